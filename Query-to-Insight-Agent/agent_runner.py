@@ -0,0 +1,111 @@
+# =============================================================================
+# FILE: agent_runner.py
+# PURPOSE:
+#   Command-line chat with the Query-to-Insight root agent that shows the
+#   answer as it is produced. Events are printed in the order they arrive:
+#     - progress events (tools/progress.py): the data preview, analysis rows
+#       and insight lines, as soon as each stage has them
+#     - model text streamed token by token (StreamingMode.SSE)
+#     - the final insight
+#   The time since the question was asked is printed next to each stage, so
+#   the gap between the first useful output and the final answer is visible.
+#
+# USAGE:
+#   python agent_runner.py
+#   python agent_runner.py --question "Most selling course?"
+# =============================================================================
+
+import argparse
+import asyncio
+import time
+
+from dotenv import load_dotenv
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+load_dotenv()
+
+from agents.root_agent.agent import root_agent
+
+APP_NAME = "query_to_insight_app"
+USER_ID = "user_12345"
+SESSION_ID = "session_chat_loop_1"
+
+
+def _text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text or "" for part in event.content.parts)
+
+
+async def ask(runner: Runner, question: str) -> str:
+    """
+    Sends one question and prints its events as they arrive.
+
+    Returns:
+        str: The final answer text.
+    """
+    started = time.perf_counter()
+    answer, streaming = "", None
+    events = runner.run_async(
+        user_id=USER_ID,
+        session_id=SESSION_ID,
+        new_message=Content(role="user", parts=[Part(text=question)]),
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    )
+    async for event in events:
+        elapsed = f"[{time.perf_counter() - started:6.2f}s]"
+        message = (event.custom_metadata or {}).get("progress")
+        if message is not None:
+            if streaming:
+                print()
+                streaming = None
+            print(f"{elapsed} {message['stage']}:")
+            print(_text(event))
+            continue
+
+        if event.partial:
+            # Model text streamed in chunks; the full text follows as a final event.
+            if streaming != event.author:
+                print(f"{elapsed} {event.author}: ", end="")
+                streaming = event.author
+            print(_text(event), end="", flush=True)
+            continue
+
+        if streaming:
+            print()
+            streaming = None
+        for call in event.get_function_calls():
+            print(f"{elapsed} {event.author} -> {call.name}")
+        if event.is_final_response() and _text(event).strip():
+            answer = _text(event).strip()
+    print(f"\n[{time.perf_counter() - started:6.2f}s] Answer:\n{answer}\n")
+    return answer
+
+
+async def chat_loop(questions: list) -> None:
+    session_service = InMemorySessionService()
+    await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+
+    if questions:
+        for question in questions:
+            await ask(runner, question)
+        return
+
+    print("Type 'quit', 'exit' or ':q' to end the session.\n")
+    while True:
+        question = input("Enter your question: ")
+        if question.lower() in ["quit", "exit", ":q"]:
+            break
+        await ask(runner, question)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chat with the Query-to-Insight agent, streaming partial results.")
+    parser.add_argument("--question", action="append", default=[],
+                        help="Ask this question and exit (repeatable).")
+    args = parser.parse_args()
+    asyncio.run(chat_loop(args.question))
@@ -2,18 +2,25 @@ import os
 import sys
 from google.adk.agents import LlmAgent
 
-# Add project root to path for utils and tools
+# Add project root to path for utils and tools, and the repository root for agent_common
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 
 from utils.file_loader import load_instructions_file
-from tools.file_writer_tool import read_file_content, save_text_file
+from tools.async_tools import analyze_query_and_save_to_file, read_file_content, save_text_file
+
+
+def build_analyze_agent(prefix: str = "") -> LlmAgent:
+    """Builds the Analyze stage; `prefix` namespaces its name and output key."""
+    return LlmAgent(
+        name=f"{prefix}analyze_agent",
+        model="gemini-2.5-flash",
+        instruction=load_instructions_file("agents/analyze_agent/instructions.txt"),
+        description=load_instructions_file("agents/analyze_agent/description.txt"),
+        tools=[analyze_query_and_save_to_file, read_file_content, save_text_file],
+        output_key=f"{prefix}analyze_agent_output"
+    )
+
 
 # Initialize the Analyze Agent
-analyze_agent = LlmAgent(
-    name="analyze_agent",
-    model="gemini-2.5-flash",
-    instruction=load_instructions_file("agents/analyze_agent/instructions.txt"),
-    description=load_instructions_file("agents/analyze_agent/description.txt"),
-    tools=[read_file_content, save_text_file],
-    output_key="analyze_agent_output"
-)
+analyze_agent = build_analyze_agent()
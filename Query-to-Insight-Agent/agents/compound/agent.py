@@ -0,0 +1,78 @@
+import os
+import sys
+from google.adk.agents import LlmAgent, ParallelAgent, SequentialAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+
+# Add project root and repository root (shared agent_common package) to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from utils.file_loader import load_instructions_file
+from tools.async_tools import read_file_content, save_text_file
+from tools.decomposition import MAX_PARTS
+from agents.query_agent.agent import build_query_writer_agent
+from agents.datafetch_agent.agent import build_data_extraction_agent
+from agents.analyze_agent.agent import build_analyze_agent
+from agents.compound.compound_path import PARTS_KEY, BranchAgent, CompoundQuestionAgent, branch_prefix
+
+MERGE_INSTRUCTIONS = load_instructions_file("agents/compound/instructions.txt")
+
+
+def build_branch(slot: int) -> BranchAgent:
+    """One SQL writer -> data extraction -> analyze branch with its own agent names and state keys."""
+    prefix = branch_prefix(slot)
+    return BranchAgent(
+        name=f"{prefix}agent",
+        slot=slot,
+        pipeline=SequentialAgent(
+            name=f"{prefix}pipeline",
+            sub_agents=[
+                build_query_writer_agent(prefix, intent_key=f"{prefix}intent"),
+                build_data_extraction_agent(prefix),
+                build_analyze_agent(prefix),
+            ],
+        ),
+        description=f"Answers part {slot + 1} of a compound question."
+    )
+
+
+def merge_instruction(context: ReadonlyContext) -> str:
+    """Merge agent instructions with the parts and what each branch reported."""
+    sections = []
+    for slot, part in enumerate(context.state.get(PARTS_KEY) or []):
+        prefix = branch_prefix(slot)
+        sections.append(
+            f"{slot + 1}. {part['question']} [{part['intent']}]\n"
+            f"   Data extraction output: {context.state.get(f'{prefix}data_extraction_output') or 'none'}\n"
+            f"   Analysis output: {context.state.get(f'{prefix}analyze_agent_output') or 'none'}"
+        )
+    return MERGE_INSTRUCTIONS.replace("[PARTS]", "\n".join(sections))
+
+
+# One branch per possible part; branches without a part finish at once.
+compound_branches = ParallelAgent(
+    name="compound_branches",
+    sub_agents=[build_branch(slot) for slot in range(MAX_PARTS)],
+    description="Runs the branches of a compound question concurrently."
+)
+
+# Merges the branch analyses into one insight.
+compound_insight_agent = LlmAgent(
+    name="compound_insight_agent",
+    model="gemini-2.5-flash",
+    instruction=merge_instruction,
+    description=load_instructions_file("agents/compound/description.txt"),
+    tools=[read_file_content, save_text_file],
+    output_key="insight_agent_output"
+)
+
+
+def build_compound_agent(pipeline) -> CompoundQuestionAgent:
+    """Puts compound-question handling in front of the single-question `pipeline`."""
+    return CompoundQuestionAgent(
+        name="compound_question_agent",
+        pipeline=pipeline,
+        branches=compound_branches,
+        merge_agent=compound_insight_agent,
+        description=load_instructions_file("agents/compound/description.txt")
+    )
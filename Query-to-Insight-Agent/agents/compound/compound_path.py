@@ -0,0 +1,144 @@
+# =============================================================================
+# FILE: compound_path.py
+# PURPOSE:
+#   CompoundQuestionAgent answers questions that ask for several things at
+#   once ("top courses and best instructors by revenue this year"). The
+#   question is split by tools/decomposition.py; each sub-question runs its
+#   own SQL writer -> data extraction -> analyze branch, all branches at the
+#   same time under a ParallelAgent (tool calls share the async tool pool and
+#   the database connection pool), and one merge agent turns the branch
+#   analyses into a single insight. Wall time is close to the slowest branch
+#   instead of the sum of all of them.
+#
+#   Questions that are not compound run through the single-question
+#   pipeline unchanged. The branch_N_* state keys of an earlier question in
+#   the session are cleared before the branches run, so the merge agent
+#   never reads a previous run's outputs.
+# =============================================================================
+
+import os
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from agent_common.tracing import get_tracer
+from tools.decomposition import decompose_question
+
+# QUESTION_DECOMPOSITION=0 sends every question through the single-question pipeline.
+DECOMPOSITION_ENABLED = os.environ.get("QUESTION_DECOMPOSITION", "1") != "0"
+
+# Session state key holding the [{"question", "intent"}] parts of the current question.
+PARTS_KEY = "compound_parts"
+
+
+def _question_text(ctx: InvocationContext) -> str:
+    if not ctx.user_content or not ctx.user_content.parts:
+        return ""
+    return " ".join(part.text for part in ctx.user_content.parts if part.text)
+
+
+def branch_prefix(slot: int) -> str:
+    """Name / state key prefix of the branch answering part `slot` (0-based)."""
+    return f"branch_{slot + 1}_"
+
+
+class BranchAgent(BaseAgent):
+    """
+    Runs `pipeline` for one part of a compound question. The branch sees its
+    sub-question as the user question; it does nothing when the question
+    has fewer parts than there are branches.
+    """
+
+    slot: int
+    pipeline: BaseAgent
+
+    def __init__(self, name: str, slot: int, pipeline: BaseAgent, description: str = ""):
+        super().__init__(
+            name=name,
+            description=description,
+            slot=slot,
+            pipeline=pipeline,
+            sub_agents=[pipeline],
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        parts = ctx.session.state.get(PARTS_KEY) or []
+        if self.slot >= len(parts):
+            return
+        part = parts[self.slot]
+        prefix = branch_prefix(self.slot)
+
+        # Announced in this branch only, so the LLM stages see which part they answer.
+        text = f"Sub-question {self.slot + 1}: {part['question']}\n{part['intent']}"
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=EventActions(state_delta={f"{prefix}intent": part["intent"]}),
+        )
+
+        branch_ctx = ctx.model_copy(update={
+            "user_content": types.Content(role="user", parts=[types.Part(text=part["question"])]),
+        })
+        async for event in self.pipeline.run_async(branch_ctx):
+            yield event
+
+
+class CompoundQuestionAgent(BaseAgent):
+    """Splits compound questions into parallel branches, otherwise runs `pipeline`."""
+
+    pipeline: BaseAgent
+    branches: BaseAgent
+    merge_agent: BaseAgent
+    max_parts: int
+
+    def __init__(self, name: str, pipeline: BaseAgent, branches: BaseAgent, merge_agent: BaseAgent,
+                 description: str = ""):
+        super().__init__(
+            name=name,
+            description=description,
+            pipeline=pipeline,
+            branches=branches,
+            merge_agent=merge_agent,
+            max_parts=len(branches.sub_agents),
+            sub_agents=[pipeline, branches, merge_agent],
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        question = _question_text(ctx)
+        parts = []
+        if DECOMPOSITION_ENABLED and question:
+            with get_tracer().span("tool", "decompose_question", ctx.invocation_id, agent=self.name) as span:
+                try:
+                    parts = decompose_question(question, max_parts=self.max_parts)
+                except Exception as e:
+                    # Decomposition is an optimization; the pipeline can always answer.
+                    print(f"[WARNING] Question decomposition failed: {e}")
+                if span is not None:
+                    span["attributes"]["parts"] = len(parts)
+
+        if not parts:
+            async for event in self.pipeline.run_async(ctx):
+                yield event
+            return
+
+        lines = [f"{i + 1}. {part['question']} [{part['intent']}]" for i, part in enumerate(parts)]
+        prefixes = tuple(branch_prefix(slot) for slot in range(self.max_parts))
+        stale = {key: None for key in ctx.session.state.keys() if key.startswith(prefixes)}
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(
+                text="Compound question, answered in parallel parts:\n" + "\n".join(lines)
+            )]),
+            actions=EventActions(state_delta={**stale, PARTS_KEY: parts}),
+        )
+        async for event in self.branches.run_async(ctx):
+            yield event
+        async for event in self.merge_agent.run_async(ctx):
+            yield event
@@ -2,18 +2,25 @@ import os
 import sys
 from google.adk.agents import LlmAgent
 
-# Add project root to path to import utils and tools
+# Add project root to path to import utils and tools, and the repository root for agent_common
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 
 from utils.file_loader import load_instructions_file
-from tools.file_writer_tool import fetch_data_and_save_to_file
+from tools.async_tools import fetch_data_and_save_to_file
+
+
+def build_data_extraction_agent(prefix: str = "") -> LlmAgent:
+    """Builds the Data Extraction stage; `prefix` namespaces its name and output key."""
+    return LlmAgent(
+        name=f"{prefix}data_extraction_agent",
+        model="gemini-2.5-flash",
+        instruction=load_instructions_file("agents/datafetch_agent/instructions.txt"),
+        description=load_instructions_file("agents/datafetch_agent/description.txt"),
+        tools=[fetch_data_and_save_to_file],
+        output_key=f"{prefix}data_extraction_output"
+    )
+
 
 # Initialize the Data Extraction Agent
-data_extraction_agent = LlmAgent(
-    name="data_extraction_agent",
-    model="gemini-2.5-flash",
-    instruction=load_instructions_file("agents/datafetch_agent/instructions.txt"),
-    description=load_instructions_file("agents/datafetch_agent/description.txt"),
-    tools=[fetch_data_and_save_to_file],
-    output_key="data_extraction_output"
-)
+data_extraction_agent = build_data_extraction_agent()
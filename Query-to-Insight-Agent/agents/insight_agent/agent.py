@@ -2,11 +2,12 @@ import os
 import sys
 from google.adk.agents import LlmAgent
 
-# Add project root to path
+# Add project root to path, and the repository root for agent_common
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 
 from utils.file_loader import load_instructions_file
-from tools.file_writer_tool import generate_insights_and_save_to_file
+from tools.async_tools import generate_insights_and_save_to_file
 
 # Initialize Insight Generator Agent
 insight_agent = LlmAgent(
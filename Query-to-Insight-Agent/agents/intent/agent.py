@@ -3,10 +3,18 @@ import sys
 from google.adk.agents import LlmAgent
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..","..")))
 from utils.file_loader import load_instructions_file
+from agents.intent.fast_path import FastPathIntentAgent
 
-intent_agent = LlmAgent(
-    name = "intent_classifier_agent",
+# Gemini classifier, only consulted when the local fast path is not confident.
+intent_llm_agent = LlmAgent(
+    name = "intent_llm_classifier_agent",
     model = "gemini-2.5-flash",
     instruction=load_instructions_file("agents/intent/instructions.txt"),
-    description=load_instructions_file("agents/intent/description.txt"))
\ No newline at end of file
+    description=load_instructions_file("agents/intent/description.txt"))
+
+intent_agent = FastPathIntentAgent(
+    name = "intent_classifier_agent",
+    fallback_agent=intent_llm_agent,
+    description=load_instructions_file("agents/intent/description.txt"))
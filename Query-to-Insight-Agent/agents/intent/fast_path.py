@@ -0,0 +1,76 @@
+# =============================================================================
+# FILE: fast_path.py
+# PURPOSE:
+#   FastPathIntentAgent answers the intent step locally when the keyword /
+#   TF-IDF classifier in tools/intent_classifier.py is confident, and only
+#   delegates to the Gemini intent agent otherwise. Either way the label is
+#   emitted as the agent's reply (so downstream agents see it in the
+#   conversation as before) and stored in session state under "intent".
+# =============================================================================
+
+import time
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from tools.intent_classifier import LABELS, get_intent_classifier, log_labelled_question
+
+
+def _question_text(ctx: InvocationContext) -> str:
+    if not ctx.user_content or not ctx.user_content.parts:
+        return ""
+    return " ".join(part.text for part in ctx.user_content.parts if part.text)
+
+
+class FastPathIntentAgent(BaseAgent):
+    """Local intent classification with the LLM intent agent as fallback."""
+
+    fallback_agent: BaseAgent
+
+    def __init__(self, name: str, fallback_agent: BaseAgent, description: str = ""):
+        super().__init__(
+            name=name,
+            description=description,
+            fallback_agent=fallback_agent,
+            sub_agents=[fallback_agent],
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        question = _question_text(ctx)
+        classifier = get_intent_classifier()
+        result = classifier.classify(question)
+
+        if result["label"]:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=result["label"])]),
+                actions=EventActions(state_delta={
+                    "intent": result["label"],
+                    "intent_source": result["source"],
+                }),
+            )
+            return
+
+        # Not confident: ask the LLM and learn from its answer.
+        started = time.perf_counter()
+        label = None
+        async for event in self.fallback_agent.run_async(ctx):
+            if event.is_final_response() and event.content and event.content.parts:
+                text = "".join(part.text or "" for part in event.content.parts).strip().upper()
+                label = text if text in LABELS else label
+            yield event
+        classifier.record_fallback(time.perf_counter() - started)
+
+        if label:
+            log_labelled_question(question, label)
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={"intent": label, "intent_source": "llm"}),
+            )
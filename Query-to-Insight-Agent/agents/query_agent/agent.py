@@ -1,16 +1,47 @@
 import os
 import sys
 from google.adk.agents import LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..","..")))
 from utils.file_loader import load_instructions_file
-from tools.file_writer_tool import write_sql_to_file
-
-query_writer_agent = LlmAgent(
-    name = "query_writer_agent",
-    model = "gemini-2.5-flash",
-    instruction=load_instructions_file("agents/query_agent/instructions.txt"),
-    description=load_instructions_file("agents/query_agent/description.txt"),
-    tools=[write_sql_to_file],
-    output_key="query_writer_output"
-)
\ No newline at end of file
+from tools.async_tools import write_sql_to_file
+from tools.schema_catalog import schema_prompt
+from agents.query_agent import template_path
+from agents.query_agent.template_path import TemplateQueryAgent
+
+QUERY_WRITER_INSTRUCTIONS = load_instructions_file("agents/query_agent/instructions.txt")
+
+
+def query_writer_instruction(context: ReadonlyContext) -> str:
+    """SQL writer instructions with the live schema catalog (tools/schema_catalog.py), cached per schema version."""
+    return QUERY_WRITER_INSTRUCTIONS.replace("[SCHEMA]", schema_prompt(template_path.DB_FILE_PATH))
+
+
+def build_query_writer_agent(prefix: str = "", intent_key: str = "intent") -> TemplateQueryAgent:
+    """
+    Builds the SQL writer stage. `prefix` namespaces the agent names and
+    output keys (parallel branches of a compound question each get their
+    own copy); `intent_key` is the state key holding the intent label.
+    """
+    # SQL writer LLM, only consulted when no validated template matches the question.
+    query_writer_llm_agent = LlmAgent(
+        name = f"{prefix}query_writer_llm_agent",
+        model = "gemini-2.5-flash",
+        instruction=query_writer_instruction,
+        description=load_instructions_file("agents/query_agent/description.txt"),
+        tools=[write_sql_to_file],
+        output_key=f"{prefix}query_writer_output"
+    )
+
+    return TemplateQueryAgent(
+        name = f"{prefix}query_writer_agent",
+        fallback_agent=query_writer_llm_agent,
+        description=load_instructions_file("agents/query_agent/description.txt"),
+        output_key=f"{prefix}query_writer_output",
+        intent_key=intent_key
+    )
+
+
+query_writer_agent = build_query_writer_agent()
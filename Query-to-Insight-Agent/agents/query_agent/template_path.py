@@ -0,0 +1,83 @@
+# =============================================================================
+# FILE: template_path.py
+# PURPOSE:
+#   TemplateQueryAgent writes the SQL from the validated template library
+#   (tools/sql_templates.py) when the question matches a template, and only
+#   runs the SQL writer LLM otherwise. SQL saved by the LLM is registered as
+#   a template candidate; the data tools promote it once it executes.
+# =============================================================================
+
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from agent_common.tracing import get_tracer
+from tools.async_tools import run_blocking, write_sql_to_file
+from tools.sql_templates import match_template, register_candidate
+
+DB_FILE_PATH = "datatechcon.db"
+
+
+def _question_text(ctx: InvocationContext) -> str:
+    if not ctx.user_content or not ctx.user_content.parts:
+        return ""
+    return " ".join(part.text for part in ctx.user_content.parts if part.text)
+
+
+class TemplateQueryAgent(BaseAgent):
+    """SQL from the template library, with the SQL writer LLM as fallback."""
+
+    fallback_agent: BaseAgent
+    output_key: str = "query_writer_output"
+    # State key of the intent label (branches of a compound question use their own).
+    intent_key: str = "intent"
+
+    def __init__(self, name: str, fallback_agent: BaseAgent, description: str = "",
+                 output_key: str = "query_writer_output", intent_key: str = "intent"):
+        super().__init__(
+            name=name,
+            description=description,
+            fallback_agent=fallback_agent,
+            output_key=output_key,
+            intent_key=intent_key,
+            sub_agents=[fallback_agent],
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        question = _question_text(ctx)
+        intent = ctx.session.state.get(self.intent_key, "")
+
+        tracer = get_tracer()
+        try:
+            with tracer.span("tool", "match_template", ctx.invocation_id, agent=self.name):
+                match = await run_blocking(match_template, question, intent, DB_FILE_PATH) if intent else None
+        except Exception as e:
+            print(f"[WARNING] SQL template matching failed: {e}")
+            match = None
+
+        if match:
+            with tracer.span("tool", write_sql_to_file.__name__, ctx.invocation_id, agent=self.name):
+                saved = await write_sql_to_file(match["sql"])
+            if saved["status"] == "success":
+                text = f"SQL query saved to {saved['file']} (handle: {saved['handle']})"
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    content=types.Content(role="model", parts=[types.Part(text=text)]),
+                    actions=EventActions(state_delta={
+                        self.output_key: text,
+                        "sql_source": f"{match['source']}:{match['name']}",
+                    }),
+                )
+                return
+
+        async for event in self.fallback_agent.run_async(ctx):
+            for response in event.get_function_responses():
+                if response.name == write_sql_to_file.__name__ and response.response:
+                    for ref in (response.response.get("handle"), response.response.get("file")):
+                        register_candidate(ref, intent, question)
+            yield event
@@ -2,9 +2,12 @@ import os
 import sys
 from google.adk.agents import SequentialAgent
 
-# Add project root to path
+# Add project root and repository root (shared agent_common package) to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 
+from agent_common.artifact_store import track_runs
+from agent_common.tracing import instrument
 from utils.file_loader import load_instructions_file
 
 # Import all sub-agents
@@ -13,10 +16,13 @@ from agents.query_agent.agent import query_writer_agent
 from agents.datafetch_agent.agent import data_extraction_agent
 from agents.analyze_agent.agent import analyze_agent
 from agents.insight_agent.agent import insight_agent
+from agents.compound.agent import build_compound_agent, compound_insight_agent
+from agents.root_agent.cached_pipeline import CachedPipelineAgent
+from agents.root_agent.progressive import ProgressivePipelineAgent
 
-# Initialize the Root Agent for Query-to-Insight pipeline
-root_agent = SequentialAgent(
-    name="root_query_to_insight_agent",
+# The five-stage Query-to-Insight pipeline
+query_to_insight_pipeline = SequentialAgent(
+    name="query_to_insight_pipeline",
     sub_agents=[
         intent_agent,
         query_writer_agent,
@@ -26,3 +32,25 @@ root_agent = SequentialAgent(
     ],
     description=load_instructions_file("agents/root_agent/description.txt")
 )
+
+# Compound questions are split and answered in parallel branches (agents/compound/);
+# everything else runs through the five-stage pipeline.
+question_router = build_compound_agent(query_to_insight_pipeline)
+
+# Partial results (data preview, analysis rows, insight lines) are shown as they
+# are produced instead of after the last stage (tools/progress.py).
+progressive_pipeline = ProgressivePipelineAgent(
+    name="progressive_pipeline",
+    pipeline=question_router,
+    description=load_instructions_file("agents/root_agent/description.txt")
+)
+
+# Initialize the Root Agent: answers repeated questions from the answer cache.
+# Every agent, model call and tool call below it is traced (agent_common/tracing.py),
+# and the files its tools write are indexed by run (agent_common/artifact_store.py).
+root_agent = instrument(track_runs(CachedPipelineAgent(
+    name="root_query_to_insight_agent",
+    pipeline=progressive_pipeline,
+    answer_agent_names=[insight_agent.name, compound_insight_agent.name],
+    description=load_instructions_file("agents/root_agent/description.txt")
+)))
@@ -0,0 +1,100 @@
+# =============================================================================
+# FILE: cached_pipeline.py
+# PURPOSE:
+#   CachedPipelineAgent puts the answer cache (tools/answer_cache.py) in
+#   front of the whole Query-to-Insight pipeline. On a hit the stored
+#   insight is returned at once and no sub-agent runs; on a miss the
+#   pipeline runs as usual and its final insight plus the files it wrote
+#   are stored for the next time the question is asked - but only when the
+#   insights tool succeeded in that run, so failure replies are never cached.
+# =============================================================================
+
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from agent_common.tracing import get_tracer
+from tools.answer_cache import get_answer_cache
+from tools.async_tools import run_blocking
+from tools.result_cache import database_version
+
+DB_FILE_PATH = "datatechcon.db"
+
+
+def _question_text(ctx: InvocationContext) -> str:
+    if not ctx.user_content or not ctx.user_content.parts:
+        return ""
+    return " ".join(part.text for part in ctx.user_content.parts if part.text)
+
+
+class CachedPipelineAgent(BaseAgent):
+    """Answers repeated questions from the answer cache, otherwise runs `pipeline`."""
+
+    pipeline: BaseAgent
+    # Authors of the events whose text is the final answer.
+    answer_agent_names: list = ["insight_agent"]
+    # Tools of the answer agents that write the insight; the answer is cached
+    # only when they succeeded.
+    insight_tool_names: list = ["generate_insights_and_save_to_file", "save_text_file"]
+
+    def __init__(self, name: str, pipeline: BaseAgent, description: str = "",
+                 answer_agent_names: list = None, insight_tool_names: list = None):
+        super().__init__(
+            name=name,
+            description=description,
+            pipeline=pipeline,
+            answer_agent_names=answer_agent_names or ["insight_agent"],
+            insight_tool_names=insight_tool_names or ["generate_insights_and_save_to_file", "save_text_file"],
+            sub_agents=[pipeline],
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        question = _question_text(ctx)
+        cache = get_answer_cache()
+
+        with get_tracer().span("tool", "answer_cache_lookup", ctx.invocation_id, agent=self.name) as span:
+            cached = await run_blocking(cache.get, question, DB_FILE_PATH) if question else None
+            if span is not None:
+                span["attributes"]["hit"] = bool(cached)
+        if cached:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=cached["answer"])]),
+                actions=EventActions(state_delta={
+                    "answer_cache": cached["match"],
+                    "answer_artifacts": cached["artifacts"],
+                }),
+            )
+            return
+
+        # Version observed before running, so a concurrent write is never cached as current.
+        version = database_version(DB_FILE_PATH)
+        answer, artifacts, insight_statuses = None, [], []
+        async for event in self.pipeline.run_async(ctx):
+            for response in event.get_function_responses():
+                file = (response.response or {}).get("file")
+                if file and file not in artifacts:
+                    artifacts.append(file)
+                if event.author in self.answer_agent_names and response.name in self.insight_tool_names:
+                    insight_statuses.append((response.response or {}).get("status"))
+            if event.author in self.answer_agent_names and event.is_final_response() and event.content:
+                text = "".join(part.text or "" for part in event.content.parts or []).strip()
+                answer = text or answer
+            yield event
+
+        # Replies from runs without insights, or whose last insights call
+        # failed, describe a failure and are not cached.
+        succeeded = bool(insight_statuses) and insight_statuses[-1] == "success"
+        if question and answer and succeeded:
+            await run_blocking(cache.put, question, DB_FILE_PATH, answer, artifacts, version=version)
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={"answer_cache": "miss", "answer_artifacts": artifacts}),
+            )
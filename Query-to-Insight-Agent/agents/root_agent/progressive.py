@@ -0,0 +1,92 @@
+# =============================================================================
+# FILE: progressive.py
+# PURPOSE:
+#   ProgressivePipelineAgent shows partial results while the pipeline is
+#   still running. It opens a progress channel (tools/progress.py) for the
+#   invocation and runs `pipeline` in a task of its own; the pipeline's
+#   events and the tools' progress messages (data preview, analysis rows,
+#   insight lines) are yielded in the order they arrive, the messages as
+#   partial events authored by this agent. The data preview therefore
+#   reaches the user right after the query, not after the whole pipeline.
+#
+#   Partial events are not stored in the session, so the later agents do
+#   not see them in their conversation. The pipeline only resumes after
+#   each of its own events has been yielded, as if it ran directly.
+# =============================================================================
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
+
+from tools import progress
+
+
+class ProgressivePipelineAgent(BaseAgent):
+    """Runs `pipeline` and interleaves its events with partial progress events."""
+
+    pipeline: BaseAgent
+
+    def __init__(self, name: str, pipeline: BaseAgent, description: str = ""):
+        super().__init__(
+            name=name,
+            description=description,
+            pipeline=pipeline,
+            sub_agents=[pipeline],
+        )
+
+    def _progress_event(self, ctx: InvocationContext, message: dict) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            partial=True,
+            content=types.Content(role="model", parts=[types.Part(text=progress.render(message))]),
+            custom_metadata={"progress": message},
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not progress.PROGRESSIVE_ENABLED:
+            async for event in self.pipeline.run_async(ctx):
+                yield event
+            return
+
+        inbox = asyncio.Queue()
+        resume = asyncio.Event()
+
+        async def run_pipeline():
+            # One task for the whole run, so the pipeline's context variables stay consistent.
+            try:
+                async for event in self.pipeline.run_async(ctx):
+                    resume.clear()
+                    inbox.put_nowait(("event", event))
+                    await resume.wait()
+                inbox.put_nowait(("done", None))
+            except BaseException as e:
+                inbox.put_nowait(("done", e))
+                raise
+
+        progress.open_channel(ctx.invocation_id, asyncio.get_running_loop(),
+                              lambda message: inbox.put_nowait(("progress", message)))
+        runner = asyncio.create_task(run_pipeline())
+        try:
+            while True:
+                kind, item = await inbox.get()
+                if kind == "progress":
+                    yield self._progress_event(ctx, item)
+                elif kind == "event":
+                    yield item
+                    resume.set()
+                elif item is not None:
+                    raise item
+                else:
+                    break
+        finally:
+            progress.close_channel(ctx.invocation_id)
+            if not runner.done():
+                runner.cancel()
+            # The pipeline's own error was raised above; only retrieve it here.
+            await asyncio.gather(runner, return_exceptions=True)
@@ -0,0 +1,142 @@
+# =============================================================================
+# FILE: bench_approximate.py
+# PURPOSE:
+#   Compares exact answers with approximate mode (tools/approximate.py) on a
+#   generated database: the hash sample filtered inline from the base table,
+#   and the maintained sample tables. For each query it reports the median
+#   wall time, the speedup over the exact run, the median relative error of
+#   the estimates, how often the exact value falls inside the 95% interval
+#   and how many groups the sample missed.
+#
+# USAGE:
+#   python benchmarks/bench_approximate.py --scale 5000 --rates 0.01 0.05
+# =============================================================================
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from setup_db import setup_database
+from tools.approximate import MARGIN_SUFFIX, install_samples
+from tools.artifact_registry import publish
+from tools.db_pool import close_pools
+from tools.file_writer_tool import _load_frame, analyze_query_and_save_to_file, fetch_data_and_save_to_file
+
+QUERIES = {
+    "course_enrollments": """
+        SELECT c.title, COUNT(e.enrollment_id) AS total_enrollments
+        FROM courses c JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY total_enrollments DESC""",
+    "course_revenue": """
+        SELECT c.title, c.price * COUNT(e.enrollment_id) AS revenue
+        FROM courses c JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY revenue DESC""",
+    "category_enrollments": """
+        SELECT c.category, COUNT(*) AS total_enrollments
+        FROM enrollments e JOIN courses c ON c.course_id = e.course_id
+        GROUP BY c.category""",
+    "country_minutes": """
+        SELECT l.country, SUM(s.duration_minutes) AS minutes, AVG(s.duration_minutes) AS avg_minutes
+        FROM sessions s JOIN learners l ON l.learner_id = s.learner_id
+        GROUP BY l.country""",
+    "monthly_sessions": """
+        SELECT strftime('%Y-%m', s.session_date) AS month, COUNT(*) AS sessions
+        FROM sessions s GROUP BY month ORDER BY month""",
+}
+# Row-level query analyzed in pandas: the sampled rows are scaled by the analysis step.
+RAW_QUERY = ("raw_course_sales", "COURSE_SALES", """
+    SELECT c.title, 1 AS total_enrollments
+    FROM enrollments e JOIN courses c ON c.course_id = e.course_id""")
+
+
+def run_query(sql: str, db_path: str, out_dir: str, approximate: bool, rate: float):
+    result = fetch_data_and_save_to_file(
+        publish("sql", sql), db_path, out_dir,
+        use_cache=False, write_through=False, approximate=approximate, sample_rate=rate
+    )
+    assert result["status"] == "success", result
+    return result
+
+
+def run_raw(sql: str, intent: str, db_path: str, out_dir: str, approximate: bool):
+    # Samples at the rate of the installed sample table.
+    result = analyze_query_and_save_to_file(
+        publish("sql", sql), intent, db_path, out_dir,
+        write_through=False, use_cache=False, approximate=approximate
+    )
+    assert result["status"] == "success", result
+    return result
+
+
+def timed(fn, repeat: int, *args) -> tuple:
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def accuracy(exact, approx) -> tuple:
+    """(median relative error, share of values inside the interval, groups missing) over estimated columns."""
+    estimated = [c[:-len(MARGIN_SUFFIX)] for c in approx.columns if c.endswith(MARGIN_SUFFIX)]
+    keys = [c for c in exact.columns if c not in estimated]
+    merged = exact.merge(approx, on=keys, how="left", suffixes=("", "_approx"), indicator=True)
+    missing = int((merged["_merge"] == "left_only").sum())
+    merged = merged[merged["_merge"] == "both"]
+    errors, covered = [], []
+    for column in estimated:
+        truth, estimate = merged[column].astype(float), merged[f"{column}_approx"].astype(float)
+        margin = merged[column + MARGIN_SUFFIX].astype(float)
+        errors += list(((estimate - truth).abs() / truth.abs()).where(truth != 0, 0.0))
+        covered += list((estimate - truth).abs() <= margin)
+    return statistics.median(errors), sum(covered) / max(len(covered), 1), missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark exact vs approximate (sampled) answers.")
+    parser.add_argument("--scale", type=int, default=5000, help="setup_db.py scale factor.")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.01, 0.05])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "datatechcon.db")
+        built = setup_database(db_path, args.scale, verbose=False)
+        out_dir = os.path.join(tmp, "output")
+        print(f"scale {args.scale}: {built['rows']['enrollments']:,} enrollments, "
+              f"{built['rows']['sessions']:,} sessions")
+        print(f"{'query':>22} {'rate':>6} {'source':>13} {'time ms':>9} {'speedup':>8} "
+              f"{'med err':>8} {'in CI':>6} {'missing':>8}")
+
+        for rate in args.rates:
+            sampled_db = os.path.join(tmp, f"sampled_{rate}.db")
+            shutil.copyfile(db_path, sampled_db)
+            install_samples(sampled_db, rate)
+
+            for name, sql in QUERIES.items():
+                exact_time, exact = timed(run_query, args.repeat, sql, db_path, out_dir, False, rate)
+                exact_df = _load_frame(exact["handle"])
+                for source, path in (("inline", db_path), ("sample_table", sampled_db)):
+                    approx_time, approx = timed(run_query, args.repeat, sql, path, out_dir, True, rate)
+                    assert approx["approximate"]["source"] == source, approx["approximate"]
+                    error, inside, missing = accuracy(exact_df, _load_frame(approx["handle"]))
+                    print(f"{name:>22} {rate:>6.2%} {source:>13} {approx_time * 1000:>9.1f} "
+                          f"{exact_time / approx_time:>7.1f}x {error:>8.2%} {inside:>6.0%} {missing:>8}")
+                print(f"{name:>22} {'':>6} {'exact':>13} {exact_time * 1000:>9.1f}")
+
+            name, intent, sql = RAW_QUERY
+            exact_time, exact = timed(run_raw, args.repeat, sql, intent, sampled_db, out_dir, False)
+            approx_time, approx = timed(run_raw, args.repeat, sql, intent, sampled_db, out_dir, True)
+            error, inside, missing = accuracy(_load_frame(exact["handle"]), _load_frame(approx["handle"]))
+            print(f"{name:>22} {rate:>6.2%} {'sample_table':>13} {approx_time * 1000:>9.1f} "
+                  f"{exact_time / approx_time:>7.1f}x {error:>8.2%} {inside:>6.0%} {missing:>8}")
+            print(f"{name:>22} {'':>6} {'exact':>13} {exact_time * 1000:>9.1f}")
+            close_pools()
@@ -0,0 +1,101 @@
+# =============================================================================
+# FILE: bench_async_tools.py
+# PURPOSE:
+#   Serves N simultaneous "questions" (fetch -> analyze -> insights) from one
+#   asyncio event loop, the way an ADK Runner serves concurrent sessions, and
+#   compares calling the synchronous tools on the loop against the async
+#   variants in tools/async_tools.py. Reports throughput, per-question
+#   latency and the longest event-loop stall seen by a 10 ms heartbeat.
+#
+# USAGE:
+#   python benchmarks/bench_async_tools.py --scale 2000 --concurrency 1 4 8 16
+# =============================================================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from setup_db import setup_database
+from tools import async_tools, file_writer_tool
+from tools.db_pool import close_pools
+
+# A mix of a row-level query and an aggregate, as the pipeline typically sees.
+QUESTIONS = [
+    ("""SELECT c.title, COUNT(e.enrollment_id) AS total_enrollments
+        FROM courses c JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY total_enrollments DESC""", "COURSE_SALES"),
+    ("""SELECT s.duration_minutes, s.course_id FROM sessions s""", "GENERAL_ANALYTICS"),
+]
+HEARTBEAT_SECONDS = 0.01
+
+
+async def _call(tools, name: str, *args, **kwargs) -> dict:
+    result = getattr(tools, name)(*args, **kwargs)
+    return await result if asyncio.iscoroutine(result) else result
+
+
+async def answer(tools, sql: str, intent: str, db_path: str, out_dir: str) -> float:
+    started = time.perf_counter()
+    sql_handle = (await _call(tools, "write_sql_to_file", sql, out_dir, db_file_path=None))["handle"]
+    fetched = await _call(tools, "fetch_data_and_save_to_file", sql_handle, db_path, out_dir, use_cache=False)
+    analysis = await _call(tools, "analyze_data_and_save_to_file", fetched["handle"], intent, out_dir)
+    insights = await _call(tools, "generate_insights_and_save_to_file", analysis["handle"], intent, out_dir)
+    assert insights["status"] == "success", insights
+    return time.perf_counter() - started
+
+
+async def run(tools, concurrency: int, db_path: str, out_dir: str) -> dict:
+    stalls = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            stalls.append(time.perf_counter() - before - HEARTBEAT_SECONDS)
+
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*[
+        answer(tools, *QUESTIONS[i % len(QUESTIONS)], db_path, out_dir) for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return {
+        "qps": concurrency / elapsed,
+        "p50": statistics.median(latencies),
+        "max_stall": max(stalls) if stalls else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async tools under concurrent questions.")
+    parser.add_argument("--scale", type=int, default=2000, help="setup_db.py scale factor.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--workers", type=int, default=None, help="Tool thread pool size.")
+    args = parser.parse_args()
+
+    if args.workers:
+        async_tools.configure_tool_pool(args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "datatechcon.db")
+        setup_database(db_path, args.scale, verbose=False)
+        out_dir = os.path.join(tmp, "output")
+
+        print(f"{'N':>4} {'mode':>6} {'q/s':>8} {'p50 s':>8} {'max loop stall ms':>18}")
+        for concurrency in args.concurrency:
+            for mode, tools in (("sync", file_writer_tool), ("async", async_tools)):
+                stats = asyncio.run(run(tools, concurrency, db_path, out_dir))
+                print(f"{concurrency:>4} {mode:>6} {stats['qps']:>8.2f} {stats['p50']:>8.3f} "
+                      f"{stats['max_stall'] * 1000:>18.1f}")
+        close_pools()
+    print(async_tools.tool_pool_stats())
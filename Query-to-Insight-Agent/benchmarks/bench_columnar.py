@@ -0,0 +1,87 @@
+# =============================================================================
+# FILE: bench_columnar.py
+# PURPOSE:
+#   Measures write time, read time and file size of the TSV and the .qcol
+#   columnar result formats for enrollment-shaped rows
+#   (INTEGER, TEXT, REAL, DATE columns).
+#
+# USAGE:
+#   python benchmarks/bench_columnar.py --rows 100000 1000000 10000000
+# =============================================================================
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import pandas as pd
+
+from tools.columnar import read_columnar, write_columnar
+from tools.file_writer_tool import _write_tsv
+
+COLUMNS = ["enrollment_id", "learner_id", "title", "price", "enrollment_date"]
+COURSES = [
+    ("Intro to Python", 49.99), ("Advanced SQL", 59.99), ("Web Dev Bootcamp", 99.99),
+    ("React for Beginners", 69.99), ("Machine Learning A-Z", 129.99),
+    ("Deep Learning Specialization", 149.99), ("AWS Solutions Architect", 199.99),
+    ("Google Cloud Fundamentals", 89.99),
+]
+BATCH_SIZE = 5000
+
+
+def synthetic_batches(row_count: int, seed: int = 7):
+    """Yields `fetchmany`-style batches of enrollment rows."""
+    rng = random.Random(seed)
+    start = datetime.date(2023, 1, 1)
+    dates = [(start + datetime.timedelta(days=d)).isoformat() for d in range(730)]
+    for first in range(0, row_count, BATCH_SIZE):
+        batch = []
+        for i in range(first, min(first + BATCH_SIZE, row_count)):
+            title, price = COURSES[rng.randrange(len(COURSES))]
+            batch.append((i + 1, rng.randrange(1, 1_000_000), title, price, dates[rng.randrange(730)]))
+        yield batch
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def run_benchmark(row_counts: list) -> None:
+    print("write s excludes the time spent generating the synthetic rows.")
+    print(f"{'rows':>10} {'format':>8} {'write s':>9} {'read s':>9} {'size MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in row_counts:
+            _, generate = _timed(lambda n: sum(1 for _ in synthetic_batches(n)), rows)
+            tsv_path = os.path.join(tmp, "results.txt")
+            qcol_path = os.path.join(tmp, "results.qcol")
+
+            _, tsv_write = _timed(_write_tsv, tsv_path, COLUMNS, synthetic_batches(rows))
+            tsv_df, tsv_read = _timed(lambda p: pd.read_csv(p, sep="\t"), tsv_path)
+            _, qcol_write = _timed(write_columnar, qcol_path, COLUMNS, synthetic_batches(rows))
+            qcol_df, qcol_read = _timed(read_columnar, qcol_path)
+
+            assert len(tsv_df) == len(qcol_df) == rows
+            for fmt, write_s, read_s, path in (
+                ("tsv", tsv_write, tsv_read, tsv_path),
+                ("qcol", qcol_write, qcol_read, qcol_path),
+            ):
+                print(f"{rows:>10} {fmt:>8} {write_s - generate:>9.2f} {read_s:>9.3f} "
+                      f"{os.path.getsize(path) / 1e6:>9.1f}")
+            os.remove(tsv_path)
+            os.remove(qcol_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TSV vs .qcol result files.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Row counts to benchmark (10^7 needs a few GB of RAM for the TSV read).")
+    args = parser.parse_args()
+    run_benchmark(args.rows)
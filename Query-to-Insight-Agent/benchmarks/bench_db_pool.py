@@ -0,0 +1,84 @@
+# =============================================================================
+# FILE: bench_db_pool.py
+# PURPOSE:
+#   Compares reconnect-per-call against the shared read-only connection pool
+#   for the short aggregate queries the pipeline typically generates, with N
+#   threads issuing queries concurrently.
+#
+# USAGE:
+#   python benchmarks/bench_db_pool.py --threads 1 4 8 --queries 500
+# =============================================================================
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from tools.db_pool import close_pools, get_pool
+
+DB_PATH = os.path.join(PROJECT_ROOT, "datatechcon.db")
+QUERY = """
+SELECT c.title, COUNT(e.enrollment_id) AS total_enrollments
+FROM courses c
+JOIN enrollments e ON c.course_id = e.course_id
+GROUP BY c.course_id
+ORDER BY total_enrollments DESC
+"""
+
+
+def reconnect_query() -> None:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute(QUERY).fetchall()
+    finally:
+        conn.close()
+
+
+def pooled_query() -> None:
+    with get_pool(DB_PATH).connection() as conn:
+        conn.execute(QUERY).fetchall()
+
+
+def run(fn, threads: int, queries: int) -> tuple:
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(queries):
+            started = time.perf_counter()
+            fn()
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, statistics.mean(latencies), statistics.quantiles(latencies, n=100)[98]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reconnect-per-call vs pooled connections.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--queries", type=int, default=500, help="Queries per thread.")
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} {'mode':>9} {'q/s':>9} {'mean ms':>8} {'p99 ms':>8}")
+    for threads in args.threads:
+        close_pools()
+        get_pool(DB_PATH, max_size=threads)
+        for name, fn in (("reconnect", reconnect_query), ("pool", pooled_query)):
+            qps, mean, p99 = run(fn, threads, args.queries)
+            print(f"{threads:>7} {name:>9} {qps:>9,.0f} {mean * 1000:>8.3f} {p99 * 1000:>8.3f}")
+        print(f"{'':>7} pool stats: {get_pool(DB_PATH).stats()}")
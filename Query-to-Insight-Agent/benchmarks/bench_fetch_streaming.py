@@ -0,0 +1,112 @@
+# =============================================================================
+# FILE: bench_fetch_streaming.py
+# PURPOSE:
+#   Compares the streaming and the legacy (fetchall) paths of
+#   `fetch_data_and_save_to_file` on a scaled-up copy of datatechcon.db.
+#   Each run happens in a fresh process so peak RSS is measured in isolation.
+#
+# USAGE:
+#   python benchmarks/bench_fetch_streaming.py --rows 1000000 2000000
+# =============================================================================
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+BENCH_QUERY = """
+SELECT e.enrollment_id, e.learner_id, c.title, c.price, e.enrollment_date
+FROM enrollments e
+JOIN courses c ON c.course_id = e.course_id
+"""
+
+
+def build_scaled_db(target_rows: int, folder: str) -> str:
+    """Copies datatechcon.db and doubles `enrollments` until it has at least `target_rows` rows."""
+    db_path = os.path.join(folder, f"datatechcon_{target_rows}.db")
+    shutil.copyfile(os.path.join(PROJECT_ROOT, "datatechcon.db"), db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    count = conn.execute("SELECT COUNT(*) FROM enrollments").fetchone()[0]
+    while count < target_rows:
+        conn.execute(
+            "INSERT INTO enrollments (learner_id, course_id, enrollment_date) "
+            "SELECT learner_id, course_id, enrollment_date FROM enrollments LIMIT ?",
+            (target_rows - count,)
+        )
+        count = conn.execute("SELECT COUNT(*) FROM enrollments").fetchone()[0]
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_once(db_path: str, sql_path: str, out_dir: str, stream: bool, queue) -> None:
+    from tools.file_writer_tool import fetch_data_and_save_to_file
+
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    result = fetch_data_and_save_to_file(sql_path, db_path, out_dir, stream=stream)
+    elapsed = time.perf_counter() - started
+    queue.put({
+        "status": result["status"],
+        "rows": result.get("rows", 0),
+        "bytes": result.get("bytes", 0),
+        "elapsed": elapsed,
+        "rss_baseline_mb": baseline,
+        "rss_peak_mb": _peak_rss_mb(),
+    })
+
+
+def run_benchmark(row_counts: list) -> None:
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_path = os.path.join(tmp, "bench_query.txt")
+        with open(sql_path, "w", encoding="utf-8") as f:
+            f.write(BENCH_QUERY)
+
+        print(f"{'rows':>10} {'mode':>9} {'seconds':>9} {'rows/s':>12} {'MB/s':>8} {'peak RSS MB':>12} {'delta MB':>9}")
+        for target in row_counts:
+            db_path = build_scaled_db(target, tmp)
+            for stream in (False, True):
+                out_dir = os.path.join(tmp, "output")
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run_once, args=(db_path, sql_path, out_dir, stream, queue))
+                proc.start()
+                stats = queue.get()
+                proc.join()
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+                mode = "stream" if stream else "fetchall"
+                print(
+                    f"{stats['rows']:>10} {mode:>9} {stats['elapsed']:>9.2f} "
+                    f"{stats['rows'] / stats['elapsed']:>12,.0f} "
+                    f"{stats['bytes'] / stats['elapsed'] / 1e6:>8.1f} "
+                    f"{stats['rss_peak_mb']:>12.1f} "
+                    f"{stats['rss_peak_mb'] - stats['rss_baseline_mb']:>9.1f}"
+                )
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs fetchall result extraction.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000],
+                        help="Enrollment row counts to benchmark.")
+    args = parser.parse_args()
+    run_benchmark(args.rows)
@@ -0,0 +1,195 @@
+# =============================================================================
+# FILE: bench_import_time.py
+# PURPOSE:
+#   Cold-start profile of the root agent modules of all four projects, the
+#   work `adk web` and every new worker process repeat before serving a
+#   request. Each module is imported in fresh interpreters under
+#   `python -X importtime` (run from a neutral working directory); the
+#   report has the median wall time, the import time of the agent module,
+#   the packages that cost the most (self time summed per top-level
+#   package) and whether a deferred dependency (pandas, numpy) was loaded.
+#
+#   Results are written as JSON; two result files can be compared to catch
+#   import-time regressions between commits, like run_benchmarks.py.
+#
+# USAGE:
+#   python benchmarks/bench_import_time.py --repeat 5 --output import_time.json
+#   python benchmarks/bench_import_time.py --compare before.json after.json --threshold 0.2
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REPO_ROOT = os.path.dirname(PROJECT_ROOT)
+
+# (project directory, root agent module)
+TARGETS = [
+    ("Query-to-Insight-Agent", "agents.root_agent.agent"),
+    ("version_2_sequential_db_agent", "agents.root_db_builder.agent"),
+    ("version_3_market_competitor_analysis", "agents.root_report_builder.agent"),
+    ("version_interview_preparation_agent", "agents.website_builder_simple.agent"),
+]
+# Imported only when a tool needs them; loading them at import time is a regression.
+DEFERRED = ["pandas", "numpy"]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        list: {"module", "self_us", "cumulative_us", "depth"} in import order.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def profile_once(project: str, module: str) -> dict:
+    """Imports `module` of `project` in a fresh interpreter and profiles it."""
+    code = f"import sys; sys.path.insert(0, {os.path.join(REPO_ROOT, project)!r}); import {module}"
+    env = dict(os.environ, AGENT_TRACING="0")
+    # A neutral working directory: agents must not depend on being run from their project.
+    with tempfile.TemporaryDirectory() as cwd:
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              cwd=cwd, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    modules = {row["module"] for row in rows}
+    by_package = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0) + row["self_us"]
+    target = next((row for row in rows if row["module"] == module), None)
+    return {
+        "wall_s": wall,
+        "import_s": (target["cumulative_us"] if target else 0) / 1e6,
+        "modules": len(modules),
+        "packages": by_package,
+        "deferred_loaded": [name for name in DEFERRED if name in modules],
+    }
+
+
+def run_profiles(repeat: int, top: int) -> dict:
+    results = []
+    for project, module in TARGETS:
+        runs = [profile_once(project, module) for _ in range(repeat)]
+        packages = {}
+        for run in runs:
+            for package, us in run["packages"].items():
+                packages.setdefault(package, []).append(us)
+        heaviest = sorted(((statistics.median(v) / 1e6, p) for p, v in packages.items()), reverse=True)[:top]
+        result = {
+            "project": project,
+            "module": module,
+            "wall_s": statistics.median(r["wall_s"] for r in runs),
+            "import_s": statistics.median(r["import_s"] for r in runs),
+            "modules": runs[-1]["modules"],
+            "deferred_loaded": runs[-1]["deferred_loaded"],
+            "top_packages": [{"package": p, "self_s": s} for s, p in heaviest],
+        }
+        results.append(result)
+        loaded = ", ".join(result["deferred_loaded"]) or "-"
+        print(f"{project:>38} {result['wall_s'] * 1000:>9.0f} {result['import_s'] * 1000:>10.0f} "
+              f"{result['modules']:>8} {loaded:>14}")
+        print(" " * 40 + "  ".join(f"{p} {s * 1000:.0f}ms" for s, p in heaviest))
+    return {"meta": _run_metadata(repeat), "results": results}
+
+
+def _run_metadata(repeat: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+    }
+
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    """
+    Compares two result files project by project.
+
+    Returns:
+        list: Rows {"project", "metric", "before", "after", "change"} where the
+              import time grew by more than `threshold` (e.g. 0.2 = 20%) or a
+              deferred dependency started loading at import time.
+    """
+    old = {r["project"]: r for r in before["results"]}
+    new = {r["project"]: r for r in after["results"]}
+    print(f"{'project':>38} {'ms before':>10} {'ms after':>10} {'change':>8}")
+    regressions = []
+    for project in sorted(old.keys() & new.keys()):
+        a, b = old[project]["import_s"], new[project]["import_s"]
+        change = (b - a) / a if a else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{project:>38} {a * 1000:>10.0f} {b * 1000:>10.0f} {change:>+7.0%}{flag}")
+        if change > threshold:
+            regressions.append({"project": project, "metric": "import_s", "before": a, "after": b,
+                                "change": change})
+        for name in set(new[project]["deferred_loaded"]) - set(old[project]["deferred_loaded"]):
+            print(f"{project:>38} now imports {name} at startup  REGRESSION")
+            regressions.append({"project": project, "metric": f"loads {name}", "before": False,
+                                "after": True, "change": None})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the cold import of every project's root agent.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per project; the median is reported.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages listed per project.")
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative growth reported as a regression.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            after = json.load(f)
+        found = compare(before, after, args.threshold)
+        print(f"{len(found)} regression(s) above {args.threshold:.0%}.")
+        sys.exit(1 if found else 0)
+
+    print(f"{'project':>38} {'wall ms':>9} {'import ms':>10} {'modules':>8} {'deferred':>14}")
+    report = run_profiles(args.repeat, args.top)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    # Deferred dependencies loaded at startup fail the run, so CI can track it.
+    if any(r["deferred_loaded"] for r in report["results"]):
+        sys.exit(1)
@@ -0,0 +1,209 @@
+# =============================================================================
+# FILE: bench_incremental.py
+# PURPOSE:
+#   Incremental refresh (tools/incremental.py) vs recomputing saved
+#   questions on a generated database. After a first full run of every
+#   catalogue question, --batches rounds append --append new enrollments
+#   and sessions (copies of the latest rows, a day later) and refresh each
+#   question both ways. The report has the median refresh time, the
+#   speedup over the full query and whether the incremental answer equals
+#   it (floats to 9 digits; row order only where the query fixes it).
+#
+#   Results are written as JSON; two result files can be compared to catch
+#   regressions between commits, like run_benchmarks.py. A wrong
+#   incremental answer fails the run.
+#
+# USAGE:
+#   python benchmarks/bench_incremental.py --scale 2000 --append 500 --batches 5 --output incr.json
+#   python benchmarks/bench_incremental.py --compare before.json after.json --threshold 0.2
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from setup_db import setup_database
+from tools.db_pool import close_pools
+from tools.incremental import IncrementalStateStore, install_change_tracking, run_incremental
+
+# name -> (sql, row order is part of the answer)
+QUERIES = {
+    "course_enrollments": ("""
+        SELECT c.title, COUNT(*) AS total_enrollments
+        FROM enrollments e JOIN courses c ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY total_enrollments DESC, c.course_id""", True),
+    "top5_revenue": ("""
+        SELECT c.title, c.price * COUNT(e.enrollment_id) AS revenue
+        FROM courses c JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY revenue DESC, c.course_id LIMIT 5""", True),
+    "country_minutes": ("""
+        SELECT l.country, ROUND(AVG(s.duration_minutes), 2) AS avg_minutes, SUM(s.duration_minutes) AS minutes
+        FROM sessions s JOIN learners l ON l.learner_id = s.learner_id
+        GROUP BY l.country ORDER BY minutes DESC""", True),
+    "date_range": ("""
+        SELECT MIN(session_date) AS first_session, MAX(session_date) AS last_session, COUNT(*) AS sessions
+        FROM sessions""", True),
+    "monthly_sessions": ("""
+        SELECT strftime('%Y-%m', session_date) AS month, COUNT(*) AS sessions
+        FROM sessions GROUP BY month""", False),
+}
+
+
+def _normalize(rows: list, ordered: bool) -> list:
+    rows = [tuple(round(v, 9) if isinstance(v, float) else v for v in row) for row in rows]
+    return rows if ordered else sorted(rows, key=repr)
+
+
+def append_rows(db_path: str, count: int) -> None:
+    """Appends copies of the latest `count` enrollments and sessions, dated a day later."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(f"""
+                INSERT INTO enrollments (learner_id, course_id, enrollment_date)
+                SELECT learner_id, course_id, date(enrollment_date, '+1 day')
+                FROM enrollments ORDER BY enrollment_id DESC LIMIT {count}""")
+            conn.execute(f"""
+                INSERT INTO sessions (learner_id, course_id, session_date, duration_minutes)
+                SELECT learner_id, course_id, date(session_date, '+1 day'), duration_minutes
+                FROM sessions ORDER BY session_id DESC LIMIT {count}""")
+    finally:
+        conn.close()
+
+
+def run_full(conn: sqlite3.Connection, sql: str) -> tuple:
+    cursor = conn.execute(sql)
+    return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+def run_catalogue(scale: int, append: int, batches: int) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "datatechcon.db")
+        built = setup_database(db_path, scale, verbose=False)
+        install_change_tracking(db_path)
+        store = IncrementalStateStore(os.path.join(tmp, "incremental_state.db"))
+        print(f"scale {scale}: {built['rows']['enrollments']:,} enrollments, "
+              f"{built['rows']['sessions']:,} sessions; {batches} batches of {append} new rows")
+        print(f"{'query':>20} {'full ms':>9} {'incr ms':>9} {'speedup':>8} {'correct':>8}")
+
+        for name, (sql, _) in QUERIES.items():
+            run_incremental(sql, db_path, name, store)
+        timings = {name: {"full": [], "incremental": [], "correct": True} for name in QUERIES}
+        try:
+            for _ in range(batches):
+                append_rows(db_path, append)
+                conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+                try:
+                    for name, (sql, ordered) in QUERIES.items():
+                        started = time.perf_counter()
+                        refreshed = run_incremental(sql, db_path, name, store)
+                        timings[name]["incremental"].append(time.perf_counter() - started)
+                        started = time.perf_counter()
+                        columns, expected = run_full(conn, sql)
+                        timings[name]["full"].append(time.perf_counter() - started)
+                        timings[name]["correct"] &= (
+                            refreshed["mode"] == "delta" and refreshed["columns"] == columns
+                            and _normalize(refreshed["rows"], ordered) == _normalize(expected, ordered)
+                        )
+                finally:
+                    conn.close()
+        finally:
+            close_pools()
+
+        for name, timing in timings.items():
+            full_s = statistics.median(timing["full"])
+            incremental_s = statistics.median(timing["incremental"])
+            results.append({
+                "query": name,
+                "full_s": full_s,
+                "incremental_s": incremental_s,
+                "speedup": full_s / incremental_s if incremental_s else None,
+                "correct": timing["correct"],
+            })
+            print(f"{name:>20} {full_s * 1000:>9.1f} {incremental_s * 1000:>9.1f} "
+                  f"{full_s / incremental_s:>7.2f}x {'yes' if timing['correct'] else 'NO':>8}")
+    return {"meta": _run_metadata(scale, append, batches), "results": results}
+
+
+def _run_metadata(scale: int, append: int, batches: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": scale,
+        "append": append,
+        "batches": batches,
+    }
+
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    """
+    Compares two result files query by query.
+
+    Returns:
+        list: Rows {"query", "before", "after", "change"} where the incremental
+              refresh time grew by more than `threshold` (e.g. 0.2 = 20%).
+    """
+    old = {r["query"]: r for r in before["results"]}
+    new = {r["query"]: r for r in after["results"]}
+    print(f"{'query':>20} {'ms before':>10} {'ms after':>10} {'change':>8}")
+    regressions = []
+    for query in sorted(old.keys() & new.keys()):
+        a, b = old[query]["incremental_s"], new[query]["incremental_s"]
+        change = (b - a) / a if a else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{query:>20} {a * 1000:>10.1f} {b * 1000:>10.1f} {change:>+7.0%}{flag}")
+        if change > threshold:
+            regressions.append({"query": query, "before": a, "after": b, "change": change})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark incremental refresh against recomputing.")
+    parser.add_argument("--scale", type=int, default=2000, help="setup_db.py scale factor.")
+    parser.add_argument("--append", type=int, default=500, help="Enrollments and sessions added per batch.")
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            after = json.load(f)
+        found = compare(before, after, args.threshold)
+        print(f"{len(found)} regression(s) above {args.threshold:.0%}.")
+        sys.exit(1 if found else 0)
+
+    report = run_catalogue(args.scale, args.append, args.batches)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    # An incremental answer that differs from the full query fails the run.
+    if not all(r["correct"] for r in report["results"]):
+        sys.exit(1)
@@ -0,0 +1,82 @@
+# =============================================================================
+# FILE: bench_intent_fast_path.py
+# PURPOSE:
+#   Measures the local intent fast path on a labelled set of questions that
+#   are NOT in the training examples: hit rate (answered without the LLM),
+#   accuracy of the answered ones, and per-question latency. With
+#   --llm-seconds it also estimates the LLM time saved.
+#
+# USAGE:
+#   python benchmarks/bench_intent_fast_path.py --llm-seconds 1.5
+# =============================================================================
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from tools.intent_classifier import IntentClassifier, load_examples
+
+HELD_OUT = [
+    ("which course sold the most copies", "COURSE_SALES"),
+    ("best sellers this year", "COURSE_SALES"),
+    ("number of courses sold per category", "COURSE_SALES"),
+    ("most popular course in web development", "COURSE_SALES"),
+    ("how many enrollments in 2023", "ENROLLMENT_ANALYSIS"),
+    ("enrollment count by course", "ENROLLMENT_ANALYSIS"),
+    ("how many learners signed up per month", "ENROLLMENT_ANALYSIS"),
+    ("total number of enrolments", "ENROLLMENT_ANALYSIS"),
+    ("which instructor has the most students", "INSTRUCTOR_PERFORMANCE"),
+    ("rank the tutors", "INSTRUCTOR_PERFORMANCE"),
+    ("top performing instructor", "INSTRUCTOR_PERFORMANCE"),
+    ("how much revenue did machine learning generate", "REVENUE_ANALYSIS"),
+    ("earnings per course", "REVENUE_ANALYSIS"),
+    ("which course made the most money", "REVENUE_ANALYSIS"),
+    ("total income last quarter", "REVENUE_ANALYSIS"),
+    ("average session duration per course", "GENERAL_ANALYTICS"),
+    ("how many learners per country", "GENERAL_ANALYTICS"),
+    ("distribution of learning time", "GENERAL_ANALYTICS"),
+    ("give me an overview of the platform", "GENERAL_ANALYTICS"),
+    ("what's going on", "GENERAL_ANALYTICS"),
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local intent fast path.")
+    parser.add_argument("--threshold", type=float, default=None, help="Override the confidence threshold.")
+    parser.add_argument("--llm-seconds", type=float, default=None, help="Typical LLM classification latency.")
+    parser.add_argument("--iterations", type=int, default=1000, help="Timing passes over the question set.")
+    args = parser.parse_args()
+
+    examples = load_examples(log_path=None)
+    classifier = IntentClassifier(examples) if args.threshold is None else IntentClassifier(examples, args.threshold)
+
+    answered = correct = 0
+    for question, expected in HELD_OUT:
+        result = classifier.classify(question)
+        status = "fallback"
+        if result["label"]:
+            answered += 1
+            correct += result["label"] == expected
+            status = "ok" if result["label"] == expected else f"WRONG ({result['label']})"
+        print(f"{result['source']:>8} {result['confidence']:>5.2f}  {status:<28} {question}")
+
+    latencies = []
+    for _ in range(args.iterations):
+        for question, _ in HELD_OUT:
+            started = time.perf_counter()
+            classifier.classify(question)
+            latencies.append(time.perf_counter() - started)
+
+    print()
+    print(f"training examples: {len(examples)}")
+    print(f"hit rate:          {answered}/{len(HELD_OUT)} ({answered / len(HELD_OUT):.0%})")
+    print(f"accuracy on hits:  {correct}/{answered}" if answered else "accuracy on hits:  n/a")
+    print(f"latency:           mean {statistics.mean(latencies) * 1e6:.1f} us, "
+          f"p99 {statistics.quantiles(latencies, n=100)[98] * 1e6:.1f} us")
+    if args.llm_seconds is not None:
+        print(f"LLM time saved:    {answered * args.llm_seconds:.1f}s per {len(HELD_OUT)} questions")
@@ -0,0 +1,74 @@
+# =============================================================================
+# FILE: bench_pushdown.py
+# PURPOSE:
+#   Compares the pandas analysis path (fetch every row, then groupby in
+#   pandas) against aggregation pushdown (aggregate inside SQLite) for each
+#   supported intent at several data scales.
+#
+# USAGE:
+#   python benchmarks/bench_pushdown.py --rows 100000 1000000
+# =============================================================================
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from bench_fetch_streaming import build_scaled_db
+from tools.file_writer_tool import (
+    analyze_data_and_save_to_file,
+    analyze_query_and_save_to_file,
+    fetch_data_and_save_to_file,
+    write_sql_to_file,
+)
+
+# Row-level query, the shape that forces the pandas path to ship every enrollment.
+RAW_SQL = """
+SELECT c.title, i.name AS instructor, c.price, 1 AS total_enrollments
+FROM enrollments e
+JOIN courses c ON c.course_id = e.course_id
+JOIN instructors i ON i.instructor_id = c.instructor_id
+"""
+INTENTS = ["COURSE_SALES", "ENROLLMENT_ANALYSIS", "INSTRUCTOR_PERFORMANCE", "REVENUE_ANALYSIS"]
+
+
+def pandas_path(sql_handle: str, intent: str, db_path: str, out_dir: str) -> dict:
+    fetched = fetch_data_and_save_to_file(sql_handle, db_path, out_dir, use_cache=False)
+    return analyze_data_and_save_to_file(fetched["file"], intent, out_dir)
+
+
+def pushdown_path(sql_handle: str, intent: str, db_path: str, out_dir: str) -> dict:
+    return analyze_query_and_save_to_file(sql_handle, intent, db_path, out_dir, use_cache=False)
+
+
+def run_benchmark(row_counts: list) -> None:
+    print(f"{'rows':>10} {'intent':>24} {'pandas s':>9} {'pushdown s':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = os.path.join(tmp, "output")
+        sql_handle = write_sql_to_file(RAW_SQL, out_dir, write_through=False)["handle"]
+        for rows in row_counts:
+            db_path = build_scaled_db(rows, tmp)
+            for intent in INTENTS:
+                timings = []
+                for fn in (pandas_path, pushdown_path):
+                    started = time.perf_counter()
+                    result = fn(sql_handle, intent, db_path, out_dir)
+                    timings.append(time.perf_counter() - started)
+                    assert result["status"] == "success", result
+                print(f"{rows:>10} {intent:>24} {timings[0]:>9.3f} {timings[1]:>11.3f} "
+                      f"{timings[0] / timings[1]:>7.1f}x")
+                shutil.rmtree(out_dir, ignore_errors=True)
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pandas analysis vs SQLite aggregation pushdown.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Enrollment row counts to benchmark.")
+    args = parser.parse_args()
+    run_benchmark(args.rows)
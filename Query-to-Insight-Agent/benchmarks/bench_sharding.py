@@ -0,0 +1,197 @@
+# =============================================================================
+# FILE: bench_sharding.py
+# PURPOSE:
+#   Single database vs sharded execution (tools/sharding.py) on a generated
+#   database. The database is split into --shards files; every catalogue
+#   query runs on the single file and on the shards with each --workers
+#   count (0 = shards one after the other in this process). The report has
+#   the median wall time, the speedup over the single file and whether the
+#   merged result equals the single-file result (floats to 9 digits; row
+#   order only where the query fixes it).
+#
+#   Results are written as JSON; two result files can be compared to catch
+#   regressions between commits, like run_benchmarks.py. A wrong merged
+#   result fails the run.
+#
+# USAGE:
+#   python benchmarks/bench_sharding.py --scale 2000 --shards 4 --workers 0 2 4 --output shards.json
+#   python benchmarks/bench_sharding.py --compare before.json after.json --threshold 0.2
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from setup_db import setup_database
+from tools.db_pool import close_pools
+from tools.sharding import close_shard_pool, load_manifest, run_sharded, split_database
+
+# name -> (sql, row order is part of the answer)
+QUERIES = {
+    "course_enrollments": ("""
+        SELECT c.title, COUNT(*) AS total_enrollments
+        FROM enrollments e JOIN courses c ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY total_enrollments DESC, c.course_id""", True),
+    "top5_revenue": ("""
+        SELECT c.title, c.price * COUNT(e.enrollment_id) AS revenue
+        FROM courses c JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY revenue DESC LIMIT 5""", True),
+    "country_minutes": ("""
+        SELECT l.country, ROUND(AVG(s.duration_minutes), 2) AS avg_minutes, SUM(s.duration_minutes) AS minutes
+        FROM sessions s JOIN learners l ON l.learner_id = s.learner_id
+        GROUP BY l.country ORDER BY minutes DESC""", True),
+    "date_range": ("""
+        SELECT MIN(session_date) AS first_session, MAX(session_date) AS last_session, COUNT(*) AS sessions
+        FROM sessions""", True),
+    "longest_sessions": ("""
+        SELECT s.session_id, s.learner_id, s.duration_minutes
+        FROM sessions s ORDER BY s.duration_minutes DESC, s.session_id LIMIT 20""", True),
+    "monthly_sessions": ("""
+        SELECT strftime('%Y-%m', session_date) AS month, COUNT(*) AS sessions
+        FROM sessions GROUP BY month""", False),
+}
+
+
+def _normalize(rows: list, ordered: bool) -> list:
+    rows = [tuple(round(v, 9) if isinstance(v, float) else v for v in row) for row in rows]
+    return rows if ordered else sorted(rows, key=repr)
+
+
+def run_single(conn: sqlite3.Connection, sql: str) -> tuple:
+    cursor = conn.execute(sql)
+    return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+def timed(fn, repeat: int, *args) -> tuple:
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def run_catalogue(scale: int, shards: int, by: str, workers: list, repeat: int) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "datatechcon.db")
+        built = setup_database(db_path, scale, verbose=False)
+        split = split_database(db_path, os.path.join(tmp, "shards"), shards, by)
+        manifest = load_manifest(split["manifest"])
+        print(f"scale {scale}: {built['rows']['enrollments']:,} enrollments, "
+              f"{built['rows']['sessions']:,} sessions; {shards} shards by {by} in {split['elapsed_seconds']:.1f}s")
+        print(f"{'query':>20} {'run':>10} {'time ms':>9} {'speedup':>8} {'correct':>8}")
+
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            for name, (sql, ordered) in QUERIES.items():
+                single_s, (columns, expected) = timed(run_single, repeat, conn, sql)
+                print(f"{name:>20} {'single':>10} {single_s * 1000:>9.1f}")
+                for count in workers:
+                    run_sharded(sql, manifest, count)  # warm the pools and worker processes
+                    sharded_s, merged = timed(run_sharded, repeat, sql, manifest, count)
+                    correct = (merged["columns"] == columns
+                               and _normalize(merged["rows"], ordered) == _normalize(expected, ordered))
+                    results.append({
+                        "query": name,
+                        "workers": count,
+                        "single_s": single_s,
+                        "sharded_s": sharded_s,
+                        "speedup": single_s / sharded_s if sharded_s else None,
+                        "refetched": merged["refetched"],
+                        "correct": correct,
+                    })
+                    print(f"{name:>20} {f'{count} workers':>10} {sharded_s * 1000:>9.1f} "
+                          f"{single_s / sharded_s:>7.2f}x {'yes' if correct else 'NO':>8}")
+        finally:
+            conn.close()
+            close_shard_pool()
+            close_pools()
+    return {"meta": _run_metadata(scale, shards, by, repeat), "results": results}
+
+
+def _run_metadata(scale: int, shards: int, by: str, repeat: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": scale,
+        "shards": shards,
+        "by": by,
+        "repeat": repeat,
+    }
+
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    """
+    Compares two result files query by query and worker count.
+
+    Returns:
+        list: Rows {"query", "workers", "before", "after", "change"} where the
+              sharded time grew by more than `threshold` (e.g. 0.2 = 20%).
+    """
+    old = {(r["query"], r["workers"]): r for r in before["results"]}
+    new = {(r["query"], r["workers"]): r for r in after["results"]}
+    print(f"{'query':>20} {'workers':>8} {'ms before':>10} {'ms after':>10} {'change':>8}")
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key]["sharded_s"], new[key]["sharded_s"]
+        change = (b - a) / a if a else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{key[0]:>20} {key[1]:>8} {a * 1000:>10.1f} {b * 1000:>10.1f} {change:>+7.0%}{flag}")
+        if change > threshold:
+            regressions.append({"query": key[0], "workers": key[1], "before": a, "after": b, "change": change})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded execution against a single database.")
+    parser.add_argument("--scale", type=int, default=2000, help="setup_db.py scale factor.")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--by", choices=["learner", "date"], default="learner")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4],
+                        help="Worker process counts to run the shards with (0 = in process).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            after = json.load(f)
+        found = compare(before, after, args.threshold)
+        print(f"{len(found)} regression(s) above {args.threshold:.0%}.")
+        sys.exit(1 if found else 0)
+
+    report = run_catalogue(args.scale, args.shards, args.by, args.workers, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    # A merged result that differs from the single database fails the run.
+    if not all(r["correct"] for r in report["results"]):
+        sys.exit(1)
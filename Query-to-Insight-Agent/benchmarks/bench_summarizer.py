@@ -0,0 +1,200 @@
+# =============================================================================
+# FILE: bench_summarizer.py
+# PURPOSE:
+#   Full-content read vs token-budgeted summary (tools/summarizer.py) of
+#   result files of growing size. Each catalogue query runs once on a
+#   generated database and its result is written as a TSV file; then
+#   read_file_content reads it whole (summarize=False) and summarized. The
+#   report has the median latency of both reads, the estimated tokens of
+#   both contents, the tokens saved, and whether the summary is accurate:
+#   exact row count, medians between the exact 45th and 55th percentiles,
+#   distinct counts within 5%.
+#
+#   Results are written as JSON; two result files can be compared to catch
+#   regressions between commits, like run_benchmarks.py. An inaccurate
+#   summary fails the run.
+#
+# USAGE:
+#   python benchmarks/bench_summarizer.py --scale 200 --budget 2000 --output summary.json
+#   python benchmarks/bench_summarizer.py --compare before.json after.json --threshold 0.2
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from setup_db import setup_database
+from tools.artifact_registry import publish
+from tools.db_pool import close_pools
+from tools.file_writer_tool import fetch_data_and_save_to_file, read_file_content
+from tools.summarizer import summarize_file
+
+# name -> sql
+QUERIES = {
+    "course_enrollments": """
+        SELECT c.title, COUNT(*) AS total_enrollments
+        FROM enrollments e JOIN courses c ON c.course_id = e.course_id
+        GROUP BY c.course_id ORDER BY total_enrollments DESC""",
+    "learner_minutes": """
+        SELECT l.learner_id, l.country, SUM(s.duration_minutes) AS minutes
+        FROM sessions s JOIN learners l ON l.learner_id = s.learner_id
+        GROUP BY l.learner_id ORDER BY minutes DESC""",
+    "enrollment_rows": """
+        SELECT e.enrollment_id, e.enrollment_date, c.title, c.category, c.price
+        FROM enrollments e JOIN courses c ON c.course_id = e.course_id""",
+    "session_rows": """
+        SELECT s.session_id, s.learner_id, s.session_date, s.duration_minutes, l.country
+        FROM sessions s JOIN learners l ON l.learner_id = s.learner_id""",
+}
+
+
+def timed(fn, repeat: int, *args, **kwargs) -> tuple:
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def check_accuracy(conn: sqlite3.Connection, sql: str, summary: dict) -> list:
+    """Compares the summary's statistics with exact ones; returns the problems found."""
+    problems = []
+    exact_rows = conn.execute(f"SELECT COUNT(*) FROM ({sql})").fetchone()[0]
+    if summary["rows"] != exact_rows:
+        problems.append(f"rows {summary['rows']} != {exact_rows}")
+    for column in summary["columns"]:
+        name = column["name"]
+        distinct = conn.execute(f'SELECT COUNT(DISTINCT "{name}") FROM ({sql})').fetchone()[0]
+        if abs(column["distinct"] - distinct) > 0.05 * distinct:
+            problems.append(f"{name}: distinct {column['distinct']} vs {distinct}")
+        if column["type"] in ("int", "real"):
+            values = [v for (v,) in conn.execute(f'SELECT "{name}" FROM ({sql}) WHERE "{name}" IS NOT NULL ORDER BY 1')]
+            low, high = values[int(0.45 * (len(values) - 1))], values[int(0.55 * (len(values) - 1))]
+            if not low <= column["quantiles"]["median"] <= high:
+                problems.append(f"{name}: median {column['quantiles']['median']} outside [{low}, {high}]")
+    return problems
+
+
+def run_catalogue(scale: int, budget: int, repeat: int) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "datatechcon.db")
+        built = setup_database(db_path, scale, verbose=False)
+        print(f"scale {scale}: {built['rows']['enrollments']:,} enrollments, "
+              f"{built['rows']['sessions']:,} sessions; budget {budget:,} tokens")
+        print(f"{'query':>20} {'rows':>9} {'full tok':>10} {'sum tok':>8} {'full ms':>9} {'sum ms':>8} {'accurate':>9}")
+
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            for name, sql in QUERIES.items():
+                fetched = fetch_data_and_save_to_file(
+                    publish("sql", sql), db_path, os.path.join(tmp, "output"), use_cache=False
+                )
+                path = fetched["file"]
+                full_s, full = timed(read_file_content, repeat, path, summarize=False)
+                summary_s, summarized = timed(read_file_content, repeat, path, max_tokens=budget)
+                problems = check_accuracy(conn, sql, summarize_file(path, budget))
+                results.append({
+                    "query": name,
+                    "rows": fetched["rows"],
+                    "full_tokens": full["tokens"],
+                    "summary_tokens": summarized["tokens"],
+                    "tokens_saved": full["tokens"] - summarized["tokens"],
+                    "summarized": summarized["summarized"],
+                    "full_s": full_s,
+                    "summary_s": summary_s,
+                    "accurate": not problems,
+                    "problems": problems,
+                })
+                print(f"{name:>20} {fetched['rows']:>9,} {full['tokens']:>10,} {summarized['tokens']:>8,} "
+                      f"{full_s * 1000:>9.1f} {summary_s * 1000:>8.1f} {'yes' if not problems else 'NO':>9}")
+                for problem in problems:
+                    print(f"{'':>20} {problem}")
+        finally:
+            conn.close()
+            close_pools()
+    return {"meta": _run_metadata(scale, budget, repeat), "results": results}
+
+
+def _run_metadata(scale: int, budget: int, repeat: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": scale,
+        "budget": budget,
+        "repeat": repeat,
+    }
+
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    """
+    Compares two result files query by query.
+
+    Returns:
+        list: Rows {"query", "before", "after", "change"} where the summary
+              latency grew by more than `threshold` (e.g. 0.2 = 20%).
+    """
+    old = {r["query"]: r for r in before["results"]}
+    new = {r["query"]: r for r in after["results"]}
+    print(f"{'query':>20} {'ms before':>10} {'ms after':>10} {'change':>8}")
+    regressions = []
+    for query in sorted(old.keys() & new.keys()):
+        a, b = old[query]["summary_s"], new[query]["summary_s"]
+        change = (b - a) / a if a else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{query:>20} {a * 1000:>10.1f} {b * 1000:>10.1f} {change:>+7.0%}{flag}")
+        if change > threshold:
+            regressions.append({"query": query, "before": a, "after": b, "change": change})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark summarized reads of result files against full reads.")
+    parser.add_argument("--scale", type=int, default=200, help="setup_db.py scale factor.")
+    parser.add_argument("--budget", type=int, default=2000, help="Token budget of the summary.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            after = json.load(f)
+        found = compare(before, after, args.threshold)
+        print(f"{len(found)} regression(s) above {args.threshold:.0%}.")
+        sys.exit(1 if found else 0)
+
+    report = run_catalogue(args.scale, args.budget, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    # A summary whose statistics are wrong fails the run.
+    if not all(r["accurate"] for r in report["results"]):
+        sys.exit(1)
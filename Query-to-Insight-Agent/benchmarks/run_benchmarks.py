@@ -0,0 +1,250 @@
+# =============================================================================
+# FILE: run_benchmarks.py
+# PURPOSE:
+#   LLM-free benchmark of the Query-to-Insight tool chain. For every database
+#   scale and every intent in a fixed SQL catalogue it drives
+#   write_sql_to_file -> fetch_data_and_save_to_file ->
+#   analyze_data_and_save_to_file -> generate_insights_and_save_to_file and
+#   records per-stage wall time (median of --repeat runs), peak traced
+#   memory (tracemalloc, separate pass) and bytes written.
+#
+#   Results are written as JSON; two result files can be compared to catch
+#   regressions between commits.
+#
+# USAGE:
+#   python benchmarks/run_benchmarks.py --scales 1 100 1000 --output bench.json
+#   python benchmarks/run_benchmarks.py --compare before.json after.json --threshold 0.2
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from setup_db import setup_database
+from tools.db_pool import close_pools
+from tools.file_writer_tool import (
+    analyze_data_and_save_to_file,
+    fetch_data_and_save_to_file,
+    generate_insights_and_save_to_file,
+    write_sql_to_file,
+)
+
+# Representative SQL per intent, in the shape query_writer_agent produces.
+SQL_CATALOGUE = {
+    "COURSE_SALES": """
+        SELECT c.title, COUNT(e.enrollment_id) AS total_enrollments
+        FROM courses c
+        JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id
+        ORDER BY total_enrollments DESC;
+    """,
+    "ENROLLMENT_ANALYSIS": """
+        SELECT c.title, e.enrollment_date, 1 AS total_enrollments
+        FROM enrollments e
+        JOIN courses c ON c.course_id = e.course_id;
+    """,
+    "INSTRUCTOR_PERFORMANCE": """
+        SELECT i.name AS instructor, COUNT(e.enrollment_id) AS total_enrollments
+        FROM instructors i
+        JOIN courses c ON c.instructor_id = i.instructor_id
+        JOIN enrollments e ON e.course_id = c.course_id
+        GROUP BY i.instructor_id
+        ORDER BY total_enrollments DESC;
+    """,
+    "REVENUE_ANALYSIS": """
+        SELECT c.title, c.price, COUNT(e.enrollment_id) AS total_enrollments
+        FROM courses c
+        JOIN enrollments e ON c.course_id = e.course_id
+        GROUP BY c.course_id;
+    """,
+    "GENERAL_ANALYTICS": """
+        SELECT s.duration_minutes, s.course_id, l.country
+        FROM sessions s
+        JOIN learners l ON l.learner_id = s.learner_id;
+    """,
+}
+STAGES = ["write_sql", "fetch", "analyze", "insights"]
+
+
+def _file_size(path) -> int:
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def run_chain(sql: str, intent: str, db_path: str, out_dir: str) -> list:
+    """Runs the four tools once and returns [(stage, seconds, bytes_written, rows), ...]."""
+    measurements = []
+
+    def timed(stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        if result["status"] != "success":
+            raise RuntimeError(f"{stage} failed for {intent}: {result['message']}")
+        written = result.get("bytes", _file_size(result.get("file")))
+        measurements.append((stage, elapsed, written, result.get("rows")))
+        return result
+
+    sql_result = timed("write_sql", write_sql_to_file, sql, out_dir, db_file_path=db_path)
+    fetched = timed("fetch", fetch_data_and_save_to_file, sql_result["handle"], db_path, out_dir, use_cache=False)
+    analysis = timed("analyze", analyze_data_and_save_to_file, fetched["handle"], intent, out_dir)
+    timed("insights", generate_insights_and_save_to_file, analysis["handle"], intent, out_dir)
+    return measurements
+
+
+def _peak_memory(sql: str, intent: str, db_path: str, out_dir: str) -> dict:
+    """Peak traced allocation per stage, from one extra run under tracemalloc."""
+    peaks = {}
+
+    def traced(stage, fn, *args, **kwargs):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = fn(*args, **kwargs)
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - baseline
+        return result
+
+    tracemalloc.start()
+    try:
+        sql_result = traced("write_sql", write_sql_to_file, sql, out_dir, db_file_path=db_path)
+        fetched = traced("fetch", fetch_data_and_save_to_file, sql_result["handle"], db_path, out_dir, use_cache=False)
+        analysis = traced("analyze", analyze_data_and_save_to_file, fetched["handle"], intent, out_dir)
+        traced("insights", generate_insights_and_save_to_file, analysis["handle"], intent, out_dir)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_benchmarks(scales: list, repeat: int, seed: int, db_dir: str = None) -> dict:
+    """Builds one database per scale and benchmarks every catalogue entry on it."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            db_path = os.path.join(db_dir or tmp, f"datatechcon_scale{scale}_seed{seed}.db")
+            if not os.path.exists(db_path):
+                setup_database(db_path, scale, seed, verbose=False)
+            conn = sqlite3.connect(db_path)
+            enrollments = conn.execute("SELECT COUNT(*) FROM enrollments").fetchone()[0]
+            conn.close()
+
+            for intent, sql in SQL_CATALOGUE.items():
+                out_dir = os.path.join(tmp, "output")
+                runs = [run_chain(sql, intent, db_path, out_dir) for _ in range(repeat)]
+                peaks = _peak_memory(sql, intent, db_path, out_dir)
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+                for i, stage in enumerate(STAGES):
+                    _, _, written, rows = runs[-1][i]
+                    wall = statistics.median(run[i][1] for run in runs)
+                    results.append({
+                        "scale": scale,
+                        "enrollments": enrollments,
+                        "intent": intent,
+                        "stage": stage,
+                        "wall_s": round(wall, 6),
+                        "peak_mem_bytes": peaks[stage],
+                        "bytes_written": written,
+                        "rows": rows,
+                    })
+                    print(f"{scale:>7} {intent:>24} {stage:>10} {wall * 1000:>10.2f} "
+                          f"{peaks[stage] / 1024 ** 2:>10.2f} {written:>12,}", flush=True)
+            close_pools()
+            if not db_dir:
+                os.remove(db_path)
+
+    return {"meta": _run_metadata(repeat, seed), "results": results}
+
+
+def _run_metadata(repeat: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+    }
+
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    """
+    Compares two result files stage by stage.
+
+    Returns:
+        list: Rows {"key", "metric", "before", "after", "change"} where a metric
+              grew by more than `threshold` (e.g. 0.2 = 20%).
+    """
+    def keyed(doc):
+        return {(r["scale"], r["intent"], r["stage"]): r for r in doc["results"]}
+
+    old, new = keyed(before), keyed(after)
+    print(f"{'scale':>7} {'intent':>24} {'stage':>10} {'ms before':>10} {'ms after':>10} {'change':>8}")
+    regressions = []
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[0], k[1], STAGES.index(k[2]))):
+        for metric in ("wall_s", "peak_mem_bytes", "bytes_written"):
+            a, b = old[key][metric], new[key][metric]
+            change = (b - a) / a if a else 0.0
+            if metric == "wall_s":
+                flag = "  REGRESSION" if change > threshold else ""
+                print(f"{key[0]:>7} {key[1]:>24} {key[2]:>10} {a * 1000:>10.2f} {b * 1000:>10.2f} "
+                      f"{change:>+7.0%}{flag}")
+            if change > threshold:
+                regressions.append({"key": key, "metric": metric, "before": a, "after": b, "change": change})
+
+    missing = old.keys() - new.keys()
+    if missing:
+        print(f"{len(missing)} stage result(s) from BEFORE are missing in AFTER.")
+    for r in regressions:
+        if r["metric"] != "wall_s":
+            print(f"{r['key']} {r['metric']}: {r['before']:,} -> {r['after']:,} ({r['change']:+.0%})  REGRESSION")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Query-to-Insight tool chain without the LLM.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100, 1000], help="setup_db.py scale factors.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per intent; the median is reported.")
+    parser.add_argument("--seed", type=int, default=42, help="Data generation seed.")
+    parser.add_argument("--db-dir", help="Keep generated databases here and reuse them across runs.")
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files instead of running.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative growth reported as a regression.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            after = json.load(f)
+        found = compare(before, after, args.threshold)
+        print(f"{len(found)} regression(s) above {args.threshold:.0%}.")
+        sys.exit(1 if found else 0)
+
+    if args.db_dir:
+        os.makedirs(args.db_dir, exist_ok=True)
+    print(f"{'scale':>7} {'intent':>24} {'stage':>10} {'wall ms':>10} {'peak MB':>10} {'bytes':>12}")
+    report = run_benchmarks(args.scales, args.repeat, args.seed, args.db_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
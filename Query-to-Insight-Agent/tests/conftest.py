@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+# agent_common/ lives at the repository root.
+sys.path.insert(1, os.path.dirname(PROJECT_ROOT))
+
+
+@pytest.fixture(scope="session")
+def db_path(tmp_path_factory):
+    from setup_db import setup_database
+
+    path = str(tmp_path_factory.mktemp("db") / "datatechcon.db")
+    setup_database(path, 1, seed=42, verbose=False)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def isolated_output(tmp_path, monkeypatch):
+    """Keeps the caches and libraries the tools write out of output/."""
+    monkeypatch.setenv("SQL_TEMPLATE_LIBRARY_PATH", str(tmp_path / "sql_templates.json"))
+    monkeypatch.setenv("ANSWER_CACHE_PATH", str(tmp_path / "answer_cache.db"))
+    monkeypatch.setenv("AGENT_TRACE_FILE", str(tmp_path / "trace.jsonl"))
+    monkeypatch.setenv("INCREMENTAL_STATE_PATH", str(tmp_path / "incremental.db"))
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.root_agent import cached_pipeline
+from agents.root_agent.cached_pipeline import CachedPipelineAgent
+from tools.answer_cache import configure_answer_cache, normalize_question
+
+
+def test_stop_words_are_removed_before_folding():
+    assert normalize_question("What does this course cost?") == "course cost"
+    assert normalize_question("Which courses sold the most?") == "course sold most"
+
+
+class FakeInsightPipeline(BaseAgent):
+    """Replies like the insight agent, after an insights tool call with `status`."""
+
+    status: str = "success"
+
+    async def _run_async_impl(self, ctx):
+        response = types.FunctionResponse(name="generate_insights_and_save_to_file",
+                                           response={"status": self.status, "file": None})
+        yield Event(invocation_id=ctx.invocation_id, author="insight_agent",
+                    content=types.Content(role="user", parts=[types.Part(function_response=response)]))
+        yield Event(invocation_id=ctx.invocation_id, author="insight_agent",
+                    content=types.Content(role="model", parts=[types.Part(text=f"insights: {self.status}")]))
+
+
+async def _ask(status: str, question: str) -> None:
+    agent = CachedPipelineAgent(name="root", pipeline=FakeInsightPipeline(name="pipeline", status=status))
+    sessions = InMemorySessionService()
+    await sessions.create_session(app_name="test", user_id="u", session_id="s")
+    runner = Runner(agent=agent, app_name="test", session_service=sessions)
+    async for _ in runner.run_async(user_id="u", session_id="s",
+                                    new_message=types.Content(role="user", parts=[types.Part(text=question)])):
+        pass
+
+
+@pytest.mark.parametrize("status, cached", [("success", True), ("error", False)])
+def test_only_answers_of_successful_insights_are_cached(db_path, monkeypatch, status, cached):
+    monkeypatch.setattr(cached_pipeline, "DB_FILE_PATH", db_path)
+    cache = configure_answer_cache(persist_path=None, similarity_threshold=None)
+    asyncio.run(_ask(status, "Most selling course?"))
+    assert (cache.get("Most selling course?", db_path) is not None) == cached
+
+
+def test_near_duplicates_only_differ_in_stop_words_inflection_or_order(db_path):
+    cache = configure_answer_cache(persist_path=None)
+    cache.put("average session duration per learner", db_path, "ungrouped", [])
+    cache.put("top 3 courses in India", db_path, "india", [])
+
+    hit = cache.get("Average duration of sessions per learner?", db_path)
+    assert hit is not None and (hit["match"], hit["answer"]) == ("similar", "ungrouped")
+    assert cache.get("average session duration per learner country", db_path) is None
+    assert cache.get("top 3 courses in germany", db_path) is None
+    assert cache.get("top 5 courses in India", db_path) is None
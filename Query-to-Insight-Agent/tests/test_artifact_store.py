@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+
+from agent_common.artifact_store import ArtifactStore, run_scope
+from tools import artifact_registry
+from tools.answer_cache import configure_answer_cache
+
+
+def test_parallel_branches_keep_their_own_refs(tmp_path):
+    store = ArtifactStore(str(tmp_path / "output"))
+    with run_scope("run-1", agent="branch_1_analyze_agent"):
+        first = store.put_text("analysis of part 1", "analysis.txt")
+    with run_scope("run-1", agent="branch_2_analyze_agent"):
+        second = store.put_text("analysis of part 2", "analysis.txt")
+
+    assert store.lookup("run-1", "analysis", agent="branch_1_analyze_agent") == first
+    assert store.lookup("run-1", "analysis", agent="branch_2_analyze_agent") == second
+    assert [a["path"] for a in store.run_artifacts("run-1")] == [first, second]
+    store.close()
+
+
+def test_gc_keeps_files_of_live_handles_and_cached_answers(tmp_path):
+    store = ArtifactStore(str(tmp_path / "output"), max_bytes=0)
+    held = store.put_text("held by a handle", "table.txt")
+    cached = store.put_text("cached answer artifact", "insights.txt")
+    loose = store.put_text("nobody refers to this", "analysis.txt")
+    handle = artifact_registry.publish("table", None, file=held)
+    configure_answer_cache(persist_path=None).put("Most selling course?", "missing.db", "answer", [cached])
+    try:
+        store.gc(max_bytes=1, max_age_seconds=0)
+        assert os.path.exists(held) and os.path.exists(cached)
+        assert not os.path.exists(loose)
+    finally:
+        artifact_registry.release(handle)
+        configure_answer_cache(persist_path=None)
+        store.close()
+
+
+def test_index_of_an_older_version_is_migrated(tmp_path):
+    root = tmp_path / "output"
+    os.makedirs(root / "blobs" / "tmp")
+    conn = sqlite3.connect(root / "blobs" / "index.sqlite")
+    conn.executescript("""
+        CREATE TABLE refs (run_id TEXT NOT NULL, stage TEXT NOT NULL, blob TEXT NOT NULL,
+                           name TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (run_id, stage));
+        INSERT INTO refs VALUES ('run-0', 'insights', 'ab.txt', 'insights.txt', 1.0);
+    """)
+    conn.close()
+
+    store = ArtifactStore(str(root))
+    assert store.run_artifacts("run-0")[0]["stage"] == "insights"
+    store.close()
+
+
+def test_concurrent_gc_never_leaves_an_indexed_blob_without_its_file(tmp_path):
+    store = ArtifactStore(str(tmp_path / "output"), max_bytes=0)
+    stop = threading.Event()
+
+    def collect():
+        while not stop.is_set():
+            store.gc(max_bytes=1, max_age_seconds=0)
+
+    collector = threading.Thread(target=collect)
+    collector.start()
+    try:
+        for i in range(300):
+            store.put_text(f"content {i % 3}", "analysis.txt")
+            tmp = store.reserve("result.tsv")
+            with open(tmp, "w") as f:
+                f.write(f"rows {i % 3}")
+            store.commit(tmp, "result.tsv")
+    finally:
+        stop.set()
+        collector.join()
+    blobs = [b for (b,) in store._index().execute("SELECT blob FROM blobs")]
+    assert all(os.path.exists(store.blob_path(blob)) for blob in blobs)
+    store.close()
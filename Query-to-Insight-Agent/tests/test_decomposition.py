@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from google.adk.agents import BaseAgent, ParallelAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.compound.compound_path import CompoundQuestionAgent
+from tools.decomposition import decompose_question
+
+
+@pytest.mark.parametrize("question", [
+    "Show course sales by category and country",
+    "Top instructors by enrollments and by revenue",
+    "Show revenue by course, category and country",
+    "Show sales for Python and SQL courses",
+    "Machine Learning and AI courses sold",
+])
+def test_grouping_lists_are_not_split(question):
+    assert decompose_question(question) == []
+
+
+@pytest.mark.parametrize("question, parts", [
+    ("Which courses sold the most and how much did we make per category",
+     ["Which courses sold the most", "how much did we make per category"]),
+    ("What are the best selling courses, also which instructors have most students",
+     ["What are the best selling courses", "which instructors have most students"]),
+    ("Top courses and best instructors by revenue this year",
+     ["Top courses by revenue this year", "best instructors by revenue this year"]),
+])
+def test_independent_questions_are_split(question, parts):
+    assert [part["question"] for part in decompose_question(question)] == parts
+
+
+class _Idle(BaseAgent):
+    async def _run_async_impl(self, ctx):
+        return
+        yield
+
+
+class _StateProbe(BaseAgent):
+    seen: dict = {}
+
+    async def _run_async_impl(self, ctx):
+        self.seen.update(ctx.session.state)
+        return
+        yield
+
+
+def test_branch_outputs_of_an_earlier_question_are_cleared():
+    probe = _StateProbe(name="merge")
+    agent = CompoundQuestionAgent(
+        name="compound", pipeline=_Idle(name="pipeline"), merge_agent=probe,
+        branches=ParallelAgent(name="branches", sub_agents=[_Idle(name="b1"), _Idle(name="b2")]),
+    )
+
+    async def run():
+        sessions = InMemorySessionService()
+        await sessions.create_session(app_name="test", user_id="u", session_id="s",
+                                      state={"branch_1_analyze_agent_output": "previous answer"})
+        runner = Runner(agent=agent, app_name="test", session_service=sessions)
+        question = "Which courses sold the most and which instructors have the most students"
+        async for _ in runner.run_async(user_id="u", session_id="s",
+                                        new_message=types.Content(role="user", parts=[types.Part(text=question)])):
+            pass
+
+    asyncio.run(run())
+    assert len(probe.seen["compound_parts"]) == 2
+    assert probe.seen["branch_1_analyze_agent_output"] is None
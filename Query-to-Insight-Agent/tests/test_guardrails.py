@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+from tools.guardrails import GuardrailError, QueryGuard, configure_guardrails, guardrail_limits
+
+
+@pytest.fixture
+def limits():
+    saved = guardrail_limits()
+    yield configure_guardrails
+    configure_guardrails(**saved)
+
+
+def test_byte_cap_measures_every_batch(limits):
+    limits(max_bytes=10_000, max_rows=None)
+    conn = sqlite3.connect(":memory:")
+    narrow = [("a",)] * 100
+    wide = [("x" * 1000,)] * 100
+    with pytest.raises(GuardrailError) as error:
+        with QueryGuard(conn) as guard:
+            for _ in guard.wrap([narrow, wide]):
+                pass
+    assert error.value.code == "BYTE_LIMIT"
+
+
+def test_cancel_after_the_guard_exited_does_not_interrupt(limits):
+    conn = sqlite3.connect(":memory:")
+    with QueryGuard(conn) as guard:
+        conn.execute("SELECT 1").fetchall()
+    guard.cancel()
+    assert guard.reason is None
+    assert conn.execute("SELECT 2").fetchone() == (2,)
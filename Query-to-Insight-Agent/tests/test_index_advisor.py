@@ -0,0 +1,42 @@
+import os
+import shutil
+import sqlite3
+
+from tools import index_advisor
+from tools.index_advisor import apply_indexes, load_workload, record_query
+
+SELECT = "SELECT course_id, COUNT(*) FROM enrollments GROUP BY course_id"
+
+
+def test_workload_replay_is_read_only(db_path, tmp_path):
+    db = str(tmp_path / "copy.db")
+    shutil.copy(db_path, db)
+    report = apply_indexes(db, [], [SELECT, "DELETE FROM enrollments", "SELECT 1; DELETE FROM courses"], repeat=1)
+
+    assert [t["sql"] for t in report["timings"]] == [SELECT]
+    assert {s["code"] for s in report["skipped"]} == {"NOT_SELECT", "SQL_ERROR"}
+    conn = sqlite3.connect(db)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM enrollments").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_record_query_opens_paths_with_uri_characters(db_path, tmp_path):
+    db = str(tmp_path / "data #1?.db")
+    shutil.copy(db_path, db)
+    entry = record_query(SELECT, db, str(tmp_path / "workload_log.jsonl"))
+    assert "error" not in entry
+    assert entry["plan"]
+
+
+def test_workload_log_is_rotated(db_path, tmp_path, monkeypatch):
+    log = str(tmp_path / "workload_log.jsonl")
+    monkeypatch.setattr(index_advisor, "WORKLOAD_LOG_MAX_BYTES", 1)
+    for _ in range(3):
+        record_query(SELECT, db_path, log)
+
+    assert os.path.exists(log + ".1")
+    assert sum(1 for _ in open(log, encoding="utf-8")) == 1
+    assert len(load_workload(log)) == 2
@@ -0,0 +1,90 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from tools.artifact_registry import publish
+from tools.file_writer_tool import _load_frame, analyze_query_and_save_to_file
+from tools.materialized import SUMMARY_TABLE, install_aggregates, refresh_aggregates, verify_aggregates
+from tools.sql_templates import BUILTIN_TEMPLATES, render_builtin
+
+
+@pytest.fixture
+def db(db_path, tmp_path):
+    path = str(tmp_path / "copy.db")
+    shutil.copy(db_path, path)
+    return path
+
+
+def _phantom_courses(conn):
+    return conn.execute(
+        f"SELECT COUNT(*) FROM {SUMMARY_TABLE} WHERE course_id NOT IN (SELECT course_id FROM courses)"
+    ).fetchone()[0]
+
+
+def test_triggers_skip_enrollments_without_a_course(db):
+    install_aggregates(db, "trigger")
+    conn = sqlite3.connect(db)
+    try:
+        with conn:
+            conn.execute("INSERT INTO enrollments (learner_id, course_id, enrollment_date) "
+                         "VALUES (1, NULL, '2024-01-01')")
+            moved, course_id = conn.execute(
+                "SELECT enrollment_id, course_id FROM enrollments WHERE course_id IS NOT NULL LIMIT 1"
+            ).fetchone()
+            conn.execute("UPDATE enrollments SET course_id = NULL WHERE enrollment_id = ?", (moved,))
+            assert verify_aggregates(conn)["consistent"]
+            conn.execute("UPDATE enrollments SET course_id = ? WHERE enrollment_id = ?", (course_id, moved))
+            conn.execute("DELETE FROM enrollments WHERE course_id IS NULL")
+        assert _phantom_courses(conn) == 0
+        assert verify_aggregates(conn)["consistent"]
+    finally:
+        conn.close()
+
+
+def test_watermark_refresh_skips_enrollments_without_a_course(db):
+    install_aggregates(db, "watermark")
+    conn = sqlite3.connect(db)
+    try:
+        with conn:
+            conn.execute("INSERT INTO enrollments (learner_id, course_id, enrollment_date) "
+                         "VALUES (1, NULL, '2024-01-01')")
+        refresh_aggregates(db)
+        assert _phantom_courses(conn) == 0
+        assert verify_aggregates(conn)["consistent"]
+    finally:
+        conn.close()
+
+
+def test_deleted_course_keeps_the_count_of_its_enrollments(db):
+    install_aggregates(db, "trigger")
+    conn = sqlite3.connect(db)
+    try:
+        course = conn.execute("SELECT * FROM courses WHERE course_id IN "
+                              "(SELECT course_id FROM enrollments) LIMIT 1").fetchone()
+        with conn:
+            conn.execute("DELETE FROM courses WHERE course_id = ?", (course[0],))
+        assert verify_aggregates(conn)["consistent"]
+        with conn:
+            conn.execute(f"INSERT INTO courses VALUES ({', '.join('?' * len(course))})", course)
+        assert verify_aggregates(conn)["consistent"]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("name", list(BUILTIN_TEMPLATES))
+def test_unfiltered_builtin_analysis_reads_the_materialized_aggregates(db, tmp_path, name):
+    intent = BUILTIN_TEMPLATES[name]["intent"]
+    output = str(tmp_path / "output")
+
+    def analyze(sql):
+        return analyze_query_and_save_to_file(publish("sql", sql), intent, db, output, use_cache=False)
+
+    scanned = analyze(render_builtin(name, {}))
+    install_aggregates(db, "trigger")
+    looked_up = analyze(render_builtin(name, {}))
+    filtered = analyze(render_builtin(name, {"year": "2024"}))
+
+    assert not scanned.get("materialized") and looked_up["materialized"]
+    assert not filtered.get("materialized")
+    assert _load_frame(looked_up["handle"]).equals(_load_frame(scanned["handle"]))
@@ -0,0 +1,22 @@
+import pytest
+
+from tools.pushdown import mask_sql, strip_terminator
+
+
+@pytest.mark.parametrize("sql, stripped", [
+    ("SELECT 1;", "SELECT 1"),
+    ("SELECT 1 ; -- done\n;", "SELECT 1"),
+    ("SELECT 1 /* the end; */", "SELECT 1"),
+    ("SELECT * FROM t WHERE note = 'a -- b'", "SELECT * FROM t WHERE note = 'a -- b'"),
+    ("SELECT * FROM t WHERE note = 'a -- b';", "SELECT * FROM t WHERE note = 'a -- b'"),
+    ("SELECT '/* x */' AS c /* tail */ ;", "SELECT '/* x */' AS c"),
+])
+def test_strip_terminator_keeps_trailing_literals(sql, stripped):
+    assert strip_terminator(sql) == stripped
+
+
+def test_mask_sql_blanks_block_comments():
+    sql = "SELECT a /* FROM (b) */ FROM c"
+    masked = mask_sql(sql)
+    assert len(masked) == len(sql)
+    assert masked.split() == ["SELECT", "a", "FROM", "c"]
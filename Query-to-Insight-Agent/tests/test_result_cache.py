@@ -0,0 +1,18 @@
+from tools.result_cache import QueryResultCache, normalize_sql
+
+
+def test_keywords_and_whitespace_are_normalized():
+    assert normalize_sql("SELECT  *\nFROM learners ;") == normalize_sql("select * from learners")
+
+
+def test_double_quoted_strings_keep_their_case():
+    assert normalize_sql("SELECT * FROM learners WHERE country = \"USA\"") != \
+        normalize_sql("SELECT * FROM learners WHERE country = \"usa\"")
+    assert "'USA'" in normalize_sql("SELECT * FROM learners WHERE country = 'USA'")
+
+
+def test_double_quoted_literal_case_is_not_a_cache_hit(db_path):
+    cache = QueryResultCache()
+    cache.put('SELECT COUNT(*) FROM learners WHERE country = "USA"', db_path, ["n"], [(128,)])
+    assert cache.get('SELECT COUNT(*) FROM learners WHERE country = "usa"', db_path) is None
+    assert cache.get('select count(*) from learners where country = "USA"', db_path) == (["n"], [(128,)])
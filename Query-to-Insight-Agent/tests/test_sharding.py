@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from tools.sharding import SCHEMES, ShardingError, plan_partials
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("scheme, sql", [
+    ("date", "SELECT l.learner_id FROM learners l LEFT JOIN enrollments e "
+             "ON l.learner_id = e.learner_id WHERE e.enrollment_id IS NULL"),
+    ("date", "SELECT COUNT(*) FROM learners l LEFT JOIN enrollments e "
+             "ON l.learner_id = e.learner_id WHERE e.enrollment_id IS NULL"),
+    ("learner", "SELECT c.title, COUNT(e.enrollment_id) FROM courses c LEFT JOIN enrollments e "
+                "ON c.course_id = e.course_id GROUP BY c.title"),
+    ("date", "SELECT c.title, COUNT(*) FROM enrollments e RIGHT JOIN courses c "
+             "ON c.course_id = e.course_id GROUP BY c.title"),
+    ("date", "SELECT COUNT(*) FROM enrollments e FULL OUTER JOIN courses c ON c.course_id = e.course_id"),
+])
+def test_outer_join_null_extending_a_partitioned_table_is_rejected(conn, scheme, sql):
+    with pytest.raises(ShardingError):
+        plan_partials(sql, SCHEMES[scheme], conn, colocated=scheme == "learner")
+
+
+@pytest.mark.parametrize("scheme, sql", [
+    ("learner", "SELECT COUNT(*) FROM learners l LEFT JOIN enrollments e "
+                "ON l.learner_id = e.learner_id WHERE e.enrollment_id IS NULL"),
+    ("date", "SELECT c.title, COUNT(*) FROM enrollments e LEFT JOIN courses c "
+             "ON c.course_id = e.course_id GROUP BY c.title"),
+    ("date", "SELECT c.title, COUNT(*) FROM courses c RIGHT JOIN enrollments e "
+             "ON c.course_id = e.course_id GROUP BY c.title"),
+])
+def test_outer_join_preserving_partitioned_rows_is_planned(conn, scheme, sql):
+    assert plan_partials(sql, SCHEMES[scheme], conn, colocated=scheme == "learner").all_shards
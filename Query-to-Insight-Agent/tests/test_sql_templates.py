@@ -0,0 +1,47 @@
+import pytest
+
+from tools.sql_templates import match_template
+
+INTENTS = ["COURSE_SALES", "ENROLLMENT_ANALYSIS", "INSTRUCTOR_PERFORMANCE", "REVENUE_ANALYSIS"]
+
+
+@pytest.mark.parametrize("question", [
+    "How many instructors do we have?",
+    "How many courses are there?",
+    "Which instructor teaches the most courses?",
+    "Which learners enrolled in the most courses?",
+    "Which courses have no enrollments?",
+    "Which courses are never purchased?",
+    "What is the price of the Python course?",
+    "Which courses sold more than 100 copies?",
+    "What is the most selling course excluding Intro to Python?",
+    "Which course sold 100 copies?",
+])
+@pytest.mark.parametrize("intent", INTENTS)
+def test_questions_outside_every_signature_go_to_the_llm(db_path, question, intent):
+    assert match_template(question, intent, db_path) is None
+
+
+@pytest.mark.parametrize("question, intent, name", [
+    ("Most selling course?", "COURSE_SALES", "course_sales_by_course"),
+    ("What are the top 5 best-selling courses in 2024?", "COURSE_SALES", "course_sales_by_course"),
+    ("Show enrollments per course", "ENROLLMENT_ANALYSIS", "enrollments_by_course"),
+    ("Which instructors have the most enrollments?", "INSTRUCTOR_PERFORMANCE", "instructor_performance"),
+    ("Top 5 courses by revenue in 2024", "REVENUE_ANALYSIS", "revenue_by_course"),
+])
+def test_matching_signature_fills_the_builtin_template(db_path, question, intent, name):
+    match = match_template(question, intent, db_path)
+    assert match is not None
+    assert match["name"] == name
+    assert match["source"] == "builtin"
+
+
+def test_slots_are_rendered_into_the_builtin_sql(db_path):
+    match = match_template("Top 3 courses by revenue in 2024", "REVENUE_ANALYSIS", db_path)
+    assert match["slots"] == {"year": "2024", "limit": "3"}
+    assert "LIMIT 3" in match["sql"]
+    assert "'2024" in match["sql"]
+
+
+def test_signature_of_another_intent_does_not_match(db_path):
+    assert match_template("Top 5 courses by revenue", "COURSE_SALES", db_path) is None
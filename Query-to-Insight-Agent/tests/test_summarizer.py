@@ -0,0 +1,48 @@
+import collections
+import random
+
+from tools.artifact_registry import publish
+from tools.columnar import iter_columnar, write_columnar
+from tools.file_writer_tool import read_file_content
+from tools.summarizer import SpaceSaving, summarize_file
+
+
+def test_guaranteed_top_never_overstates_a_count():
+    rng = random.Random(7)
+    # About 400 values of similar frequency, one clearly ahead.
+    stream = [f"v{rng.randrange(400)}" for _ in range(30_000)] + ["hot"] * 200
+    rng.shuffle(stream)
+    sketch = SpaceSaving(capacity=64)
+    for value in stream:
+        sketch.add(value)
+
+    exact = collections.Counter(stream)
+    top = sketch.guaranteed_top()
+    assert all(low <= exact[value] for value, low, _ in top)
+    assert [value for value, _, _ in top] in ([], ["hot"])
+
+
+def test_uniform_column_reports_no_top_values(tmp_path):
+    path = tmp_path / "dates.txt"
+    rng = random.Random(1)
+    path.write_text("day\tn\n" + "".join(f"2023-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}\t{i}\n"
+                                         for i in range(20_000)), encoding="utf-8")
+    day = summarize_file(str(path), 500)["columns"][0]
+    assert "top" not in day
+
+
+def test_columnar_files_are_streamed_with_plain_values(tmp_path):
+    path = str(tmp_path / "result.qcol")
+    rows = [(i, f"name {i}" if i % 5 else None, i / 2, "2024-01-02" if i % 3 else None) for i in range(10_000)]
+    write_columnar(path, ["id", "name", "half", "day"], [rows])
+    columns, stream = iter_columnar(path, batch_rows=999)
+    assert columns == ["id", "name", "half", "day"]
+    assert list(stream) == rows
+    assert summarize_file(path, 500)["rows"] == len(rows)
+
+
+def test_small_handle_is_returned_whole():
+    handle = publish("table", {"columns": ["course", "total"], "rows": [("Python", 3), ("SQL", 2)]})
+    result = read_file_content(handle)
+    assert result["summarized"] is False
+    assert result["content"].splitlines() == ["course\ttotal", "Python\t3", "SQL\t2"]
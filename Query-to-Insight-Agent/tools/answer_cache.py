@@ -0,0 +1,304 @@
+# =============================================================================
+# FILE: answer_cache.py
+# PURPOSE:
+#   Whole-pipeline answer cache for root_query_to_insight_agent. A finished
+#   run stores the final insight text and the artifact files it produced,
+#   keyed by the normalized question and the database version; a repeated
+#   question is answered without running any agent.
+#
+#   Lookup order:
+#     1. exact match on the normalized question (lower-cased, punctuation and
+#        stop words dropped, number words turned into digits, plurals folded)
+#     2. near-duplicate match: cosine similarity of character-trigram vectors
+#        above a threshold, with the same set of content words after
+#        stemming, so a near-duplicate only differs in stop words, inflection
+#        or word order: "top 3 ... in India" never reuses "top 5 ... in
+#        Germany", nor "... per learner country" the answer "... per learner"
+#   Entries expire after a TTL, the least recently used are evicted beyond
+#   `max_entries`, and everything is persisted in a local SQLite file. The
+#   artifact files of cached answers are garbage collection roots of the
+#   artifact store.
+# =============================================================================
+
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+# Repository root, for the shared agent_common package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_common.artifact_store import add_gc_root
+from tools.result_cache import database_version
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_SIMILARITY = 0.9
+
+# Environment variable pointing at the cache file; defaults to output/answer_cache.db.
+PERSIST_PATH_ENV = "ANSWER_CACHE_PATH"
+DEFAULT_PERSIST_PATH = os.path.join("output", "answer_cache.db")
+
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did", "of", "for",
+    "to", "in", "on", "at", "by", "from", "with", "and", "or", "me", "my", "we", "our", "us", "you",
+    "your", "it", "its", "this", "that", "these", "those", "what", "which", "who", "how", "please",
+    "show", "tell", "give", "list", "can", "could", "would", "i", "there", "have", "has", "had",
+}
+NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "twenty": "20", "fifty": "50", "hundred": "100",
+}
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SUFFIXES = ("ing", "ed", "es")
+
+
+def _fold(token: str) -> str:
+    token = NUMBER_WORDS.get(token, token)
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question used as the exact-match key."""
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", question.lower())
+    # Stop words are matched on the raw tokens; folding "this" or "does" would miss them.
+    return " ".join(_fold(t) for t in _TOKEN.findall(text) if t not in STOP_WORDS)
+
+
+def _trigrams(normalized: str) -> dict:
+    padded = f"  {normalized} "
+    counts = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return {g: c / norm for g, c in counts.items()} if norm else {}
+
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def _guard_tokens(normalized: str) -> tuple:
+    """Stemmed content words that must all match for a near-duplicate hit."""
+    return tuple(sorted({_stem(t) for t in normalized.split()}))
+
+
+class AnswerCache:
+    """TTL + LRU cache of final pipeline answers with SQLite persistence."""
+
+    def __init__(
+        self,
+        persist_path: str = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        similarity_threshold: float = DEFAULT_SIMILARITY,
+    ):
+        self.persist_path = persist_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # None disables near-duplicate matching.
+        self.similarity_threshold = similarity_threshold
+
+        self._entries = OrderedDict()   # key -> entry dict
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "expirations": 0, "evictions": 0}
+
+        if persist_path:
+            Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+            with self._disk() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS answer_cache ("
+                    " key TEXT PRIMARY KEY, question TEXT, normalized TEXT, db_path TEXT,"
+                    " db_version TEXT, answer TEXT, artifacts TEXT, created REAL, last_used REAL)"
+                )
+                rows = conn.execute(
+                    "SELECT key, question, normalized, db_path, db_version, answer, artifacts, created"
+                    " FROM answer_cache ORDER BY last_used"
+                ).fetchall()
+            for key, question, normalized, db_path, version, answer, artifacts, created in rows:
+                self._entries[key] = self._entry(question, normalized, db_path, version,
+                                                 answer, json.loads(artifacts), created)
+
+    # -------------------------------------------------------------------------
+    @contextmanager
+    def _disk(self):
+        conn = sqlite3.connect(self.persist_path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(normalized: str, db_path: str) -> str:
+        return hashlib.sha256(f"{Path(db_path).resolve()}\n{normalized}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry(question, normalized, db_path, version, answer, artifacts, created) -> dict:
+        return {
+            "question": question,
+            "normalized": normalized,
+            "db_path": str(Path(db_path).resolve()),
+            "db_version": version,
+            "answer": answer,
+            "artifacts": artifacts,
+            "created": created,
+            "vector": _trigrams(normalized),
+            "guard": _guard_tokens(normalized),
+        }
+
+    def _drop(self, keys: list) -> None:
+        # Caller holds self._lock.
+        for key in keys:
+            self._entries.pop(key, None)
+        if self.persist_path and keys:
+            with self._disk() as conn:
+                conn.executemany("DELETE FROM answer_cache WHERE key = ?", [(k,) for k in keys])
+
+    # -------------------------------------------------------------------------
+    def get(self, question: str, db_path: str):
+        """
+        Looks up a stored answer for `question` on the current database version.
+
+        Returns:
+            dict | None: {"answer", "artifacts", "question", "match"} where match is
+            "exact" or "similar", or None on a miss.
+        """
+        normalized = normalize_question(question)
+        version = database_version(db_path)
+        resolved = str(Path(db_path).resolve())
+        now = time.time()
+
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if now - e["created"] > self.ttl_seconds]
+            stale = [k for k, e in self._entries.items()
+                     if e["db_path"] == resolved and e["db_version"] != version]
+            self._stats["expirations"] += len(expired)
+            self._drop(expired + [k for k in stale if k not in expired])
+
+            key, match = self._key(normalized, db_path), "exact"
+            entry = self._entries.get(key)
+            if entry is None and self.similarity_threshold is not None:
+                key, entry, match = self._nearest(question, normalized, resolved)
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits" if match == "exact" else "similar_hits"] += 1
+            result = {"answer": entry["answer"], "artifacts": list(entry["artifacts"]),
+                      "question": entry["question"], "match": match}
+
+        if self.persist_path:
+            with self._disk() as conn:
+                conn.execute("UPDATE answer_cache SET last_used = ? WHERE key = ?", (now, key))
+        return result
+
+    def _nearest(self, question: str, normalized: str, resolved_db: str) -> tuple:
+        # Caller holds self._lock.
+        vector = _trigrams(normalized)
+        guard = _guard_tokens(normalized)
+        best = (None, None, 0.0)
+        for key, entry in self._entries.items():
+            if entry["db_path"] != resolved_db or entry["guard"] != guard:
+                continue
+            score = sum(w * entry["vector"].get(g, 0.0) for g, w in vector.items())
+            if score >= self.similarity_threshold and score > best[2]:
+                best = (key, entry, score)
+        return best[0], best[1], "similar"
+
+    def put(self, question: str, db_path: str, answer: str, artifacts: list, version: str = None) -> None:
+        """
+        Stores the final answer of a run. `version` should be the database
+        version observed when the run started.
+        """
+        normalized = normalize_question(question)
+        key = self._key(normalized, db_path)
+        version = version or database_version(db_path)
+        now = time.time()
+        entry = self._entry(question, normalized, db_path, version, answer, list(artifacts), now)
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self._stats["stores"] += 1
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self._stats["evictions"] += len(evicted)
+            if self.persist_path:
+                with self._disk() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO answer_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, question, normalized, entry["db_path"], version, answer,
+                         json.dumps(entry["artifacts"]), now, now)
+                    )
+                    conn.executemany("DELETE FROM answer_cache WHERE key = ?", [(k,) for k in evicted])
+
+    def stats(self) -> dict:
+        """Returns hit/miss/expiration/eviction counters and the current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        hits = stats["hits"] + stats["similar_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+    def artifact_files(self) -> list:
+        """Files referenced by the cached answers."""
+        with self._lock:
+            return [file for entry in self._entries.values() for file in entry["artifacts"]]
+
+    def clear(self) -> None:
+        """Empties the cache (memory and disk)."""
+        with self._lock:
+            self._entries.clear()
+            if self.persist_path:
+                with self._disk() as conn:
+                    conn.execute("DELETE FROM answer_cache")
+
+
+# -----------------------------------------------------------------------------
+# PROCESS-WIDE CACHE
+# -----------------------------------------------------------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Returns the process-wide answer cache, persisted to $ANSWER_CACHE_PATH (or output/answer_cache.db)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(persist_path=os.environ.get(PERSIST_PATH_ENV) or DEFAULT_PERSIST_PATH)
+        return _cache
+
+
+def _cached_artifact_files() -> list:
+    # Only the cache in use; GC should not be what creates it.
+    return _cache.artifact_files() if _cache is not None else []
+
+
+add_gc_root(_cached_artifact_files)
+
+
+def configure_answer_cache(**kwargs) -> AnswerCache:
+    """Replaces the process-wide answer cache with one built from `kwargs` (see AnswerCache)."""
+    global _cache
+    with _cache_lock:
+        _cache = AnswerCache(**kwargs)
+        return _cache
@@ -0,0 +1,472 @@
+# =============================================================================
+# FILE: approximate.py
+# PURPOSE:
+#   Approximate-analytics mode for questions over the large fact tables
+#   (`enrollments`, `sessions`). The generated SQL is rewritten to read a
+#   uniform Bernoulli sample of the largest fact table it scans instead of
+#   the table itself, and its COUNT / SUM / TOTAL / AVG outputs are turned
+#   into estimates with a 95% margin of error (`<column>_moe`).
+#
+#   The sample is defined by a multiplicative hash of the rowid, so it is
+#   deterministic and the same for every query:
+#       (rowid * 2654435761) % 2^32 < rate * 2^32
+#   It is read from a maintained sample table `sample_<table>` when one is
+#   installed (the fast path: the query touches ~rate of the rows), or else
+#   filtered from the base table on the fly (still a full scan, but joins
+#   and grouping only see the sampled rows).
+#
+#   Estimators (Horvitz-Thompson for Bernoulli sampling with rate p):
+#     COUNT(x)  ->  n / p              moe = z * sqrt(n (1 - p)) / p
+#     SUM(x)    ->  s / p              moe = z * sqrt(sum(x^2) (1 - p)) / p
+#     AVG(x)    ->  mean (unscaled)    moe = z * sqrt(var(x) (1 - p) / n)
+#   An aggregate multiplied or divided by a per-group value (e.g.
+#   `c.price * COUNT(*)`) is scaled the same way. Groups with no sampled
+#   row are missing from the result.
+#
+#   Query shapes the estimators do not cover (MIN/MAX, COUNT(DISTINCT),
+#   HAVING, window functions, compound queries, the fact table inside a
+#   subquery, ...) are not sampled; the caller runs them exactly.
+#
+# USAGE:
+#   python -m tools.approximate install --rate 0.01
+#   python -m tools.approximate status
+#   python -m tools.approximate drop
+# =============================================================================
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+
+from tools.pushdown import mask_sql, split_top_level, strip_terminator
+
+# Fact tables worth sampling, and the smallest size at which sampling pays off.
+SAMPLED_TABLES = ("enrollments", "sessions")
+MIN_SAMPLE_ROWS = int(os.environ.get("APPROXIMATE_MIN_ROWS", 100_000))
+DEFAULT_SAMPLE_RATE = float(os.environ.get("APPROXIMATE_SAMPLE_RATE", 0.01))
+
+SAMPLE_PREFIX = "sample_"
+META_TABLE = "sample_meta"
+
+# Two-sided 95% normal quantile.
+CONFIDENCE = 0.95
+CONFIDENCE_Z = 1.96
+
+MARGIN_SUFFIX = "_moe"
+
+_HASH_MULTIPLIER = 2654435761
+_HASH_RANGE = 2 ** 32
+
+_AGGREGATE = re.compile(r"\b(COUNT|SUM|TOTAL|AVG|MIN|MAX|GROUP_CONCAT|STRING_AGG)\s*\(", re.I)
+_UNSUPPORTED = re.compile(r"\b(UNION|INTERSECT|EXCEPT|HAVING|OVER|WINDOW)\b", re.I)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_NOT_ALIAS = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "outer", "on",
+    "using", "group", "order", "limit", "having", "union", "window", "intersect", "except",
+}
+_LEFT_FACTOR = re.compile(r"\s*|[^+\-|<>=]*\*\s*")
+_RIGHT_FACTOR = re.compile(r"\s*(?:[*/][^+\-|<>=]*?)?(?:\s+(?:AS\s+)?\w+)?\s*", re.I)
+
+
+def margin_column(column: str) -> str:
+    """Name of the margin-of-error column that accompanies an estimated column."""
+    return f"{column}{MARGIN_SUFFIX}"
+
+
+def combine_margins(margins) -> float:
+    """Margin of error of a sum of independent estimates (root of the summed squares)."""
+    return math.sqrt(sum(float(m) ** 2 for m in margins))
+
+
+def sum_margin(sum_of_squares: float, rate: float) -> float:
+    """Margin of error of SUM(x) / rate over the sample, given SUM(x * x) (COUNT sums ones)."""
+    return CONFIDENCE_Z * math.sqrt(max(sum_of_squares or 0, 0) * (1 - rate)) / rate
+
+
+def _hash_filter(column: str, threshold: int) -> str:
+    return f"(({column} * {_HASH_MULTIPLIER}) % {_HASH_RANGE}) < {threshold}"
+
+
+def _threshold(rate: float) -> int:
+    if not 0 < rate <= 1:
+        raise ValueError("sample rate must be in (0, 1]")
+    return max(1, round(rate * _HASH_RANGE))
+
+
+# -----------------------------------------------------------------------------
+# SAMPLE TABLES (needs a writable connection)
+# -----------------------------------------------------------------------------
+def _columns(conn: sqlite3.Connection, table: str) -> list:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _trigger_ddl(table: str, columns: list, threshold: int) -> dict:
+    sample = SAMPLE_PREFIX + table
+    target = ", ".join(["rowid"] + [f'"{c}"' for c in columns])
+    values = ", ".join(["NEW.rowid"] + [f'NEW."{c}"' for c in columns])
+    keep = _hash_filter("NEW.rowid", threshold)
+    return {
+        f"trg_{sample}_insert": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{sample}_insert AFTER INSERT ON {table}
+            WHEN {keep}
+            BEGIN
+                INSERT INTO {sample} ({target}) VALUES ({values});
+            END""",
+        f"trg_{sample}_delete": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{sample}_delete AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM {sample} WHERE rowid = OLD.rowid;
+            END""",
+        f"trg_{sample}_update": f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{sample}_update AFTER UPDATE ON {table}
+            BEGIN
+                DELETE FROM {sample} WHERE rowid = OLD.rowid;
+                INSERT INTO {sample} ({target}) SELECT {values} WHERE {keep};
+            END""",
+    }
+
+
+def _drop_table_samples(conn: sqlite3.Connection, table: str) -> None:
+    sample = SAMPLE_PREFIX + table
+    for name in _trigger_ddl(table, [], 1):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(f"DROP TABLE IF EXISTS {sample}")
+
+
+def install_samples(db_path: str, rate: float = DEFAULT_SAMPLE_RATE, tables=SAMPLED_TABLES) -> dict:
+    """
+    Creates (or rebuilds) `sample_<table>` for each fact table and installs
+    the triggers that keep it equal to the hash sample on every write.
+
+    The sample table has the same schema and rowids as its source, so the
+    rewritten queries keep their joins and column references.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        rate (float): Fraction of rows to keep, e.g. 0.01.
+        tables (tuple): Fact tables to sample.
+
+    Returns:
+        dict: Status dictionary with the rate and rows kept per table.
+    """
+    threshold = _threshold(rate)
+    conn = sqlite3.connect(db_path)
+    kept = {}
+    try:
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value)")
+            for table in tables:
+                ddl = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()
+                if ddl is None:
+                    raise ValueError(f"No table named '{table}'")
+                _drop_table_samples(conn, table)
+                sample = SAMPLE_PREFIX + table
+                conn.execute(re.sub(
+                    r"^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\"?)\w+\1",
+                    f"CREATE TABLE {sample}", ddl[0], count=1, flags=re.I
+                ))
+                columns = _columns(conn, table)
+                column_list = ", ".join(f'"{c}"' for c in columns)
+                conn.execute(
+                    f"INSERT INTO {sample} (rowid, {column_list}) "
+                    f"SELECT rowid, {column_list} FROM {table} WHERE {_hash_filter('rowid', threshold)}"
+                )
+                for trigger in _trigger_ddl(table, columns, threshold).values():
+                    conn.execute(trigger)
+                kept[table] = conn.execute(f"SELECT COUNT(*) FROM {sample}").fetchone()[0]
+            conn.execute(
+                f"INSERT INTO {META_TABLE} (key, value) VALUES ('threshold', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (threshold,)
+            )
+            conn.execute(
+                f"INSERT INTO {META_TABLE} (key, value) VALUES ('tables', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (",".join(tables),)
+            )
+    finally:
+        conn.close()
+
+    return {
+        "status": "success",
+        "rate": threshold / _HASH_RANGE,
+        "rows": kept,
+        "message": f"Sample tables installed for {', '.join(tables)}."
+    }
+
+
+def drop_samples(db_path: str) -> None:
+    """Removes the sample tables, their triggers and the metadata."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            for table in SAMPLED_TABLES:
+                _drop_table_samples(conn, table)
+            conn.execute(f"DROP TABLE IF EXISTS {META_TABLE}")
+    finally:
+        conn.close()
+
+
+def installed_samples(conn: sqlite3.Connection) -> dict:
+    """Returns {"threshold", "tables"} of the installed sample tables, or {} when none are."""
+    try:
+        meta = dict(conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+    if "threshold" not in meta:
+        return {}
+    return {"threshold": int(meta["threshold"]), "tables": [t for t in str(meta.get("tables", "")).split(",") if t]}
+
+
+# -----------------------------------------------------------------------------
+# QUERY REWRITE
+# -----------------------------------------------------------------------------
+class ApproximatePlan:
+    """
+    A sampled rewrite of one query plus the estimators for its outputs.
+
+    `transform` turns the raw result of `sql` (the original columns followed
+    by helper aggregates) into estimates with margin-of-error columns.
+    """
+
+    def __init__(self, sql: str, table: str, rate: float, source: str, output_count: int, estimators: list):
+        self.sql = sql
+        self.table = table
+        self.rate = rate
+        self.source = source
+        self.output_count = output_count
+        # (output position, aggregate, helper positions)
+        self.estimators = estimators
+
+    @property
+    def kind(self) -> str:
+        return "aggregate" if self.estimators else "rows"
+
+    def describe(self) -> dict:
+        """Summary published with the result and shown to the insight step."""
+        return {
+            "sample_rate": round(self.rate, 6),
+            "table": self.table,
+            "source": self.source,
+            "kind": self.kind,
+            "confidence": CONFIDENCE,
+        }
+
+    def transform(self, columns: list, batches) -> tuple:
+        """
+        Returns (columns, batches) with estimates in place of the sample
+        aggregates and a `<column>_moe` column after each estimated column.
+        """
+        if not self.estimators:
+            return columns, batches
+
+        estimated = {position: (aggregate, helpers) for position, aggregate, helpers in self.estimators}
+        out_columns = []
+        for position, name in enumerate(columns[:self.output_count]):
+            out_columns.append(name)
+            if position in estimated:
+                out_columns.append(margin_column(name))
+
+        def rows():
+            for batch in batches:
+                out = []
+                for row in batch:
+                    values = []
+                    for position in range(self.output_count):
+                        if position in estimated:
+                            aggregate, helpers = estimated[position]
+                            values.extend(self._estimate(row[position], aggregate, [row[h] for h in helpers]))
+                        else:
+                            values.append(row[position])
+                    out.append(tuple(values))
+                yield out
+
+        return out_columns, rows()
+
+    def _estimate(self, value, aggregate: str, helpers: list) -> tuple:
+        p = self.rate
+        if value is None:
+            return None, None
+        raw = helpers[0]
+        if aggregate == "COUNT":
+            margin = sum_margin(raw, p)
+        elif aggregate in ("SUM", "TOTAL"):
+            margin = sum_margin(helpers[1], p)
+        else:  # AVG
+            n, mean, mean_sq = helpers[2] or 0, raw or 0, helpers[1] or 0
+            margin = CONFIDENCE_Z * math.sqrt(max(mean_sq - mean * mean, 0) * (1 - p) / n) if n else 0.0
+        # Per-group factor of `factor * AGG(...)`, recovered from the raw aggregate.
+        factor = abs(value / raw) if raw else 1.0
+        moe = round(margin * factor, 6)
+        if aggregate == "AVG":
+            return value, moe
+        estimate = value / p
+        if aggregate == "COUNT" and isinstance(value, int):
+            estimate = int(round(estimate))
+        return estimate, moe
+
+
+def _table_rows(conn: sqlite3.Connection, table: str) -> int:
+    # MAX(rowid) is an O(log n) stand-in for COUNT(*) on these append-only tables.
+    return conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+
+
+def _sample_source(conn: sqlite3.Connection, table: str, threshold: int) -> tuple:
+    """Returns (sql source, effective threshold, source kind) for sampling `table`."""
+    installed = installed_samples(conn)
+    if table in installed.get("tables", []) and threshold <= installed["threshold"]:
+        sample = SAMPLE_PREFIX + table
+        if threshold == installed["threshold"]:
+            return sample, threshold, "sample_table"
+        # The hash sample at a lower rate is a subset of the installed one.
+        return f"(SELECT * FROM {sample} WHERE {_hash_filter('rowid', threshold)})", threshold, "sample_table"
+    return f"(SELECT * FROM {table} WHERE {_hash_filter('rowid', threshold)})", threshold, "inline"
+
+
+def _aggregate_item(item: str):
+    """
+    Parses one select-list item.
+
+    Returns:
+        tuple | None | False: (aggregate, argument) for an estimable aggregate,
+        None for a plain column, False for an aggregate the estimators cannot handle.
+    """
+    masked = mask_sql(item, nested=False)
+    calls = list(_AGGREGATE.finditer(masked))
+    if not calls:
+        return None
+    if len(calls) > 1:
+        return False
+    call = calls[0]
+    aggregate = call.group(1).upper()
+    if aggregate not in ("COUNT", "SUM", "TOTAL", "AVG"):
+        return False
+
+    # Matching parenthesis of the call
+    depth, end = 0, None
+    for i in range(call.end() - 1, len(masked)):
+        if masked[i] == "(":
+            depth += 1
+        elif masked[i] == ")":
+            depth -= 1
+            if depth == 0:
+                end = i + 1
+                break
+    if end is None:
+        return False
+    argument = item[call.end():end - 1].strip()
+    if re.match(r"DISTINCT\b", argument, re.I):
+        return False
+
+    # Only `AGG(...)`, `factor * AGG(...)`, `AGG(...) * factor` or `AGG(...) / factor`
+    top = mask_sql(item)
+    if not _LEFT_FACTOR.fullmatch(top[:call.start()]) or not _RIGHT_FACTOR.fullmatch(top[end:]):
+        return False
+    return aggregate, argument
+
+
+def plan_approximate(conn: sqlite3.Connection, sql_query: str, sample_rate: float = None):
+    """
+    Rewrites `sql_query` to run over a sample of its largest fact table.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database (read-only is fine).
+        sql_query (str): The generated SQL.
+        sample_rate (float): Fraction of rows to sample. Default: the installed
+            sample tables' rate, or DEFAULT_SAMPLE_RATE.
+
+    Returns:
+        ApproximatePlan | None: The plan, or None when the query has to run
+        exactly (unsupported shape, no large fact table).
+    """
+    sql = strip_terminator(sql_query)
+    masked = mask_sql(sql)
+    if not re.match(r"\s*SELECT\b", masked, re.I) or _UNSUPPORTED.search(masked):
+        return None
+
+    # Largest fact table referenced at the top level
+    refs = [m for m in _TABLE_REF.finditer(masked) if m.group(1).lower() in SAMPLED_TABLES]
+    if not refs:
+        return None
+    sizes = {m.group(1).lower(): _table_rows(conn, m.group(1)) for m in refs}
+    table = max(sizes, key=sizes.get)
+    if sizes[table] < MIN_SAMPLE_ROWS:
+        return None
+    table_refs = [m for m in refs if m.group(1).lower() == table]
+    nested_refs = [
+        m for m in _TABLE_REF.finditer(mask_sql(sql, nested=False)) if m.group(1).lower() == table
+    ]
+    if len(table_refs) != 1 or len(nested_refs) != 1:
+        # Self-joins and subqueries over the same table would mix sampled and exact rows.
+        return None
+    ref = table_refs[0]
+
+    # Select list
+    select = re.match(r"\s*SELECT\s+(DISTINCT\s+)?", masked, re.I)
+    from_clause = re.search(r"\bFROM\b", masked, re.I)
+    items = split_top_level(sql[select.end():from_clause.start()], masked[select.end():from_clause.start()])
+    parsed = [_aggregate_item(item) for item in items]
+    if any(p is False for p in parsed):
+        return None
+    has_group_by = re.search(r"\bGROUP\s+BY\b", masked, re.I) is not None
+    aggregates = [(i, p) for i, p in enumerate(parsed) if p]
+    if aggregates and (select.group(1) or any(re.search(r"\*\s*$", item) and "(" not in item for item in items)):
+        return None
+    if has_group_by and not aggregates:
+        # Grouping without aggregates lists groups, and a sample misses some.
+        return None
+
+    installed = installed_samples(conn)
+    if sample_rate is None:
+        sample_rate = installed["threshold"] / _HASH_RANGE if installed else DEFAULT_SAMPLE_RATE
+    source, threshold, source_kind = _sample_source(conn, table, _threshold(sample_rate))
+
+    # Helper aggregates go after the original columns so their positions do not move.
+    helpers, estimators = [], []
+    for position, (aggregate, argument) in aggregates:
+        first = len(items) + len(helpers)
+        if aggregate == "COUNT":
+            helpers.append(f"COUNT({argument})")
+            estimators.append((position, aggregate, [first]))
+        elif aggregate in ("SUM", "TOTAL"):
+            helpers += [f"TOTAL({argument})", f"TOTAL(({argument}) * ({argument}))"]
+            estimators.append((position, aggregate, [first, first + 1]))
+        else:
+            helpers += [f"AVG({argument})", f"AVG(({argument}) * ({argument}))", f"COUNT({argument})"]
+            estimators.append((position, aggregate, [first, first + 1, first + 2]))
+
+    alias = ref.group(2) if ref.group(2) and ref.group(2).lower() not in _NOT_ALIAS else ref.group(1)
+    reference_end = ref.end(2) if ref.group(2) and ref.group(2).lower() not in _NOT_ALIAS else ref.end(1)
+    rewritten = sql[:ref.start(1)] + f"{source} AS {alias}" + sql[reference_end:]
+    if helpers:
+        helper_sql = "".join(f",\n       {h} AS __approx_{i}" for i, h in enumerate(helpers))
+        cut = from_clause.start()
+        rewritten = rewritten[:cut].rstrip() + helper_sql + "\n" + rewritten[cut:]
+
+    return ApproximatePlan(
+        rewritten, table, threshold / _HASH_RANGE, source_kind, len(items), estimators
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the sample tables used by approximate mode.")
+    parser.add_argument("command", choices=["install", "status", "drop"])
+    parser.add_argument("--db", default="datatechcon.db", help="Path to the SQLite database.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_SAMPLE_RATE, help="Sample rate for 'install'.")
+    parser.add_argument("--tables", nargs="+", default=list(SAMPLED_TABLES), help="Fact tables to sample.")
+    args = parser.parse_args()
+
+    if args.command == "install":
+        print(install_samples(args.db, args.rate, tuple(args.tables)))
+    elif args.command == "status":
+        connection = sqlite3.connect(args.db)
+        try:
+            print(installed_samples(connection) or "No sample tables installed.")
+        finally:
+            connection.close()
+    else:
+        drop_samples(args.db)
+        print("Sample tables dropped.")
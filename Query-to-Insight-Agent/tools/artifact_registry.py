@@ -0,0 +1,115 @@
+# =============================================================================
+# FILE: artifact_registry.py
+# PURPOSE:
+#   In-process registry used to hand results from one pipeline stage to the
+#   next without a disk round-trip. A tool publishes a value (SQL text, a
+#   result table, an analysis DataFrame) and gets back an opaque handle such
+#   as "artifact://sql/3f2c9e..."; later tools resolve the handle to the
+#   value itself. The file written for audit (if any) is remembered alongside
+#   so a handle can always fall back to disk. Those files are garbage
+#   collection roots of the artifact store while their handle is held.
+# =============================================================================
+
+import os
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+# Repository root, for the shared agent_common package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_common.artifact_store import add_gc_root
+
+HANDLE_PREFIX = "artifact://"
+
+# Oldest artifacts are dropped once this many are held.
+DEFAULT_MAX_ARTIFACTS = 512
+
+_artifacts = OrderedDict()
+_lock = threading.Lock()
+_max_artifacts = DEFAULT_MAX_ARTIFACTS
+
+
+def is_handle(value) -> bool:
+    """Returns True if `value` is an artifact handle rather than a file path."""
+    return isinstance(value, str) and value.strip().startswith(HANDLE_PREFIX)
+
+
+def publish(kind: str, value, file: str = None, metadata: dict = None) -> str:
+    """
+    Registers a value and returns its handle.
+
+    Args:
+        kind (str): Artifact kind, e.g. "sql", "table", "analysis", "text".
+        value: The in-memory value (str, {"columns", "rows"} dict, DataFrame, ...).
+               May be None when only the file should be referenced.
+        file (str): Path of the write-through copy on disk, if one was written.
+        metadata (dict): Extra information for downstream tools.
+
+    Returns:
+        str: Handle of the form "artifact://<kind>/<id>".
+    """
+    handle = f"{HANDLE_PREFIX}{kind}/{uuid.uuid4().hex}"
+    with _lock:
+        _artifacts[handle] = {
+            "kind": kind,
+            "value": value,
+            "file": file,
+            "metadata": dict(metadata or {}),
+        }
+        while len(_artifacts) > _max_artifacts:
+            _artifacts.popitem(last=False)
+    return handle
+
+
+def resolve(handle: str) -> dict:
+    """
+    Looks up a handle.
+
+    Returns:
+        dict: {"kind", "value", "file", "metadata"}.
+
+    Raises:
+        KeyError: If the handle is unknown or has been evicted.
+    """
+    handle = handle.strip()
+    with _lock:
+        artifact = _artifacts.get(handle)
+        if artifact is None:
+            raise KeyError(f"Unknown or expired artifact handle: {handle}")
+        _artifacts.move_to_end(handle)
+        return artifact
+
+
+def release(handle: str) -> None:
+    """Drops a handle so its value can be garbage-collected."""
+    with _lock:
+        _artifacts.pop(handle.strip(), None)
+
+
+def configure(max_artifacts: int = DEFAULT_MAX_ARTIFACTS) -> None:
+    """Changes how many artifacts are kept before the oldest are dropped."""
+    global _max_artifacts
+    with _lock:
+        _max_artifacts = max(1, int(max_artifacts))
+        while len(_artifacts) > _max_artifacts:
+            _artifacts.popitem(last=False)
+
+
+def files() -> list:
+    """Paths of the files behind the handles currently held."""
+    with _lock:
+        return [artifact["file"] for artifact in _artifacts.values() if artifact["file"]]
+
+
+add_gc_root(files)
+
+
+def stats() -> dict:
+    """Returns how many artifacts of each kind are currently held."""
+    with _lock:
+        counts = {}
+        for artifact in _artifacts.values():
+            counts[artifact["kind"]] = counts.get(artifact["kind"], 0) + 1
+        return {"artifacts": len(_artifacts), "by_kind": counts, "max_artifacts": _max_artifacts}
@@ -0,0 +1,102 @@
+# =============================================================================
+# FILE: async_tools.py
+# PURPOSE:
+#   Non-blocking variants of the tools in file_writer_tool.py. Each one is a
+#   coroutine with the same name, signature, docstring and return dict as
+#   the synchronous tool; the blocking SQLite / pandas / file work runs on a
+#   bounded, process-wide thread pool so the ADK event loop keeps serving
+#   other sessions while a slow query runs. (SQLite and most pandas I/O
+#   release the GIL, so threads overlap well; a process pool would have to
+#   pickle every result and could not share the artifact registry.)
+#
+#   Agents import the tools from here instead of file_writer_tool.
+# =============================================================================
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import file_writer_tool
+
+# Environment variable overriding the number of worker threads.
+WORKERS_ENV = "ASYNC_TOOL_WORKERS"
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats = {"submitted": 0, "completed": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get(WORKERS_ENV, DEFAULT_WORKERS))
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tool")
+        return _executor
+
+
+def _tracked(func, *args, **kwargs):
+    with _executor_lock:
+        _stats["in_flight"] += 1
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    try:
+        return func(*args, **kwargs)
+    finally:
+        with _executor_lock:
+            _stats["in_flight"] -= 1
+            _stats["completed"] += 1
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking callable on the tool thread pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    with _executor_lock:
+        _stats["submitted"] += 1
+    # Copy the caller's context so context variables (e.g. the run id of
+    # agent_common/artifact_store.py) are visible on the worker thread.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(context.run, _tracked, func, *args, **kwargs)
+    )
+
+
+def _offload(func):
+    """Wraps a synchronous tool as a coroutine that runs it on the thread pool."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+    return wrapper
+
+
+def configure_tool_pool(max_workers: int) -> None:
+    """Replaces the thread pool with one of `max_workers` threads (running tasks finish first)."""
+    global _executor
+    with _executor_lock:
+        old, _executor = _executor, ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="tool")
+    if old is not None:
+        old.shutdown(wait=True)
+
+
+def tool_pool_stats() -> dict:
+    """Returns submitted / completed / in-flight counters of the tool thread pool."""
+    with _executor_lock:
+        stats = dict(_stats)
+        stats["workers"] = _executor._max_workers if _executor is not None else None
+    return stats
+
+
+# -----------------------------------------------------------------------------
+# ASYNC TOOL VARIANTS
+# -----------------------------------------------------------------------------
+write_sql_to_file = _offload(file_writer_tool.write_sql_to_file)
+fetch_data_and_save_to_file = _offload(file_writer_tool.fetch_data_and_save_to_file)
+analyze_data_and_save_to_file = _offload(file_writer_tool.analyze_data_and_save_to_file)
+analyze_query_and_save_to_file = _offload(file_writer_tool.analyze_query_and_save_to_file)
+lookup_intent_and_save_to_file = _offload(file_writer_tool.lookup_intent_and_save_to_file)
+generate_insights_and_save_to_file = _offload(file_writer_tool.generate_insights_and_save_to_file)
+read_file_content = _offload(file_writer_tool.read_file_content)
+save_text_file = _offload(file_writer_tool.save_text_file)
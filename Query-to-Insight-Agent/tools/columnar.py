@@ -0,0 +1,429 @@
+# =============================================================================
+# FILE: columnar.py
+# PURPOSE:
+#   Typed, memory-mappable columnar result format (".qcol") used between the
+#   data-fetch, analyze and insight tools as an alternative to untyped TSV.
+#
+#   Layout (little-endian):
+#     8 bytes   magic  b"QCOL1\0\0\0"
+#     8 bytes   header length (uint64)
+#     N bytes   JSON header: row count + per-column name, type and buffer spans
+#     ...       column buffers, each aligned to 64 bytes
+#
+#   Column types:
+#     int64   -> int64 values (+ uint8 null mask when the column has NULLs)
+#     float64 -> float64 values (NULL stored as NaN)
+#     date    -> int64 days since 1970-01-01 (+ null mask); ISO 'YYYY-MM-DD' text
+#     text    -> int64 offsets (rows + 1) and UTF-8 bytes, Arrow-style
+#     category -> int32 codes + dictionary (offsets/bytes) for low-cardinality text
+#
+#   Numeric buffers are returned as zero-copy views over a read-only memmap.
+#   numpy and pandas are imported on first use (agent_common/lazy.py).
+# =============================================================================
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from array import array
+
+# Repository root, for the shared agent_common package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_common.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+COLUMNAR_SUFFIX = ".qcol"
+
+_MAGIC = b"QCOL1\0\0\0"
+_ALIGN = 64
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def is_columnar_file(path: str) -> bool:
+    """Returns True if `path` points at a .qcol columnar artifact."""
+    return str(path).endswith(COLUMNAR_SUFFIX)
+
+
+# -----------------------------------------------------------------------------
+# WRITING
+# -----------------------------------------------------------------------------
+class _ColumnBuilder:
+    """Accumulates one column's values in a compact typed buffer."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.kind = None          # None until the first non-NULL value is seen
+        self.values = None
+        self.nulls = array("b")
+
+    def _become(self, kind: str) -> None:
+        if self.kind is None:
+            self.kind = kind
+            self.values = array("q" if kind == "int64" else "d") if kind != "text" else []
+            # Back-fill placeholders for the NULLs seen so far.
+            filler = 0 if kind == "int64" else (float("nan") if kind == "float64" else "")
+            self.values.extend([filler] * len(self.nulls))
+        elif self.kind == "int64" and kind == "float64":
+            self.values = array("d", (float("nan") if isnull else v for v, isnull in zip(self.values, self.nulls)))
+            self.kind = "float64"
+        elif kind == "text" and self.kind != "text":
+            self.values = ["" if isnull else str(v) for v, isnull in zip(self.values, self.nulls)]
+            self.kind = "text"
+
+    def extend(self, values) -> None:
+        # Fast path: a NULL-free batch that already matches the column type.
+        if self.kind is not None and None not in values:
+            try:
+                if self.kind == "text":
+                    if not all(type(v) is str for v in values):
+                        raise TypeError
+                    self.values.extend(values)
+                else:
+                    self.values.extend(array(self.values.typecode, values))
+                self.nulls.frombytes(bytes(len(values)))
+                return
+            except TypeError:
+                pass
+
+        for value in values:
+            if value is None:
+                self.nulls.append(1)
+                if self.kind == "int64":
+                    self.values.append(0)
+                elif self.kind == "float64":
+                    self.values.append(float("nan"))
+                elif self.kind == "text":
+                    self.values.append("")
+                continue
+
+            if isinstance(value, bool) or isinstance(value, int):
+                kind = "int64" if self.kind in (None, "int64") else self.kind
+            elif isinstance(value, float):
+                kind = "float64" if self.kind != "text" else "text"
+            else:
+                kind = "text"
+            if kind != self.kind:
+                self._become(kind)
+
+            self.nulls.append(0)
+            if self.kind == "text":
+                self.values.append(value if isinstance(value, str) else str(value))
+            else:
+                self.values.append(value)
+
+    def finish(self) -> tuple:
+        """Returns (type, {buffer_name: numpy array}) for serialization."""
+        nulls = np.frombuffer(self.nulls, dtype=np.int8).astype(np.uint8) if len(self.nulls) else np.zeros(0, np.uint8)
+        has_nulls = bool(nulls.any())
+
+        if self.kind is None:
+            # Every value was NULL: keep it as an all-NULL float column.
+            return "float64", {"values": np.full(len(self.nulls), np.nan)}
+
+        if self.kind == "float64":
+            return "float64", {"values": np.frombuffer(self.values, dtype=np.float64)}
+
+        if self.kind == "int64":
+            buffers = {"values": np.frombuffer(self.values, dtype=np.int64)}
+            if has_nulls:
+                buffers["mask"] = nulls
+            return "int64", buffers
+
+        # Text column: promote to a date column if every non-NULL value is ISO formatted.
+        if all(isnull or _ISO_DATE.match(v) for v, isnull in zip(self.values, self.nulls)):
+            try:
+                dates = np.array(["NaT" if isnull else v for v, isnull in zip(self.values, self.nulls)],
+                                 dtype="datetime64[D]")
+                buffers = {"values": np.where(nulls.astype(bool), 0, dates.astype(np.int64))}
+                if has_nulls:
+                    buffers["mask"] = nulls
+                return "date", buffers
+            except ValueError:
+                pass
+
+        # Low-cardinality text (course titles, countries, ...) is dictionary encoded.
+        distinct = {}
+        codes = np.fromiter((distinct.setdefault(v, len(distinct)) for v in self.values),
+                            dtype=np.int32, count=len(self.values))
+        if len(distinct) <= max(1, len(self.values) // 2):
+            buffers = {"codes": codes}
+            buffers.update(_encode_strings(list(distinct)))
+            if has_nulls:
+                buffers["mask"] = nulls
+            return "category", buffers
+
+        buffers = _encode_strings(self.values)
+        if has_nulls:
+            buffers["mask"] = nulls
+        return "text", buffers
+
+
+def _encode_strings(values: list) -> dict:
+    """Packs strings into Arrow-style int64 offsets plus one UTF-8 byte buffer."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {"offsets": offsets, "data": np.frombuffer(b"".join(encoded), dtype=np.uint8)}
+
+
+def _decode_strings(offsets: np.ndarray, raw: bytes, count: int) -> list:
+    """Inverse of `_encode_strings`."""
+    bounds = offsets.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(count)]
+
+
+def _data_start(header_length: int) -> int:
+    """Offset of the first column buffer: the magic and header, rounded up to the alignment."""
+    return -(-(len(_MAGIC) + 8 + header_length) // _ALIGN) * _ALIGN
+
+
+def _write_file(path: str, row_count: int, columns: list) -> None:
+    """Serializes `columns` ([(name, type, buffers)]) into a .qcol file at `path`."""
+    header = {"rows": row_count, "columns": []}
+    layout = []
+    offset = 0
+    for name, kind, buffers in columns:
+        spans = {}
+        for buffer_name, buf in buffers.items():
+            raw = np.ascontiguousarray(buf)
+            spans[buffer_name] = [offset, raw.nbytes, raw.dtype.str]
+            layout.append((offset, raw))
+            offset += -(-raw.nbytes // _ALIGN) * _ALIGN
+        header["columns"].append({"name": name, "type": kind, "buffers": spans})
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _data_start(len(header_bytes))
+
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for rel_offset, raw in layout:
+            f.seek(data_start + rel_offset)
+            f.write(raw.tobytes())
+        f.truncate(data_start + offset)
+
+
+def write_columnar(path: str, columns: list, batches) -> int:
+    """
+    Writes row batches (as produced by `cursor.fetchmany`) to a .qcol file.
+
+    Column types are inferred from the SQLite values themselves (INTEGER,
+    REAL, TEXT; ISO date text becomes a date column), so no type information
+    is lost the way it is with `str(item)` in TSV.
+
+    Args:
+        path (str): Destination file path (should end with ".qcol").
+        columns (list): Column names from `cursor.description`.
+        batches: Iterable of row lists.
+
+    Returns:
+        int: Number of rows written.
+    """
+    builders = [_ColumnBuilder(name) for name in columns]
+    row_count = 0
+    for batch in batches:
+        if not batch:
+            continue
+        for builder, values in zip(builders, zip(*batch)):
+            builder.extend(values)
+        row_count += len(batch)
+
+    finished = []
+    for builder in builders:
+        kind, buffers = builder.finish()
+        finished.append((builder.name, kind, buffers))
+    _write_file(path, row_count, finished)
+    return row_count
+
+
+def write_columnar_frame(df: pd.DataFrame, path: str) -> int:
+    """
+    Writes a pandas DataFrame to a .qcol file, keeping numeric and date dtypes.
+
+    Args:
+        df (pd.DataFrame): Frame to serialize.
+        path (str): Destination file path.
+
+    Returns:
+        int: Number of rows written.
+    """
+    finished = []
+    for name in df.columns:
+        series = df[name]
+        mask = series.isna().to_numpy(dtype=np.uint8)
+        buffers = {}
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+            buffers["values"] = series.fillna(0).to_numpy(dtype=np.int64)
+            kind = "int64"
+        elif pd.api.types.is_float_dtype(series):
+            buffers["values"] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            kind = "float64"
+            mask = None
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            days = series.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+            buffers["values"] = np.where(mask.astype(bool), 0, days)
+            kind = "date"
+        else:
+            builder = _ColumnBuilder(str(name))
+            builder.extend(None if isnull else str(v) for v, isnull in zip(series.tolist(), mask))
+            kind, buffers = builder.finish()
+            mask = None
+        if mask is not None and mask.any():
+            buffers["mask"] = mask
+        finished.append((str(name), kind, buffers))
+
+    _write_file(path, len(df), finished)
+    return len(df)
+
+
+# -----------------------------------------------------------------------------
+# READING
+# -----------------------------------------------------------------------------
+def read_columnar_header(path: str) -> dict:
+    """Reads only the JSON header of a .qcol file (row count, column names and types)."""
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a columnar result file")
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length).decode("utf-8"))
+    header["data_start"] = _data_start(length)
+    return header
+
+
+def read_columnar(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads a .qcol file as a DataFrame backed by a read-only memory map.
+
+    Numeric columns without NULLs are zero-copy views over the file; text
+    columns are decoded into Python strings.
+
+    Args:
+        path (str): Path to the .qcol file.
+        columns (list): Optional subset of column names to load.
+
+    Returns:
+        pd.DataFrame: The typed result table.
+    """
+    header = read_columnar_header(path)
+    data_start = header["data_start"]
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def view(span):
+        start, nbytes, dtype = span
+        return np.frombuffer(mm, dtype=np.dtype(dtype), count=nbytes // np.dtype(dtype).itemsize,
+                             offset=data_start + start)
+
+    data = {}
+    for col in header["columns"]:
+        if columns is not None and col["name"] not in columns:
+            continue
+        spans = col["buffers"]
+        mask = view(spans["mask"]).astype(bool) if "mask" in spans else None
+
+        if col["type"] == "float64":
+            data[col["name"]] = view(spans["values"])
+        elif col["type"] == "int64":
+            values = view(spans["values"])
+            data[col["name"]] = values if mask is None else pd.arrays.IntegerArray(values.copy(), mask)
+        elif col["type"] == "date":
+            dates = view(spans["values"]).astype("datetime64[D]").astype("datetime64[s]")
+            if mask is not None:
+                dates[mask] = np.datetime64("NaT")
+            data[col["name"]] = dates
+        else:
+            offsets = view(spans["offsets"])
+            raw = view(spans["data"]).tobytes() if spans["data"][1] else b""
+            strings = _decode_strings(offsets, raw, len(offsets) - 1)
+            if col["type"] == "category":
+                codes = view(spans["codes"])
+                if mask is not None:
+                    codes = np.where(mask, -1, codes)
+                data[col["name"]] = pd.Categorical.from_codes(codes, categories=strings)
+            else:
+                values = np.array(strings, dtype=object)
+                if mask is not None:
+                    values[mask] = None
+                data[col["name"]] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+def iter_columnar(path: str, batch_rows: int = 8192) -> tuple:
+    """
+    (columns, row iterator) of a .qcol file, read `batch_rows` rows at a time
+    from the memory map, so a large result is never loaded whole. Values are
+    plain Python: NULL / NaN are None and dates ISO 'YYYY-MM-DD' text.
+    """
+    header = read_columnar_header(path)
+
+    def rows():
+        data_start = header["data_start"]
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+
+        def view(span):
+            start, nbytes, dtype = span
+            return np.frombuffer(mm, dtype=np.dtype(dtype), count=nbytes // np.dtype(dtype).itemsize,
+                                 offset=data_start + start)
+
+        readers = []
+        for col in header["columns"]:
+            spans = col["buffers"]
+            mask = view(spans["mask"]) if "mask" in spans else None
+            if col["type"] in ("text", "category"):
+                offsets = view(spans["offsets"])
+                raw = view(spans["data"]) if spans["data"][1] else np.zeros(0, dtype=np.uint8)
+                if col["type"] == "category":
+                    # The dictionary is small; only the codes are read per batch.
+                    readers.append((col["type"], _decode_strings(offsets, raw.tobytes(), len(offsets) - 1),
+                                    view(spans["codes"]), mask))
+                else:
+                    readers.append((col["type"], offsets, raw, mask))
+            else:
+                readers.append((col["type"], None, view(spans["values"]), mask))
+
+        for lo in range(0, header["rows"], batch_rows):
+            hi = min(lo + batch_rows, header["rows"])
+            batch = []
+            for kind, extra, values, mask in readers:
+                if kind == "text":
+                    bounds = extra[lo:hi + 1].tolist()
+                    chunk = values[bounds[0]:bounds[-1]].tobytes()
+                    base = bounds[0]
+                    cells = [chunk[bounds[i] - base:bounds[i + 1] - base].decode("utf-8") for i in range(hi - lo)]
+                elif kind == "category":
+                    cells = [extra[code] if code >= 0 else None for code in values[lo:hi].tolist()]
+                elif kind == "date":
+                    cells = np.datetime_as_string(values[lo:hi].astype("datetime64[D]")).tolist()
+                elif kind == "float64":
+                    cells = [None if v != v else v for v in values[lo:hi].tolist()]
+                else:
+                    cells = values[lo:hi].tolist()
+                if mask is not None:
+                    cells = [None if null else cell for cell, null in zip(cells, mask[lo:hi].tolist())]
+                batch.append(cells)
+            yield from zip(*batch)
+
+    return [col["name"] for col in header["columns"]], rows()
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Reads a result table written by the tools, either .qcol or tab-separated text."""
+    if is_columnar_file(path):
+        return read_columnar(path)
+    return pd.read_csv(path, sep="\t")
+
+
+def result_suffix(output_format: str) -> str:
+    """Maps an `output_format` tool argument to the result file suffix."""
+    fmt = (output_format or "tsv").lower().strip()
+    if fmt in ("columnar", "qcol"):
+        return COLUMNAR_SUFFIX
+    if fmt in ("tsv", "txt", "text"):
+        return ".txt"
+    raise ValueError(f"Unsupported output_format '{output_format}'. Use 'tsv' or 'columnar'.")
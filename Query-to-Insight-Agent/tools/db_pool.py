@@ -0,0 +1,208 @@
+# =============================================================================
+# FILE: db_pool.py
+# PURPOSE:
+#   Shared pool of read-only, tuned SQLite connections for the Query-to-Insight
+#   data-access tools. Connections are opened once with a `mode=ro` URI, get
+#   their PRAGMAs applied once, keep a bounded prepared-statement cache, and
+#   are reused across tool calls and threads instead of reconnecting per call.
+# =============================================================================
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import quote
+
+# Defaults applied to every pooled connection.
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHED_STATEMENTS = 128
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024      # bytes
+DEFAULT_CACHE_SIZE_KIB = 64 * 1024         # 64 MiB page cache per connection
+DEFAULT_ACQUIRE_TIMEOUT = 30.0             # seconds
+
+
+class ConnectionPool:
+    """
+    Bounded pool of read-only SQLite connections to a single database file.
+
+    Connections are created lazily up to `max_size`; once all of them are in
+    use, callers block until one is returned. Hit/miss and wait-time counters
+    are kept so the pool can be sized from real traffic.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = DEFAULT_POOL_SIZE,
+        cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB,
+        wal: bool = False,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT
+    ):
+        self.db_path = str(Path(db_path).resolve())
+        self.max_size = max(1, int(max_size))
+        self.cached_statements = cached_statements
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._all = []
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+        if wal:
+            enable_wal(self.db_path)
+
+    # -------------------------------------------------------------------------
+    def _open(self) -> sqlite3.Connection:
+        if not Path(self.db_path).exists():
+            raise FileNotFoundError(f"Database file not found: {self.db_path}")
+
+        conn = sqlite3.connect(
+            f"file:{quote(self.db_path)}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Takes a connection from the pool, opening one or waiting if necessary."""
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats["hits"] += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = len(self._all) < self.max_size
+            if can_open:
+                # Reserve the slot before opening so concurrent callers respect max_size.
+                self._all.append(None)
+        if can_open:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._lock:
+                    self._all.remove(None)
+                raise
+            with self._lock:
+                self._all[self._all.index(None)] = conn
+                self._stats["misses"] += 1
+            return conn
+
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No pooled connection to {self.db_path} became free within {self.acquire_timeout}s"
+            )
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["waits"] += 1
+            self._stats["wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Returns a connection to the pool, ending any transaction left open."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that acquires a pooled connection and always releases it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        """Returns pool size and hit/miss/wait counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            size = sum(1 for c in self._all if c is not None)
+        stats.update({
+            "db_path": self.db_path,
+            "max_size": self.max_size,
+            "size": size,
+            "idle": self._idle.qsize(),
+            "in_use": size - self._idle.qsize(),
+        })
+        return stats
+
+    def close(self) -> None:
+        """Closes every idle connection and forgets the ones still in use."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._all = []
+
+
+# -----------------------------------------------------------------------------
+# MODULE-LEVEL REGISTRY (one pool per database file)
+# -----------------------------------------------------------------------------
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **kwargs) -> ConnectionPool:
+    """
+    Returns the shared pool for `db_path`, creating it on first use.
+
+    Keyword arguments are only applied when the pool is created.
+    """
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> dict:
+    """Returns the stats of every pool created in this process, keyed by database path."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.db_path: pool.stats() for pool in pools}
+
+
+def close_pools() -> None:
+    """Closes and drops every pool (used by tests, benchmarks and after the DB is rebuilt)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def enable_wal(db_path: str) -> str:
+    """
+    Switches the database to WAL journal mode so readers never block on a writer.
+
+    WAL is a persistent property of the file, so this only needs a writable
+    connection once. Returns the resulting journal mode.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    finally:
+        conn.close()
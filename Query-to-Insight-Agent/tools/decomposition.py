@@ -0,0 +1,141 @@
+# =============================================================================
+# FILE: decomposition.py
+# PURPOSE:
+#   Splits a compound question ("top courses and best instructors by revenue
+#   this year") into sub-questions with one intent each, so the compound
+#   agent (agents/compound/) can answer them in parallel branches.
+#
+#   The question is cut at conjunctions ("and", "also", "as well as", ";",
+#   ","), but only where both sides are questions of their own: each names a
+#   metric or ranking ("sales", "revenue", "top", "how many", ...) or a verb
+#   ("sold", "teach", ...), and the right side does not start with a
+#   qualifier. So grouping lists stay whole: "course sales by category and
+#   country" and "top instructors by enrollments and by revenue" are one
+#   question each. A clause without a qualifier borrows the one of the following
+#   clause ("top courses" + "... by revenue this year"), unless that clause
+#   is a question of its own ("... and how much did we make per category").
+#   Every clause is then labelled by the local intent classifier
+#   (tools/intent_classifier.py); a clause without a confident label is
+#   glued back onto its neighbour, so "Machine Learning and AI courses sold"
+#   stays one question. Only when two or more labelled clauses remain is the
+#   question treated as compound.
+# =============================================================================
+
+import os
+import re
+
+from tools.intent_classifier import get_intent_classifier
+
+# Parallel branches available in the compound agent; longer questions run unsplit.
+MAX_PARTS = int(os.environ.get("COMPOUND_MAX_PARTS", 3))
+
+_SPLIT = re.compile(r"\s*(?:;|,\s*(?:and\s+)?|\b(?:and also|as well as|and|also|plus)\b)\s*", re.I)
+# A qualifier starts at the first of these words after the clause's subject.
+_QUALIFIER_WORD = r"(?:by|per|in|for|during|this|last|since|over|from|between|across)\b"
+_QUALIFIER = re.compile(rf"\s+({_QUALIFIER_WORD}.*)$", re.I)
+_BARE_QUALIFIER = re.compile(rf"^{_QUALIFIER_WORD}", re.I)
+_LEAD = re.compile(r"^(?:what|which|who|how|show|list|give|tell)\b", re.I)
+# What makes a clause a question of its own: a metric or ranking, or a verb.
+_METRIC_OR_VERB = re.compile(
+    r"\b(?:sales?|sell\w*|sold|revenue|earn\w*|income|money|profit\w*|enrol\w*|purchas\w*|bought|"
+    r"top|best|worst|most|least|highest|lowest|fewest|popular\w*|perform\w*|average|avg|total|"
+    r"count|number|how many|how much|trend\w*|growth|grow\w*|rating\w*|minutes|duration|"
+    r"made|make|makes|teach\w*|taught|have|has|had|did|does|generat\w*|spen[dt]\w*|watch\w*)\b",
+    re.I,
+)
+
+
+def _independent(clause: str) -> bool:
+    return bool(_METRIC_OR_VERB.search(clause)) and not _BARE_QUALIFIER.match(clause)
+
+
+def _clauses(text: str) -> list:
+    """Cuts `text` at the conjunctions that separate two independent questions."""
+    pieces, start = [], 0
+    for match in _SPLIT.finditer(text):
+        if match.start() > start:
+            pieces.append((start, match.start()))
+        start = max(start, match.end())
+    pieces.append((start, len(text)))
+
+    clauses = []
+    for begin, end in pieces:
+        piece = text[begin:end].strip()
+        if not piece:
+            continue
+        if clauses and not (_independent(clauses[-1][1]) and _independent(piece)):
+            # Part of the previous question (a grouping list, a bare qualifier, ...).
+            clauses[-1] = (clauses[-1][0], text[clauses[-1][0]:end].strip())
+        else:
+            clauses.append((begin, piece))
+    return [clause for _, clause in clauses]
+
+
+def _qualifier(clause: str):
+    match = _QUALIFIER.search(clause)
+    return match.group(1) if match and match.start() > 0 else None
+
+
+def _label(classifier, clause: str):
+    return classifier.classify(clause)["label"]
+
+
+def decompose_question(question: str, classifier=None, max_parts: int = None) -> list:
+    """
+    Splits a compound question into single-intent sub-questions.
+
+    Args:
+        question (str): The user's question.
+        classifier: Intent classifier (default: the process-wide one).
+        max_parts (int): Most sub-questions allowed. Default: MAX_PARTS.
+
+    Returns:
+        list: [{"question", "intent"}] with two or more entries, or [] when the
+        question is not compound (or has more parts than allowed) and should
+        run through the single-question pipeline.
+    """
+    max_parts = MAX_PARTS if max_parts is None else max_parts
+    text = (question or "").strip().rstrip("?.! ")
+    clauses = _clauses(text)
+    if len(clauses) < 2:
+        return []
+
+    # A clause without a qualifier takes the one of the next clause that has
+    # one, unless that clause is a question of its own ("... and how much did
+    # we make per category").
+    shared = None
+    for i in range(len(clauses) - 1, -1, -1):
+        own = _qualifier(clauses[i])
+        if own:
+            shared = None if _LEAD.match(clauses[i]) else own
+        elif shared:
+            clauses[i] = f"{clauses[i]} {shared}"
+
+    classifier = classifier or get_intent_classifier()
+    parts = []
+    for clause in clauses:
+        label = _label(classifier, clause)
+        if label:
+            parts.append({"question": clause, "intent": label})
+        elif parts:
+            # Not a question on its own: it belongs to the previous clause.
+            merged = f"{parts[-1]['question']} and {clause}"
+            parts[-1] = {"question": merged, "intent": _label(classifier, merged) or parts[-1]["intent"]}
+        else:
+            parts.append({"question": clause, "intent": None})
+    # A leading unlabelled clause belongs to the next one.
+    if parts and parts[0]["intent"] is None:
+        if len(parts) == 1:
+            return []
+        merged = f"{parts[0]['question']} and {parts[1]['question']}"
+        parts[1] = {"question": merged, "intent": _label(classifier, merged) or parts[1]["intent"]}
+        parts.pop(0)
+
+    if len(parts) < 2 or len(parts) > max_parts:
+        return []
+    # Sub-questions read as questions of their own.
+    lead = _LEAD.match(text)
+    for part in parts[1:]:
+        if lead and not _LEAD.match(part["question"]):
+            part["question"] = f"{lead.group(0)} {part['question']}"
+    return parts
@@ -1,43 +1,154 @@
 # =============================================================================
 # FILE: file_writer_tool_sql.py
 # PURPOSE:
-#   Tool function to save generated SQL queries to timestamped text files.
+#   Tool function to save generated SQL queries to text files.
+#   Files are written to the content-addressed artifact store
+#   (agent_common/artifact_store.py) under the output folder.
 # =============================================================================
 
-import datetime
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+import time
 from pathlib import Path
 import sqlite3
-import pandas as pd
+
+# Repository root, for the shared agent_common package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_common.artifact_store import get_store
+from agent_common.lazy import lazy_import
+from tools.approximate import MARGIN_SUFFIX, combine_margins, margin_column, plan_approximate, sum_margin
+from tools.artifact_registry import is_handle, publish, resolve
+from tools.columnar import (
+    is_columnar_file, iter_columnar, read_columnar_header, read_table, result_suffix, write_columnar,
+    write_columnar_frame,
+)
+from tools.db_pool import get_pool
+from tools.guardrails import GuardrailError, QueryGuard, check_cost, limit_exploratory
+from tools.incremental import run_incremental
+from tools.index_advisor import DEFAULT_LOG_NAME as WORKLOAD_LOG_NAME, record_query
+from tools.materialized import answer_intent
+from tools import progress
+from tools.pushdown import compile_intent_query, result_columns
+from tools.result_cache import ResultCollector, database_version, get_result_cache, normalize_sql
+from tools.sharding import ShardingError, run_sharded, shard_manifest_for, shards_version
+from tools.sql_templates import BUILTIN_TEMPLATES, confirm_candidate, render_builtin
+from tools.summarizer import (
+    CHARS_PER_TOKEN, estimate_tokens, iter_frame, iter_tsv, is_tsv_file, summarize_rows, token_budget,
+)
+
+# pandas is imported when an analysis tool first runs, not when the agents load.
+pd = lazy_import("pandas")
+
+# Buffer size used when streaming query results to disk.
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Results up to this many rows are also kept in memory and handed to the next
+# stage through the artifact registry.
+MAX_IN_MEMORY_ROWS = 100_000
+
+
+def _read_text_input(ref: str) -> str:
+    """Returns the text behind an artifact handle or a file path."""
+    if is_handle(ref):
+        artifact = resolve(ref)
+        if isinstance(artifact["value"], str):
+            return artifact["value"]
+        if artifact["file"]:
+            return Path(artifact["file"]).read_text(encoding="utf-8")
+        raise ValueError(f"Artifact {ref} does not hold text")
+    return Path(ref).read_text(encoding="utf-8")
+
+
+def _load_frame(ref: str) -> pd.DataFrame:
+    """Returns the table behind an artifact handle, or reads it from a TSV/.qcol file."""
+    if is_handle(ref):
+        artifact = resolve(ref)
+        value = artifact["value"]
+        if isinstance(value, pd.DataFrame):
+            return value
+        if isinstance(value, dict) and "rows" in value:
+            return pd.DataFrame.from_records(value["rows"], columns=value["columns"])
+        if artifact["file"]:
+            return read_table(artifact["file"])
+        raise ValueError(f"Artifact {ref} does not hold a table")
+    return read_table(ref)
+
+
+def _approximation(ref: str):
+    """Sample description attached to an artifact by approximate mode, if any."""
+    if not is_handle(ref):
+        return None
+    try:
+        return resolve(ref)["metadata"].get("approximate")
+    except KeyError:
+        return None
+
+
+def _sum_by(df: pd.DataFrame, key: str, value: str, sample_rate: float = None) -> pd.DataFrame:
+    """
+    Sums `value` per `key`, largest first. The margins of error of approximate
+    results (`<value>_moe`) are combined alongside; raw rows sampled at
+    `sample_rate` are scaled up to estimates with margins.
+    """
+    margin = margin_column(value)
+    if sample_rate:
+        grouped = df.assign(_square=df[value] ** 2).groupby(key)
+        result_df = (grouped[value].sum() / sample_rate).reset_index()
+        result_df[margin] = [sum_margin(q, sample_rate) for q in grouped["_square"].sum()]
+        return result_df.sort_values(value, ascending=False)
+    if margin not in df.columns:
+        return df.groupby(key)[value].sum().reset_index().sort_values(value, ascending=False)
+    result_df = df.groupby(key).agg({value: "sum", margin: combine_margins}).reset_index()
+    return result_df.sort_values(value, ascending=False)
 
 # ---------------------------------------------------------------------------
 # TOOL FUNCTION: write_sql_to_file
 # ---------------------------------------------------------------------------
-def write_sql_to_file(sql_query: str, folder: str = "output") -> dict:
+def write_sql_to_file(
+    sql_query: str,
+    folder: str = "output",
+    write_through: bool = True,
+    db_file_path: str = "datatechcon.db",
+) -> dict:
     """
-    Saves a SQL query string to a timestamped .txt file.
+    Saves a SQL query string to a .txt file in the artifact store.
+
+    The query is also published to the in-process artifact registry; the
+    returned "handle" can be passed to the next tool instead of the file path.
+    When the database exists, the query plan is appended to the index
+    advisor's workload log (`{folder}/workload_log.jsonl`).
 
     Args:
         sql_query (str): The SQL query string to save.
         folder (str): Folder where the file will be saved. Default is "output".
+        write_through (bool): Also write the query to disk for audit. Default: True.
+        db_file_path (str): Database the query will run against, used for
+                            EXPLAIN QUERY PLAN. Pass None to skip. Default: "datatechcon.db".
 
     Returns:
-        dict: Status dictionary with file path and message.
+        dict: Status dictionary with file path, artifact handle and message.
     """
 
-    # Ensure folder exists
-    Path(folder).mkdir(exist_ok=True)
-
-    # Create timestamped filename
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-    filename = f"{folder}/{timestamp}_sql_query.txt"
+    filename = None
 
     try:
-        # Write SQL query to file
-        Path(filename).write_text(sql_query.strip(), encoding="utf-8")
+        sql_text = sql_query.strip()
+
+        # Write SQL query to the artifact store (deduplicated by content)
+        if write_through:
+            filename = get_store(folder).put_text(sql_text, "sql_query.txt")
+
+        if db_file_path and os.path.exists(db_file_path):
+            record_query(sql_text, db_file_path, os.path.join(folder, WORKLOAD_LOG_NAME))
 
         return {
             "status": "success",
             "file": filename,
+            "handle": publish("sql", sql_text, file=filename),
             "message": "SQL query saved successfully."
         }
 
@@ -52,26 +163,92 @@ def write_sql_to_file(sql_query: str, folder: str = "output") -> dict:
 def fetch_data_and_save_to_file(
     sql_file_path: str,
     db_file_path: str = "datatechcon.db",
-    output_folder: str = "output"
+    output_folder: str = "output",
+    stream: bool = True,
+    batch_size: int = 5000,
+    output_format: str = "tsv",
+    use_cache: bool = True,
+    write_through: bool = True,
+    intent: str = "",
+    approximate: bool = False,
+    sample_rate: float = None,
+    incremental: bool = False,
+    question: str = ""
 ) -> dict:
     """
     Executes a SQL query from a file against a SQLite database and saves the results to a text file.
 
+    By default rows are streamed from the cursor in `batch_size` chunks and
+    written through a buffered writer, so memory stays flat no matter how many
+    rows the query returns. Set `stream=False` to fall back to the original
+    fetch-everything-then-write behaviour.
+
+    `output_format="columnar"` writes a typed, memory-mappable .qcol file
+    (see tools/columnar.py) instead of tab-separated text; the analyze and
+    insight tools read either format.
+
+    Results of repeated queries are served from a versioned result cache
+    (see tools/result_cache.py) until the database file changes; the
+    "cache" key of the returned dict is "hit", "miss" or "off".
+
+    Execution is guarded (see tools/guardrails.py): a query whose plan is too
+    expensive is rejected up front, and one that runs past the time budget or
+    returns too many rows / bytes is cut off. The error dict then carries a
+    "code": COST_REJECTED, TIMEOUT, ROW_LIMIT, BYTE_LIMIT or CANCELLED.
+    For exploratory intents (GENERAL_ANALYTICS) a LIMIT is added to queries
+    that have none; "limited" in the result tells whether that happened.
+
+    With `approximate=True` a query over a large fact table runs on a uniform
+    sample of it instead (see tools/approximate.py): COUNT / SUM / AVG
+    outputs become estimates, each followed by a `<column>_moe` column with
+    its 95% margin of error. "approximate" in the result describes the
+    sample, or is None when the query had to run exactly.
+
+    Results of up to MAX_IN_MEMORY_ROWS rows are published to the artifact
+    registry; pass the returned "handle" to the analyze tools to skip
+    re-reading and re-parsing the file.
+
+    When `db_file_path` is a shard manifest, or QUERY_SHARD_MANIFEST names
+    shards split from it, the query runs on every shard in parallel and the
+    partial results are merged (see tools/sharding.py); "sharded" in the
+    result then describes the run. Queries that do not decompose over the
+    shards fail with code NOT_SHARDABLE.
+
+    With `incremental=True` a recurring aggregate question over enrollments
+    or sessions is answered from its stored partial aggregates plus the rows
+    added since its last run (see tools/incremental.py); "incremental" in the
+    result tells whether it ran as a delta, a full recompute (and why) or
+    could not be maintained incrementally ("off").
+
     Args:
-        sql_file_path (str): Path to the .txt file containing the SQL query.
-        db_file_path (str): Path to the SQLite database file.
+        sql_file_path (str): Path to the .txt file containing the SQL query,
+            or the artifact handle returned by `write_sql_to_file`.
+        db_file_path (str): Path to the SQLite database file, or to a shard manifest.
         output_folder (str): Folder to save the results. Default: "output".
+        stream (bool): Stream rows in batches instead of loading them all. Default: True.
+        batch_size (int): Number of rows pulled per `fetchmany` call when streaming.
+        output_format (str): "tsv" (default, human readable) or "columnar".
+        use_cache (bool): Look up / store the result in the query result cache. Default: True.
+        write_through (bool): Write the results file to disk. When False the file is
+            only written if the result is too large to keep in memory. Default: True.
+        intent (str): Intent label of the question, if known; exploratory intents
+            get an automatic row LIMIT.
+        approximate (bool): Answer from a sample of the large tables. Default: False.
+        sample_rate (float): Fraction sampled in approximate mode. Default: the rate
+            of the installed sample tables, or 1%.
+        incremental (bool): Maintain the answer incrementally between runs. Default: False.
+        question (str): Name the incremental state is saved under. Default: the SQL text.
 
     Returns:
-        dict: Status dictionary containing file path and message.
+        dict: Status dictionary containing file path, artifact handle, message,
+              rows/bytes/elapsed stats and the cache outcome.
     """
 
-    # Ensure output folder exists
-    Path(output_folder).mkdir(exist_ok=True)
+    started = time.perf_counter()
 
-    # Read SQL query from file
+    # Read SQL query from the artifact registry or from file
     try:
-        sql_query = Path(sql_file_path).read_text(encoding="utf-8").strip()
+        sql_query = _read_text_input(sql_file_path).strip()
     except Exception as e:
         return {
             "status": "error",
@@ -79,45 +256,107 @@ def fetch_data_and_save_to_file(
             "message": f"Error reading SQL file: {str(e)}"
         }
 
-    # Connect to SQLite database and execute query
     try:
-        conn = sqlite3.connect(db_file_path)
-        cursor = conn.cursor()
-        cursor.execute(sql_query)
-
-        # Fetch all rows
-        rows = cursor.fetchall()
+        shards = shard_manifest_for(db_file_path)
+    except (OSError, ValueError) as e:
+        return {
+            "status": "error",
+            "file": None,
+            "message": f"Error reading shard manifest: {str(e)}"
+        }
 
-        # Fetch column names
-        columns = [description[0] for description in cursor.description]
+    approximation = None
+    # Sharded runs are exact; sampling applies to a single database file.
+    if approximate and shards is None:
+        try:
+            with get_pool(db_file_path).connection() as conn:
+                approximation = plan_approximate(conn, sql_query, sample_rate)
+        except (sqlite3.Error, ValueError, FileNotFoundError) as e:
+            return {
+                "status": "error",
+                "file": None,
+                "message": f"Database query error: {str(e)}"
+            }
+        if approximation is not None:
+            sql_query = approximation.sql
 
-        conn.close()
+    sql_query, limited = limit_exploratory(sql_query, intent)
 
-    except Exception as e:
+    try:
+        suffix = result_suffix(output_format)
+    except ValueError as e:
         return {
             "status": "error",
             "file": None,
-            "message": f"Database query error: {str(e)}"
+            "message": str(e)
         }
 
-    # Save results to text file
-    try:
-        timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-        result_file = f"{output_folder}/{timestamp}_query_results.txt"
+    # Results are written to a temp file of the artifact store and committed once complete
+    store = get_store(output_folder)
+    result_name = f"query_results{suffix}"
 
-        with open(result_file, "w", encoding="utf-8") as f:
-            # Write column headers
-            f.write("\t".join(columns) + "\n")
-            # Write rows
-            for row in rows:
-                f.write("\t".join(str(item) for item in row) + "\n")
+    def new_result_file():
+        return store.reserve(result_name)
 
+    # Serve repeated questions from the result cache while the database is unchanged
+    # Saved questions keep their own state; the result cache would hide new rows' deltas.
+    incremental = incremental and shards is None and approximation is None
+    cache = get_result_cache() if use_cache and not incremental else None
+    shard_version = shards_version(shards) if shards is not None else None
+    cached = cache.get(sql_query, db_file_path, version=shard_version) if cache is not None else None
+    sharding = refresh = None
+
+    try:
+        if cached is not None:
+            cache_status = "hit"
+            columns, rows = cached
+            row_count = len(rows)
+            result_file = None
+            if write_through:
+                result_file = new_result_file()
+                _write_results(result_file, columns, iter([rows]))
+                result_file = store.commit(result_file, result_name)
+        else:
+            cache_status = "miss" if cache is not None else "off"
+            # Version observed before executing, so a concurrent write is never cached as current.
+            db_version = shard_version or database_version(db_file_path)
+            if shards is not None:
+                columns, row_count, rows, result_file, sharding = _execute_sharded(
+                    sql_query, shards, write_through, new_result_file
+                )
+            elif incremental:
+                columns, row_count, rows, result_file, refresh = _execute_incremental(
+                    sql_query, db_file_path, question, stream, batch_size, write_through, new_result_file
+                )
+            else:
+                columns, row_count, rows, result_file = _execute_query(
+                    sql_query, db_file_path, stream, batch_size, write_through, new_result_file,
+                    transform=approximation.transform if approximation else None
+                )
+            if result_file:
+                result_file = store.commit(result_file, result_name)
+            if cache is not None and rows is not None:
+                cache.put(sql_query, db_file_path, columns, rows, version=db_version)
+    except GuardrailError as e:
         return {
-            "status": "success",
-            "file": result_file,
-            "message": f"Query executed successfully. {len(rows)} rows saved."
+            "status": "error",
+            "file": None,
+            "code": e.code,
+            "message": str(e)
+        }
+    except ShardingError as e:
+        return {
+            "status": "error",
+            "file": None,
+            "code": "NOT_SHARDABLE",
+            "message": f"{e} Rewrite the query, or run it on the unsharded database."
+        }
+    except (sqlite3.Error, FileNotFoundError, TimeoutError) as e:
+        return {
+            "status": "error",
+            "file": None,
+            "message": f"Database query error: {str(e)}"
         }
-
     except Exception as e:
         return {
             "status": "error",
@@ -125,34 +364,268 @@ def fetch_data_and_save_to_file(
             "message": f"Error writing results to file: {str(e)}"
         }
 
+    # Plain queries preview their first batch while running; the other paths have the rows now.
+    if (cached is not None or sharding is not None or refresh is not None) and progress.current_stage() == "data":
+        progress.publish_preview(columns, rows, row_count)
+
+    metadata = {"rows": row_count}
+    if approximation is not None:
+        metadata["approximate"] = approximation.describe()
+    handle = publish(
+        "table",
+        {"columns": columns, "rows": rows} if rows is not None else None,
+        file=result_file,
+        metadata=metadata
+    )
+    _confirm_sql_template(sql_file_path, shards["paths"][0] if shards is not None else db_file_path)
+    bytes_written = os.path.getsize(result_file) if result_file else 0
+    elapsed = time.perf_counter() - started
+
+    message = f"Query executed successfully. {row_count} rows saved."
+    if approximation is not None:
+        message += (f" Approximate: estimated from a {approximation.rate:.2%} sample of "
+                    f"{approximation.table}; *_moe columns are 95% margins of error.")
+    elif approximate:
+        message += " This query cannot be sampled, so the answer is exact."
+    if sharding is not None:
+        message += f" Merged from {sharding['shards']} shard(s)."
+    if refresh is not None:
+        if refresh["mode"] == "delta":
+            message += f" Incremental: folded {refresh['new_rows']} new {refresh['table']} rows into the saved aggregate."
+        elif refresh["mode"] == "unchanged":
+            message += " Incremental: no new rows since the last run."
+        else:
+            message += f" Incremental: {'recomputed' if refresh['mode'] == 'full' else 'not used'} ({refresh['reason']})."
+
+    return {
+        "status": "success",
+        "file": result_file,
+        "handle": handle,
+        "message": message,
+        "rows": row_count,
+        "bytes": bytes_written,
+        "elapsed_seconds": round(elapsed, 6),
+        "cache": cache_status,
+        "limited": limited,
+        "approximate": approximation.describe() if approximation is not None else None,
+        "sharded": sharding,
+        "incremental": refresh
+    }
+
+
+def _execute_query(
+    sql_query: str,
+    db_file_path: str,
+    stream: bool,
+    batch_size: int,
+    write_through: bool,
+    new_result_file,
+    transform=None
+) -> tuple:
+    """
+    Runs `sql_query` on a pooled read-only connection.
+
+    The query is subject to the guardrails in tools/guardrails.py (cost
+    pre-check, time budget, row and byte caps). `transform(columns, batches)`,
+    if given, rewrites the result on its way out (approximate mode uses it to
+    turn sample aggregates into estimates).
+
+    Returns:
+        tuple: (columns, row_count, rows, result_file). `rows` is None when the
+        result exceeded MAX_IN_MEMORY_ROWS; `result_file` is None when nothing
+        was written to disk.
+
+    Raises:
+        GuardrailError: The query was rejected or cut off.
+    """
+    pool = get_pool(db_file_path)
+    conn = pool.acquire()
+    cursor = conn.cursor()
+    result_file = None
+    try:
+        # Reject runaway plans (e.g. a missing join condition) before they start
+        estimated = check_cost(conn, db_file_path, sql_query)
+
+        with QueryGuard(conn) as guard:
+            cursor.execute(sql_query)
+
+            # Fetch column names
+            columns = [description[0] for description in cursor.description]
+
+            if stream:
+                batches = _iter_batches(cursor, max(1, int(batch_size)))
+            else:
+                # Fetch all rows up front (legacy behaviour)
+                batches = iter([cursor.fetchall()])
+            batches = guard.wrap(batches)
+            if transform is not None:
+                columns, batches = transform(columns, batches)
+            if progress.current_stage() == "data" and progress.is_listening():
+                # Show the first rows while the rest are still being read and written
+                batches = progress.preview_batches(
+                    columns, batches, max(1, int(batch_size)) if stream else None, estimated
+                )
+
+            if write_through:
+                collector = ResultCollector(MAX_IN_MEMORY_ROWS)
+                result_file = new_result_file()
+                row_count = _write_results(result_file, columns, collector.wrap(batches))
+                return columns, row_count, collector.rows, result_file
+
+            held, held_rows = [], 0
+            for batch in batches:
+                held.append(batch)
+                held_rows += len(batch)
+                if held_rows > MAX_IN_MEMORY_ROWS:
+                    # Too large to hand over in memory: spill everything to disk after all.
+                    result_file = new_result_file()
+                    row_count = _write_results(result_file, columns, itertools.chain(held, batches))
+                    return columns, row_count, None, result_file
+            return columns, held_rows, [row for batch in held for row in batch], None
+    except Exception:
+        # Do not leave a truncated result behind
+        if result_file and os.path.exists(result_file):
+            os.remove(result_file)
+        raise
+    finally:
+        cursor.close()
+        pool.release(conn)
+
+
+def _execute_sharded(sql_query: str, manifest: dict, write_through: bool, new_result_file) -> tuple:
+    """
+    Runs `sql_query` on the shards of `manifest` and merges the results (see
+    tools/sharding.py).
+
+    Returns:
+        tuple: (columns, row_count, rows, result_file, info) like _execute_query,
+        plus the shard run info {"shards", "workers", "refetched", "elapsed_seconds"}.
+
+    Raises:
+        ShardingError: The query does not decompose over the shards.
+        GuardrailError: A shard query was rejected or cut off.
+    """
+    result = run_sharded(sql_query, manifest)
+    columns, rows = result.pop("columns"), result.pop("rows")
+    return (columns, *_hold_rows(columns, rows, write_through, new_result_file), result)
+
+
+def _execute_incremental(
+    sql_query: str,
+    db_file_path: str,
+    question: str,
+    stream: bool,
+    batch_size: int,
+    write_through: bool,
+    new_result_file
+) -> tuple:
+    """
+    Answers a saved question from its stored partials and the new rows (see
+    tools/incremental.py); a query that cannot be maintained that way runs
+    through `_execute_query` instead.
+
+    Returns:
+        tuple: (columns, row_count, rows, result_file, info) like _execute_query,
+        plus {"mode": "full" | "delta" | "unchanged" | "off", "reason", ...}.
+    """
+    try:
+        result = run_incremental(sql_query, db_file_path, question)
+    except ShardingError as e:
+        executed = _execute_query(sql_query, db_file_path, stream, batch_size, write_through, new_result_file)
+        return (*executed, {"mode": "off", "reason": str(e)})
+    columns, rows = result.pop("columns"), result.pop("rows")
+    return (columns, *_hold_rows(columns, rows, write_through, new_result_file), result)
+
+
+def _hold_rows(columns: list, rows: list, write_through: bool, new_result_file) -> tuple:
+    """
+    Writes rows merged in memory to a result file when asked to, or when
+    there are too many to hand over in memory.
+
+    Returns:
+        tuple: (row_count, rows or None, result_file or None)
+    """
+    result_file = None
+    if write_through or len(rows) > MAX_IN_MEMORY_ROWS:
+        result_file = new_result_file()
+        try:
+            _write_results(result_file, columns, iter([rows]))
+        except Exception:
+            if os.path.exists(result_file):
+                os.remove(result_file)
+            raise
+    return len(rows), rows if len(rows) <= MAX_IN_MEMORY_ROWS else None, result_file
+
+
+def _write_results(result_file: str, columns: list, batches) -> int:
+    """Writes row batches as TSV or .qcol depending on the file suffix; returns the row count."""
+    if is_columnar_file(result_file):
+        return write_columnar(result_file, columns, batches)
+    return _write_tsv(result_file, columns, batches)
+
+
+def _confirm_sql_template(sql_ref: str, db_file_path: str) -> None:
+    """Promotes LLM-written SQL into the template library once it has run successfully."""
+    try:
+        confirm_candidate(sql_ref, db_file_path)
+    except Exception as e:
+        # The template library is an optimization; never fail the query because of it.
+        print(f"[WARNING] SQL template promotion failed: {e}")
+
+
+def _iter_batches(cursor: sqlite3.Cursor, batch_size: int):
+    """Yields lists of rows from `cursor` until it is exhausted."""
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+def _write_tsv(result_file: str, columns: list, batches) -> int:
+    """Writes the header and row batches as tab-separated text, one bulk write per batch."""
+    row_count = 0
+    with open(result_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write("\t".join(columns) + "\n")
+        for batch in batches:
+            f.write(_format_tsv_rows(batch))
+            row_count += len(batch)
+    return row_count
+
+
+def _format_tsv_rows(rows: list) -> str:
+    """Renders a batch of rows as one tab-separated string (same cell format as before)."""
+    return "".join("\t".join(map(str, row)) + "\n" for row in rows)
 
 
 def analyze_data_and_save_to_file(
     data_file_path: str,
     intent: str,
-    output_folder: str = "output"
+    output_folder: str = "output",
+    output_format: str = "tsv",
+    write_through: bool = True
 ) -> dict:
     """
-    Performs analysis on a tab-separated data file based on the intent
-    and saves the results to a timestamped text file.
+    Performs analysis on a tab-separated (or .qcol columnar) data file based on
+    the intent and saves the results to the artifact store.
 
     Args:
-        data_file_path (str): Path to the tab-separated data file.
+        data_file_path (str): Path to the tab-separated or .qcol data file, or the
+            artifact handle returned by `fetch_data_and_save_to_file`.
         intent (str): Intent label for the type of analysis.
         output_folder (str): Folder to save the results. Default: "output".
+        output_format (str): "tsv" (default) or "columnar" for the saved results.
+        write_through (bool): Also write the analysis to disk for audit. Default: True.
     
     intent = intent.upper().strip()
 
     Returns:
-        dict: Status dictionary with file path and message.
+        dict: Status dictionary with file path, artifact handle and message.
     """
 
-    # Ensure output folder exists
-    Path(output_folder).mkdir(exist_ok=True)
-
     # Read data
     try:
-        df = pd.read_csv(data_file_path, sep="\t")
+        df = _load_frame(data_file_path)
     except Exception as e:
         return {
             "status": "error",
@@ -160,14 +633,17 @@ def analyze_data_and_save_to_file(
             "message": f"Error reading data file: {str(e)}"
         }
 
+    # Raw rows from approximate mode are a sample; sums over them get scaled up.
+    approximation = _approximation(data_file_path)
+    sample_rate = approximation["sample_rate"] if approximation and approximation["kind"] == "rows" else None
+
     # Perform analysis based on intent
     try:
         result_df = None
 
         if intent == "COURSE_SALES":
             if "title" in df.columns and "total_enrollments" in df.columns:
-                result_df = df.groupby("title")["total_enrollments"].sum().reset_index()
-                result_df = result_df.sort_values("total_enrollments", ascending=False)
+                result_df = _sum_by(df, "title", "total_enrollments", sample_rate)
             else:
                 raise ValueError("Missing required columns for COURSE_SALES")
 
@@ -176,21 +652,30 @@ def analyze_data_and_save_to_file(
                 result_df = pd.DataFrame({
                     "total_enrollments": [df["total_enrollments"].sum()]
                 })
+                if sample_rate:
+                    result_df["total_enrollments"] /= sample_rate
+                    result_df[margin_column("total_enrollments")] = sum_margin(
+                        (df["total_enrollments"] ** 2).sum(), sample_rate
+                    )
+                elif margin_column("total_enrollments") in df.columns:
+                    result_df[margin_column("total_enrollments")] = combine_margins(
+                        df[margin_column("total_enrollments")]
+                    )
             else:
                 result_df = pd.DataFrame({"message": ["No enrollment data found."]})
 
         elif intent == "INSTRUCTOR_PERFORMANCE":
             if "instructor" in df.columns and "total_enrollments" in df.columns:
-                result_df = df.groupby("instructor")["total_enrollments"].sum().reset_index()
-                result_df = result_df.sort_values("total_enrollments", ascending=False)
+                result_df = _sum_by(df, "instructor", "total_enrollments", sample_rate)
             else:
                 raise ValueError("Missing required columns for INSTRUCTOR_PERFORMANCE")
 
         elif intent == "REVENUE_ANALYSIS":
             if "title" in df.columns and "total_enrollments" in df.columns and "price" in df.columns:
-                df["revenue"] = df["total_enrollments"] * df["price"]
-                result_df = df.groupby("title")["revenue"].sum().reset_index()
-                result_df = result_df.sort_values("revenue", ascending=False)
+                df = df.assign(revenue=df["total_enrollments"] * df["price"])
+                if margin_column("total_enrollments") in df.columns:
+                    df[margin_column("revenue")] = df[margin_column("total_enrollments")] * df["price"].abs()
+                result_df = _sum_by(df, "title", "revenue", sample_rate)
             elif "title" in df.columns and "price" in df.columns:
                 result_df = df[["title", "price"]].sort_values("price", ascending=False)
             else:
@@ -206,16 +691,48 @@ def analyze_data_and_save_to_file(
             "message": f"Error performing analysis: {str(e)}"
         }
 
-    # Save results to text file
+    return _save_analysis(result_df, intent, output_folder, output_format, write_through, approximation)
+
+
+def _save_analysis(
+    result_df: pd.DataFrame,
+    intent: str,
+    output_folder: str,
+    output_format: str,
+    write_through: bool,
+    approximation: dict = None
+) -> dict:
+    """Publishes an analysis table and (optionally) writes it to the artifact store."""
     try:
-        timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-        result_file = f"{output_folder}/{timestamp}_analysis_results.txt"
+        result_df = result_df.reset_index(drop=True)
+        result_file = None
+        if progress.is_listening():
+            with progress.stage("analysis"):
+                progress.publish_groups(
+                    list(result_df.columns), result_df.head(progress.MAX_GROUP_ROWS).values.tolist(), len(result_df)
+                )
 
-        result_df.to_csv(result_file, sep="\t", index=False)
+        if write_through:
+            store = get_store(output_folder)
+            name = f"analysis_results{result_suffix(output_format)}"
+            result_file = store.reserve(name)
+            try:
+                if is_columnar_file(result_file):
+                    write_columnar_frame(result_df, result_file)
+                else:
+                    result_df.to_csv(result_file, sep="\t", index=False)
+            except Exception:
+                store.discard(result_file)
+                raise
+            result_file = store.commit(result_file, name)
 
+        metadata = {"intent": intent}
+        if approximation:
+            metadata["approximate"] = approximation
         return {
             "status": "success",
             "file": result_file,
+            "handle": publish("analysis", result_df, file=result_file, metadata=metadata),
             "message": f"Analysis completed successfully. {len(result_df)} rows saved."
         }
 
@@ -227,18 +744,199 @@ def analyze_data_and_save_to_file(
         }
 
 
+# ---------------------------------------------------------------------------
+# TOOL FUNCTION: analyze_query_and_save_to_file
+# ---------------------------------------------------------------------------
+def analyze_query_and_save_to_file(
+    sql_file_path: str,
+    intent: str,
+    db_file_path: str = "datatechcon.db",
+    output_folder: str = "output",
+    output_format: str = "tsv",
+    write_through: bool = True,
+    use_cache: bool = True,
+    approximate: bool = False
+) -> dict:
+    """
+    Runs the intent analysis inside SQLite instead of in pandas.
+
+    The analysis for the intent (group, sum, rank) is compiled into an
+    aggregate query over the generated SQL (see tools/pushdown.py), so only
+    the aggregated rows leave the database. Intents that cannot be expressed
+    that way (e.g. GENERAL_ANALYTICS) fall back to fetching the rows and
+    running `analyze_data_and_save_to_file`, and so does approximate mode,
+    whose estimates and margins of error are combined in pandas. Sharded
+    databases also take the fallback: the compiled aggregate wraps the query
+    in a subquery, which cannot be merged across shards.
+
+    When the SQL is the unfiltered built-in template of the intent and the
+    database has materialized aggregates (tools/materialized.py), the answer
+    is read from them instead (`lookup_intent_and_save_to_file`), without
+    scanning `enrollments`; "materialized" in the result is then True.
+
+    Args:
+        sql_file_path (str): Path to the .txt SQL file or the artifact handle from `write_sql_to_file`.
+        intent (str): Intent label for the type of analysis.
+        db_file_path (str): Path to the SQLite database file.
+        output_folder (str): Folder to save the results. Default: "output".
+        output_format (str): "tsv" (default) or "columnar" for the saved results.
+        write_through (bool): Also write the analysis to disk for audit. Default: True.
+        use_cache (bool): Use the query result cache. Default: True.
+        approximate (bool): Answer from a sample of the large tables. Default: False.
+
+    Returns:
+        dict: Same status dictionary as `analyze_data_and_save_to_file`, plus
+              "pushdown" telling whether the aggregate ran inside SQLite.
+    """
+    intent = (intent or "").upper().strip()
+
+    try:
+        sql_query = _read_text_input(sql_file_path).strip()
+        shards = shard_manifest_for(db_file_path)
+        schema_db = shards["paths"][0] if shards is not None else db_file_path
+        with get_pool(schema_db).connection() as conn:
+            columns = result_columns(conn, sql_query)
+    except Exception as e:
+        return {
+            "status": "error",
+            "file": None,
+            "message": f"Database query error: {str(e)}"
+        }
+
+    if shards is None and not approximate and _is_unfiltered_builtin(sql_query, intent):
+        looked_up = lookup_intent_and_save_to_file(intent, db_file_path, output_folder, output_format, write_through)
+        # Not installed in this database: run the aggregate below.
+        if looked_up["status"] == "success":
+            looked_up["pushdown"] = True
+            return looked_up
+
+    compiled = compile_intent_query(intent, sql_query, columns) if shards is None else None
+
+    if compiled is None or approximate:
+        # Fall back to the pandas path: fetch the rows, then analyze them.
+        fetched = fetch_data_and_save_to_file(
+            sql_file_path, db_file_path, output_folder,
+            output_format=output_format, use_cache=use_cache, write_through=write_through,
+            intent=intent, approximate=approximate
+        )
+        if fetched["status"] != "success":
+            return fetched
+        result = analyze_data_and_save_to_file(
+            fetched["handle"], intent, output_folder, output_format, write_through
+        )
+        result["pushdown"] = False
+        result["approximate"] = fetched["approximate"]
+        return result
+
+    # The aggregate's rows are the analysis; they are published as groups, not as a data preview.
+    with progress.stage("analysis"):
+        aggregated = fetch_data_and_save_to_file(
+            publish("sql", compiled), db_file_path, output_folder,
+            use_cache=use_cache, write_through=False
+        )
+    if aggregated["status"] != "success":
+        return aggregated
+
+    _confirm_sql_template(sql_file_path, schema_db)
+    result = _save_analysis(_load_frame(aggregated["handle"]), intent, output_folder, output_format, write_through)
+    result["pushdown"] = True
+    return result
+
+
+def _is_unfiltered_builtin(sql_query: str, intent: str) -> bool:
+    """True if `sql_query` is the built-in template of `intent` without slots, i.e. its materialized answer."""
+    normalized = normalize_sql(sql_query)
+    return any(
+        template["intent"] == intent and normalize_sql(render_builtin(name, {})) == normalized
+        for name, template in BUILTIN_TEMPLATES.items()
+    )
+
+
+# ---------------------------------------------------------------------------
+# TOOL FUNCTION: lookup_intent_and_save_to_file
+# ---------------------------------------------------------------------------
+def lookup_intent_and_save_to_file(
+    intent: str,
+    db_file_path: str = "datatechcon.db",
+    output_folder: str = "output",
+    output_format: str = "tsv",
+    write_through: bool = True
+) -> dict:
+    """
+    Answers a standard intent from the materialized aggregates in the database.
+
+    COURSE_SALES, ENROLLMENT_ANALYSIS, INSTRUCTOR_PERFORMANCE and
+    REVENUE_ANALYSIS are read from the per-course summary table (see
+    tools/materialized.py) in O(courses) without scanning `enrollments`. The
+    result has the same columns as `analyze_data_and_save_to_file`, so it can
+    go straight to `generate_insights_and_save_to_file`. The pipeline reaches
+    it through `analyze_query_and_save_to_file`, for the unfiltered built-in
+    SQL of an intent.
+
+    Args:
+        intent (str): Intent label.
+        db_file_path (str): Path to the SQLite database file.
+        output_folder (str): Folder to save the results. Default: "output".
+        output_format (str): "tsv" (default) or "columnar" for the saved results.
+        write_through (bool): Also write the analysis to disk for audit. Default: True.
+
+    Returns:
+        dict: Analysis status dictionary; status is "error" when the intent has
+              no materialized answer or the aggregates are not installed.
+    """
+    intent = (intent or "").upper().strip()
+
+    try:
+        with get_pool(db_file_path).connection() as conn:
+            answer = answer_intent(conn, intent)
+    except Exception as e:
+        return {
+            "status": "error",
+            "file": None,
+            "message": f"Materialized lookup error: {str(e)}"
+        }
+
+    if answer is None:
+        return {
+            "status": "error",
+            "file": None,
+            "message": f"No materialized aggregate answers intent '{intent}'."
+        }
+
+    columns, rows = answer
+    result = _save_analysis(
+        pd.DataFrame.from_records(rows, columns=columns), intent, output_folder, output_format, write_through
+    )
+    result["materialized"] = True
+    return result
+
+
+def _estimate_text(row: pd.Series, column: str) -> str:
+    """Renders a value, as "~value (±margin)" when it is an estimate from approximate mode."""
+    margin = margin_column(column)
+    if margin in row.index and pd.notna(row[margin]):
+        return f"~{row[column]:,.0f} (±{row[margin]:,.0f})"
+    return f"{row[column]}"
+
+
 def generate_insights_and_save_to_file(
     analysis_file_path: str,
     intent: str,
-    output_folder: str = "output"
+    output_folder: str = "output",
+    write_through: bool = True
 ) -> dict:
     """
     Generates meaningful insights from analysis results and saves to a text file.
 
+    Estimates from approximate mode (columns with a `<column>_moe` margin) are
+    phrased as "~value (±margin)" and the insights say the answer is approximate.
+
     Args:
-        analysis_file_path (str): Path to the analysis results file (tab-separated).
+        analysis_file_path (str): Path to the analysis results file (tab-separated or .qcol),
+            or the artifact handle returned by `analyze_data_and_save_to_file`.
         intent (str): Intent label to guide insight generation.
         output_folder (str): Folder to save insights file. Default: "output".
+        write_through (bool): Also write the insights to disk. Default: True.
     
     intent = intent.upper().strip()
 
@@ -246,12 +944,9 @@ def generate_insights_and_save_to_file(
         dict: Status dictionary with file path and message.
     """
 
-    # Ensure output folder exists
-    Path(output_folder).mkdir(exist_ok=True)
-
     # Read analysis results
     try:
-        df = pd.read_csv(analysis_file_path, sep="\t")
+        df = _load_frame(analysis_file_path)
     except Exception as e:
         return {
             "status": "error",
@@ -268,29 +963,34 @@ def generate_insights_and_save_to_file(
         else:
             if intent == "COURSE_SALES":
                 top_course = df.iloc[0]
-                insights.append(f"The top-selling course is '{top_course['title']}' with {top_course['total_enrollments']} enrollments.")
+                insights.append(f"The top-selling course is '{top_course['title']}' with {_estimate_text(top_course, 'total_enrollments')} enrollments.")
                 insights.append("Complete course sales ranking:")
                 for idx, row in df.iterrows():
-                    insights.append(f"{idx+1}. {row['title']}: {row['total_enrollments']} enrollments")
+                    insights.append(f"{idx+1}. {row['title']}: {_estimate_text(row, 'total_enrollments')} enrollments")
 
             elif intent == "ENROLLMENT_ANALYSIS":
                 total_enrollments = df["total_enrollments"].sum() if "total_enrollments" in df.columns else 0
+                if margin_column("total_enrollments") in df.columns:
+                    total_enrollments = _estimate_text(pd.Series({
+                        "total_enrollments": total_enrollments,
+                        margin_column("total_enrollments"): combine_margins(df[margin_column("total_enrollments")]),
+                    }), "total_enrollments")
                 insights.append(f"Total enrollments across all courses: {total_enrollments}")
 
             elif intent == "INSTRUCTOR_PERFORMANCE":
                 top_instructor = df.iloc[0]
-                insights.append(f"The best-performing instructor is '{top_instructor['instructor']}' with {top_instructor['total_enrollments']} enrollments.")
+                insights.append(f"The best-performing instructor is '{top_instructor['instructor']}' with {_estimate_text(top_instructor, 'total_enrollments')} enrollments.")
                 insights.append("Instructor performance ranking:")
                 for idx, row in df.iterrows():
-                    insights.append(f"{idx+1}. {row['instructor']}: {row['total_enrollments']} enrollments")
+                    insights.append(f"{idx+1}. {row['instructor']}: {_estimate_text(row, 'total_enrollments')} enrollments")
 
             elif intent == "REVENUE_ANALYSIS":
                 top_course = df.iloc[0]
                 if "revenue" in df.columns:
-                    insights.append(f"The course generating the highest revenue is '{top_course['title']}' with total revenue of {top_course['revenue']}.")
+                    insights.append(f"The course generating the highest revenue is '{top_course['title']}' with total revenue of {_estimate_text(top_course, 'revenue')}.")
                     insights.append("Revenue breakdown by course:")
                     for idx, row in df.iterrows():
-                        insights.append(f"{idx+1}. {row['title']}: {row['revenue']}")
+                        insights.append(f"{idx+1}. {row['title']}: {_estimate_text(row, 'revenue')}")
                 elif "price" in df.columns:
                      insights.append(f"The most expensive course is '{top_course['title']}' priced at {top_course['price']}.")
                      insights.append("Price ranking:")
@@ -302,17 +1002,32 @@ def generate_insights_and_save_to_file(
                 for col in df.columns:
                     insights.append(f"{col}: {df[col].iloc[0] if not df[col].empty else 'N/A'}")
 
-        # Save insights to file
-        timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-        insights_file = f"{output_folder}/{timestamp}_insights.txt"
+            approximation = _approximation(analysis_file_path)
+            if approximation:
+                insights.append(
+                    f"Approximate answer: estimated from a {approximation['sample_rate']:.2%} sample of "
+                    f"{approximation['table']}; ± values are 95% margins of error."
+                )
+            elif any(str(col).endswith(MARGIN_SUFFIX) for col in df.columns):
+                insights.append("Approximate answer: estimated from a sample; ± values are 95% margins of error.")
 
-        with open(insights_file, "w", encoding="utf-8") as f:
+        # Stream the text before the file is written and the agent phrases its reply
+        with progress.stage("insight"):
             for line in insights:
-                f.write(line + "\n")
+                if not progress.publish("text", text=line):
+                    break
+
+        # Save insights to file
+        insights_file = None
+        if write_through:
+            insights_file = get_store(output_folder).put_text(
+                "".join(line + "\n" for line in insights), "insights.txt"
+            )
 
         return {
             "status": "success",
             "file": insights_file,
+            "handle": publish("insights", "\n".join(insights), file=insights_file),
             "message": f"Insights generated successfully. Content: {' '.join(insights)}",
             "insights": insights
         }
@@ -324,22 +1039,69 @@ def generate_insights_and_save_to_file(
             "message": f"Error generating insights: {str(e)}"
         }
 
-def read_file_content(file_path: str) -> dict:
+def read_file_content(file_path: str, summarize: bool = True, max_tokens: int = None) -> dict:
     """
     Reads the content of a text-based file (e.g., SQL results) and returns it as a string.
-    
+
+    A result table too large for the token budget is summarized instead (see
+    tools/summarizer.py): row count, column types, per-column statistics
+    (quantiles, distinct counts, top values) and a stratified row sample,
+    computed in one pass over the file. "summarized" in the result tells
+    which one was returned, and "tokens" / "full_tokens" what it saved.
+
     Args:
-        file_path (str): Path to the file to read.
-        
+        file_path (str): Path to the file to read, or an artifact handle
+            returned by another tool (resolved in memory, tables rendered as TSV).
+        summarize (bool): Summarize tables that exceed the budget. Default: True.
+        max_tokens (int): Token budget of the content. Default:
+            $SUMMARY_TOKEN_BUDGET or 2000.
+
     Returns:
         dict: Status dictionary with content or error message.
     """
+    started = time.perf_counter()
     try:
-        content = Path(file_path).read_text(encoding="utf-8")
+        table = _table_source(file_path) if summarize else None
+        summary = content = None
+        if table is not None:
+            columns, rows, size, row_count = table
+            budget = token_budget(max_tokens)
+            if size is None and 2 * row_count * max(1, len(columns)) <= budget * CHARS_PER_TOKEN:
+                # Few enough cells to fit (each takes a character and a separator):
+                # render the table and measure it rather than scanning it for a summary.
+                content = _render_table(file_path)
+                size = len(content)
+            # A file that fits is returned whole; its size tells without reading it.
+            if size is None or estimate_tokens(size) > budget:
+                summary = summarize_rows(columns, rows, budget)
+                if estimate_tokens(summary["chars"]) <= budget:
+                    summary = None
+
+        if summary is None:
+            if content is None:
+                content = _render_table(file_path)
+            return {
+                "status": "success",
+                "content": content,
+                "message": "File read successfully.",
+                "summarized": False,
+                "tokens": estimate_tokens(content),
+                "elapsed_seconds": round(time.perf_counter() - started, 6)
+            }
+
+        full_tokens = estimate_tokens(size if size is not None else summary["chars"])
         return {
             "status": "success",
-            "content": content,
-            "message": "File read successfully."
+            "content": summary["text"],
+            "message": (f"Table too large to read whole ({summary['rows']:,} rows, ~{full_tokens:,} tokens): "
+                        f"returned a summary of ~{summary['tokens']:,} tokens with column statistics "
+                        f"and a {summary['sampled_rows']}-row sample."),
+            "summarized": True,
+            "rows": summary["rows"],
+            "tokens": summary["tokens"],
+            "full_tokens": full_tokens,
+            "tokens_saved": max(0, full_tokens - summary["tokens"]),
+            "elapsed_seconds": round(time.perf_counter() - started, 6)
         }
     except Exception as e:
         return {
@@ -348,34 +1110,81 @@ def read_file_content(file_path: str) -> dict:
             "message": f"Error reading file {file_path}: {str(e)}"
         }
 
-def save_text_file(content: str, filename_prefix: str = "analysis", output_folder: str = "output") -> dict:
+
+def _table_source(ref: str):
     """
-    Saves a string content to a timestamped text file.
+    (columns, row iterator, file size or None, row count or None) for a
+    result table behind a handle or file, or None when `ref` holds plain
+    text. The size is only known for text files, the row count only for
+    in-memory and .qcol tables.
+    """
+    path = ref
+    if is_handle(ref):
+        artifact = resolve(ref)
+        value = artifact["value"]
+        if isinstance(value, str):
+            return None
+        if isinstance(value, dict) and "rows" in value:
+            return value["columns"], iter(value["rows"]), None, len(value["rows"])
+        if value is not None and hasattr(value, "itertuples"):
+            return (*iter_frame(value), None, len(value))
+        if not artifact["file"]:
+            return None
+        path = artifact["file"]
+    if is_columnar_file(path):
+        return (*iter_columnar(path), None, read_columnar_header(path)["rows"])
+    if is_tsv_file(path):
+        return (*iter_tsv(path), os.path.getsize(path), None)
+    return None
+
+
+def _is_table(ref: str) -> bool:
+    """True when `ref` holds a table that is not stored as text (in-memory, or .qcol)."""
+    if is_handle(ref):
+        return not isinstance(resolve(ref)["value"], str)
+    return is_columnar_file(ref)
+
+
+def _render_table(ref: str) -> str:
+    """Tab-separated text of the table behind `ref` (text files are returned as they are)."""
+    if _is_table(ref):
+        return _load_frame(ref).to_csv(sep="\t", index=False)
+    return _read_text_input(ref)
+
+
+def save_text_file(
+    content: str,
+    filename_prefix: str = "analysis",
+    output_folder: str = "output",
+    write_through: bool = True
+) -> dict:
+    """
+    Saves a string content to a text file in the artifact store.
     
     Args:
         content (str): Text content to save.
         filename_prefix (str): Prefix for the filename (e.g., 'analysis', 'insights').
         output_folder (str): Folder to save the file.
+        write_through (bool): Also write the text to disk for audit. Default: True.
         
     Returns:
-        dict: Status dictionary with file path.
+        dict: Status dictionary with file path and artifact handle.
     """
-    # Ensure output folder exists
-    Path(output_folder).mkdir(exist_ok=True)
-    
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-    filename = f"{output_folder}/{timestamp}_{filename_prefix}.txt"
-    
+    filename = None
+
     try:
-        Path(filename).write_text(content, encoding="utf-8")
+        if write_through:
+            filename = get_store(output_folder).put_text(content, f"{filename_prefix}.txt")
+        handle = publish("text", content, file=filename)
         return {
             "status": "success",
             "file": filename,
-            "message": f"File saved successfully to {filename}"
+            "handle": handle,
+            "message": f"File saved successfully to {filename or handle}"
         }
     except Exception as e:
         return {
             "status": "error",
             "file": None,
             "message": f"Error saving file: {str(e)}"
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,296 @@
+# =============================================================================
+# FILE: guardrails.py
+# PURPOSE:
+#   Execution guardrails for LLM-written SQL, used by
+#   `fetch_data_and_save_to_file`:
+#     - cost pre-check: EXPLAIN QUERY PLAN is turned into an estimated number
+#       of row visits (nested loops multiply); queries above the budget are
+#       rejected before they run (code COST_REJECTED)
+#     - wall-clock budget: a SQLite progress handler aborts the statement at
+#       the deadline (code TIMEOUT); `cancel_running_queries` interrupts
+#       queries from another thread (code CANCELLED)
+#     - row / byte caps on the result (codes ROW_LIMIT / BYTE_LIMIT)
+#     - automatic LIMIT for exploratory intents, whose raw rows are only
+#       ever summarized
+#
+#   Limits come from the environment (QUERY_TIMEOUT_SECONDS, QUERY_MAX_ROWS,
+#   QUERY_MAX_BYTES, QUERY_MAX_COST, EXPLORATORY_ROW_LIMIT) or
+#   `configure_guardrails`.
+# =============================================================================
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from tools.index_advisor import table_aliases
+from tools.pushdown import strip_terminator
+from tools.result_cache import database_version
+
+# Intents whose results are only described, never aggregated exactly.
+EXPLORATORY_INTENTS = {"GENERAL_ANALYTICS", "UNKNOWN"}
+
+# SQLite VM instructions between two progress-handler calls.
+PROGRESS_INTERVAL = 10_000
+# Rows assumed per index lookup that is not on a unique key, without sqlite_stat1.
+DEFAULT_SEARCH_FANOUT = 10
+# Rows assumed for a materialized subquery / CTE the plan scans.
+DEFAULT_SUBQUERY_ROWS = 1000
+# Rows of every batch whose text width is measured for the byte cap.
+BYTE_SAMPLE_ROWS = 64
+
+_limits = {
+    "timeout_seconds": float(os.environ.get("QUERY_TIMEOUT_SECONDS", 30)),
+    "max_rows": int(os.environ.get("QUERY_MAX_ROWS", 2_000_000)),
+    "max_bytes": int(os.environ.get("QUERY_MAX_BYTES", 512 * 1024 * 1024)),
+    "max_cost": float(os.environ.get("QUERY_MAX_COST", 1e9)),
+    "exploratory_row_limit": int(os.environ.get("EXPLORATORY_ROW_LIMIT", 10_000)),
+}
+_running = set()
+_running_lock = threading.Lock()
+_row_counts = {}
+_row_counts_lock = threading.Lock()
+
+_TRAILING_LIMIT = re.compile(r"\blimit\s+\d+(\s*(offset|,)\s*\d+)?\s*$", re.I)
+
+
+class GuardrailError(Exception):
+    """A query was rejected or cut off; `code` says why."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+    def __reduce__(self):
+        # Keeps `code` when the error crosses a process boundary (sharded execution).
+        return GuardrailError, (self.code, str(self))
+
+
+def configure_guardrails(**limits) -> dict:
+    """
+    Changes the limits (timeout_seconds, max_rows, max_bytes, max_cost,
+    exploratory_row_limit). A value of None disables that limit.
+
+    Returns:
+        dict: The limits now in effect.
+    """
+    unknown = set(limits) - set(_limits)
+    if unknown:
+        raise ValueError(f"Unknown guardrail limits: {', '.join(sorted(unknown))}")
+    _limits.update(limits)
+    return dict(_limits)
+
+
+def guardrail_limits() -> dict:
+    """Returns the limits currently in effect."""
+    return dict(_limits)
+
+
+# -----------------------------------------------------------------------------
+# LIMIT INJECTION
+# -----------------------------------------------------------------------------
+def limit_exploratory(sql_query: str, intent: str) -> tuple:
+    """
+    Caps the rows of exploratory queries that have no LIMIT of their own.
+
+    Returns:
+        tuple: (sql, limited) where `limited` tells whether a LIMIT was added.
+    """
+    limit = _limits["exploratory_row_limit"]
+    sql = strip_terminator(sql_query)
+    if not limit or (intent or "").upper().strip() not in EXPLORATORY_INTENTS or _TRAILING_LIMIT.search(sql):
+        return sql_query, False
+    return f"SELECT * FROM (\n{sql}\n) LIMIT {int(limit)}", True
+
+
+# -----------------------------------------------------------------------------
+# COST PRE-CHECK
+# -----------------------------------------------------------------------------
+def _table_rows(conn: sqlite3.Connection, db_path: str, table: str) -> int:
+    """Approximate row count: MAX(rowid) is an O(log n) stand-in for COUNT(*)."""
+    version = database_version(db_path)
+    with _row_counts_lock:
+        cache = _row_counts.get(db_path)
+        if cache is None or cache[0] != version:
+            cache = _row_counts[db_path] = (version, {})
+        if table in cache[1]:
+            return cache[1][table]
+    # Queried outside the lock; a concurrent caller may count the same table.
+    try:
+        rows = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0]
+    except sqlite3.OperationalError:
+        try:
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        except sqlite3.OperationalError:
+            rows = None
+    with _row_counts_lock:
+        cache[1][table] = rows
+    return rows
+
+
+def estimate_cost(conn: sqlite3.Connection, db_path: str, sql_query: str) -> float:
+    """
+    Estimated row visits of `sql_query`, from its EXPLAIN QUERY PLAN.
+
+    Loops listed under the same parent are nested, so their row counts
+    multiply: a full scan counts the table's rows, a primary-key lookup 1,
+    another index lookup DEFAULT_SEARCH_FANOUT. Correlated subqueries run
+    once per outer row; other subqueries once.
+    """
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall()
+    aliases = table_aliases(sql_query)
+    children = {}
+    for node_id, parent, _, detail in plan:
+        children.setdefault(parent, []).append((node_id, detail))
+
+    def rows_of(name: str) -> int:
+        table = aliases.get(name.lower(), name.lower())
+        rows = _table_rows(conn, db_path, table)
+        return rows if rows is not None else DEFAULT_SUBQUERY_ROWS
+
+    def cost(parent: int, outer: float) -> float:
+        product, total = outer, 0.0
+        for node_id, detail in children.get(parent, []):
+            loop = re.match(r"(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?", detail)
+            if loop:
+                name = loop.group(3) or loop.group(2)
+                if loop.group(1) == "SCAN":
+                    multiplier = max(rows_of(name), 1)
+                elif "PRIMARY KEY" in detail:
+                    multiplier = 1
+                else:
+                    multiplier = DEFAULT_SEARCH_FANOUT
+                    if "AUTOMATIC" in detail:
+                        total += rows_of(name)    # building the automatic index
+                product *= multiplier
+                total += product
+                total += cost(node_id, product)
+            elif detail.startswith("CORRELATED"):
+                total += cost(node_id, product)
+            else:
+                # MATERIALIZE, CO-ROUTINE, LIST/SCALAR SUBQUERY, COMPOUND: run once.
+                total += cost(node_id, 1.0)
+        return total
+
+    return cost(0, 1.0)
+
+
+def check_cost(conn: sqlite3.Connection, db_path: str, sql_query: str) -> float:
+    """
+    Rejects queries whose estimated cost exceeds the budget.
+
+    Returns:
+        float: The estimated cost.
+
+    Raises:
+        GuardrailError: code COST_REJECTED.
+    """
+    estimated = estimate_cost(conn, db_path, sql_query)
+    if _limits["max_cost"] and estimated > _limits["max_cost"]:
+        raise GuardrailError(
+            "COST_REJECTED",
+            f"Query rejected before execution: estimated {estimated:,.0f} row visits exceeds the "
+            f"budget of {_limits['max_cost']:,.0f}. Check for missing join conditions or add filters."
+        )
+    return estimated
+
+
+# -----------------------------------------------------------------------------
+# RUNTIME GUARD
+# -----------------------------------------------------------------------------
+class QueryGuard:
+    """
+    Enforces the time budget and row / byte caps while one query runs on `conn`.
+
+    Use as a context manager around execution and wrap the row batches with
+    `wrap`; SQLite aborts are re-raised as GuardrailError.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.timeout_seconds = _limits["timeout_seconds"]
+        self.max_rows = _limits["max_rows"]
+        self.max_bytes = _limits["max_bytes"]
+        self.deadline = None
+        self.reason = None
+        self.rows = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        self.deadline = time.monotonic() + self.timeout_seconds if self.timeout_seconds else None
+        self.conn.set_progress_handler(self._progress, PROGRESS_INTERVAL)
+        with _running_lock:
+            _running.add(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.set_progress_handler(None, 0)
+        with _running_lock:
+            _running.discard(self)
+        if isinstance(exc, sqlite3.OperationalError) and self.reason:
+            raise self._error() from exc
+        return False
+
+    def _progress(self) -> int:
+        # Non-zero aborts the running statement with "interrupted".
+        if self.reason:
+            return 1
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = "TIMEOUT"
+            return 1
+        return 0
+
+    def _error(self) -> GuardrailError:
+        if self.reason == "TIMEOUT":
+            return GuardrailError("TIMEOUT", f"Query cut off after the {self.timeout_seconds:g}s time budget.")
+        if self.reason == "CANCELLED":
+            return GuardrailError("CANCELLED", "Query cancelled.")
+        if self.reason == "ROW_LIMIT":
+            return GuardrailError("ROW_LIMIT", f"Query cut off: result exceeds {self.max_rows:,} rows. "
+                                               "Aggregate in SQL or add a LIMIT.")
+        return GuardrailError("BYTE_LIMIT", f"Query cut off: result exceeds {self.max_bytes:,} bytes. "
+                                            "Select fewer columns or aggregate in SQL.")
+
+    def cancel(self) -> None:
+        """Aborts the query from any thread; does nothing once the guarded block has exited."""
+        with _running_lock:
+            if self not in _running:
+                return
+            self.reason = self.reason or "CANCELLED"
+            # Under the lock, so the connection cannot move on to another statement first.
+            self.conn.interrupt()
+
+    def wrap(self, batches):
+        """
+        Passes row batches through, enforcing the caps and the deadline between
+        batches. Result bytes are the text width of up to BYTE_SAMPLE_ROWS rows
+        spread over each batch, scaled to the batch.
+        """
+        for batch in batches:
+            if self.reason:
+                raise self._error()
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                self.reason = "TIMEOUT"
+                raise self._error()
+            if batch:
+                sample = batch[::max(1, len(batch) // BYTE_SAMPLE_ROWS)]
+                row_bytes = sum(len("\t".join(map(str, row))) + 1 for row in sample) / len(sample)
+                self.bytes += int(len(batch) * row_bytes)
+            self.rows += len(batch)
+            if self.max_rows and self.rows > self.max_rows:
+                self.reason = "ROW_LIMIT"
+                raise self._error()
+            if self.max_bytes and self.bytes > self.max_bytes:
+                self.reason = "BYTE_LIMIT"
+                raise self._error()
+            yield batch
+
+
+def cancel_running_queries() -> int:
+    """Interrupts every query currently running under a guard; returns how many."""
+    with _running_lock:
+        guards = list(_running)
+    for guard in guards:
+        guard.cancel()
+    return len(guards)
@@ -0,0 +1,407 @@
+# =============================================================================
+# FILE: incremental.py
+# PURPOSE:
+#   Incremental answers for recurring questions ("enrollments per course"
+#   on a dashboard refreshed every few minutes). `enrollments` and
+#   `sessions` are append-only with increasing integer ids, so a saved
+#   question keeps:
+#     - its partial aggregates per group (the same decomposition as sharded
+#       execution, see tools/sharding.py: COUNT / SUM / MIN / MAX, AVG as
+#       sum and count)
+#     - the watermark: the highest enrollment_id / session_id folded in
+#   A refresh aggregates only rows above the watermark, combines them with
+#   the stored partials and evaluates HAVING / ORDER BY / LIMIT on the
+#   result, so its cost follows the new rows rather than the table size.
+#
+#   Older rows must not change behind the watermark. `install` adds
+#   triggers that count updates and deletes per table (and inserts below
+#   the current maximum id of the append-only tables) in agg_changes; a
+#   refresh recomputes from scratch when a table the question reads was
+#   changed, when the schema version moved, when the question's SQL changed
+#   or when the triggers are not installed.
+#
+#   State lives outside the database (it is opened read-only by the tools),
+#   in $INCREMENTAL_STATE_PATH or output/incremental_state.db.
+#
+# USAGE:
+#   python -m tools.incremental install --db datatechcon.db
+#   python -m tools.incremental run --question course_enrollments --sql "SELECT ..."
+#   python -m tools.incremental list
+# =============================================================================
+
+import argparse
+import hashlib
+import marshal
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from tools.db_pool import get_pool
+from tools.guardrails import QueryGuard, check_cost
+from tools.materialized import CHANGES_TABLE
+from tools.pushdown import mask_sql
+from tools.result_cache import normalize_sql
+from tools.schema_catalog import is_internal_table
+from tools.sharding import ShardingError, plan_partials, table_references
+
+# Append-only tables and their increasing id column.
+APPEND_ONLY = {"enrollments": "enrollment_id", "sessions": "session_id"}
+
+# Environment variable pointing at the state file; defaults to output/incremental_state.db.
+STATE_PATH_ENV = "INCREMENTAL_STATE_PATH"
+DEFAULT_STATE_PATH = os.path.join("output", "incremental_state.db")
+
+_TRIGGER_PREFIX = "trg_incr_"
+
+
+# -----------------------------------------------------------------------------
+# CHANGE TRACKING (needs a writable connection)
+# -----------------------------------------------------------------------------
+def _bump(table: str) -> str:
+    return f"UPDATE {CHANGES_TABLE} SET changes = changes + 1 WHERE tbl = '{table}';"
+
+
+def _tracking_triggers(tables: list) -> dict:
+    triggers = {}
+    for table in tables:
+        triggers[f"{_TRIGGER_PREFIX}{table}_update"] = (
+            f'CREATE TRIGGER IF NOT EXISTS {_TRIGGER_PREFIX}{table}_update AFTER UPDATE ON "{table}" '
+            f"BEGIN {_bump(table)} END"
+        )
+        triggers[f"{_TRIGGER_PREFIX}{table}_delete"] = (
+            f'CREATE TRIGGER IF NOT EXISTS {_TRIGGER_PREFIX}{table}_delete AFTER DELETE ON "{table}" '
+            f"BEGIN {_bump(table)} END"
+        )
+        column = APPEND_ONLY.get(table)
+        if column:
+            # Only an insert below the current maximum lands behind a watermark.
+            triggers[f"{_TRIGGER_PREFIX}{table}_insert"] = (
+                f'CREATE TRIGGER IF NOT EXISTS {_TRIGGER_PREFIX}{table}_insert AFTER INSERT ON "{table}" '
+                f'WHEN NEW."{column}" < (SELECT MAX("{column}") FROM "{table}") '
+                f"BEGIN {_bump(table)} END"
+            )
+    return triggers
+
+
+def _user_tables(conn: sqlite3.Connection) -> list:
+    return [
+        name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        if not is_internal_table(name)
+    ]
+
+
+def install_change_tracking(db_path: str) -> dict:
+    """
+    Creates agg_changes and the triggers that count changes to older rows.
+
+    Inserts into the dimension tables (new learners, courses) are not
+    counted: they do not change aggregates over existing rows.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        dict: Status dictionary with the tracked tables.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} ("
+                " tbl TEXT PRIMARY KEY,"
+                " changes INTEGER NOT NULL DEFAULT 0)"
+            )
+            tables = _user_tables(conn)
+            conn.executemany(f"INSERT OR IGNORE INTO {CHANGES_TABLE} (tbl) VALUES (?)", [(t,) for t in tables])
+            for ddl in _tracking_triggers(tables).values():
+                conn.execute(ddl)
+    finally:
+        conn.close()
+    return {
+        "status": "success",
+        "tables": tables,
+        "message": f"Change tracking installed on {len(tables)} tables."
+    }
+
+
+def drop_change_tracking(db_path: str) -> None:
+    """Removes the triggers and agg_changes; saved questions then recompute on every run."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            names = [name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?", (_TRIGGER_PREFIX + "%",)
+            )]
+            for name in names:
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"DROP TABLE IF EXISTS {CHANGES_TABLE}")
+    finally:
+        conn.close()
+
+
+def _change_counters(conn: sqlite3.Connection):
+    """{table: changes}, or None when change tracking is not installed."""
+    try:
+        return dict(conn.execute(f"SELECT tbl, changes FROM {CHANGES_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+
+# -----------------------------------------------------------------------------
+# STATE STORE
+# -----------------------------------------------------------------------------
+class IncrementalStateStore:
+    """Partial aggregates and watermarks of saved questions, in a SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._disk() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS incremental_state ("
+                " key TEXT PRIMARY KEY, question TEXT, db_path TEXT, payload BLOB, updated REAL)"
+            )
+
+    @contextmanager
+    def _disk(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(question: str, db_path: str) -> str:
+        return hashlib.sha256(f"{Path(db_path).resolve()}\n{question}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """The stored state dict, or None."""
+        with self._lock, self._disk() as conn:
+            row = conn.execute("SELECT payload FROM incremental_state WHERE key = ?", (key,)).fetchone()
+        return marshal.loads(row[0]) if row else None
+
+    def put(self, key: str, question: str, db_path: str, state: dict) -> None:
+        payload = marshal.dumps(state)
+        with self._lock, self._disk() as conn:
+            conn.execute(
+                "INSERT INTO incremental_state (key, question, db_path, payload, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET question = excluded.question, db_path = excluded.db_path, "
+                "payload = excluded.payload, updated = excluded.updated",
+                (key, question, str(Path(db_path).resolve()), payload, time.time())
+            )
+
+    def forget(self, key: str) -> bool:
+        with self._lock, self._disk() as conn:
+            return conn.execute("DELETE FROM incremental_state WHERE key = ?", (key,)).rowcount > 0
+
+    def list(self) -> list:
+        """[{"question", "db_path", "updated", "watermark", "groups"}] of every saved question."""
+        with self._lock, self._disk() as conn:
+            rows = conn.execute(
+                "SELECT question, db_path, updated, payload FROM incremental_state ORDER BY updated DESC"
+            ).fetchall()
+        saved = []
+        for question, db_path, updated, payload in rows:
+            state = marshal.loads(payload)
+            saved.append({"question": question, "db_path": db_path, "updated": updated,
+                          "watermark": state["watermark"], "groups": len(state["rows"])})
+        return saved
+
+    def clear(self) -> None:
+        with self._lock, self._disk() as conn:
+            conn.execute("DELETE FROM incremental_state")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> IncrementalStateStore:
+    """Returns the process-wide state store at $INCREMENTAL_STATE_PATH (or output/incremental_state.db)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IncrementalStateStore(os.environ.get(STATE_PATH_ENV) or DEFAULT_STATE_PATH)
+        return _store
+
+
+def configure_state_store(path: str) -> IncrementalStateStore:
+    """Replaces the process-wide state store with one at `path`."""
+    global _store
+    with _store_lock:
+        _store = IncrementalStateStore(path)
+        return _store
+
+
+# -----------------------------------------------------------------------------
+# REFRESH
+# -----------------------------------------------------------------------------
+def _add_condition(sql: str, condition: str) -> str:
+    """`sql` with `condition` ANDed into its top-level WHERE clause."""
+    top = mask_sql(sql)
+    where = re.search(r"\bWHERE\b", top, re.I)
+    start = where.end() if where else 0
+    following = re.search(r"\b(?:GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT)\b", top[start:], re.I)
+    end = start + following.start() if following else len(sql)
+    if where:
+        return f"{sql[:start]} ({sql[start:end].strip()}) AND {condition} {sql[end:]}".rstrip()
+    return f"{sql[:end].rstrip()} WHERE {condition} {sql[end:]}".rstrip()
+
+
+def _run(conn: sqlite3.Connection, db_path: str, sql: str) -> list:
+    """Runs `sql` under the guardrails on an open connection; returns the rows."""
+    check_cost(conn, db_path, sql)
+    cursor = conn.cursor()
+    try:
+        with QueryGuard(conn) as guard:
+            cursor.execute(sql)
+            rows = []
+            for batch in guard.wrap(iter(lambda: cursor.fetchmany(5000), [])):
+                rows.extend(batch)
+            return rows
+    finally:
+        cursor.close()
+
+
+def _stale_reason(state, sql: str, columns: list, schema_version: int, counters, changes: dict,
+                  table: str, high: int):
+    """Why the stored partials cannot be extended, or None when they can."""
+    if counters is None:
+        return "change tracking is not installed"
+    if state is None:
+        return "first run"
+    if state["sql"] != sql or state["columns"] != columns or state["table"] != table:
+        return "query changed"
+    if state["schema_version"] != schema_version:
+        return "schema changed"
+    changed = sorted(t for t in changes if changes[t] != state["changes"].get(t))
+    if changed:
+        return f"older rows changed in {', '.join(changed)}"
+    if high < state["watermark"]:
+        return f"rows removed from {table}"
+    return None
+
+
+def run_incremental(sql_query: str, db_path: str, question: str = "", store: IncrementalStateStore = None) -> dict:
+    """
+    Answers a saved question from its stored partials plus the rows added since.
+
+    Args:
+        sql_query (str): The question's aggregate SQL over enrollments or sessions.
+        db_path (str): Path to the SQLite database.
+        question (str): Name of the saved question. Default: the normalized SQL.
+        store (IncrementalStateStore): State store. Default: get_state_store().
+
+    Returns:
+        dict: {"columns", "rows", "mode": "full" | "delta" | "unchanged",
+        "reason" (why "full"), "table", "watermark", "new_rows" (folded
+        in by a delta, None after a full run)}
+
+    Raises:
+        ShardingError: The query cannot be maintained incrementally.
+        GuardrailError: The query was rejected or cut off.
+    """
+    store = store or get_state_store()
+    sql = normalize_sql(sql_query)
+    key = store.key(question or sql, db_path)
+
+    with get_pool(db_path).connection() as conn:
+        # One read snapshot for the watermark, the change counters and the query.
+        conn.execute("BEGIN")
+        try:
+            plan = plan_partials(sql_query, APPEND_ONLY, conn, topk=False)
+            facts = table_references(plan.shard_sql, APPEND_ONLY) if plan.all_shards else []
+            if plan.combine_sql is None or len(facts) != 1:
+                raise ShardingError("Incremental mode needs an aggregate query over enrollments or sessions.")
+            table, alias = facts[0]
+            top = mask_sql(plan.shard_sql)
+            if (re.search(rf"\bLEFT\s+(?:OUTER\s+)?JOIN\s+{table}\b", top, re.I)
+                    or re.search(r"\b(?:RIGHT|FULL)\b", top, re.I)):
+                raise ShardingError(f"Incremental mode cannot outer-join {table}: new rows would "
+                                    "change the rows it already produced.")
+            column = APPEND_ONLY[table]
+            high = conn.execute(f'SELECT COALESCE(MAX("{column}"), 0) FROM "{table}"').fetchone()[0]
+            schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            counters = _change_counters(conn)
+            read = {t for t, _ in table_references(sql_query, _user_tables(conn), nested=True)}
+            changes = {t: (counters or {}).get(t, 0) for t in sorted(read)}
+
+            state = store.get(key)
+            reason = _stale_reason(state, sql, plan.partial_columns, schema_version, counters, changes, table, high)
+            bound = f'{alias}."{column}" <= {high}'
+            if reason is None and high == state["watermark"]:
+                mode, partials, new_rows = "unchanged", state["rows"], 0
+            elif reason is None:
+                low = state["watermark"]
+                delta = _run(conn, db_path, _add_condition(plan.shard_sql, f'{alias}."{column}" > {low} AND {bound}'))
+                partials = plan.combine([(None, state["rows"]), (None, delta)])
+                new_rows = conn.execute(
+                    f'SELECT COUNT(*) FROM "{table}" WHERE "{column}" > ? AND "{column}" <= ?', (low, high)
+                ).fetchone()[0]
+                mode = "delta"
+            else:
+                partials = _run(conn, db_path, _add_condition(plan.shard_sql, bound))
+                mode, new_rows = "full", None
+        finally:
+            conn.rollback()
+
+    if mode != "unchanged":
+        store.put(key, question or sql, db_path, {
+            "sql": sql,
+            "table": table,
+            "columns": plan.partial_columns,
+            "rows": [tuple(row) for row in partials],
+            "watermark": high,
+            "schema_version": schema_version,
+            "changes": changes,
+        })
+    columns, rows = plan.merge([(plan.partial_columns, partials)])
+    return {
+        "columns": columns,
+        "rows": rows,
+        "mode": mode,
+        "reason": reason,
+        "table": table,
+        "watermark": high,
+        "new_rows": new_rows,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental answers for saved questions.")
+    parser.add_argument("command", choices=["install", "drop", "run", "list", "forget"])
+    parser.add_argument("--db", default="datatechcon.db", help="Path to the SQLite database.")
+    parser.add_argument("--question", default="", help="Name of the saved question ('run', 'forget').")
+    parser.add_argument("--sql", help="The question's SQL ('run', or 'forget' without --question).")
+    args = parser.parse_args()
+
+    if args.command == "install":
+        print(install_change_tracking(args.db))
+    elif args.command == "drop":
+        drop_change_tracking(args.db)
+        print("Change tracking dropped.")
+    elif args.command == "run":
+        if not args.sql:
+            parser.error("'run' needs --sql")
+        result = run_incremental(args.sql, args.db, args.question)
+        print("\t".join(result["columns"]))
+        for row in result["rows"][:50]:
+            print("\t".join(map(str, row)))
+        detail = f"{result['new_rows']} new rows" if result["mode"] == "delta" else result["reason"] or ""
+        print(f"{len(result['rows'])} rows; {result['mode']} ({detail}); "
+              f"{result['table']} watermark {result['watermark']}")
+    elif args.command == "list":
+        for saved in get_state_store().list():
+            print(f"{saved['question'][:60]:<60} watermark {saved['watermark']:>10} "
+                  f"{saved['groups']:>6} groups  {saved['db_path']}")
+    else:
+        store = get_state_store()
+        forgotten = store.forget(store.key(args.question or normalize_sql(args.sql or ""), args.db))
+        print("Forgotten." if forgotten else "No such saved question.")
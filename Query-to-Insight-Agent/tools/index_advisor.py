@@ -0,0 +1,403 @@
+# =============================================================================
+# FILE: index_advisor.py
+# PURPOSE:
+#   Index advisor for the SQL produced by query_writer_agent.
+#
+#   1. `record_query` runs EXPLAIN QUERY PLAN on every query saved by
+#      `write_sql_to_file` and appends the plan, full-table scans, automatic
+#      indexes and temp B-tree sorts to a JSONL workload log. The log is
+#      rotated to `<log>.1` when it grows past WORKLOAD_LOG_MAX_BYTES.
+#   2. `recommend_indexes` aggregates that log and proposes covering indexes
+#      for large tables that are scanned to satisfy joins, filters or
+#      GROUP BY / ORDER BY.
+#   3. `apply_indexes` creates them and reports before/after timings of the
+#      logged queries. The logged SQL is replayed on a read-only connection
+#      under the execution guardrails (tools/guardrails.py); only the
+#      CREATE INDEX statements use a writable one. Statements that are not
+#      SELECTs, or that the guardrails reject, are skipped.
+#
+# USAGE:
+#   python -m tools.index_advisor --log output/workload_log.jsonl --db datatechcon.db
+#   python -m tools.index_advisor --log output/workload_log.jsonl --db datatechcon.db --apply
+# =============================================================================
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from tools.pushdown import mask_sql
+
+DEFAULT_LOG_NAME = "workload_log.jsonl"
+# Size at which the workload log is rotated to `<log>.1` (0 = never).
+WORKLOAD_LOG_MAX_BYTES = int(os.environ.get("WORKLOAD_LOG_MAX_BYTES", 5 * 1024 * 1024))
+
+# Tables smaller than this are cheaper to scan than to index.
+DEFAULT_MIN_ROWS = 1000
+# Upper bound on columns in a proposed covering index.
+MAX_INDEX_COLUMNS = 5
+
+_SQL_KEYWORDS = {
+    "on", "where", "join", "left", "right", "inner", "outer", "cross", "natural", "group",
+    "order", "limit", "having", "union", "select", "using", "as", "full", "window",
+}
+_TABLE_REF = re.compile(r"\b(?:from|join)\s+([A-Za-z_]\w*)(?:\s+(?:as\s+)?([A-Za-z_]\w*))?", re.I)
+_QUALIFIED = re.compile(r"\b([A-Za-z_]\w*)\.([A-Za-z_]\w*)\b")
+_EQUALITY_LEFT = re.compile(r"\b([A-Za-z_]\w*)\.([A-Za-z_]\w*)\s*=")
+_EQUALITY_RIGHT = re.compile(r"(?<![<>!])=\s*([A-Za-z_]\w*)\.([A-Za-z_]\w*)\b")
+_RANGE = re.compile(r"\b([A-Za-z_]\w*)\.([A-Za-z_]\w*)\s*(?:<=|>=|<|>|\bbetween\b)", re.I)
+_GROUP_ORDER = re.compile(r"\b(?:group|order)\s+by\s+(.+?)(?=\b(?:having|limit|order|window)\b|$)", re.I | re.S)
+
+
+# -----------------------------------------------------------------------------
+# PLAN INSPECTION
+# -----------------------------------------------------------------------------
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{quote(str(Path(db_path).resolve()))}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def table_aliases(sql: str) -> dict:
+    """Maps every alias (and bare table name) in FROM / JOIN clauses to its table."""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> list:
+    """Returns the EXPLAIN QUERY PLAN detail strings for `sql`."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+
+def summarize_plan(sql: str, plan: list) -> dict:
+    """
+    Extracts the costly steps from a query plan.
+
+    Returns:
+        dict: {"full_scans": [table, ...], "automatic_indexes": [table, ...],
+               "temp_btrees": ["GROUP BY", "ORDER BY", ...]}
+    """
+    aliases = table_aliases(sql)
+    full_scans, automatic, temp = [], [], []
+    for detail in plan:
+        # e.g. "SCAN e", "SCAN TABLE enrollments AS e", "SCAN e USING COVERING INDEX idx"
+        match = re.match(r"SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)", detail)
+        if match and "INDEX" not in match.group(3):
+            name = (match.group(2) or match.group(1)).lower()
+            full_scans.append(aliases.get(name, name))
+        match = re.search(r"SEARCH (?:TABLE )?(\w+)(?: AS (\w+))? USING AUTOMATIC", detail)
+        if match:
+            name = (match.group(2) or match.group(1)).lower()
+            automatic.append(aliases.get(name, name))
+        match = re.match(r"USE TEMP B-TREE FOR (.+)", detail)
+        if match:
+            temp.append(match.group(1))
+    return {"full_scans": full_scans, "automatic_indexes": automatic, "temp_btrees": temp}
+
+
+def record_query(sql: str, db_path: str, log_path: str) -> dict:
+    """
+    Explains `sql` against `db_path` and appends the result to the workload log.
+
+    Errors (invalid SQL, missing database) are recorded rather than raised so
+    saving a query never fails because of the advisor.
+
+    Returns:
+        dict: The logged entry.
+    """
+    entry = {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"), "sql": sql.strip()}
+    try:
+        conn = _connect_read_only(db_path)
+        try:
+            entry["plan"] = explain(conn, sql)
+        finally:
+            conn.close()
+        entry.update(summarize_plan(sql, entry["plan"]))
+    except Exception as e:
+        entry["error"] = str(e)
+
+    Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if WORKLOAD_LOG_MAX_BYTES and os.path.getsize(log_path) >= WORKLOAD_LOG_MAX_BYTES:
+            # One older generation is kept, so the log holds at most twice the cap.
+            os.replace(log_path, log_path + ".1")
+    except OSError:
+        pass
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def load_workload(log_path: str) -> list:
+    """Reads the logged entries (rotated generation first), skipping the ones whose EXPLAIN failed."""
+    entries = []
+    for path in (log_path + ".1", log_path):
+        if path != log_path and not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if "error" not in entry:
+                        entries.append(entry)
+    return entries
+
+
+# -----------------------------------------------------------------------------
+# RECOMMENDATION
+# -----------------------------------------------------------------------------
+def _table_columns(conn: sqlite3.Connection, table: str) -> tuple:
+    """Returns (all column names, rowid-alias primary key or None) for `table`."""
+    info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+    columns = [row[1].lower() for row in info]
+    pk = [row for row in info if row[5]]
+    rowid_alias = pk[0][1].lower() if len(pk) == 1 and pk[0][2].upper() == "INTEGER" else None
+    return columns, rowid_alias
+
+
+def _existing_indexes(conn: sqlite3.Connection, table: str) -> list:
+    """Returns the column lists of the indexes already on `table`."""
+    indexes = []
+    for row in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        cols = [r[2].lower() for r in conn.execute(f'PRAGMA index_info("{row[1]}")').fetchall() if r[2]]
+        indexes.append(cols)
+    return indexes
+
+
+def _column_usage(sql: str, table: str, aliases: dict, columns: list) -> tuple:
+    """Returns (equality columns, range columns, group/order columns, all referenced columns) of `table`."""
+    names = {a for a, t in aliases.items() if t == table}
+    single_table = len(set(aliases.values())) == 1
+
+    def own(alias, column):
+        return (alias.lower() in names) and column.lower() in columns
+
+    equality, ranges, grouping, referenced = [], [], [], []
+    for alias, column in _EQUALITY_LEFT.findall(sql) + _EQUALITY_RIGHT.findall(sql):
+        if own(alias, column) and column.lower() not in equality:
+            equality.append(column.lower())
+    for alias, column in _RANGE.findall(sql):
+        if own(alias, column) and column.lower() not in ranges:
+            ranges.append(column.lower())
+    for clause in _GROUP_ORDER.findall(sql):
+        for alias, column in _QUALIFIED.findall(clause):
+            if own(alias, column) and column.lower() not in grouping:
+                grouping.append(column.lower())
+    for alias, column in _QUALIFIED.findall(sql):
+        if own(alias, column) and column.lower() not in referenced:
+            referenced.append(column.lower())
+
+    if single_table:
+        # Unqualified column names only make sense when a single table is queried.
+        for word in re.findall(r"[A-Za-z_]\w*", sql):
+            if word.lower() in columns and word.lower() not in referenced:
+                referenced.append(word.lower())
+    return equality, ranges, grouping, referenced
+
+
+def recommend_indexes(log_path: str, db_path: str, min_rows: int = DEFAULT_MIN_ROWS) -> list:
+    """
+    Proposes covering indexes from the workload log.
+
+    For every large table that the logged plans scan in full (or for which
+    SQLite had to build an automatic index), the key columns are the
+    columns it is joined / filtered on by equality, then range-filtered
+    columns, then GROUP BY / ORDER BY columns; the remaining referenced
+    columns are appended so the index covers the query.
+
+    Returns:
+        list: Recommendations ordered by how many logged queries they help:
+              {"table", "columns", "ddl", "queries", "reasons"}.
+    """
+    conn = _connect_read_only(db_path)
+    try:
+        proposals = {}
+        row_counts = {}
+        for entry in load_workload(log_path):
+            sql = entry["sql"]
+            aliases = table_aliases(sql)
+            costly = set(entry.get("full_scans", [])) | set(entry.get("automatic_indexes", []))
+            for table in costly:
+                if table not in row_counts:
+                    try:
+                        row_counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                    except sqlite3.Error:
+                        row_counts[table] = 0
+                if row_counts[table] < min_rows:
+                    continue
+
+                columns, rowid_alias = _table_columns(conn, table)
+                equality, ranges, grouping, referenced = _column_usage(sql, table, aliases, columns)
+                key = [c for c in equality + ranges + grouping if c != rowid_alias]
+                key = list(dict.fromkeys(key))
+                if not key:
+                    continue
+                covering = key + [c for c in referenced if c not in key and c != rowid_alias]
+                covering = covering[:MAX_INDEX_COLUMNS]
+
+                existing = _existing_indexes(conn, table)
+                if any(idx[:len(covering)] == covering for idx in existing):
+                    continue
+
+                reasons = []
+                if table in entry.get("full_scans", []):
+                    reasons.append("full table scan")
+                if table in entry.get("automatic_indexes", []):
+                    reasons.append("automatic index")
+                if entry.get("temp_btrees") and grouping:
+                    reasons.append("temp b-tree for " + ", ".join(entry["temp_btrees"]))
+
+                proposal = proposals.setdefault((table, tuple(covering)), {
+                    "table": table,
+                    "columns": covering,
+                    "ddl": f'CREATE INDEX IF NOT EXISTS "idx_{table}_{"_".join(covering)}" '
+                           f'ON "{table}" ({", ".join(covering)})',
+                    "queries": 0,
+                    "reasons": [],
+                    "table_rows": row_counts[table],
+                })
+                proposal["queries"] += 1
+                for reason in reasons:
+                    if reason not in proposal["reasons"]:
+                        proposal["reasons"].append(reason)
+    finally:
+        conn.close()
+
+    # An index whose columns are a prefix of another proposal on the same table
+    # is served by the wider one.
+    merged = []
+    for proposal in sorted(proposals.values(), key=lambda p: -len(p["columns"])):
+        wider = next((m for m in merged if m["table"] == proposal["table"]
+                      and m["columns"][:len(proposal["columns"])] == proposal["columns"]), None)
+        if wider is None:
+            merged.append(proposal)
+            continue
+        wider["queries"] += proposal["queries"]
+        wider["reasons"] += [r for r in proposal["reasons"] if r not in wider["reasons"]]
+
+    return sorted(merged, key=lambda p: (-p["queries"], -p["table_rows"]))
+
+
+# -----------------------------------------------------------------------------
+# APPLYING
+# -----------------------------------------------------------------------------
+def _time_query(db_path: str, sql: str, repeat: int) -> float:
+    """
+    Median run time of `sql` on a read-only connection, under the guardrails.
+
+    Raises:
+        GuardrailError: The statement is not a SELECT, or the guardrails
+            rejected or cut it off.
+        sqlite3.Error: The statement failed.
+    """
+    # guardrails imports this module (table_aliases), so it is imported here.
+    from tools.guardrails import GuardrailError, QueryGuard, check_cost
+
+    if not re.match(r"\s*(?:SELECT|WITH)\b", mask_sql(sql), re.I):
+        raise GuardrailError("NOT_SELECT", "Only SELECT statements are replayed.")
+    conn = _connect_read_only(db_path)
+    try:
+        check_cost(conn, db_path, sql)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            with QueryGuard(conn) as guard:
+                cursor.execute(sql)
+                for _batch in guard.wrap(iter(lambda: cursor.fetchmany(5000), [])):
+                    pass
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+    finally:
+        conn.close()
+
+
+def _time_workload(db_path: str, workload_sql: list, repeat: int) -> dict:
+    """{sql: median seconds, or the error that stopped it}."""
+    from tools.guardrails import GuardrailError
+
+    timings = {}
+    for sql in workload_sql:
+        try:
+            timings[sql] = _time_query(db_path, sql, repeat)
+        except (GuardrailError, sqlite3.Error) as e:
+            timings[sql] = e
+    return timings
+
+
+def apply_indexes(db_path: str, recommendations: list, workload_sql: list, repeat: int = 3) -> dict:
+    """
+    Creates the recommended indexes and times the workload before and after.
+
+    The workload runs on read-only connections under the guardrails; a
+    writable connection is opened only to create the indexes.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        recommendations (list): Output of `recommend_indexes`.
+        workload_sql (list): Distinct SQL statements to time.
+        repeat (int): Runs per query; the median is reported.
+
+    Returns:
+        dict: {"created": [ddl, ...], "timings": [{"sql", "before_s", "after_s", "speedup"}, ...],
+               "skipped": [{"sql", "code", "message"}, ...]}
+    """
+    before = _time_workload(db_path, workload_sql, repeat)
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            for rec in recommendations:
+                conn.execute(rec["ddl"])
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    after = _time_workload(db_path, workload_sql, repeat)
+
+    timings, skipped = [], []
+    for sql in workload_sql:
+        error = next((t for t in (before[sql], after[sql]) if isinstance(t, Exception)), None)
+        if error is not None:
+            skipped.append({"sql": sql, "code": getattr(error, "code", "SQL_ERROR"), "message": str(error)})
+            continue
+        timings.append({
+            "sql": sql,
+            "before_s": round(before[sql], 6),
+            "after_s": round(after[sql], 6),
+            "speedup": round(before[sql] / after[sql], 2) if after[sql] else None,
+        })
+    return {"created": [rec["ddl"] for rec in recommendations], "timings": timings, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommend (and optionally create) indexes from the workload log.")
+    parser.add_argument("--log", default=f"output/{DEFAULT_LOG_NAME}", help="Workload log written by write_sql_to_file.")
+    parser.add_argument("--db", default="datatechcon.db", help="Path to the SQLite database.")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS, help="Ignore tables smaller than this.")
+    parser.add_argument("--apply", action="store_true", help="Create the indexes and report timings.")
+    args = parser.parse_args()
+
+    recs = recommend_indexes(args.log, args.db, args.min_rows)
+    if not recs:
+        print("No index recommendations.")
+    for rec in recs:
+        print(f"[{rec['queries']} queries] {rec['ddl']}  ({'; '.join(rec['reasons'])})")
+
+    if args.apply and recs:
+        workload = list(dict.fromkeys(entry["sql"] for entry in load_workload(args.log)))
+        report = apply_indexes(args.db, recs, workload)
+        for timing in report["timings"]:
+            first_line = " ".join(timing["sql"].split())[:70]
+            print(f"{timing['before_s']:>9.4f}s -> {timing['after_s']:>9.4f}s  x{timing['speedup']}  {first_line}")
+        for skip in report["skipped"]:
+            first_line = " ".join(skip["sql"].split())[:70]
+            print(f"{'skipped':>24} [{skip['code']}]  {first_line}")
@@ -0,0 +1,243 @@
+# =============================================================================
+# FILE: intent_classifier.py
+# PURPOSE:
+#   Local fast-path intent classifier used in front of the Gemini intent
+#   agent. Two layers:
+#     1. Keyword rules: a question that matches exactly one intent's keywords
+#        is labelled immediately.
+#     2. A TF-IDF nearest-centroid (linear) model trained on the examples in
+#        agents/intent/instructions.txt plus questions the LLM has already
+#        labelled (the intent log). Its confidence is the relative margin
+#        between the best and the second-best intent.
+#   Anything below the confidence threshold returns None and the caller
+#   falls back to the LLM.
+# =============================================================================
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+LABELS = [
+    "COURSE_SALES",
+    "ENROLLMENT_ANALYSIS",
+    "INSTRUCTOR_PERFORMANCE",
+    "REVENUE_ANALYSIS",
+    "GENERAL_ANALYTICS",
+]
+
+DEFAULT_INSTRUCTIONS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "agents", "intent", "instructions.txt"
+)
+# Questions labelled by the LLM fallback, one JSON object per line.
+DEFAULT_INTENT_LOG = os.path.join("output", "intent_log.jsonl")
+
+DEFAULT_THRESHOLD = 0.35
+# Below this cosine similarity the question is unlike every training example.
+MIN_SIMILARITY = 0.15
+
+# Keyword rules, checked in full: a single matching intent is answered directly.
+RULES = {
+    "INSTRUCTOR_PERFORMANCE": re.compile(r"\b(instructors?|teachers?|tutors?|educators?)\b", re.I),
+    "REVENUE_ANALYSIS": re.compile(r"\b(revenue|earn\w*|income|money|profit\w*|turnover)\b", re.I),
+    "ENROLLMENT_ANALYSIS": re.compile(r"\b(enrol\w*|sign[- ]?ups?|registrations?)\b", re.I),
+    "COURSE_SALES": re.compile(r"\b(sold|sell\w*|sales|best[- ]?sellers?|most popular)\b", re.I),
+}
+
+_INTENT_HEADER = re.compile(r"^\s*\d+\.\s+([A-Z_]+)\s*$")
+_EXAMPLE = re.compile(r"^\s*[•\-*]\s*[\"“](.+?)[\"”]\s*$")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """Very light suffix stripping so 'enrollments'/'enrolled' share features."""
+    for suffix in ("ments", "ment", "ings", "ing", "ers", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def _features(text: str) -> Counter:
+    """Unigram and bigram counts of the stemmed, lower-cased question."""
+    words = [_stem(w) for w in _WORD.findall(text.lower())]
+    feats = Counter(words)
+    feats.update(f"{a}_{b}" for a, b in zip(words, words[1:]))
+    return feats
+
+
+def load_examples(instructions_path: str = DEFAULT_INSTRUCTIONS, log_path: str = DEFAULT_INTENT_LOG) -> list:
+    """
+    Collects (question, label) training pairs.
+
+    Examples are the quoted bullet lines under each numbered intent heading
+    in the intent agent's instructions, plus the LLM-labelled questions in
+    the intent log (if present).
+    """
+    examples = []
+    label = None
+    try:
+        with open(instructions_path, "r", encoding="utf-8") as f:
+            for line in f:
+                header = _INTENT_HEADER.match(line)
+                if header:
+                    label = header.group(1) if header.group(1) in LABELS else None
+                    continue
+                example = _EXAMPLE.match(line)
+                if example and label:
+                    examples.append((example.group(1), label))
+    except FileNotFoundError:
+        pass
+
+    if log_path and os.path.exists(log_path):
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("label") in LABELS and entry.get("question"):
+                    examples.append((entry["question"], entry["label"]))
+    return examples
+
+
+class IntentClassifier:
+    """
+    Keyword rules plus a TF-IDF nearest-centroid model.
+
+    `classify` returns {"label", "confidence", "source"} where source is
+    "rule", "model" or "fallback" (label None: ask the LLM).
+    """
+
+    def __init__(self, examples: list, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._idf = {}
+        self._centroids = {}
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._fast_seconds = 0.0
+        self._fallback_seconds = 0.0
+        self._fallback_timed = 0
+        self.fit(examples)
+
+    def fit(self, examples: list) -> None:
+        """Trains the model on (question, label) pairs."""
+        docs = [(_features(q), label) for q, label in examples]
+        df = Counter()
+        for feats, _ in docs:
+            df.update(feats.keys())
+        n = max(len(docs), 1)
+        self._idf = {term: math.log((1 + n) / (1 + count)) + 1.0 for term, count in df.items()}
+
+        centroids = {}
+        for feats, label in docs:
+            vector = self._vector(feats)
+            centroid = centroids.setdefault(label, Counter())
+            for term, weight in vector.items():
+                centroid[term] += weight
+        self._centroids = {label: self._normalize(c) for label, c in centroids.items()}
+
+    def _vector(self, feats: Counter) -> dict:
+        vector = {t: (1 + math.log(c)) * self._idf[t] for t, c in feats.items() if t in self._idf}
+        return self._normalize(vector)
+
+    @staticmethod
+    def _normalize(vector: dict) -> dict:
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
+
+    def scores(self, question: str) -> dict:
+        """Cosine similarity of the question to every intent centroid."""
+        vector = self._vector(_features(question))
+        return {
+            label: sum(w * centroid.get(t, 0.0) for t, w in vector.items())
+            for label, centroid in self._centroids.items()
+        }
+
+    def classify(self, question: str) -> dict:
+        """Labels `question`, or returns label None when it is not confident enough."""
+        started = time.perf_counter()
+        matched = [label for label, rule in RULES.items() if rule.search(question)]
+        if len(matched) == 1:
+            result = {"label": matched[0], "confidence": 1.0, "source": "rule"}
+        else:
+            scores = self.scores(question)
+            # Several keyword families matched: only they are candidates.
+            candidates = {l: s for l, s in scores.items() if l in matched} if matched else scores
+            ranked = sorted(candidates.items(), key=lambda item: item[1], reverse=True)
+            best, best_score = ranked[0] if ranked else (None, 0.0)
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            confidence = (best_score - runner_up) / best_score if best_score > 0 else 0.0
+            if best and best_score >= MIN_SIMILARITY and confidence >= self.threshold:
+                result = {"label": best, "confidence": round(confidence, 3), "source": "model"}
+            else:
+                result = {"label": None, "confidence": round(confidence, 3), "source": "fallback"}
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counts[result["source"]] += 1
+            if result["label"]:
+                self._fast_seconds += elapsed
+        return result
+
+    def record_fallback(self, seconds: float) -> None:
+        """Records how long one LLM fallback classification took."""
+        with self._lock:
+            self._fallback_seconds += seconds
+            self._fallback_timed += 1
+
+    def stats(self) -> dict:
+        """
+        Fast-path counters.
+
+        "latency_saved_seconds" estimates the LLM time avoided: fast-path hits
+        times the mean observed fallback latency, minus the fast-path time.
+        """
+        with self._lock:
+            hits = self._counts["rule"] + self._counts["model"]
+            total = hits + self._counts["fallback"]
+            mean_fallback = self._fallback_seconds / self._fallback_timed if self._fallback_timed else None
+            return {
+                "questions": total,
+                "rule_hits": self._counts["rule"],
+                "model_hits": self._counts["model"],
+                "fallbacks": self._counts["fallback"],
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "mean_fast_path_us": round(self._fast_seconds / hits * 1e6, 1) if hits else None,
+                "mean_fallback_seconds": round(mean_fallback, 3) if mean_fallback is not None else None,
+                "latency_saved_seconds": (
+                    round(hits * mean_fallback - self._fast_seconds, 3) if mean_fallback is not None else None
+                ),
+            }
+
+
+def log_labelled_question(question: str, label: str, log_path: str = DEFAULT_INTENT_LOG) -> None:
+    """Appends an LLM-labelled question to the intent log used for training."""
+    if label not in LABELS or not question.strip():
+        return
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"question": question.strip(), "label": label}) + "\n")
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Returns the process-wide classifier, trained on first use."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            threshold = float(os.environ.get("INTENT_FAST_PATH_THRESHOLD", DEFAULT_THRESHOLD))
+            _classifier = IntentClassifier(load_examples(), threshold)
+        return _classifier
+
+
+def retrain_intent_classifier() -> IntentClassifier:
+    """Retrains the process-wide classifier on the current examples and intent log."""
+    classifier = get_intent_classifier()
+    classifier.fit(load_examples())
+    return classifier
@@ -0,0 +1,319 @@
+# =============================================================================
+# FILE: materialized.py
+# PURPOSE:
+#   Materialized aggregate layer inside datatechcon.db for the standard
+#   intents. One summary table, `agg_course_enrollments` (enrollments per
+#   course), answers COURSE_SALES, ENROLLMENT_ANALYSIS, INSTRUCTOR_PERFORMANCE
+#   and REVENUE_ANALYSIS by joining the small `courses` / `instructors`
+#   tables at lookup time, so course titles, prices and instructors are
+#   always current and a lookup costs O(courses) instead of a scan of
+#   `enrollments`.
+#
+#   Two maintenance modes:
+#     trigger   - AFTER INSERT/DELETE/UPDATE triggers on `enrollments` keep the
+#                 summary exact on every write.
+#     watermark - no write overhead; `refresh_aggregates` folds in enrollments
+#                 with enrollment_id above the stored watermark. Lookups add
+#                 the not-yet-folded tail on the fly, so answers stay exact
+#                 for append-only data.
+#
+#   Enrollments without a course (course_id NULL) are not counted: in the
+#   INTEGER PRIMARY KEY column of the summary a NULL would become a new
+#   rowid, i.e. a phantom course.
+#
+# USAGE:
+#   python -m tools.materialized install --mode trigger
+#   python -m tools.materialized refresh
+#   python -m tools.materialized verify
+# =============================================================================
+
+import argparse
+import sqlite3
+
+SUMMARY_TABLE = "agg_course_enrollments"
+META_TABLE = "agg_meta"
+# Per-table counters of updates and deletes, kept by the triggers of tools/incremental.py.
+CHANGES_TABLE = "agg_changes"
+
+_TRIGGERS = {
+    "trg_agg_enrollments_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agg_enrollments_insert AFTER INSERT ON enrollments
+        WHEN NEW.course_id IS NOT NULL
+        BEGIN
+            INSERT INTO {SUMMARY_TABLE} (course_id, total_enrollments) VALUES (NEW.course_id, 1)
+            ON CONFLICT(course_id) DO UPDATE SET total_enrollments = total_enrollments + 1;
+        END""",
+    "trg_agg_enrollments_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agg_enrollments_delete AFTER DELETE ON enrollments
+        WHEN OLD.course_id IS NOT NULL
+        BEGIN
+            UPDATE {SUMMARY_TABLE} SET total_enrollments = total_enrollments - 1
+            WHERE course_id = OLD.course_id;
+        END""",
+    "trg_agg_enrollments_update": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_agg_enrollments_update AFTER UPDATE OF course_id ON enrollments
+        WHEN OLD.course_id IS NOT NEW.course_id
+        BEGIN
+            UPDATE {SUMMARY_TABLE} SET total_enrollments = total_enrollments - 1
+            WHERE OLD.course_id IS NOT NULL AND course_id = OLD.course_id;
+            INSERT INTO {SUMMARY_TABLE} (course_id, total_enrollments)
+            SELECT NEW.course_id, 1 WHERE NEW.course_id IS NOT NULL
+            ON CONFLICT(course_id) DO UPDATE SET total_enrollments = total_enrollments + 1;
+        END""",
+}
+# Dropped by install and drop in databases set up by older versions. Deleted
+# courses keep their summary rows, like their enrollments; lookups join `courses`.
+_RETIRED_TRIGGERS = ("trg_agg_courses_delete",)
+
+# Per-course counts: the summary plus, in watermark mode, enrollments not yet folded in.
+_COUNTS_CTE = f"""
+WITH counts AS (
+    SELECT course_id, SUM(n) AS total_enrollments FROM (
+        SELECT course_id, total_enrollments AS n FROM {SUMMARY_TABLE}
+        UNION ALL
+        SELECT course_id, COUNT(*) FROM enrollments
+        WHERE enrollment_id > :watermark AND course_id IS NOT NULL GROUP BY course_id
+    )
+    GROUP BY course_id
+)
+"""
+
+# Same columns and ordering as the pandas analysis for each intent.
+LOOKUP_QUERIES = {
+    "COURSE_SALES": _COUNTS_CTE + """
+        SELECT c.title, k.total_enrollments
+        FROM counts k JOIN courses c ON c.course_id = k.course_id
+        WHERE k.total_enrollments > 0
+        ORDER BY k.total_enrollments DESC""",
+    "ENROLLMENT_ANALYSIS": _COUNTS_CTE + """
+        SELECT COALESCE(SUM(total_enrollments), 0) AS total_enrollments FROM counts""",
+    "INSTRUCTOR_PERFORMANCE": _COUNTS_CTE + """
+        SELECT i.name AS instructor, SUM(k.total_enrollments) AS total_enrollments
+        FROM counts k
+        JOIN courses c ON c.course_id = k.course_id
+        JOIN instructors i ON i.instructor_id = c.instructor_id
+        GROUP BY i.instructor_id
+        HAVING SUM(k.total_enrollments) > 0
+        ORDER BY total_enrollments DESC""",
+    "REVENUE_ANALYSIS": _COUNTS_CTE + """
+        SELECT c.title, k.total_enrollments * c.price AS revenue
+        FROM counts k JOIN courses c ON c.course_id = k.course_id
+        WHERE k.total_enrollments > 0
+        ORDER BY revenue DESC""",
+}
+
+
+# -----------------------------------------------------------------------------
+# MAINTENANCE (needs a writable connection)
+# -----------------------------------------------------------------------------
+def _set_meta(conn: sqlite3.Connection, key: str, value) -> None:
+    conn.execute(
+        f"INSERT INTO {META_TABLE} (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value)
+    )
+
+
+def _rebuild(conn: sqlite3.Connection) -> int:
+    """Recomputes the summary from scratch; returns the new watermark."""
+    watermark = conn.execute("SELECT COALESCE(MAX(enrollment_id), 0) FROM enrollments").fetchone()[0]
+    conn.execute(f"DELETE FROM {SUMMARY_TABLE}")
+    conn.execute(
+        f"INSERT INTO {SUMMARY_TABLE} (course_id, total_enrollments) "
+        "SELECT course_id, COUNT(*) FROM enrollments "
+        "WHERE enrollment_id <= ? AND course_id IS NOT NULL GROUP BY course_id",
+        (watermark,)
+    )
+    _set_meta(conn, "watermark", watermark)
+    return watermark
+
+
+def install_aggregates(db_path: str, mode: str = "trigger") -> dict:
+    """
+    Creates the summary tables, fills them with a full recompute and, in
+    trigger mode, installs the maintenance triggers.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        mode (str): "trigger" or "watermark".
+
+    Returns:
+        dict: Status dictionary with the mode and watermark.
+    """
+    if mode not in ("trigger", "watermark"):
+        raise ValueError("mode must be 'trigger' or 'watermark'")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} ("
+                " course_id INTEGER PRIMARY KEY,"
+                " total_enrollments INTEGER NOT NULL)"
+            )
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value)")
+            for name in (*_TRIGGERS, *_RETIRED_TRIGGERS):
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            watermark = _rebuild(conn)
+            if mode == "trigger":
+                for ddl in _TRIGGERS.values():
+                    conn.execute(ddl)
+            _set_meta(conn, "mode", mode)
+    finally:
+        conn.close()
+
+    return {
+        "status": "success",
+        "mode": mode,
+        "watermark": watermark,
+        "message": f"Materialized aggregates installed in {mode} mode."
+    }
+
+
+def refresh_aggregates(db_path: str, full: bool = False) -> dict:
+    """
+    Folds enrollments added since the last refresh into the summary.
+
+    Only needed in watermark mode (trigger mode is always current). With
+    `full=True` the summary is recomputed from scratch instead, which also
+    repairs it after updates or deletes of already-folded rows.
+
+    Returns:
+        dict: Status dictionary with the number of folded rows and new watermark.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            mode, old = _read_meta(conn)
+            if full:
+                watermark = _rebuild(conn)
+                folded = None
+            else:
+                watermark = conn.execute("SELECT COALESCE(MAX(enrollment_id), 0) FROM enrollments").fetchone()[0]
+                folded = conn.execute(
+                    "SELECT COUNT(*) FROM enrollments WHERE enrollment_id > ? AND enrollment_id <= ?",
+                    (old, watermark)
+                ).fetchone()[0]
+                if mode == "watermark" and folded:
+                    conn.execute(
+                        f"INSERT INTO {SUMMARY_TABLE} (course_id, total_enrollments) "
+                        "SELECT course_id, COUNT(*) FROM enrollments "
+                        "WHERE enrollment_id > ? AND enrollment_id <= ? AND course_id IS NOT NULL "
+                        "GROUP BY course_id "
+                        "ON CONFLICT(course_id) DO UPDATE "
+                        "SET total_enrollments = total_enrollments + excluded.total_enrollments",
+                        (old, watermark)
+                    )
+                # In trigger mode the rows are already counted; just advance the watermark.
+                _set_meta(conn, "watermark", watermark)
+    finally:
+        conn.close()
+
+    return {
+        "status": "success",
+        "mode": mode,
+        "folded_rows": folded,
+        "watermark": watermark,
+        "message": "Aggregates recomputed." if full else f"Folded {folded} new enrollments."
+    }
+
+
+def drop_aggregates(db_path: str) -> None:
+    """Removes the triggers and summary tables."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            for name in (*_TRIGGERS, *_RETIRED_TRIGGERS):
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"DROP TABLE IF EXISTS {SUMMARY_TABLE}")
+            conn.execute(f"DROP TABLE IF EXISTS {META_TABLE}")
+    finally:
+        conn.close()
+
+
+# -----------------------------------------------------------------------------
+# LOOKUP AND VERIFICATION (read-only)
+# -----------------------------------------------------------------------------
+def _read_meta(conn: sqlite3.Connection) -> tuple:
+    """Returns (mode, watermark), raising LookupError when aggregates are not installed."""
+    try:
+        meta = dict(conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        raise LookupError("Materialized aggregates are not installed in this database.")
+    return meta.get("mode", "watermark"), int(meta.get("watermark", 0))
+
+
+def answer_intent(conn: sqlite3.Connection, intent: str):
+    """
+    Answers an intent from the summary tables.
+
+    Returns:
+        tuple | None: (columns, rows), or None when the intent has no materialized answer.
+
+    Raises:
+        LookupError: If the aggregates are not installed.
+    """
+    query = LOOKUP_QUERIES.get((intent or "").upper().strip())
+    if query is None:
+        return None
+    mode, watermark = _read_meta(conn)
+    # Trigger mode is always current, so the tail scan is skipped entirely.
+    params = {"watermark": watermark if mode == "watermark" else 2 ** 63 - 1}
+    cursor = conn.execute(query, params)
+    try:
+        return [d[0] for d in cursor.description], cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def verify_aggregates(conn: sqlite3.Connection) -> dict:
+    """
+    Compares the summary against a full recompute from `enrollments`.
+
+    In watermark mode only rows up to the watermark are compared (the tail is
+    not folded in yet by design).
+
+    Returns:
+        dict: {"consistent": bool, "mode", "watermark", "mismatches": [
+               {"course_id", "expected", "materialized"}, ...]}
+    """
+    mode, watermark = _read_meta(conn)
+    limit = watermark if mode == "watermark" else 2 ** 63 - 1
+    expected = dict(conn.execute(
+        "SELECT course_id, COUNT(*) FROM enrollments "
+        "WHERE enrollment_id <= ? AND course_id IS NOT NULL GROUP BY course_id", (limit,)
+    ).fetchall())
+    actual = dict(conn.execute(
+        f"SELECT course_id, total_enrollments FROM {SUMMARY_TABLE} WHERE total_enrollments != 0"
+    ).fetchall())
+
+    mismatches = [
+        {"course_id": cid, "expected": expected.get(cid, 0), "materialized": actual.get(cid, 0)}
+        for cid in sorted(set(expected) | set(actual), key=lambda c: (c is None, c))
+        if expected.get(cid, 0) != actual.get(cid, 0)
+    ]
+    return {"consistent": not mismatches, "mode": mode, "watermark": watermark, "mismatches": mismatches}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage materialized intent aggregates.")
+    parser.add_argument("command", choices=["install", "refresh", "verify", "drop"])
+    parser.add_argument("--db", default="datatechcon.db", help="Path to the SQLite database.")
+    parser.add_argument("--mode", default="trigger", choices=["trigger", "watermark"],
+                        help="Maintenance mode used by 'install'.")
+    parser.add_argument("--full", action="store_true", help="Full recompute for 'refresh'.")
+    args = parser.parse_args()
+
+    if args.command == "install":
+        print(install_aggregates(args.db, args.mode))
+    elif args.command == "refresh":
+        print(refresh_aggregates(args.db, full=args.full))
+    elif args.command == "verify":
+        connection = sqlite3.connect(args.db)
+        try:
+            print(verify_aggregates(connection))
+        finally:
+            connection.close()
+    else:
+        drop_aggregates(args.db)
+        print("Materialized aggregates dropped.")
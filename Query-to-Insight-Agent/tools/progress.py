@@ -0,0 +1,191 @@
+# =============================================================================
+# FILE: progress.py
+# PURPOSE:
+#   Progress channel for progressive answers. While the pipeline runs, the
+#   tools publish partial results as soon as they have them:
+#
+#     data      "preview"  first rows of the query result and a row count
+#                          (exact, or an estimate while rows are still coming)
+#     analysis  "groups"   analysis rows, a chunk at a time
+#     insight   "text"     each insight line as it is written
+#
+#   ProgressivePipelineAgent (agents/root_agent/progressive.py) opens a
+#   channel per ADK invocation and turns every message into a partial
+#   event, so the user sees the preview while the later stages still run.
+#
+#   Tools run on worker threads (tools/async_tools.py copies the caller's
+#   context), so a message finds its channel through the run id of
+#   agent_common/artifact_store.py and is handed to the event loop with
+#   call_soon_threadsafe. Without an open channel (scripts, benchmarks,
+#   PROGRESSIVE_RESULTS=0) publishing does nothing.
+# =============================================================================
+
+import contextlib
+import contextvars
+import itertools
+import os
+import threading
+import time
+
+from agent_common.artifact_store import current_run_id
+
+# PROGRESSIVE_RESULTS=0 turns partial events off.
+PROGRESSIVE_ENABLED = os.environ.get("PROGRESSIVE_RESULTS", "1") != "0"
+# Rows shown in a data preview.
+PREVIEW_ROWS = int(os.environ.get("PROGRESS_PREVIEW_ROWS", "10"))
+# Analysis rows per "groups" message, and the most sent for one analysis.
+GROUP_CHUNK_ROWS = 25
+MAX_GROUP_ROWS = 200
+
+_channels = {}
+_lock = threading.Lock()
+_sequence = itertools.count(1)
+_stage = contextvars.ContextVar("progress_stage", default="data")
+
+
+class ProgressChannel:
+    """Delivers the messages of one run to `deliver` on the event loop `loop`."""
+
+    def __init__(self, run_id: str, loop, deliver):
+        self.run_id = run_id
+        self.loop = loop
+        self.deliver = deliver
+        self.published = 0
+
+    def send(self, message: dict) -> None:
+        self.published += 1
+        if self.loop.is_closed():
+            return
+        # Messages come from worker threads; the loop owns the consumer.
+        self.loop.call_soon_threadsafe(self.deliver, message)
+
+
+def open_channel(run_id: str, loop, deliver) -> ProgressChannel:
+    """Routes the progress of `run_id` to `deliver(message)`, called on `loop`."""
+    channel = ProgressChannel(run_id, loop, deliver)
+    with _lock:
+        _channels[run_id] = channel
+    return channel
+
+
+def close_channel(run_id: str) -> None:
+    """Stops routing the progress of `run_id`; later messages are dropped."""
+    with _lock:
+        _channels.pop(run_id, None)
+
+
+def _channel():
+    run_id = current_run_id()
+    if run_id is None:
+        return None
+    with _lock:
+        return _channels.get(run_id)
+
+
+def is_listening() -> bool:
+    """True when the current run has an open channel, i.e. publishing is worth its cost."""
+    return _channel() is not None
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Labels the messages published inside the block with stage `name`."""
+    token = _stage.set(name)
+    try:
+        yield name
+    finally:
+        _stage.reset(token)
+
+
+def current_stage() -> str:
+    """Stage the messages published here are labelled with ("data" outside any stage block)."""
+    return _stage.get()
+
+
+def publish(kind: str, **data) -> bool:
+    """
+    Publishes one message of the current stage to the current run's channel.
+
+    Returns:
+        bool: False when nobody is listening and the message was dropped.
+    """
+    channel = _channel()
+    if channel is None:
+        return False
+    channel.send({
+        "seq": next(_sequence),
+        "stage": _stage.get(),
+        "kind": kind,
+        "time": time.time(),
+        **data,
+    })
+    return True
+
+
+def preview_batches(columns: list, batches, batch_size: int = None, estimated_rows: float = None):
+    """
+    Passes row batches through, publishing a "preview" as soon as the first
+    one arrives: its first PREVIEW_ROWS rows and the row count. The count is
+    exact when the first batch holds the whole result (it is shorter than
+    `batch_size`, or there is no `batch_size`: one batch of everything);
+    otherwise it is `estimated_rows`, the planner's estimate, but at least the
+    rows already read.
+    """
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None:
+        publish_preview(columns, [], 0)
+        return
+    exact = batch_size is None or len(first) < batch_size
+    publish_preview(
+        columns, first,
+        len(first) if exact else int(max(len(first), estimated_rows or 0)),
+        exact=exact,
+    )
+    yield first
+    yield from batches
+
+
+def publish_preview(columns: list, rows: list, row_count: int, exact: bool = True) -> None:
+    """Publishes a "preview" of a result: its first PREVIEW_ROWS `rows` and `row_count`."""
+    publish(
+        "preview",
+        columns=list(columns),
+        rows=[list(row) for row in (rows or [])[:PREVIEW_ROWS]],
+        row_count=row_count,
+        exact=exact,
+    )
+
+
+def publish_groups(columns: list, rows: list, total: int = None) -> None:
+    """
+    Publishes analysis rows as "groups" messages of GROUP_CHUNK_ROWS rows, at
+    most MAX_GROUP_ROWS of them; `total` is the analysis' row count (default:
+    len(rows)).
+    """
+    shown = rows[:MAX_GROUP_ROWS]
+    for start in range(0, len(shown), GROUP_CHUNK_ROWS):
+        publish(
+            "groups",
+            columns=list(columns),
+            rows=[list(row) for row in shown[start:start + GROUP_CHUNK_ROWS]],
+            offset=start,
+            total=len(rows) if total is None else total,
+        )
+
+
+def render(message: dict) -> str:
+    """Plain-text rendering of a progress message, for the partial event shown to the user."""
+    kind = message["kind"]
+    if kind == "text":
+        return message["text"]
+    lines = []
+    if kind == "preview":
+        count = f"{message['row_count']:,}" if message["exact"] else f"~{message['row_count']:,}"
+        lines.append(f"Preview: {count} rows, first {len(message['rows'])} shown")
+    elif kind == "groups" and message["offset"] == 0:
+        lines.append(f"Analysis: {message['total']:,} rows")
+    if message.get("offset", 0) == 0:
+        lines.append("\t".join(str(c) for c in message["columns"]))
+    lines += ["\t".join("" if v is None else str(v) for v in row) for row in message["rows"]]
+    return "\n".join(lines)
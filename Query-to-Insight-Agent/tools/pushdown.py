@@ -0,0 +1,139 @@
+# =============================================================================
+# FILE: pushdown.py
+# PURPOSE:
+#   Compiles the per-intent analysis done by `analyze_data_and_save_to_file`
+#   (pandas groupby / sum / sort) into one SQL aggregate that wraps the
+#   generated query as a subquery, so SQLite reduces the rows itself and only
+#   the handful of result rows leave the database.
+#
+#   Each rule mirrors the pandas branch for the same intent, including the
+#   columns it requires; intents or column sets without a rule return None
+#   and the caller falls back to the pandas path.
+#
+#   Also home of the SQL text helpers (strip_terminator, mask_sql,
+#   split_top_level) used by the approximate and sharded query rewrites.
+# =============================================================================
+
+
+def strip_terminator(sql: str) -> str:
+    """
+    Removes trailing semicolons and comments so the query can be nested.
+    Literals are masked first, so a "--" inside a trailing string stays.
+    """
+    sql = sql.strip()
+    # Literals filled with a non-blank character, comments blanked.
+    masked = _mask(sql, nested=False, literal_fill="'")
+    return sql[:len(masked.rstrip(" \t\r\n;"))]
+
+
+def mask_sql(sql: str, nested: bool = True) -> str:
+    """
+    Copy of `sql` with string literals and comments (-- and /* */) blanked
+    out and, when `nested`, everything inside parentheses too, so regexes
+    only see the top level. Positions are preserved.
+    """
+    return _mask(sql, nested, " ")
+
+
+def _mask(sql: str, nested: bool, literal_fill: str) -> str:
+    out, depth, i = [], 0, 0
+    while i < len(sql):
+        ch = sql[i]
+        if ch in "'\"":
+            end = sql.find(ch, i + 1)
+            end = len(sql) - 1 if end < 0 else end
+            out.append(literal_fill * (end - i + 1))
+            i = end + 1
+            continue
+        if sql.startswith("--", i) or sql.startswith("/*", i):
+            if ch == "-":
+                end = sql.find("\n", i)
+                end = len(sql) if end < 0 else end
+            else:
+                end = sql.find("*/", i + 2)
+                end = len(sql) if end < 0 else end + 2
+            out.append(" " * (end - i))
+            i = end
+            continue
+        if ch == "(":
+            out.append("(" if depth == 0 or not nested else " ")
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            out.append(")" if depth == 0 or not nested else " ")
+        else:
+            out.append(ch if depth == 0 or not nested else " ")
+        i += 1
+    return "".join(out)
+
+
+def split_top_level(text: str, masked: str) -> list:
+    """Splits `text` at the commas that are at the top level of `masked`."""
+    parts, start = [], 0
+    for i, ch in enumerate(masked):
+        if ch == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def compile_intent_query(intent: str, sql_query: str, columns: list):
+    """
+    Builds the aggregate query for `intent` over the result of `sql_query`.
+
+    Args:
+        intent (str): Intent label (COURSE_SALES, ENROLLMENT_ANALYSIS, ...).
+        sql_query (str): The generated SQL whose result is being analyzed.
+        columns (list): Column names produced by `sql_query`.
+
+    Returns:
+        str | None: SQL producing the same table as the pandas analysis, or
+        None when the intent cannot be expressed for these columns.
+    """
+    intent = (intent or "").upper().strip()
+    cols = set(columns)
+    src = f"(\n{strip_terminator(sql_query)}\n) AS src"
+
+    if intent == "COURSE_SALES" and {"title", "total_enrollments"} <= cols:
+        return (
+            f"SELECT {_quote('title')}, SUM({_quote('total_enrollments')}) AS total_enrollments "
+            f"FROM {src} GROUP BY {_quote('title')} ORDER BY total_enrollments DESC"
+        )
+
+    if intent == "ENROLLMENT_ANALYSIS":
+        if "total_enrollments" in cols:
+            return f"SELECT SUM({_quote('total_enrollments')}) AS total_enrollments FROM {src}"
+        return "SELECT 'No enrollment data found.' AS message"
+
+    if intent == "INSTRUCTOR_PERFORMANCE" and {"instructor", "total_enrollments"} <= cols:
+        return (
+            f"SELECT {_quote('instructor')}, SUM({_quote('total_enrollments')}) AS total_enrollments "
+            f"FROM {src} GROUP BY {_quote('instructor')} ORDER BY total_enrollments DESC"
+        )
+
+    if intent == "REVENUE_ANALYSIS":
+        if {"title", "total_enrollments", "price"} <= cols:
+            return (
+                f"SELECT {_quote('title')}, "
+                f"SUM({_quote('total_enrollments')} * {_quote('price')}) AS revenue "
+                f"FROM {src} GROUP BY {_quote('title')} ORDER BY revenue DESC"
+            )
+        if {"title", "price"} <= cols:
+            return f"SELECT {_quote('title')}, {_quote('price')} FROM {src} ORDER BY {_quote('price')} DESC"
+
+    # GENERAL_ANALYTICS (describe) and unknown intents stay on the pandas path.
+    return None
+
+
+def result_columns(conn, sql_query: str) -> list:
+    """Returns the column names `sql_query` produces without fetching any rows."""
+    cursor = conn.execute(f"SELECT * FROM (\n{strip_terminator(sql_query)}\n) LIMIT 0")
+    try:
+        return [d[0] for d in cursor.description]
+    finally:
+        cursor.close()
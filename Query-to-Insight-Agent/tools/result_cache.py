@@ -0,0 +1,285 @@
+# =============================================================================
+# FILE: result_cache.py
+# PURPOSE:
+#   Versioned cache of query results placed in front of SQL execution in
+#   `fetch_data_and_save_to_file`. Entries are keyed on a normalized form of
+#   the SQL text plus the database file, and tagged with the database version
+#   at the time they were stored; a changed database invalidates them.
+#
+#   Two tiers:
+#     - in-memory LRU bounded by entry count and total payload bytes
+#     - optional SQLite file on disk, so results survive process restarts
+# =============================================================================
+
+import hashlib
+import marshal
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024          # total payload held in memory
+DEFAULT_MAX_ENTRY_ROWS = 100_000              # larger results are never cached
+
+# Environment variable pointing at an on-disk cache file (persistence is off when unset).
+PERSIST_PATH_ENV = "QUERY_RESULT_CACHE_PATH"
+
+# String literals and quoted identifiers: '...', "..." (a string when no column has that name), `...`, [...].
+_LITERAL = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])""")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_NON_DETERMINISTIC = re.compile(
+    r"\b(random|randomblob|changes|last_insert_rowid|total_changes)\s*\(|'now'|\bcurrent_(date|time|timestamp)\b"
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical form of a SQL statement used as the cache key.
+
+    Comments are dropped, whitespace collapsed, a trailing semicolon removed
+    and everything outside quotes lowercased (SQLite keywords and bare
+    identifiers are case-insensitive). Quoted segments are kept as-is:
+    SQLite reads "USA" as a string when no column has that name.
+    """
+    parts = []
+    for i, segment in enumerate(_LITERAL.split(sql)):
+        if i % 2:
+            parts.append(segment)      # string literal, kept verbatim
+            continue
+        segment = _COMMENT.sub(" ", segment).lower()
+        segment = re.sub(r"\s+", " ", segment)
+        parts.append(re.sub(r" ?([(),=<>;+*/]) ?", r"\1", segment))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def is_cacheable_sql(normalized_sql: str) -> bool:
+    """Rejects statements whose result can change without the database changing."""
+    return not _NON_DETERMINISTIC.search(normalized_sql)
+
+
+def database_version(db_path: str) -> str:
+    """
+    Version tag of a SQLite database file, comparable across processes.
+
+    Built from the size and mtime of the database and its WAL file. (PRAGMA
+    data_version is connection-local, so it cannot tag entries shared by
+    pooled connections or stored on disk.)
+    """
+    parts = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except FileNotFoundError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+class QueryResultCache:
+    """LRU cache of (columns, rows) query results with optional on-disk persistence."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entry_rows: int = DEFAULT_MAX_ENTRY_ROWS,
+        persist_path: str = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_rows = max_entry_rows
+        self.persist_path = persist_path
+
+        self._entries = OrderedDict()   # key -> (db_version, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "stores": 0}
+
+        if persist_path:
+            Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+            with self._disk() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_cache ("
+                    " key TEXT PRIMARY KEY, db_version TEXT, payload BLOB,"
+                    " nbytes INTEGER, last_used REAL)"
+                )
+
+    # -------------------------------------------------------------------------
+    @contextmanager
+    def _disk(self):
+        conn = sqlite3.connect(self.persist_path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(sql: str, db_path: str) -> str:
+        normalized = normalize_sql(sql)
+        return hashlib.sha256(f"{Path(db_path).resolve()}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, version: str, payload: bytes) -> None:
+        # Caller holds self._lock.
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+        self._entries[key] = (version, payload)
+        self._bytes += len(payload)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    # -------------------------------------------------------------------------
+    def get(self, sql: str, db_path: str, version: str = None):
+        """
+        Looks up a cached result. `version` overrides the version tag of
+        `db_path` (sharded execution passes the combined tag of its shards).
+
+        Returns:
+            tuple | None: (columns, rows) on a hit, None on a miss or when the
+            stored entry belongs to an older version of the database.
+        """
+        key = self._key(sql, db_path)
+        version = version or database_version(db_path)
+
+        invalidated = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return marshal.loads(entry[1])
+                self._bytes -= len(self._entries.pop(key)[1])
+                self._stats["invalidations"] += 1
+                invalidated = True
+
+        if self.persist_path:
+            with self._disk() as conn:
+                row = conn.execute("SELECT db_version, payload FROM query_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] == version:
+                    conn.execute("UPDATE query_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                    with self._lock:
+                        self._remember(key, version, row[1])
+                        self._stats["hits"] += 1
+                    return marshal.loads(row[1])
+                if row is not None:
+                    conn.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+                    if not invalidated:
+                        with self._lock:
+                            self._stats["invalidations"] += 1
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, sql: str, db_path: str, columns: list, rows: list, version: str = None) -> bool:
+        """
+        Stores a result. `version` should be the database version observed
+        before the query ran, so a concurrent write can never be cached as current.
+
+        Returns:
+            bool: True if the result was stored.
+        """
+        if len(rows) > self.max_entry_rows or not is_cacheable_sql(normalize_sql(sql)):
+            return False
+        payload = marshal.dumps((list(columns), [tuple(r) for r in rows]))
+        if len(payload) > self.max_bytes:
+            return False
+
+        key = self._key(sql, db_path)
+        version = version or database_version(db_path)
+        with self._lock:
+            self._remember(key, version, payload)
+            self._stats["stores"] += 1
+
+        if self.persist_path:
+            with self._disk() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, version, payload, len(payload), time.time())
+                )
+                self._trim_disk(conn)
+        return True
+
+    def _trim_disk(self, conn: sqlite3.Connection) -> None:
+        """Drops least-recently-used disk entries beyond the entry and byte limits."""
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM query_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        for key, nbytes in conn.execute("SELECT key, nbytes FROM query_cache ORDER BY last_used").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+            count -= 1
+            total -= nbytes
+
+    def stats(self) -> dict:
+        """Returns hit/miss/invalidation/eviction counters and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"entries": len(self._entries), "bytes": self._bytes})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Empties both tiers."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.persist_path:
+            with self._disk() as conn:
+                conn.execute("DELETE FROM query_cache")
+
+
+class ResultCollector:
+    """
+    Passes row batches through unchanged while keeping a copy for the cache,
+    giving up (and freeing the copy) once the result exceeds `max_rows`.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self.rows = []
+
+    def wrap(self, batches):
+        for batch in batches:
+            if self.rows is not None:
+                if len(self.rows) + len(batch) <= self.max_rows:
+                    self.rows.extend(batch)
+                else:
+                    self.rows = None
+            yield batch
+
+
+# -----------------------------------------------------------------------------
+# PROCESS-WIDE CACHE
+# -----------------------------------------------------------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> QueryResultCache:
+    """Returns the process-wide cache, persisted to $QUERY_RESULT_CACHE_PATH when set."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryResultCache(persist_path=os.environ.get(PERSIST_PATH_ENV) or None)
+        return _cache
+
+
+def configure_result_cache(**kwargs) -> QueryResultCache:
+    """Replaces the process-wide cache with one built from `kwargs` (see QueryResultCache)."""
+    global _cache
+    with _cache_lock:
+        _cache = QueryResultCache(**kwargs)
+        return _cache
@@ -0,0 +1,226 @@
+# =============================================================================
+# FILE: schema_catalog.py
+# PURPOSE:
+#   Compact schema catalog for the SQL writer's prompt. The database is
+#   introspected once (sqlite_master, PRAGMA table_info / foreign_key_list)
+#   and summarized in one line per table:
+#
+#     courses (568 rows): course_id INT PK, title TEXT unique, category TEXT
+#       {'Cloud Computing','Machine Learning',...}, price REAL 26.24..297.09,
+#       instructor_id INT -> instructors
+#
+#   with the values of low-cardinality text columns (the exact spelling the
+#   LLM needs for filters), "unique" / "N values" for the others and the
+#   range of numbers and dates. Statistics come from an evenly spaced rowid sample
+#   of at most SAMPLE_ROWS rows, so large tables cost a few hundred index
+#   lookups rather than a scan.
+#
+#   The summary is cached per database and `PRAGMA schema_version`, so it is
+#   rebuilt only when the schema changes. Internal tables (sample tables,
+#   materialized summaries, sqlite_*) are left out.
+# =============================================================================
+
+import sqlite3
+import threading
+
+from tools.approximate import META_TABLE as SAMPLE_META_TABLE, SAMPLE_PREFIX
+from tools.db_pool import get_pool
+from tools.materialized import CHANGES_TABLE, META_TABLE as AGG_META_TABLE, SUMMARY_TABLE
+
+# Rows read per table for the column statistics.
+SAMPLE_ROWS = 2000
+# Text columns with at most this many distinct values list them.
+MAX_LISTED_VALUES = 12
+# Values shown per listed column; the rest are elided.
+SHOWN_VALUES = 6
+# Longest sample value shown, in characters.
+MAX_VALUE_LENGTH = 30
+
+_TYPE_NAMES = {"INTEGER": "INT", "VARCHAR": "TEXT", "CHAR": "TEXT", "DOUBLE": "REAL", "FLOAT": "REAL"}
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def is_internal_table(table: str) -> bool:
+    """True for sqlite_* tables and the sample / summary tables this package maintains."""
+    return (table.startswith("sqlite_") or table.startswith(SAMPLE_PREFIX)
+            or table in (SAMPLE_META_TABLE, SUMMARY_TABLE, AGG_META_TABLE, CHANGES_TABLE))
+
+
+def _short_type(declared: str) -> str:
+    base = (declared or "").split("(")[0].strip().upper()
+    return _TYPE_NAMES.get(base, base or "ANY")
+
+
+def _literal(value) -> str:
+    if isinstance(value, str):
+        text = value if len(value) <= MAX_VALUE_LENGTH else value[:MAX_VALUE_LENGTH - 3] + "..."
+        return "'" + text.replace("'", "''") + "'"
+    return str(value)
+
+
+def _approx(count: int) -> str:
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.1f}M".replace(".0M", "M")
+    if count >= 10_000:
+        return f"{count // 1000}k"
+    return str(count)
+
+
+def _sample(conn: sqlite3.Connection, table: str, columns: list) -> tuple:
+    """(row estimate, sampled rows, exact) for `table`; rows are evenly spaced by rowid."""
+    select = ", ".join(f'"{c}"' for c in columns)
+    try:
+        low, high = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{table}"').fetchone()
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID table: read the first rows instead.
+        rows = conn.execute(f'SELECT {select} FROM "{table}" LIMIT {SAMPLE_ROWS + 1}').fetchall()
+        return len(rows), rows[:SAMPLE_ROWS], len(rows) <= SAMPLE_ROWS
+    if low is None:
+        return 0, [], True
+    span = high - low + 1
+    if span <= SAMPLE_ROWS:
+        rows = conn.execute(f'SELECT {select} FROM "{table}"').fetchall()
+        return len(rows), rows, True
+    step = span / SAMPLE_ROWS
+    rowids = sorted({low + int(i * step) for i in range(SAMPLE_ROWS)})
+    rows = []
+    # Chunks stay under SQLite's bound-parameter limit.
+    for start in range(0, len(rowids), 500):
+        chunk = rowids[start:start + 500]
+        rows += conn.execute(
+            f'SELECT {select} FROM "{table}" WHERE rowid IN ({",".join("?" * len(chunk))})', chunk
+        ).fetchall()
+    return span, rows, False
+
+
+def _describe_column(column: dict, values: list, exact: bool) -> str:
+    parts = [column["name"], _short_type(column["type"])]
+    if column["pk"]:
+        parts.append("PK")
+    if column.get("references"):
+        parts.append(f"-> {column['references']}")
+    if column["pk"] or column.get("references") or not values:
+        return " ".join(parts)
+
+    present = [v for v in values if v is not None]
+    if len(present) < len(values):
+        parts.append("nullable")
+    distinct = set(present)
+    if not distinct:
+        return " ".join(parts)
+
+    # Dates are stored as text; their range tells the LLM which years exist.
+    if _short_type(column["type"]) in ("DATE", "DATETIME", "TIMESTAMP"):
+        parts.append(f"{min(distinct)}..{max(distinct)}")
+        return " ".join(parts)
+
+    if all(isinstance(v, str) for v in distinct):
+        repeated = len(distinct) < len(present)
+        if not repeated:
+            parts.append("unique")
+        elif len(distinct) <= MAX_LISTED_VALUES:
+            counts = {}
+            for v in present:
+                counts[v] = counts.get(v, 0) + 1
+            ordered = sorted(distinct, key=lambda v: (-counts[v], v))
+            shown = ",".join(_literal(v) for v in ordered[:SHOWN_VALUES])
+            if len(ordered) > SHOWN_VALUES:
+                shown += f",... {len(ordered)}{'' if exact else '+'} values"
+            parts.append("{" + shown + "}")
+        else:
+            # From a sample this is a lower bound: it cannot see every value.
+            parts.append(f"{_approx(len(distinct))}{'' if exact else '+'} values")
+        return " ".join(parts)
+
+    numbers = [v for v in distinct if isinstance(v, (int, float))]
+    if numbers:
+        parts.append(f"{round(min(numbers), 2)}..{round(max(numbers), 2)}")
+    return " ".join(parts)
+
+
+def build_catalog(conn: sqlite3.Connection) -> dict:
+    """
+    Introspects the user tables of a database.
+
+    Returns:
+        dict: {"tables": [{"name", "rows", "exact", "columns": [{"name", "type",
+        "pk", "references"}], "summary"}], "text": compact description}
+    """
+    tables = [
+        name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+        ) if not is_internal_table(name)
+    ]
+    catalog = []
+    for table in tables:
+        columns = [
+            {"name": row[1], "type": row[2], "pk": bool(row[5]), "references": None}
+            for row in conn.execute(f'PRAGMA table_info("{table}")')
+        ]
+        by_name = {c["name"]: c for c in columns}
+        for fk in conn.execute(f'PRAGMA foreign_key_list("{table}")'):
+            # (id, seq, table, from, to, on_update, on_delete, match)
+            target_column = fk[4] or fk[3]
+            if fk[3] in by_name:
+                # "-> instructors" when the column names match, else "-> table.column".
+                by_name[fk[3]]["references"] = fk[2] if target_column == fk[3] else f"{fk[2]}.{target_column}"
+
+        rows, sample, exact = _sample(conn, table, [c["name"] for c in columns])
+        described = [
+            _describe_column(column, [row[i] for row in sample], exact)
+            for i, column in enumerate(columns)
+        ]
+        size = f"{rows} rows" if exact else f"~{_approx(rows)} rows"
+        catalog.append({
+            "name": table,
+            "rows": rows,
+            "exact": exact,
+            "columns": columns,
+            "summary": f"{table} ({size}): " + ", ".join(described),
+        })
+    return {"tables": catalog, "text": "\n".join(t["summary"] for t in catalog)}
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def get_schema_catalog(db_path: str) -> dict:
+    """
+    Catalog of `db_path` (see build_catalog), rebuilt only when the schema
+    version changes.
+
+    Returns:
+        dict: The catalog plus "schema_version".
+    """
+    with get_pool(db_path).connection() as conn:
+        version = _schema_version(conn)
+        with _lock:
+            cached = _catalogs.get(db_path)
+        if cached and cached["schema_version"] == version:
+            return cached
+        catalog = build_catalog(conn)
+    catalog["schema_version"] = version
+    with _lock:
+        _catalogs[db_path] = catalog
+    return catalog
+
+
+def schema_prompt(db_path: str) -> str:
+    """
+    The schema text for the SQL writer's prompt: one line per table, or a
+    note when the database cannot be read.
+    """
+    try:
+        return get_schema_catalog(db_path)["text"]
+    except (sqlite3.Error, FileNotFoundError) as e:
+        print(f"[WARNING] Schema catalog unavailable for {db_path}: {e}")
+        return f"(schema unavailable: {e})"
+
+
+def clear_schema_cache() -> None:
+    """Forgets every cached catalog."""
+    with _lock:
+        _catalogs.clear()
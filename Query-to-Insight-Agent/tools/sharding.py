@@ -0,0 +1,1044 @@
+# =============================================================================
+# FILE: sharding.py
+# PURPOSE:
+#   Sharded execution for data that no longer fits one SQLite file.
+#
+#   `split_database` splits datatechcon.db into N shard files plus a
+#   manifest (shards.json):
+#     - by "learner": learners, enrollments and sessions are partitioned by
+#       learner_id % N, so each learner's rows live on one shard; courses
+#       and instructors are copied to every shard
+#     - by "date": enrollments and sessions are partitioned into N date
+#       ranges of about equal size; the other tables are copied
+#
+#   `run_sharded` runs one generated query on every shard in a process pool
+#   and merges the partial results. The query is rewritten so each shard
+#   returns its group keys and decomposable partial aggregates, and a merge
+#   query over those partials (in an in-memory SQLite database) finishes it:
+#     COUNT / SUM / TOTAL       summed (also `factor * COUNT(...)`)
+#     MIN / MAX                 min / max of the shard values
+#     AVG(x)                    TOTAL(x) / COUNT(x) from per-shard helpers
+#   Expressions over aggregates (ROUND(AVG(x), 2), SUM(a) / COUNT(*)),
+#   HAVING, ORDER BY and LIMIT / OFFSET are evaluated on the merged values.
+#
+#   ORDER BY <sum or count> LIMIT k over groups is a top-k with over-fetch:
+#   each shard returns only its best k * TOPK_OVERFETCH groups. The merged
+#   top k is exact when no group outside it can reach the k-th value with
+#   the partials it may be missing (each at most the shard's last value);
+#   otherwise the truncated shards are queried again without the LIMIT.
+#
+#   Queries that read only replicated tables run on one shard. Shapes that
+#   do not decompose (COUNT(DISTINCT ...), GROUP_CONCAT, window functions,
+#   UNION, a partitioned table inside a subquery, joins of partitioned
+#   tables that are not on learner_id, outer joins that keep replicated
+#   rows without a partitioned match, ...) raise ShardingError.
+#
+# USAGE:
+#   python -m tools.sharding split --db datatechcon.db --out shards --shards 4 --by learner
+#   python -m tools.sharding query --manifest shards/shards.json --sql "SELECT ..."
+#   QUERY_SHARD_MANIFEST=shards/shards.json  (fetch queries on datatechcon.db use the shards)
+# =============================================================================
+
+import argparse
+import concurrent.futures
+import datetime
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from tools.db_pool import get_pool
+from tools.guardrails import GuardrailError, QueryGuard, check_cost, configure_guardrails, guardrail_limits
+from tools.pushdown import mask_sql, result_columns, split_top_level, strip_terminator
+from tools.result_cache import database_version
+from tools.schema_catalog import is_internal_table
+
+MANIFEST_NAME = "shards.json"
+# Manifest whose shards answer fetch queries addressed to the database it was split from.
+SHARD_MANIFEST_ENV = "QUERY_SHARD_MANIFEST"
+
+# Partitioned tables and their shard key, per scheme.
+SCHEMES = {
+    "learner": {"learners": "learner_id", "enrollments": "learner_id", "sessions": "learner_id"},
+    "date": {"enrollments": "enrollment_date", "sessions": "session_date"},
+}
+# Groups fetched per shard for a top-k, as a multiple of k.
+TOPK_OVERFETCH = int(os.environ.get("SHARD_TOPK_OVERFETCH", 4))
+# Worker processes; 0 or 1 runs the shards one after the other in this process.
+DEFAULT_WORKERS = int(os.environ.get("SHARD_WORKERS", 0)) or os.cpu_count() or 1
+# "spawn" keeps workers independent of the threads and connections of the parent.
+START_METHOD = os.environ.get("SHARD_START_METHOD", "spawn")
+
+_AGGREGATE = re.compile(r"\b(COUNT|SUM|TOTAL|AVG|MIN|MAX|GROUP_CONCAT|STRING_AGG)\s*\(", re.I)
+_UNSUPPORTED = re.compile(r"\b(UNION|INTERSECT|EXCEPT|OVER|WINDOW|FILTER|WITH)\b", re.I)
+_LIMIT = re.compile(r"\bLIMIT\s+(\d+)(?:\s*(?:OFFSET\s+(\d+)|,\s*(\d+)))?\s*$", re.I)
+_ALIAS = re.compile(r"(?:\bAS\s+|(?<=[\w)\]\"'])\s+)(\"?)([A-Za-z_]\w*)\1\s*$", re.I)
+_ORDER_SUFFIX = re.compile(r"(\s+COLLATE\s+\w+)?(\s+(?:ASC|DESC))?(\s+NULLS\s+(?:FIRST|LAST))?\s*$", re.I)
+_WRAPPER = re.compile(
+    r"\s*SELECT\s+\*\s+FROM\s*(\()\s*\)\s*(?:(?:AS\s+)?(?!LIMIT\b)\w+\s*)?"
+    r"(LIMIT\s+\d+(?:\s*(?:OFFSET\s+\d+|,\s*\d+))?)?\s*$", re.I
+)
+_IDENTIFIER = re.compile(r"(?<![\w.])([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?)(?!\w)(?!\s*\()")
+_EQUALITY = re.compile(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)")
+_LEFT_FACTOR = re.compile(r"\s*|[^+\-|<>=]*\*\s*")
+_RIGHT_FACTOR = re.compile(r"\s*(?:[*/][^+\-|<>=]*?)?\s*")
+# How partial values of each aggregate combine.
+_COMBINE = {"COUNT": "SUM", "SUM": "SUM", "TOTAL": "TOTAL", "MIN": "MIN", "MAX": "MAX"}
+_KEYWORDS = {
+    "and", "or", "not", "is", "null", "case", "when", "then", "else", "end", "in", "between",
+    "like", "glob", "cast", "as", "real", "integer", "int", "text", "numeric", "true", "false",
+    "escape", "collate", "nocase", "distinct",
+}
+# Top-level FROM clause, and its sources with the join that adds them.
+_FROM_CLAUSE = re.compile(r"\bFROM\b(.*?)(?=\b(?:WHERE|GROUP|HAVING|ORDER|LIMIT|WINDOW)\b|$)", re.I | re.S)
+_JOIN_SOURCE = re.compile(
+    r"(?:^|,|\b((?:NATURAL\s+)?(?:(?:LEFT|RIGHT|FULL)(?:\s+OUTER)?|INNER|CROSS)\s+)?JOIN)\s*(\(|\w+)", re.I
+)
+_NOT_ALIAS = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "outer", "on",
+    "using", "group", "order", "limit", "having",
+}
+
+_manifests = {}
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+class ShardingError(ValueError):
+    """The query cannot be answered by merging per-shard results."""
+
+
+# -----------------------------------------------------------------------------
+# SPLITTING
+# -----------------------------------------------------------------------------
+def _date_bounds(conn: sqlite3.Connection, partitioned: dict, shards: int) -> list:
+    """N + 1 range bounds (None = open) with about equal rows of the largest partitioned table per range."""
+    sizes = {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in partitioned}
+    table = max(sizes, key=sizes.get)
+    column = partitioned[table]
+    bounds = [None]
+    for i in range(1, shards):
+        row = conn.execute(
+            f'SELECT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL ORDER BY "{column}" '
+            f"LIMIT 1 OFFSET {sizes[table] * i // shards}"
+        ).fetchone()
+        bounds.append(row[0] if row else None)
+    bounds.append(None)
+    return bounds
+
+
+def _predicate(column: str, scheme: str, index: int, shards: int, bounds: list) -> str:
+    if scheme == "learner":
+        # NULL keys go to shard 0; the double modulo keeps negative ids in range.
+        keep = f'(("{column}" % {shards}) + {shards}) % {shards} = {index}'
+        return f'({keep} OR "{column}" IS NULL)' if index == 0 else keep
+    low, high = bounds[index], bounds[index + 1]
+    conditions = []
+    if low is not None:
+        conditions.append(f'"{column}" >= {_sql_literal(low)}')
+    if high is not None:
+        conditions.append(f'"{column}" < {_sql_literal(high)}')
+    where = " AND ".join(conditions) or "1"
+    return f'({where} OR "{column}" IS NULL)' if index == 0 else where
+
+
+def _sql_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+
+def _build_shard(task: dict) -> dict:
+    """Writes one shard file; runs in a worker process. Returns the rows copied per table."""
+    tmp_path = task["path"] + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("ATTACH DATABASE ? AS src", (task["source"],))
+        conn.execute("BEGIN")
+        rows = {}
+        for table, ddl in task["tables"]:
+            conn.execute(ddl)
+            where = task["predicates"].get(table, "1")
+            conn.execute(f'INSERT INTO main."{table}" SELECT * FROM src."{table}" WHERE {where}')
+            rows[table] = conn.execute(f'SELECT COUNT(*) FROM main."{table}"').fetchone()[0]
+        for ddl in task["indexes"]:
+            conn.execute(ddl)
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE src")
+        if task["analyze"]:
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.replace(tmp_path, task["path"])
+    return rows
+
+
+def split_database(db_path: str, out_dir: str, shards: int, by: str = "learner", workers: int = None) -> dict:
+    """
+    Splits a database into `shards` SQLite files and writes their manifest.
+
+    Sample and summary tables (tools/approximate.py, tools/materialized.py)
+    are not copied; install them on the shards separately if needed.
+
+    Args:
+        db_path (str): Database to split.
+        out_dir (str): Folder for the shard files and shards.json.
+        shards (int): Number of shards.
+        by (str): "learner" (hash of learner_id) or "date" (date ranges).
+        workers (int): Shards built in parallel. Default: DEFAULT_WORKERS.
+
+    Returns:
+        dict: The manifest, plus "manifest" (its path) and "elapsed_seconds".
+    """
+    if by not in SCHEMES:
+        raise ValueError(f"Unknown shard scheme '{by}'; use one of {', '.join(SCHEMES)}")
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    started = time.perf_counter()
+    source = os.path.abspath(db_path)
+
+    conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    try:
+        tables = [
+            (name, ddl) for name, ddl in conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY rowid"
+            ) if not is_internal_table(name)
+        ]
+        names = {name for name, _ in tables}
+        indexes = [
+            ddl for (ddl,) in conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                "AND tbl_name IN (%s)" % ",".join("?" * len(names)), sorted(names)
+            )
+        ]
+        analyze = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone() is not None
+        partitioned = {t: c for t, c in SCHEMES[by].items() if t in names}
+        if not partitioned:
+            raise ValueError(f"None of the '{by}' partitioned tables exist in {db_path}")
+        bounds = _date_bounds(conn, partitioned, shards) if by == "date" else None
+    finally:
+        conn.close()
+
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = []
+    for index in range(shards):
+        tasks.append({
+            "source": source,
+            "path": os.path.abspath(os.path.join(out_dir, f"shard_{index:03d}.db")),
+            "tables": tables,
+            "indexes": indexes,
+            "analyze": analyze,
+            "predicates": {t: _predicate(c, by, index, shards, bounds) for t, c in partitioned.items()},
+        })
+    workers = DEFAULT_WORKERS if workers is None else workers
+    if workers > 1 and shards > 1:
+        context = multiprocessing.get_context(START_METHOD)
+        with concurrent.futures.ProcessPoolExecutor(min(workers, shards), mp_context=context) as pool:
+            copied = list(pool.map(_build_shard, tasks))
+    else:
+        copied = [_build_shard(task) for task in tasks]
+
+    manifest = {
+        "source": source,
+        "scheme": by,
+        "partitioned": partitioned,
+        "replicated": sorted(names - set(partitioned)),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "shards": [
+            {
+                "path": os.path.basename(task["path"]),
+                "rows": rows,
+                "range": [bounds[i], bounds[i + 1]] if bounds else None,
+            }
+            for i, (task, rows) in enumerate(zip(tasks, copied))
+        ],
+    }
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return dict(manifest, manifest=manifest_path, elapsed_seconds=round(time.perf_counter() - started, 3))
+
+
+# -----------------------------------------------------------------------------
+# MANIFESTS
+# -----------------------------------------------------------------------------
+def load_manifest(path: str) -> dict:
+    """
+    Reads a shard manifest; shard paths are made absolute. Cached until the
+    file changes.
+    """
+    path = os.path.abspath(path)
+    stamp = os.stat(path).st_mtime_ns
+    cached = _manifests.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    folder = os.path.dirname(path)
+    manifest["paths"] = [os.path.join(folder, shard["path"]) for shard in manifest["shards"]]
+    manifest["manifest"] = path
+    _manifests[path] = (stamp, manifest)
+    return manifest
+
+
+def shard_manifest_for(db_path: str):
+    """
+    The manifest to use for a query addressed to `db_path`: `db_path` itself
+    when it is a manifest, the QUERY_SHARD_MANIFEST manifest when it was
+    split from `db_path`, else None (run on the single file).
+    """
+    if not db_path:
+        return None
+    if str(db_path).endswith(".json") and os.path.isfile(db_path):
+        return load_manifest(db_path)
+    configured = os.environ.get(SHARD_MANIFEST_ENV)
+    if configured:
+        manifest = load_manifest(configured)
+        if manifest["source"] == os.path.abspath(db_path):
+            return manifest
+    return None
+
+
+def shards_version(manifest: dict) -> str:
+    """Version tag of all shards together (see result_cache.database_version)."""
+    tags = "|".join(database_version(path) for path in manifest["paths"])
+    return "shards:" + hashlib.sha1(tags.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# QUERY REWRITE
+# -----------------------------------------------------------------------------
+def _matching_paren(masked: str, open_at: int) -> int:
+    depth = 0
+    for i in range(open_at, len(masked)):
+        if masked[i] == "(":
+            depth += 1
+        elif masked[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ShardingError("Unbalanced parentheses in the query.")
+
+
+def _aggregate_calls(expr: str) -> list:
+    """(start, end, function, argument) of each aggregate call in `expr`."""
+    masked = mask_sql(expr, nested=False)
+    calls = []
+    for match in _AGGREGATE.finditer(masked):
+        if match.start() > 0 and masked[match.start() - 1] == ".":
+            continue
+        close = _matching_paren(masked, match.end() - 1)
+        name = match.group(1).upper()
+        argument = expr[match.end():close].strip()
+        if name in ("MIN", "MAX") and len(split_top_level(argument, mask_sql(argument))) > 1:
+            continue  # two-argument MIN / MAX are scalar functions
+        if calls and match.start() < calls[-1][1]:
+            raise ShardingError(f"Nested aggregate in '{expr.strip()}'.")
+        if name in ("GROUP_CONCAT", "STRING_AGG"):
+            raise ShardingError(f"{name} cannot be merged from partial results.")
+        if re.match(r"DISTINCT\b", argument, re.I):
+            raise ShardingError(f"{name}(DISTINCT ...) cannot be merged from partial results.")
+        calls.append((match.start(), close + 1, name, argument))
+    return calls
+
+
+def _normalize(expr: str) -> str:
+    return re.sub(r"\s+", " ", expr.strip()).lower()
+
+
+class _Item:
+    """One select-list entry: its expression, alias and aggregate calls."""
+
+    def __init__(self, text: str):
+        text = text.strip()
+        match = _ALIAS.search(text)
+        if match and match.group(2).lower() not in _KEYWORDS and match.start() > 0:
+            self.expr, self.alias = text[:match.start()].strip(), match.group(2)
+        else:
+            self.expr, self.alias = text, None
+        self.calls = _aggregate_calls(self.expr)
+
+
+class ShardPlan:
+    """
+    How to run one query on the shards and merge the results.
+
+    `shard_sql` runs on every shard (or on the first one when `all_shards`
+    is False); `merge_sql` runs over the concatenated shard rows, loaded
+    into a table `partials` with columns `partial_columns`. Without a merge
+    query the shard rows are concatenated and cut to `limit` / `offset`.
+    Aggregate plans also have `combine_sql`, which folds partials into fewer
+    partials of the same shape (one row per group).
+    """
+
+    def __init__(self, shard_sql: str, all_shards: bool = True, merge_sql: str = None,
+                 partial_columns: list = None, limit: int = None, offset: int = 0, topk: dict = None,
+                 combine_sql: str = None):
+        self.shard_sql = shard_sql
+        self.all_shards = all_shards
+        self.merge_sql = merge_sql
+        self.combine_sql = combine_sql
+        self.partial_columns = partial_columns
+        self.limit = limit
+        self.offset = offset
+        # {"column", "descending", "k", "keys", "shard_limit", "full_sql"} for a top-k over groups
+        self.topk = topk
+
+    def incomplete_shards(self, results: list) -> list:
+        """
+        Indexes of the shards to re-query without the top-k LIMIT, or [] when
+        the over-fetched partials already decide the top k exactly.
+        """
+        topk = self.topk
+        if not topk:
+            return []
+        sign = -1 if topk["descending"] else 1
+        truncated, last = [], {}
+        totals, seen = {}, {}
+        for index, (columns, rows) in enumerate(results):
+            value_at = columns.index(topk["column"])
+            key_at = [columns.index(k) for k in topk["keys"]]
+            if len(rows) >= topk["shard_limit"]:
+                truncated.append(index)
+            for row in rows:
+                value = row[value_at]
+                if value is None:
+                    return [i for i, (_, r) in enumerate(results) if len(r) >= topk["shard_limit"]]
+                key = tuple(row[i] for i in key_at)
+                totals[key] = totals.get(key, 0) + value
+                seen.setdefault(key, set()).add(index)
+                last[index] = value
+        if not truncated:
+            return []
+
+        # Sorted best first; a missing partial on a truncated shard is at most its last value.
+        ranked = sorted(totals, key=lambda k: sign * totals[k])
+        top, rest = ranked[:topk["k"]], ranked[topk["k"]:]
+        if len(top) < topk["k"]:
+            return truncated
+        if any(i not in seen[key] for key in top for i in truncated):
+            return truncated
+        kth = totals[top[-1]]
+
+        def bound(key):
+            missing = [last[i] for i in truncated if key is None or i not in seen[key]]
+            return (totals[key] if key is not None else 0) + sum(missing)
+
+        # Strictly better than every possible challenger, so ties cannot reorder the top k.
+        challengers = [bound(key) for key in rest] + [bound(None)]
+        if all(sign * kth < sign * value for value in challengers):
+            return []
+        return truncated
+
+    def merge(self, results: list) -> tuple:
+        """Merges the shard results; returns (columns, rows)."""
+        if self.merge_sql is None:
+            columns = results[0][0]
+            rows = [row for _, shard_rows in results for row in shard_rows]
+            end = None if self.limit is None else self.offset + self.limit
+            return columns, rows[self.offset:end] if (self.offset or end is not None) else rows
+        return self._over_partials(self.merge_sql, results)
+
+    def combine(self, results: list) -> list:
+        """Folds several sets of partial rows into one; returns the combined partial rows."""
+        if self.combine_sql is None:
+            raise ShardingError("Only aggregate queries have combinable partial results.")
+        return self._over_partials(self.combine_sql, results)[1]
+
+    def _over_partials(self, sql: str, results: list) -> tuple:
+        conn = sqlite3.connect(":memory:")
+        try:
+            width = len(self.partial_columns)
+            conn.execute("CREATE TABLE partials (%s)" % ", ".join(f'"{c}"' for c in self.partial_columns))
+            for _, shard_rows in results:
+                conn.executemany(f"INSERT INTO partials VALUES ({', '.join('?' * width)})", shard_rows)
+            cursor = conn.execute(sql)
+            columns = [description[0] for description in cursor.description]
+            return columns, cursor.fetchall()
+        finally:
+            conn.close()
+
+
+class _Planner:
+    """Builds the ShardPlan of one SELECT over partitioned tables."""
+
+    def __init__(self, sql: str, names: list, limit: int, offset: int, topk: bool = True):
+        self.sql = sql
+        self.top = mask_sql(sql)
+        self.names = names
+        self.limit, self.offset = limit, offset
+        self.topk = topk
+        self.helpers = {}          # shard expression -> partial column
+        self.hidden = {}           # plain shard expression -> partial column
+        self.combiners = {}        # partial column -> aggregate that combines its values
+
+    # -- expressions ----------------------------------------------------------
+    def _helper(self, name: str, argument: str) -> str:
+        column = self.helpers.setdefault(f"{name}({argument})", f"__a{len(self.helpers)}")
+        self.combiners[column] = _COMBINE[name]
+        return column
+
+    def _merged_call(self, name: str, argument: str) -> str:
+        if name == "AVG":
+            total = self._helper("TOTAL", argument)
+            count = self._helper("COUNT", argument)
+            return f"(TOTAL({total}) / NULLIF(SUM({count}), 0))"
+        return f"{_COMBINE[name]}({self._helper(name, argument)})"
+
+    def _rewrite(self, expr: str, calls: list, aliases: dict = None):
+        """
+        The merge-query form of an expression over aggregates, or None when it
+        refers to columns outside its aggregate calls.
+        """
+        masked = list(mask_sql(expr, nested=False))
+        for start, end, _, _ in calls:
+            masked[start:end] = " " * (end - start)
+        masked = "".join(masked)
+        if '"' in "".join(c for c, m in zip(expr, masked) if m != " " or c == '"'):
+            return None
+        replacements = [(start, end, self._merged_call(name, argument)) for start, end, name, argument in calls]
+        for match in _IDENTIFIER.finditer(masked):
+            word = match.group(1)
+            if word.lower() in _KEYWORDS:
+                continue
+            if aliases and word.lower() in aliases:
+                replacements.append((match.start(), match.end(), f"({aliases[word.lower()]})"))
+                continue
+            return None
+        out, position = [], 0
+        for start, end, text in sorted(replacements):
+            out.append(expr[position:start])
+            out.append(text)
+            position = end
+        out.append(expr[position:])
+        return "".join(out)
+
+    def _plain(self, expr: str) -> str:
+        return self.hidden.setdefault(expr.strip(), f"__o{len(self.hidden)}")
+
+    # -- clauses --------------------------------------------------------------
+    def _clause_spans(self) -> dict:
+        top = self.top
+        spans = {}
+        for key, pattern in (("from", r"\bFROM\b"), ("group", r"\bGROUP\s+BY\b"), ("having", r"\bHAVING\b"),
+                             ("order", r"\bORDER\s+BY\b"), ("limit", r"\bLIMIT\b")):
+            match = re.search(pattern, top, re.I)
+            if match:
+                spans[key] = match
+        if "from" not in spans:
+            raise ShardingError("The query has no FROM clause.")
+        order = [spans[k].start() for k in ("group", "having", "order", "limit") if k in spans]
+        if order != sorted(order):
+            raise ShardingError("Unexpected clause order in the query.")
+        return spans
+
+    def _clause(self, spans: dict, key: str) -> tuple:
+        """(text, masked text) of clause `key`, without its keyword."""
+        if key not in spans:
+            return None, None
+        following = [spans[k].start() for k in ("group", "having", "order", "limit")
+                     if k in spans and spans[k].start() > spans[key].start()]
+        end = min(following) if following else len(self.sql)
+        return self.sql[spans[key].end():end], self.top[spans[key].end():end]
+
+    def _order_terms(self, spans: dict) -> list:
+        text, masked = self._clause(spans, "order")
+        if text is None:
+            return []
+        terms = []
+        for term in split_top_level(text, masked):
+            suffix = _ORDER_SUFFIX.search(term)
+            terms.append((term[:suffix.start()].strip(), term[suffix.start():].strip()))
+        return terms
+
+    def _output_position(self, expr: str, items: list):
+        """0-based output position an ORDER BY / GROUP BY term refers to, or None."""
+        if re.fullmatch(r"\d+", expr):
+            position = int(expr) - 1
+            if not 0 <= position < len(self.names):
+                raise ShardingError(f"Term {expr} is out of range.")
+            return position
+        bare = expr.strip('"')
+        matches = [i for i, name in enumerate(self.names) if name.lower() == bare.lower()]
+        if re.fullmatch(r'"?\w+"?', expr) and len(matches) == 1:
+            return matches[0]
+        for i, item in enumerate(items):
+            if item is not None and _normalize(item.expr) == _normalize(expr):
+                return i
+        return None
+
+    # -- plans ----------------------------------------------------------------
+    def plan(self) -> ShardPlan:
+        spans = self._clause_spans()
+        select = re.match(r"\s*SELECT\s+(DISTINCT\s+|ALL\s+)?", self.top, re.I)
+        distinct = bool(select.group(1) and select.group(1).strip().upper() == "DISTINCT")
+        select_text = self.sql[select.end():spans["from"].start()]
+        raw_items = split_top_level(select_text, self.top[select.end():spans["from"].start()])
+        items = [_Item(text) for text in raw_items]
+        starred = any(re.search(r"(^|\.)\*$", item.expr) for item in items)
+        if "group" in spans or any(item.calls for item in items):
+            if starred:
+                raise ShardingError("SELECT * next to aggregates cannot be split into partial results.")
+            return self._aggregate_plan(spans, items, distinct)
+        if "having" in spans:
+            raise ShardingError("HAVING without GROUP BY cannot be split into partial results.")
+        return self._row_plan(spans, select_text, distinct, None if starred else items)
+
+    def _row_plan(self, spans: dict, select_text: str, distinct: bool, items) -> ShardPlan:
+        body_end = min([spans[k].start() for k in ("order", "limit") if k in spans] + [len(self.sql)])
+        order_text, _ = self._clause(spans, "order")
+        terms = self._order_terms(spans)
+        fetch = None if self.limit is None else self.limit + self.offset
+
+        resolved = []
+        for expr, suffix in terms:
+            position = self._output_position(expr, items or [])
+            if position is None:
+                if distinct:
+                    raise ShardingError("SELECT DISTINCT ordered by an unselected column cannot be split into partial results.")
+                resolved.append(f"{self._plain(expr)} {suffix}".strip())
+            else:
+                resolved.append(f"c{position} {suffix}".strip())
+
+        hidden = "".join(f", {expr} AS {name}" for expr, name in self.hidden.items())
+        shard_sql = (f"SELECT {'DISTINCT ' if distinct else ''}{select_text.strip()}{hidden} "
+                     f"{self.sql[spans['from'].start():body_end].strip()}")
+        if order_text is not None:
+            shard_sql += f" ORDER BY {order_text.strip()}"
+        if fetch is not None:
+            shard_sql += f" LIMIT {fetch}"
+        if not terms and not distinct:
+            return ShardPlan(shard_sql, limit=self.limit, offset=self.offset)
+
+        partials = [f"c{i}" for i in range(len(self.names))] + list(self.hidden.values())
+        outputs = ", ".join(f'c{i} AS "{name}"' for i, name in enumerate(self.names))
+        merge_sql = f"SELECT {'DISTINCT ' if distinct else ''}{outputs} FROM partials"
+        if resolved:
+            merge_sql += " ORDER BY " + ", ".join(resolved)
+        merge_sql += self._limit_sql()
+        return ShardPlan(shard_sql, merge_sql=merge_sql, partial_columns=partials)
+
+    def _limit_sql(self) -> str:
+        if self.limit is None:
+            return f" LIMIT -1 OFFSET {self.offset}" if self.offset else ""
+        return f" LIMIT {self.limit} OFFSET {self.offset}"
+
+    def _aggregate_plan(self, spans: dict, items: list, distinct: bool) -> ShardPlan:
+        # Select list: plain values, mergeable expressions over aggregates, or a
+        # linear `factor * SUM/COUNT(...)` whose per-shard values add up.
+        merged, shard_columns, linear = [], [], {}
+        for i, item in enumerate(items):
+            if not item.calls:
+                shard_columns.append(f"{item.expr} AS __c{i}")
+                merged.append(f"__c{i}")
+                continue
+            rewritten = self._rewrite(item.expr, item.calls)
+            if rewritten is not None:
+                merged.append(rewritten)
+                continue
+            top = mask_sql(item.expr)
+            start, end, name, _ = item.calls[0]
+            if (len(item.calls) == 1 and name in ("COUNT", "SUM", "TOTAL")
+                    and _LEFT_FACTOR.fullmatch(top[:start]) and _RIGHT_FACTOR.fullmatch(top[end:])):
+                shard_columns.append(f"{item.expr} AS __c{i}")
+                merged.append(f"{_COMBINE[name]}(__c{i})")
+                self.combiners[f"__c{i}"] = _COMBINE[name]
+                linear[i] = f"__c{i}"
+                continue
+            raise ShardingError(f"'{item.expr}' cannot be merged from partial results.")
+        aliases = {}
+        for i, item in enumerate(items):
+            for name in {item.alias, self.names[i] if i < len(self.names) else None} - {None}:
+                aliases[name.lower()] = merged[i]
+
+        # GROUP BY: positions and aliases become the select expressions they name.
+        group_sql, keys = "", []
+        group_text, group_masked = self._clause(spans, "group")
+        if group_text is not None:
+            expressions = []
+            for term in split_top_level(group_text, group_masked):
+                term = term.strip()
+                position = self._output_position(term, []) if re.fullmatch(r'\d+|"?\w+"?', term) else None
+                if position is not None and items[position].alias is not None or re.fullmatch(r"\d+", term):
+                    term = items[position].expr
+                expressions.append(term)
+            group_sql = " GROUP BY " + ", ".join(expressions)
+            for j, expr in enumerate(expressions):
+                shard_columns.append(f"{expr} AS __g{j}")
+                keys.append(f"__g{j}")
+
+        having_text, _ = self._clause(spans, "having")
+        having = None
+        if having_text is not None:
+            calls = _aggregate_calls(having_text)
+            having = self._rewrite(having_text, calls, aliases)
+            if having is None:
+                raise ShardingError("HAVING may only test aggregates and select aliases.")
+
+        order, topk_column = [], None
+        for index, (expr, suffix) in enumerate(self._order_terms(spans)):
+            position = self._output_position(expr, items)
+            calls = _aggregate_calls(expr)
+            if position is not None:
+                order.append(f"{position + 1} {suffix}".strip())
+                candidate = linear.get(position)
+                if candidate is None and items[position].calls:
+                    candidate = self._single_sum(items[position].expr, items[position].calls)
+            elif calls:
+                rewritten = self._rewrite(expr, calls, aliases)
+                if rewritten is None:
+                    raise ShardingError(f"ORDER BY '{expr}' cannot be merged from partial results.")
+                order.append(f"{rewritten} {suffix}".strip())
+                candidate = self._single_sum(expr, calls)
+            else:
+                order.append(f"{self._plain(expr)} {suffix}".strip())
+                candidate = None
+            if index == 0 and re.fullmatch(r"(ASC|DESC)?", suffix, re.I):
+                topk_column = (candidate, suffix.upper() == "DESC")
+
+        shard_columns += [f"{expr} AS {name}" for expr, name in self.helpers.items()]
+        shard_columns += [f"{expr} AS {name}" for expr, name in self.hidden.items()]
+        body_end = min([spans[k].start() for k in ("group", "having", "order", "limit") if k in spans]
+                       + [len(self.sql)])
+        shard_sql = (f"SELECT {', '.join(shard_columns)} "
+                     f"{self.sql[spans['from'].start():body_end].strip()}{group_sql}")
+        partials = [c.rsplit(" AS ", 1)[1] for c in shard_columns]
+
+        outputs = ", ".join(f'{expr} AS "{self.names[i]}"' for i, expr in enumerate(merged))
+        merge_sql = f"SELECT {'DISTINCT ' if distinct else ''}{outputs} FROM partials"
+        if keys:
+            merge_sql += " GROUP BY " + ", ".join(keys)
+        if having:
+            merge_sql += f" HAVING {having}"
+        if order:
+            merge_sql += " ORDER BY " + ", ".join(order)
+        merge_sql += self._limit_sql()
+        combined = ", ".join(
+            f"{self.combiners[c]}({c}) AS {c}" if c in self.combiners else c for c in partials
+        )
+        combine_sql = f"SELECT {combined} FROM partials" + (" GROUP BY " + ", ".join(keys) if keys else "")
+
+        topk = None
+        if (self.topk and keys and self.limit is not None and not having and not distinct
+                and topk_column and topk_column[0]):
+            column, descending = topk_column
+            k = self.limit + self.offset
+            shard_limit = max(k * TOPK_OVERFETCH, k + 1)
+            topk = {"column": column, "descending": descending, "k": k, "keys": keys,
+                    "shard_limit": shard_limit, "full_sql": shard_sql}
+            shard_sql += f" ORDER BY {column} {'DESC' if descending else 'ASC'} LIMIT {shard_limit}"
+        return ShardPlan(shard_sql, merge_sql=merge_sql, partial_columns=partials, topk=topk,
+                         combine_sql=combine_sql)
+
+    def _single_sum(self, expr: str, calls: list):
+        """Partial column of an expression that is exactly one COUNT / SUM / TOTAL call."""
+        if len(calls) != 1 or calls[0][2] not in ("COUNT", "SUM", "TOTAL"):
+            return None
+        start, end, name, argument = calls[0]
+        if expr[:start].strip() or expr[end:].strip():
+            return None
+        return self.helpers.get(f"{name}({argument})")
+
+
+def _unwrap(sql: str) -> tuple:
+    """Peels `SELECT * FROM (<query>) [LIMIT n]` wrappers (exploratory LIMITs); returns (sql, limit, offset)."""
+    limit, offset = None, 0
+    while True:
+        match = _WRAPPER.fullmatch(mask_sql(sql))
+        if not match:
+            return sql, limit, offset
+        open_at = match.start(1)
+        close_at = _matching_paren(mask_sql(sql, nested=False), open_at)
+        if match.group(2):
+            if limit is not None:
+                raise ShardingError("Nested LIMITs cannot be split into partial results.")
+            limit, offset = _parse_limit(match.group(2))
+        sql = sql[open_at + 1:close_at].strip()
+        if limit is not None and _LIMIT.search(mask_sql(sql)):
+            raise ShardingError("Nested LIMITs cannot be split into partial results.")
+
+
+def _parse_limit(text: str) -> tuple:
+    match = _LIMIT.search(text)
+    if match.group(3) is not None:
+        return int(match.group(3)), int(match.group(1))
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def _reference_pattern(tables) -> str:
+    # Table references follow FROM, JOIN or the comma of a join list.
+    return r"(?:\bFROM|\bJOIN|,)\s*(%s)\b(?!\s*\.)" % "|".join(re.escape(t) for t in tables)
+
+
+def table_references(sql: str, tables, nested: bool = False) -> list:
+    """
+    (table, alias) of each reference to one of `tables` in `sql`; the alias is
+    the table name when there is none. Subqueries are searched only with `nested`.
+    """
+    references = []
+    pattern = _reference_pattern(tables) + r"(?:\s+(?:AS\s+)?(\w+))?"
+    for match in re.finditer(pattern, mask_sql(sql, nested=not nested), re.I):
+        alias = match.group(2) if match.group(2) and match.group(2).lower() not in _NOT_ALIAS else match.group(1)
+        references.append((match.group(1).lower(), alias))
+    return references
+
+
+def plan_sharded(sql_query: str, manifest: dict, conn: sqlite3.Connection) -> ShardPlan:
+    """
+    Plans `sql_query` for the shards of `manifest` (see plan_partials).
+
+    Args:
+        sql_query (str): The generated SQL.
+        manifest (dict): Shard manifest (see load_manifest).
+        conn (sqlite3.Connection): Connection to one shard, for the result column names.
+    """
+    return plan_partials(sql_query, manifest["partitioned"], conn, colocated=manifest["scheme"] == "learner")
+
+
+def plan_partials(sql_query: str, partitioned: dict, conn: sqlite3.Connection,
+                  colocated: bool = False, topk: bool = True) -> ShardPlan:
+    """
+    Plans `sql_query` as partial results over disjoint parts of `partitioned`
+    tables, merged afterwards.
+
+    Args:
+        sql_query (str): The generated SQL.
+        partitioned (dict): {table: partition column} of the split tables.
+        conn (sqlite3.Connection): Connection with the schema, for the result column names.
+        colocated (bool): Rows with equal partition columns are in the same part,
+            so partitioned tables joined on them can be read together.
+        topk (bool): Plan ORDER BY ... LIMIT k over groups as an over-fetching top-k.
+
+    Returns:
+        ShardPlan: The per-part query and how to merge its results.
+
+    Raises:
+        ShardingError: The query does not decompose into partial results.
+    """
+    original = strip_terminator(sql_query)
+    flat = mask_sql(original, nested=False)
+    pattern = _reference_pattern(partitioned)
+    if not re.search(pattern, flat, re.I):
+        # Only replicated tables: any one shard has the whole answer.
+        return ShardPlan(original, all_shards=False)
+    if _UNSUPPORTED.search(flat):
+        raise ShardingError("Window functions, CTEs and set operations cannot be split into partial results.")
+
+    sql, limit, offset = _unwrap(original)
+    top, flat = mask_sql(sql), mask_sql(sql, nested=False)
+    if not re.match(r"\s*SELECT\b", top, re.I):
+        raise ShardingError("Only SELECT statements can be split into partial results.")
+    references = table_references(sql, partitioned)
+    if len(references) != len(re.findall(pattern, flat, re.I)):
+        raise ShardingError("A partitioned table inside a subquery cannot be split into partial results.")
+    _check_outer_joins(top, partitioned)
+    if len(references) > 1:
+        _check_colocated(references, partitioned, colocated, flat)
+
+    if re.search(r"\bLIMIT\b", top, re.I):
+        match = _LIMIT.search(top)
+        if not match:
+            raise ShardingError("Only a trailing LIMIT with literal numbers can be split into partial results.")
+        if limit is not None:
+            raise ShardingError("Nested LIMITs cannot be split into partial results.")
+        limit, offset = _parse_limit(match.group(0))
+        sql = sql[:match.start()].rstrip()
+    names = result_columns(conn, sql)
+    planner = _Planner(sql, names, limit, offset, topk)
+    return planner.plan()
+
+
+def _check_outer_joins(top: str, partitioned: dict) -> None:
+    """
+    Outer joins must not null-extend a partitioned table for rows of a
+    replicated one: every shard would emit the replicated rows that have no
+    match in its own part, although most of them match on another shard.
+    """
+    clause = _FROM_CLAUSE.search(top)
+    if not clause:
+        return
+    sources = []
+    for kind, name in _JOIN_SOURCE.findall(clause.group(1)):
+        kind = next((k for k in ("LEFT", "RIGHT", "FULL") if k in kind.upper().split()), "")
+        sources.append((kind, name.lower() in partitioned))
+    for i, (kind, split) in enumerate(sources[1:], start=1):
+        before = [s for _, s in sources[:i]]
+        if ((kind in ("LEFT", "FULL") and split and not all(before))
+                or (kind in ("RIGHT", "FULL") and not split and any(before))):
+            raise ShardingError(f"A {kind} JOIN that keeps replicated rows without a match in a "
+                                "partitioned table cannot be split into partial results.")
+
+
+def _check_colocated(references: list, partitioned: dict, colocated: bool, flat: str) -> None:
+    """Joins of partitioned tables must pair rows of the same part (learner_id = learner_id)."""
+    if not colocated:
+        raise ShardingError("Joins between partitioned tables cannot be split into partial results "
+                            "unless the tables are split by the join key (shards by learner).")
+    tables = {}
+    for table, alias in references:
+        if alias.lower() in tables:
+            raise ShardingError("Give each partitioned table in a self-join its own alias.")
+        tables[alias.lower()] = table
+    parent = {alias: alias for alias in tables}
+
+    def find(alias):
+        while parent[alias] != alias:
+            alias = parent[alias]
+        return alias
+
+    for a, column_a, b, column_b in _EQUALITY.findall(flat):
+        a, b = a.lower(), b.lower()
+        if (a in tables and b in tables and column_a.lower() == partitioned[tables[a]]
+                and column_b.lower() == partitioned[tables[b]]):
+            parent[find(a)] = find(b)
+    if len({find(alias) for alias in tables}) > 1:
+        key = next(iter(partitioned.values()))
+        raise ShardingError(f"Joins between partitioned tables must match on {key}.")
+
+
+# -----------------------------------------------------------------------------
+# EXECUTION
+# -----------------------------------------------------------------------------
+def _query_shard(path: str, sql: str, limits: dict) -> tuple:
+    """Runs `sql` on one shard under the guardrails; runs in a worker process. Returns (columns, rows)."""
+    configure_guardrails(**limits)
+    with get_pool(path).connection() as conn:
+        check_cost(conn, path, sql)
+        cursor = conn.cursor()
+        try:
+            with QueryGuard(conn) as guard:
+                cursor.execute(sql)
+                columns = [description[0] for description in cursor.description]
+                rows = []
+                for batch in guard.wrap(iter(lambda: cursor.fetchmany(5000), [])):
+                    rows.extend(batch)
+        finally:
+            cursor.close()
+    return columns, rows
+
+
+def _get_executor(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = concurrent.futures.ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context(START_METHOD)
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def close_shard_pool() -> None:
+    """Stops the worker processes."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+        _executor, _executor_workers = None, 0
+
+
+def _map_shards(sql: str, paths: list, workers: int) -> list:
+    limits = guardrail_limits()
+    if workers <= 1 or len(paths) == 1:
+        return [_query_shard(path, sql, limits) for path in paths]
+    try:
+        executor = _get_executor(workers)
+        futures = [executor.submit(_query_shard, path, sql, limits) for path in paths]
+        return [future.result() for future in futures]
+    except concurrent.futures.process.BrokenProcessPool:
+        close_shard_pool()
+        raise
+
+
+def run_sharded(sql_query: str, manifest: dict, workers: int = None) -> dict:
+    """
+    Runs `sql_query` on the shards of `manifest` and merges the results.
+
+    Args:
+        sql_query (str): The generated SQL.
+        manifest (dict): Shard manifest (see load_manifest).
+        workers (int): Worker processes. Default: DEFAULT_WORKERS.
+
+    Returns:
+        dict: {"columns", "rows", "shards" (queried), "workers", "refetched"
+        (shards re-queried for an exact top-k), "elapsed_seconds"}
+
+    Raises:
+        ShardingError: The query does not decompose over the shards.
+        GuardrailError: A shard query was rejected or cut off, or the merged
+            result exceeds the row cap.
+    """
+    started = time.perf_counter()
+    paths = manifest["paths"]
+    workers = DEFAULT_WORKERS if workers is None else workers
+    with get_pool(paths[0]).connection() as conn:
+        plan = plan_sharded(sql_query, manifest, conn)
+    targets = paths if plan.all_shards else paths[:1]
+    workers = min(workers, len(targets))
+
+    results = _map_shards(plan.shard_sql, targets, workers)
+    incomplete = plan.incomplete_shards(results)
+    if incomplete:
+        again = _map_shards(plan.topk["full_sql"], [targets[i] for i in incomplete], workers)
+        for index, result in zip(incomplete, again):
+            results[index] = result
+    columns, rows = plan.merge(results)
+
+    max_rows = guardrail_limits()["max_rows"]
+    if max_rows and len(rows) > max_rows:
+        raise GuardrailError("ROW_LIMIT", f"Query cut off: result exceeds {max_rows:,} rows. "
+                                          "Aggregate in SQL or add a LIMIT.")
+    return {
+        "columns": columns,
+        "rows": rows,
+        "shards": len(targets),
+        "workers": workers if workers > 1 else 0,
+        "refetched": len(incomplete),
+        "elapsed_seconds": round(time.perf_counter() - started, 6),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split a database into shards or query the shards.")
+    parser.add_argument("command", choices=["split", "query"])
+    parser.add_argument("--db", default="datatechcon.db", help="Database to split.")
+    parser.add_argument("--out", default="shards", help="Folder for the shards ('split').")
+    parser.add_argument("--shards", type=int, default=4, help="Number of shards ('split').")
+    parser.add_argument("--by", choices=sorted(SCHEMES), default="learner", help="Shard scheme ('split').")
+    parser.add_argument("--manifest", default=os.path.join("shards", MANIFEST_NAME), help="Manifest ('query').")
+    parser.add_argument("--sql", help="Query to run ('query').")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes.")
+    args = parser.parse_args()
+
+    if args.command == "split":
+        result = split_database(args.db, args.out, args.shards, args.by, args.workers)
+        for shard in result["shards"]:
+            rows = ", ".join(f"{t} {n:,}" for t, n in shard["rows"].items() if t in result["partitioned"])
+            print(f"{shard['path']}: {rows}" + (f"  {shard['range']}" if shard["range"] else ""))
+        print(f"{len(result['shards'])} shards by {args.by} in {result['elapsed_seconds']}s; "
+              f"manifest {result['manifest']}")
+    else:
+        if not args.sql:
+            parser.error("'query' needs --sql")
+        result = run_sharded(args.sql, load_manifest(args.manifest), args.workers)
+        print("\t".join(result["columns"]))
+        for row in result["rows"][:50]:
+            print("\t".join(map(str, row)))
+        print(f"{len(result['rows'])} rows from {result['shards']} shard(s), {result['workers']} worker(s), "
+              f"{result['refetched']} refetched, {result['elapsed_seconds']}s")
+        close_shard_pool()
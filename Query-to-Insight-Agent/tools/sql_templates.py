@@ -0,0 +1,460 @@
+# =============================================================================
+# FILE: sql_templates.py
+# PURPOSE:
+#   Library of pre-validated SQL templates per intent, so the SQL writer LLM
+#   can be skipped for the questions we see all the time.
+#
+#   * Built-in templates cover COURSE_SALES, ENROLLMENT_ANALYSIS,
+#     INSTRUCTOR_PERFORMANCE and REVENUE_ANALYSIS and produce exactly the
+#     columns the analysis step expects. Optional slots filled from the
+#     question: category, country, year and limit ("top 5").
+#   * `match_template` returns a built-in template only when the question
+#     matches its signature: the metric it ranks by, the entity it ranks and
+#     a ranking / listing word, with none of the words that ask for
+#     something else (another entity, counts of rows, negations, ...). Any
+#     other question - including question shapes the templates cannot express
+#     (time trends, averages, comparisons, ...) - goes to the LLM. The slots
+#     are then filled (category / country values are looked up in the
+#     database, so only known values are ever inlined).
+#   * SQL written by the LLM is registered as a pending candidate; once it
+#     executes successfully (`confirm_candidate`, called by the data tools)
+#     it is generalized - slot values replaced by placeholders - validated
+#     with EXPLAIN and promoted into the library under the question's
+#     signature. Promoted templates are persisted as JSON.
+#   Every template is validated against the database (EXPLAIN + result
+#   columns) before it is used.
+# =============================================================================
+
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from tools.artifact_registry import is_handle, resolve
+from tools.db_pool import get_pool
+from tools.pushdown import result_columns, strip_terminator
+from tools.result_cache import database_version
+
+DEFAULT_LIBRARY_PATH = os.path.join("output", "sql_templates.json")
+# Pending candidates waiting for a successful execution.
+MAX_PENDING = 256
+
+BUILTIN_TEMPLATES = {
+    "course_sales_by_course": {
+        "intent": "COURSE_SALES",
+        "select": "c.title, COUNT(e.enrollment_id) AS total_enrollments",
+        "from": "courses c\nJOIN enrollments e ON c.course_id = e.course_id",
+        "group_by": "c.course_id",
+        "order_by": "total_enrollments DESC",
+        "columns": ["title", "total_enrollments"],
+    },
+    "enrollments_by_course": {
+        "intent": "ENROLLMENT_ANALYSIS",
+        "select": "c.title, COUNT(e.enrollment_id) AS total_enrollments",
+        "from": "courses c\nJOIN enrollments e ON c.course_id = e.course_id",
+        "group_by": "c.course_id",
+        "order_by": "total_enrollments DESC",
+        "columns": ["title", "total_enrollments"],
+    },
+    "instructor_performance": {
+        "intent": "INSTRUCTOR_PERFORMANCE",
+        "select": "i.name AS instructor, COUNT(e.enrollment_id) AS total_enrollments",
+        "from": "instructors i\nJOIN courses c ON i.instructor_id = c.instructor_id\n"
+                "JOIN enrollments e ON c.course_id = e.course_id",
+        "group_by": "i.instructor_id",
+        "order_by": "total_enrollments DESC",
+        "columns": ["instructor", "total_enrollments"],
+    },
+    "revenue_by_course": {
+        "intent": "REVENUE_ANALYSIS",
+        "select": "c.title, c.price, COUNT(e.enrollment_id) AS total_enrollments",
+        "from": "courses c\nJOIN enrollments e ON c.course_id = e.course_id",
+        "group_by": "c.course_id",
+        "order_by": "c.price * COUNT(e.enrollment_id) DESC",
+        "columns": ["title", "price", "total_enrollments"],
+    },
+}
+
+# Positive signatures of the built-in templates: every "requires" pattern
+# (metric, entity, ranking) must match and "excludes" must not. Questions
+# outside every signature are left to the LLM.
+_NOT_RANKED = r"how many|count|number of|no|none|not|without|zero|never"
+TEMPLATE_SIGNATURES = {
+    "course_sales_by_course": {
+        "requires": [
+            r"\b(sell\w*|sold|sales?|best[- ]?sell\w*|popular\w*|enrol\w*|purchas\w*|bought)\b",
+            r"\bcourses?\b",
+            r"\b(most|top|best|highest|rank\w*|which|what)\b",
+        ],
+        "excludes": rf"\b(learners?|students?|users?|instructors?|teach\w*|revenue|earn\w*|money|pric\w*|{_NOT_RANKED})\b",
+    },
+    "enrollments_by_course": {
+        "requires": [
+            r"\benrol\w*",
+            r"\bcourses?\b",
+            r"\b(each|per|by|every|which|what|most|top|how many|number of)\b",
+        ],
+        "excludes": r"\b(learners?|students?|users?|instructors?|teach\w*|revenue|earn\w*|money|pric\w*|"
+                    r"no|none|not|without|zero|never)\b",
+    },
+    "instructor_performance": {
+        "requires": [
+            r"\b(enrol\w*|students?|learners?|popular\w*|perform\w*|successful)\b",
+            r"\b(instructors?|teachers?)\b",
+            r"\b(most|top|best|highest|rank\w*|which|who)\b",
+        ],
+        "excludes": rf"\b(teach|teaches|teaching|taught|courses?|revenue|earn\w*|money|pric\w*|rating\w*|{_NOT_RANKED})\b",
+    },
+    "revenue_by_course": {
+        "requires": [
+            r"\b(revenue|earn\w*|money|income|grossing|profit\w*)\b",
+            r"\bcourses?\b",
+            r"\b(most|top|best|highest|rank\w*|which|what|each|per|by)\b",
+        ],
+        "excludes": rf"\b(learners?|students?|users?|instructors?|teach\w*|{_NOT_RANKED})\b",
+    },
+}
+
+
+def matches_signature(name: str, question: str) -> bool:
+    """True if `question` asks exactly what built-in template `name` answers."""
+    signature = TEMPLATE_SIGNATURES[name]
+    return (all(re.search(pattern, question, re.I) for pattern in signature["requires"])
+            and not re.search(signature["excludes"], question, re.I))
+
+
+# How each slot narrows a built-in template ({value} is an escaped SQL literal).
+SLOT_FILTERS = {
+    "category": "c.category = {value}",
+    "country": "l.country = {value}",
+    "year": "e.enrollment_date BETWEEN {value}",
+}
+SLOT_JOINS = {"country": "JOIN learners l ON l.learner_id = e.learner_id"}
+
+# Question shapes the built-in templates cannot answer; these go to the LLM.
+UNSUPPORTED = re.compile(
+    r"\b(trend\w*|over time|month\w*|week\w*|daily|day|days|quarter\w*|"
+    r"average|avg|mean|median|compare\w*|versus|vs|ratio|percent\w*|share|growth|"
+    r"session\w*|duration|minutes|hours|least|lowest|bottom|fewest|"
+    r"last|this|previous|past|recent\w*|since|before|after|between|"
+    r"(?:more|less|fewer|greater|higher|lower)\s+than|over|above|under|below|at\s+(?:least|most)|"
+    r"excluding|exclude\w*|except|other\s+than|besides|apart\s+from|"
+    r"(?:per|by|each)\s+(?:country|countries|category|categories|learner\w*|student\w*|year\w*))\b",
+    re.I,
+)
+_YEAR = re.compile(r"\b(20\d\d)\b")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_LIMIT = re.compile(r"\btop\s+(\d{1,3})\b", re.I)
+_PLACEHOLDER = re.compile(r"\{(category|country|year|limit)\}")
+
+_lock = threading.Lock()
+_pending = {}
+_library = None
+_validated = {}
+_slot_values = {}
+
+
+def _literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# -----------------------------------------------------------------------------
+# SLOT EXTRACTION
+# -----------------------------------------------------------------------------
+def _known_values(db_path: str) -> dict:
+    """Distinct categories and countries in the database, cached per database version."""
+    version = database_version(db_path)
+    cached = _slot_values.get(db_path)
+    if cached and cached[0] == version:
+        return cached[1]
+    with get_pool(db_path).connection() as conn:
+        values = {
+            "category": [r[0] for r in conn.execute("SELECT DISTINCT category FROM courses") if r[0]],
+            "country": [r[0] for r in conn.execute("SELECT DISTINCT country FROM learners") if r[0]],
+        }
+    _slot_values[db_path] = (version, values)
+    return values
+
+
+def _unused_numbers(question: str, slots: dict) -> list:
+    """Numbers in `question` that no slot accounts for (thresholds, ids, ...)."""
+    text = question
+    for slot in ("category", "country"):
+        if slot in slots:
+            text = re.sub(re.escape(slots[slot]), " ", text, flags=re.I)
+    used = {slots.get("year"), slots.get("limit")}
+    return [n for n in _NUMBER.findall(text) if n not in used]
+
+
+def extract_slots(question: str, db_path: str) -> dict:
+    """
+    Fills the template slots mentioned in `question`.
+
+    Returns:
+        dict: Any of {"category", "country", "year", "limit"}; category and
+              country only take values that exist in the database.
+    """
+    slots = {}
+    lowered = question.lower()
+    for slot, values in _known_values(db_path).items():
+        # Longest match wins ("Machine Learning" over "Learning").
+        for value in sorted(values, key=len, reverse=True):
+            if re.search(r"\b" + re.escape(value.lower()) + r"\b", lowered):
+                slots[slot] = value
+                break
+    years = _YEAR.findall(question)
+    if len(years) == 1:
+        slots["year"] = years[0]
+    limit = _LIMIT.search(question)
+    if limit:
+        slots["limit"] = limit.group(1)
+    return slots
+
+
+def question_signature(question: str, slots: dict) -> str:
+    """Normalized question with slot values replaced by <slot> markers."""
+    text = question.lower()
+    for slot, value in slots.items():
+        text = re.sub(r"\b" + re.escape(str(value).lower()) + r"\b", f"<{slot}>", text)
+    text = re.sub(r"[^\w<>]+", " ", text)
+    return " ".join(text.split())
+
+
+# -----------------------------------------------------------------------------
+# RENDERING & VALIDATION
+# -----------------------------------------------------------------------------
+def render_builtin(name: str, slots: dict) -> str:
+    """Builds the SQL of a built-in template with the given slots applied."""
+    template = BUILTIN_TEMPLATES[name]
+    joins = [template["from"]] + [SLOT_JOINS[s] for s in slots if s in SLOT_JOINS]
+    filters = []
+    for slot in ("category", "country", "year"):
+        if slot in slots:
+            value = slots[slot]
+            if slot == "year":
+                value = f"{_literal(value + '-01-01')} AND {_literal(value + '-12-31')}"
+            else:
+                value = _literal(value)
+            filters.append(SLOT_FILTERS[slot].format(value=value))
+
+    sql = f"SELECT {template['select']}\nFROM " + "\n".join(joins)
+    if filters:
+        sql += "\nWHERE " + "\n  AND ".join(filters)
+    sql += f"\nGROUP BY {template['group_by']}\nORDER BY {template['order_by']}"
+    if "limit" in slots:
+        sql += f"\nLIMIT {int(slots['limit'])}"
+    return sql + ";"
+
+
+def render_promoted(template: dict, slots: dict) -> str:
+    """Substitutes slot values into a promoted template's placeholders."""
+    def replace(match):
+        value = slots[match.group(1)]
+        return str(int(value)) if match.group(1) in ("year", "limit") else str(value).replace("'", "''")
+    return _PLACEHOLDER.sub(replace, template["sql"])
+
+
+def validate_sql(sql: str, db_path: str, expected_columns: list = None) -> bool:
+    """True if `sql` compiles (EXPLAIN) and, when given, yields `expected_columns`."""
+    try:
+        with get_pool(db_path).connection() as conn:
+            conn.execute(f"EXPLAIN {strip_terminator(sql)}").fetchall()
+            if expected_columns is not None:
+                return result_columns(conn, sql) == list(expected_columns)
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _schema_version(db_path: str) -> int:
+    with get_pool(db_path).connection() as conn:
+        return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def validate_builtins(db_path: str) -> dict:
+    """
+    Validates every built-in template against the database schema, with no
+    slots and with all slots filled. Cached per schema version.
+
+    Returns:
+        dict: {template name: True/False}
+    """
+    version = _schema_version(db_path)
+    cached = _validated.get(db_path)
+    if cached and cached[0] == version:
+        return cached[1]
+    all_slots = {"category": "x", "country": "x", "year": "2000", "limit": "1"}
+    results = {
+        name: validate_sql(render_builtin(name, {}), db_path, template["columns"])
+        and validate_sql(render_builtin(name, all_slots), db_path, template["columns"])
+        for name, template in BUILTIN_TEMPLATES.items()
+    }
+    _validated[db_path] = (version, results)
+    return results
+
+
+# -----------------------------------------------------------------------------
+# LIBRARY OF PROMOTED TEMPLATES
+# -----------------------------------------------------------------------------
+def _library_path() -> str:
+    return os.environ.get("SQL_TEMPLATE_LIBRARY_PATH", DEFAULT_LIBRARY_PATH)
+
+
+def _load_library() -> dict:
+    """Promoted templates keyed by "<INTENT>|<signature>"."""
+    global _library
+    if _library is None:
+        try:
+            with open(_library_path(), "r", encoding="utf-8") as f:
+                _library = json.load(f)
+        except (FileNotFoundError, ValueError):
+            _library = {}
+    return _library
+
+
+def _save_library() -> None:
+    path = _library_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_library, f, indent=2)
+    os.replace(tmp, path)
+
+
+# -----------------------------------------------------------------------------
+# MATCHING
+# -----------------------------------------------------------------------------
+def match_template(question: str, intent: str, db_path: str = "datatechcon.db"):
+    """
+    Finds a validated template for the question.
+
+    Promoted templates are matched on the exact question signature; the
+    built-in template for the intent is used only when the question matches
+    its TEMPLATE_SIGNATURES entry and at most narrows it by category,
+    country, year or top-N: thresholds, exclusions and any number the
+    template does not use send the question to the LLM.
+
+    Returns:
+        dict | None: {"name", "sql", "slots", "source"} or None to use the LLM.
+    """
+    intent = (intent or "").upper().strip()
+    slots = extract_slots(question, db_path)
+    signature = question_signature(question, slots)
+
+    with _lock:
+        promoted = _load_library().get(f"{intent}|{signature}")
+    if promoted and set(promoted["slots"]) == set(slots):
+        sql = render_promoted(promoted, slots)
+        if validate_sql(sql, db_path):
+            return {"name": promoted["name"], "sql": sql, "slots": slots, "source": "promoted"}
+
+    if UNSUPPORTED.search(question) or _unused_numbers(question, slots):
+        return None
+    # "categories" / "countries" without a value asks for a breakdown, not a filter.
+    if re.search(r"\bcategor(y|ies)\b", question, re.I) and "category" not in slots:
+        return None
+    if re.search(r"\bcountr(y|ies)\b", question, re.I) and "country" not in slots:
+        return None
+
+    valid = validate_builtins(db_path)
+    for name, template in BUILTIN_TEMPLATES.items():
+        if template["intent"] == intent and valid.get(name) and matches_signature(name, question):
+            return {"name": name, "sql": render_builtin(name, slots), "slots": slots, "source": "builtin"}
+    return None
+
+
+# -----------------------------------------------------------------------------
+# PROMOTION OF LLM-GENERATED SQL
+# -----------------------------------------------------------------------------
+def generalize_sql(sql: str, slots: dict):
+    """
+    Replaces the slot values inlined in `sql` by placeholders.
+
+    Returns:
+        str | None: The template SQL, or None if a slot value from the
+        question cannot be found in the SQL (the query would not generalize).
+    """
+    template = strip_terminator(sql) + ";"
+    for slot in ("category", "country"):
+        if slot in slots:
+            pattern = re.compile(r"'" + re.escape(str(slots[slot]).replace("'", "''")) + r"'", re.I)
+            if not pattern.search(template):
+                return None
+            template = pattern.sub("'{" + slot + "}'", template)
+    if "year" in slots:
+        pattern = re.compile(r"'" + re.escape(slots["year"]) + r"(?=[-'])")
+        if not pattern.search(template):
+            return None
+        template = pattern.sub("'{year}", template)
+    if "limit" in slots:
+        pattern = re.compile(r"\bLIMIT\s+" + re.escape(slots["limit"]) + r"\b", re.I)
+        if not pattern.search(template):
+            return None
+        template = pattern.sub("LIMIT {limit}", template)
+    return template
+
+
+def register_candidate(sql_ref: str, intent: str, question: str) -> None:
+    """
+    Remembers LLM-written SQL (by artifact handle or file path) until it
+    has executed successfully.
+    """
+    if not sql_ref or not question:
+        return
+    with _lock:
+        _pending[sql_ref.strip()] = {"intent": (intent or "").upper().strip(), "question": question}
+        while len(_pending) > MAX_PENDING:
+            _pending.pop(next(iter(_pending)))
+
+
+def confirm_candidate(sql_ref: str, db_path: str = "datatechcon.db") -> bool:
+    """
+    Promotes a pending candidate after its SQL executed successfully.
+
+    Returns:
+        bool: True if a template was added to the library.
+    """
+    if not isinstance(sql_ref, str):
+        return False
+    with _lock:
+        candidate = _pending.pop(sql_ref.strip(), None)
+    if candidate is None:
+        return False
+
+    if is_handle(sql_ref):
+        sql = resolve(sql_ref)["value"]
+    else:
+        with open(sql_ref, "r", encoding="utf-8") as f:
+            sql = f.read()
+
+    slots = extract_slots(candidate["question"], db_path)
+    template = generalize_sql(sql, slots)
+    if template is None:
+        return False
+    if not validate_sql(render_promoted({"sql": template}, slots), db_path):
+        return False
+
+    signature = question_signature(candidate["question"], slots)
+    key = f"{candidate['intent']}|{signature}"
+    with _lock:
+        library = _load_library()
+        library[key] = {
+            "name": f"promoted_{len(library) + 1}",
+            "intent": candidate["intent"],
+            "signature": signature,
+            "slots": sorted(slots),
+            "sql": template,
+        }
+        _save_library()
+    return True
+
+
+def library_stats() -> dict:
+    """Sizes of the template library and the pending candidate queue."""
+    with _lock:
+        return {
+            "builtin": len(BUILTIN_TEMPLATES),
+            "promoted": len(_load_library()),
+            "pending": len(_pending),
+        }
@@ -0,0 +1,586 @@
+# =============================================================================
+# FILE: summarizer.py
+# PURPOSE:
+#   Token-budgeted summary of a result table for the LLM agents. Instead of
+#   the whole file, read_file_content returns (when the file would not fit
+#   the budget):
+#
+#     Summary: 48,210 rows x 4 columns
+#     Columns:
+#     - country (text): 12 distinct; top: 'India' 9,412, 'USA' 8,101, ...
+#     - duration_minutes (int): min 5, p5 9, p25 21, median 38, p75 61, p95 104,
+#       max 240; mean 44.7; ~236 distinct
+#     Sample (30 rows, stratified by country):
+#     <tab-separated rows>
+#
+#   Everything is computed in one streaming pass with bounded memory per
+#   column:
+#     - quantiles from a reservoir sample (exact up to RESERVOIR_SIZE values)
+#     - distinct counts, exact up to EXACT_DISTINCT values, then HyperLogLog
+#     - top values with the SpaceSaving heavy-hitter sketch; a value is
+#       only reported when its guaranteed count (count minus error) beats
+#       what any value outside the sketch could have, and that lower bound
+#       is what is printed (as '>=N' when the sketch may have over-counted)
+#     - the row sample is stratified by the first text column with at most
+#       MAX_STRATA values, otherwise by position in the file, so the head,
+#       middle and tail of a sorted result are all represented
+#
+#   .qcol files are streamed in batches from their memory map
+#   (tools/columnar.py iter_columnar). Tokens are estimated at
+#   CHARS_PER_TOKEN characters per token. The budget is
+#   $SUMMARY_TOKEN_BUDGET (default 2000) or the caller's.
+# =============================================================================
+
+import hashlib
+import heapq
+import math
+import os
+import random
+import re
+
+from tools.columnar import is_columnar_file, iter_columnar
+
+# Environment variable overriding the default token budget.
+TOKEN_BUDGET_ENV = "SUMMARY_TOKEN_BUDGET"
+DEFAULT_TOKEN_BUDGET = 2000
+# Rough characters per token of tabular text.
+CHARS_PER_TOKEN = 4
+
+# Values kept per numeric column for the quantiles.
+RESERVOIR_SIZE = 1024
+QUANTILES = ((0.05, "p5"), (0.25, "p25"), (0.5, "median"), (0.75, "p75"), (0.95, "p95"))
+# Distinct values counted exactly before switching to HyperLogLog.
+EXACT_DISTINCT = 2048
+# HyperLogLog registers: 2**12, about 1.6% standard error.
+HLL_PRECISION = 12
+# Values tracked by SpaceSaving, and shown per column.
+HEAVY_HITTER_CAPACITY = 64
+TOP_VALUES = 5
+# Strata of the row sample, and rows kept per stratum.
+MAX_STRATA = 24
+STRATUM_ROWS = 8
+# Longest cell shown in the summary, in characters.
+MAX_CELL_LENGTH = 40
+
+_NULLS = ("", "None", "NULL", "nan", "NaN")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def token_budget(budget: int = None) -> int:
+    """The token budget to use: `budget`, else $SUMMARY_TOKEN_BUDGET, else DEFAULT_TOKEN_BUDGET."""
+    if budget:
+        return int(budget)
+    return int(os.environ.get(TOKEN_BUDGET_ENV, DEFAULT_TOKEN_BUDGET))
+
+
+def estimate_tokens(text_or_chars) -> int:
+    """Estimated tokens of a text, or of a text of that many characters."""
+    chars = text_or_chars if isinstance(text_or_chars, int) else len(text_or_chars)
+    return math.ceil(chars / CHARS_PER_TOKEN)
+
+
+# -----------------------------------------------------------------------------
+# SKETCHES
+# -----------------------------------------------------------------------------
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HyperLogLog:
+    """Distinct-count estimate over 2**precision registers."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the first 1 bit in the remaining 64 - precision bits.
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range: linear counting is more accurate.
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class SpaceSaving:
+    """
+    Heavy hitters in bounded memory: the `capacity` most frequent values with
+    their counts, each over-counted by at most its "error".
+    """
+
+    def __init__(self, capacity: int = HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # (count, value) entries, some stale; the minimum is checked against `counts`.
+        self._heap = []
+
+    def add(self, value) -> None:
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+            return
+        if len(counts) < self.capacity:
+            counts[value] = 1
+            self.errors[value] = 0
+            heapq.heappush(self._heap, (1, value))
+            return
+        # Replace the least frequent value; the newcomer inherits its count as error.
+        while True:
+            count, victim = heapq.heappop(self._heap)
+            if counts.get(victim) == count:
+                break
+            if victim in counts:
+                heapq.heappush(self._heap, (counts[victim], victim))
+        del counts[victim]
+        del self.errors[victim]
+        counts[value] = count + 1
+        self.errors[value] = count
+        heapq.heappush(self._heap, (count + 1, value))
+        if len(self._heap) > 8 * self.capacity:
+            self._heap = [(c, v) for v, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, k: int = TOP_VALUES) -> list:
+        """The k most frequent values as (value, count, error), most frequent first."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0])))[:k]
+        return [(value, count, self.errors[value]) for value, count in ranked]
+
+    def guaranteed_top(self, k: int = TOP_VALUES) -> list:
+        """
+        The k values with the highest guaranteed count as (value, guaranteed
+        count, exact), keeping only values whose guaranteed count exceeds the
+        largest error in the sketch - and so the count any value it dropped
+        could have. When nothing was dropped all counts are exact.
+        """
+        bound = max(self.errors.values(), default=0)
+        if len(self.counts) >= self.capacity:
+            bound = max(bound, min(self.counts.values()))
+        ranked = sorted(((value, count - self.errors[value]) for value, count in self.counts.items()),
+                        key=lambda item: (-item[1], str(item[0])))
+        return [(value, low, self.errors[value] == 0) for value, low in ranked[:k] if low > bound]
+
+
+class Reservoir:
+    """Uniform sample of `size` items from a stream (Algorithm R)."""
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+
+    def add(self, item) -> None:
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        slot = int(self.rng.random() * self.seen)
+        if slot < self.size:
+            self.items[slot] = item
+
+
+# -----------------------------------------------------------------------------
+# COLUMN STATISTICS
+# -----------------------------------------------------------------------------
+class _ColumnStats:
+    """One pass over a column's values: type, nulls, range, quantiles, distinct and top values."""
+
+    def __init__(self, name: str, rng: random.Random):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.numeric = True
+        self.integer = True
+        self.total = 0.0
+        self.low = self.high = None
+        self.text_low = self.text_high = None
+        self.dates = True
+        self.reservoir = Reservoir(RESERVOIR_SIZE, rng)
+        self.distinct = set()
+        self.hll = None
+        self.heavy = SpaceSaving()
+
+    def add(self, value) -> None:
+        if value is None:
+            self.nulls += 1
+            return
+        self.count += 1
+        text = value if isinstance(value, str) else str(value)
+
+        if self.hll is None:
+            self.distinct.add(text)
+            if len(self.distinct) > EXACT_DISTINCT:
+                self.hll = HyperLogLog()
+                for seen in self.distinct:
+                    self.hll.add(seen)
+                self.distinct = None
+        else:
+            self.hll.add(text)
+
+        if self.numeric:
+            number = _number(value)
+            if number is not None:
+                self.integer = self.integer and isinstance(number, int)
+                self.total += number
+                self.low = number if self.low is None or number < self.low else self.low
+                self.high = number if self.high is None or number > self.high else self.high
+                self.reservoir.add(number)
+                # Top values of a wide numeric column are never shown (see describe).
+                if self.hll is None and len(self.distinct) <= HEAVY_HITTER_CAPACITY:
+                    self.heavy.add(text)
+                return
+            self.numeric = False
+            self.reservoir = None
+
+        # Text columns (from the first value that is not a number on)
+        self.heavy.add(text)
+        if self.dates:
+            self.dates = bool(_ISO_DATE.match(text))
+        if self.text_low is None or text < self.text_low:
+            self.text_low = text
+        if self.text_high is None or text > self.text_high:
+            self.text_high = text
+
+    @property
+    def distinct_count(self) -> tuple:
+        """(count, exact)"""
+        if self.hll is None:
+            return len(self.distinct), True
+        return self.hll.count(), False
+
+    def type_name(self) -> str:
+        if self.count == 0:
+            return "empty"
+        if self.numeric:
+            return "int" if self.integer else "real"
+        return "date" if self.dates else "text"
+
+    def quantiles(self) -> dict:
+        values = sorted(self.reservoir.items)
+        return {label: values[min(len(values) - 1, int(q * len(values)))] for q, label in QUANTILES}
+
+    def describe(self) -> dict:
+        distinct, exact = self.distinct_count
+        stats = {
+            "name": self.name,
+            "type": self.type_name(),
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": distinct,
+            "distinct_exact": exact,
+        }
+        if self.numeric and self.count:
+            stats.update(min=self.low, max=self.high, mean=self.total / self.count,
+                         quantiles=self.quantiles(), quantiles_exact=self.reservoir.seen <= RESERVOIR_SIZE)
+        elif self.count:
+            stats.update(min=self.text_low, max=self.text_high)
+        # Only values that certainly repeat; a wide numeric range is described by its quantiles.
+        top = [entry for entry in self.heavy.guaranteed_top() if entry[1] > 1]
+        if top and not (self.numeric and distinct > HEAVY_HITTER_CAPACITY):
+            stats["top"] = top
+        return stats
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+# -----------------------------------------------------------------------------
+# STRATIFIED ROW SAMPLE
+# -----------------------------------------------------------------------------
+class _ValueStrata:
+    """Per-value reservoirs of one column; gives up once it has more than MAX_STRATA values."""
+
+    def __init__(self, index: int, rng: random.Random):
+        self.index = index
+        self.rng = rng
+        self.strata = {}
+        self.overflowed = False
+
+    def add(self, position: int, row: tuple) -> None:
+        if self.overflowed:
+            return
+        key = row[self.index]
+        stratum = self.strata.get(key)
+        if stratum is None:
+            if len(self.strata) >= MAX_STRATA:
+                self.overflowed = True
+                self.strata = {}
+                return
+            stratum = self.strata[key] = Reservoir(STRATUM_ROWS, self.rng)
+        stratum.add((position, row))
+
+    def usable(self) -> bool:
+        return not self.overflowed and len(self.strata) > 1
+
+    def ordered(self) -> list:
+        """Strata, largest first."""
+        return sorted(self.strata.values(), key=lambda s: -s.seen)
+
+
+class _PositionStrata:
+    """
+    Reservoirs over consecutive row ranges. When there would be more than
+    MAX_STRATA ranges, neighbouring ranges are merged and the range width
+    doubles, so the strata always cover the whole file evenly.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.width = 1
+        self.strata = []
+
+    def add(self, position: int, row: tuple) -> None:
+        index = position // self.width
+        if index >= MAX_STRATA:
+            self._merge()
+            index = position // self.width
+        while len(self.strata) <= index:
+            self.strata.append(Reservoir(STRATUM_ROWS, self.rng))
+        self.strata[index].add((position, row))
+
+    def _merge(self) -> None:
+        merged = []
+        for i in range(0, len(self.strata), 2):
+            pair = self.strata[i:i + 2]
+            combined = Reservoir(STRATUM_ROWS, self.rng)
+            combined.seen = sum(s.seen for s in pair)
+            # Equal-width ranges: each kept row stands for as many rows, so a
+            # uniform pick from the union keeps every row equally likely.
+            items = [item for s in pair for item in s.items]
+            combined.items = self.rng.sample(items, min(STRATUM_ROWS, len(items)))
+            merged.append(combined)
+        self.strata = merged
+        self.width *= 2
+
+    def ordered(self) -> list:
+        """Strata in bisection order (first, last, middle, quarters, ...), so a
+        budget too small for all of them still spans the whole file."""
+        count = len(self.strata)
+        if count <= 2:
+            return list(self.strata)
+        order, intervals = [0, count - 1], [(0, count - 1)]
+        while intervals:
+            halves = []
+            for low, high in intervals:
+                if high - low > 1:
+                    middle = (low + high) // 2
+                    order.append(middle)
+                    halves += [(low, middle), (middle, high)]
+            intervals = halves
+        return [self.strata[i] for i in order]
+
+
+# -----------------------------------------------------------------------------
+# SUMMARY
+# -----------------------------------------------------------------------------
+def _cell(value) -> str:
+    text = "" if value is None else str(value)
+    return text if len(text) <= MAX_CELL_LENGTH else text[:MAX_CELL_LENGTH - 3] + "..."
+
+
+def _number_text(value) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return f"{value:,.4g}" if abs(value) < 1000 else f"{value:,.1f}"
+    return f"{int(value):,}"
+
+
+def _column_line(stats: dict, with_top: bool = True) -> str:
+    parts = []
+    if stats["type"] in ("int", "real"):
+        quantiles = stats["quantiles"]
+        approx = "" if stats["quantiles_exact"] else "~"
+        parts.append(f"min {_number_text(stats['min'])}, "
+                     + ", ".join(f"{label} {approx}{_number_text(value)}" for label, value in quantiles.items())
+                     + f", max {_number_text(stats['max'])}; mean {_number_text(stats['mean'])}")
+    elif stats["type"] == "date":
+        parts.append(f"{stats['min'][:10]}..{stats['max'][:10]}")
+    if stats["nulls"]:
+        parts.append(f"{stats['nulls']:,} nulls")
+    if stats["type"] != "empty":
+        distinct = f"{stats['distinct']:,}" if stats["distinct_exact"] else f"~{stats['distinct']:,}"
+        parts.append("all distinct" if stats["distinct_exact"] and stats["distinct"] == stats["count"]
+                     else f"{distinct} distinct")
+    if with_top and stats.get("top"):
+        parts.append("top: " + ", ".join(
+            f"'{_cell(value)}' {'' if exact else '>='}{count:,}" for value, count, exact in stats["top"]
+        ))
+    return f"- {stats['name']} ({stats['type']}): " + "; ".join(parts)
+
+
+def summarize_rows(columns: list, rows, token_budget_value: int = None, seed: int = 0) -> dict:
+    """
+    Summarizes a table in one pass over `rows` within a token budget.
+
+    Args:
+        columns (list): Column names.
+        rows: Iterable of row tuples; None marks NULL.
+        token_budget_value (int): Token budget. Default: token_budget().
+        seed (int): Seed of the samples, so summaries are reproducible.
+
+    Returns:
+        dict: {"text", "tokens", "rows", "columns" (per-column statistics),
+        "sampled_rows", "stratified_by", "chars" (characters of the rows as
+        tab-separated text)}
+    """
+    budget = token_budget(token_budget_value)
+    rng = random.Random(seed)
+    stats = [_ColumnStats(name, rng) for name in columns]
+    value_strata = None
+    position_strata = _PositionStrata(rng)
+    chars = len("\t".join(columns)) + 1
+    row_count = 0
+
+    for row in rows:
+        if value_strata is None:
+            # Stratify by the first text column (checked on the first row).
+            text_index = next((i for i, v in enumerate(row) if isinstance(v, str) and _number(v) is None), None)
+            value_strata = _ValueStrata(text_index, rng) if text_index is not None else False
+        for column, value in zip(stats, row):
+            column.add(value)
+            chars += len(value) + 1 if isinstance(value, str) else len(str(value)) + 1
+        if value_strata:
+            value_strata.add(row_count, row)
+        position_strata.add(row_count, row)
+        row_count += 1
+
+    described = [column.describe() for column in stats]
+    # Value strata first; rows spread over the file fill what budget they leave.
+    rounds = [position_strata.ordered()]
+    stratified_by = "position"
+    if value_strata and value_strata.usable():
+        rounds.insert(0, value_strata.ordered())
+        stratified_by = columns[value_strata.index]
+
+    header = f"Summary: {row_count:,} rows x {len(columns)} columns"
+    lines = [header, "Columns:"]
+    used = estimate_tokens(len(header) + 120)
+    for i, column in enumerate(described):
+        line = _column_line(column)
+        if used + estimate_tokens(line) > budget:
+            line = _column_line(column, with_top=False)
+        if used + estimate_tokens(line) > budget:
+            lines.append(f"- ... {len(described) - i} more columns not shown")
+            break
+        lines.append(line)
+        used += estimate_tokens(line) + 1
+
+    # Round-robin over the strata until the budget is spent.
+    picked, positions, full = [], set(), False
+    table_header = "\t".join(columns)
+    used += estimate_tokens(table_header) + 10
+    for strata in rounds:
+        queues = [sorted(s.items, key=lambda item: item[0]) for s in strata]
+        while any(queues) and not full:
+            for queue in queues:
+                if not queue:
+                    continue
+                position, row = queue.pop(0)
+                if position in positions:
+                    continue
+                line = "\t".join(_cell(v) for v in row)
+                cost = estimate_tokens(line) + 1
+                if used + cost > budget:
+                    full = True
+                    break
+                picked.append((position, line))
+                positions.add(position)
+                used += cost
+    if picked:
+        label = f"stratified by {stratified_by}" if stratified_by != "position" else "spread over the file"
+        lines.append(f"Sample ({len(picked)} rows, {label}):")
+        lines.append(table_header)
+        lines += [line for _, line in sorted(picked)]
+
+    text = "\n".join(lines)
+    return {
+        "text": text,
+        "tokens": estimate_tokens(text),
+        "rows": row_count,
+        "columns": described,
+        "sampled_rows": len(picked),
+        "stratified_by": stratified_by,
+        "chars": chars,
+    }
+
+
+# -----------------------------------------------------------------------------
+# TABLE SOURCES
+# -----------------------------------------------------------------------------
+def is_tsv_file(path: str) -> bool:
+    """True for a tab-separated result file (its header line has a tab)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return "\t" in f.readline()
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def iter_tsv(path: str) -> tuple:
+    """(columns, row iterator) of a tab-separated result file; "None" and empty cells are NULL."""
+    with open(path, "r", encoding="utf-8") as f:
+        columns = f.readline().rstrip("\n").split("\t")
+
+    def rows():
+        with open(path, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                yield tuple(None if cell in _NULLS else cell for cell in line.rstrip("\n").split("\t"))
+
+    return columns, rows()
+
+
+def iter_frame(df) -> tuple:
+    """(columns, row iterator) of a DataFrame; NaN / NaT are NULL and dates ISO text."""
+    def clean(value):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        if hasattr(value, "isoformat"):
+            return None if str(value) == "NaT" else value.isoformat()[:10]
+        return value.item() if hasattr(value, "item") else value
+
+    def rows():
+        for row in df.itertuples(index=False, name=None):
+            yield tuple(clean(v) for v in row)
+
+    return [str(c) for c in df.columns], rows()
+
+
+def summarize_file(path: str, token_budget_value: int = None) -> dict:
+    """
+    Summarizes a .qcol or tab-separated result file (see summarize_rows).
+
+    Returns:
+        dict: The summary, or None when the file is not a table.
+    """
+    if is_columnar_file(path):
+        columns, rows = iter_columnar(path)
+    elif is_tsv_file(path):
+        columns, rows = iter_tsv(path)
+    else:
+        return None
+    return summarize_rows(columns, rows, token_budget_value)
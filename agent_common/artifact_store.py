@@ -0,0 +1,459 @@
+# =============================================================================
+# FILE: artifact_store.py
+# PURPOSE:
+#   Content-addressed, size-bounded store for the files the tools of every
+#   project write (SQL, query results, analyses, insights, HTML reports,
+#   generated SQLite databases). It replaces the `output/{YYMMDD_HHMMSS}_*`
+#   naming, which clobbered files of concurrent requests, stored identical
+#   results over and over and let `output/` grow without bound.
+#
+#     - blobs are named by the SHA-256 of their content:
+#       `output/blobs/3f/3f2c...9e.txt`; writing the same content twice
+#       stores it once
+#     - writes are atomic: content goes to `output/blobs/tmp/` and is renamed
+#       into place, so readers never see a half-written file
+#     - a small SQLite index (`output/blobs/index.sqlite`) records every blob
+#       (size, last access) and, per run, agent and stage, which blob it
+#       produced, so parallel branches of one run keep their own entries:
+#       `lookup(run_id, "insights")` is one index read
+#     - garbage collection drops blobs not accessed for ARTIFACT_MAX_AGE_DAYS
+#       (default 7), then least recently used blobs until the store is under
+#       ARTIFACT_MAX_BYTES (default 1 GiB); it runs after writes, at most
+#       once per GC_INTERVAL_SECONDS unless the size budget is exceeded.
+#       Files that live references still point at (registered with
+#       `add_gc_root`, e.g. in-process artifact handles or cached answers)
+#       are never collected
+#
+#   Tools keep returning plain file paths, so result dicts and readers are
+#   unchanged.
+#
+# USAGE:
+#   python -m agent_common.artifact_store stats --root Query-to-Insight-Agent/output
+#   python -m agent_common.artifact_store gc --root output --max-bytes 100000000
+# =============================================================================
+
+import argparse
+import contextlib
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from agent_common.tracing import add_callback
+
+BLOB_DIR = "blobs"
+TMP_DIR = "tmp"
+INDEX_NAME = "index.sqlite"
+
+DEFAULT_MAX_BYTES = int(os.environ.get("ARTIFACT_MAX_BYTES", 1024 ** 3))
+DEFAULT_MAX_AGE_SECONDS = float(os.environ.get("ARTIFACT_MAX_AGE_DAYS", 7)) * 86400
+# Age-based collection runs at most this often; the size budget is checked on every write.
+GC_INTERVAL_SECONDS = 60
+# Temp files older than this belong to writers that died and are removed by gc().
+STALE_TMP_SECONDS = 3600
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Invocation id and agent of the ADK run the current tool call belongs to (see track_runs).
+_current_run = contextvars.ContextVar("artifact_run_id", default=None)
+_current_agent = contextvars.ContextVar("artifact_agent", default="")
+# Callables returning paths that garbage collection must keep (see add_gc_root).
+_gc_roots = []
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    blob TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs (accessed);
+CREATE TABLE IF NOT EXISTS refs (
+    run_id TEXT NOT NULL,
+    agent TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (run_id, agent, stage)
+);
+CREATE INDEX IF NOT EXISTS refs_blob ON refs (blob);
+"""
+# Indexes written before refs were keyed by agent.
+_MIGRATE_REFS = """
+ALTER TABLE refs RENAME TO refs_v1;
+DROP INDEX IF EXISTS refs_blob;
+""" + _SCHEMA + """
+INSERT INTO refs (run_id, agent, stage, blob, name, created)
+    SELECT run_id, '', stage, blob, name, created FROM refs_v1;
+DROP TABLE refs_v1;
+"""
+
+
+def _suffix(name: str) -> str:
+    return os.path.splitext(name)[1].lower()
+
+
+def _stage(name: str) -> str:
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+class ArtifactStore:
+    """
+    Content-addressed file store under `root` (usually a project's `output/`).
+
+    Small outputs are stored with `put_text` / `put_bytes`. Outputs produced
+    by another writer (a streamed result file, a SQLite database) are written
+    to `reserve(name)` and then published with `commit`, or dropped with
+    `discard`. All of them return the final blob path.
+    """
+
+    def __init__(self, root: str = "output", max_bytes: int = None, max_age_seconds: float = None):
+        self.root = root
+        self.blob_root = os.path.join(root, BLOB_DIR)
+        self.tmp_root = os.path.join(self.blob_root, TMP_DIR)
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_age_seconds = DEFAULT_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last_gc = 0.0
+
+    # -------------------------------------------------------------------------
+    # INDEX
+    # -------------------------------------------------------------------------
+    def _index(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.tmp_root, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.blob_root, INDEX_NAME), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if "agent" not in [row[1] for row in conn.execute("PRAGMA table_info(refs)")]:
+                conn.executescript("BEGIN;" + _MIGRATE_REFS + "COMMIT;")
+            self._conn = conn
+        return self._conn
+
+    def blob_path(self, blob: str) -> str:
+        """Path of a blob id (`<sha256><suffix>`) inside the store."""
+        return os.path.join(self.blob_root, blob[:2], blob)
+
+    # -------------------------------------------------------------------------
+    # WRITING
+    # -------------------------------------------------------------------------
+    def put_bytes(self, data: bytes, name: str, stage: str = None, run_id: str = None) -> str:
+        """
+        Stores `data` and returns its path.
+
+        Args:
+            data (bytes): The content.
+            name (str): Descriptive file name, e.g. "insights.txt"; its suffix
+                is kept on the blob and its stem is the default stage.
+            stage (str): Stage recorded in the run index. Default: the name stem.
+            run_id (str): Run the artifact belongs to. Default: the current ADK
+                invocation (see track_runs); nothing is indexed without one.
+
+        Returns:
+            str: Path of the stored blob.
+        """
+        blob = hashlib.sha256(data).hexdigest() + _suffix(name)
+        path = self.blob_path(blob)
+        # Known content is not rewritten; _publish re-checks under the lock.
+        with self._lock:
+            known = self._exists(blob, path)
+        tmp = None if known else self._write_tmp(data, name)
+        return self._publish(blob, path, name, stage, run_id, tmp, data)
+
+    def put_text(self, text: str, name: str, stage: str = None, run_id: str = None) -> str:
+        """Stores UTF-8 text; see put_bytes."""
+        return self.put_bytes(text.encode("utf-8"), name, stage, run_id)
+
+    def reserve(self, name: str) -> str:
+        """Returns a fresh temp path (with the suffix of `name`) for a writer to fill."""
+        os.makedirs(self.tmp_root, exist_ok=True)
+        return os.path.join(self.tmp_root, f"{uuid.uuid4().hex}{_suffix(name)}")
+
+    def commit(self, tmp_path: str, name: str, stage: str = None, run_id: str = None) -> str:
+        """
+        Moves a finished temp file from `reserve` into the store.
+
+        The file is hashed in chunks; if the content is already stored the temp
+        file is simply deleted.
+
+        Returns:
+            str: Path of the stored blob.
+        """
+        digest = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        blob = digest.hexdigest() + _suffix(name)
+        return self._publish(blob, self.blob_path(blob), name, stage, run_id, tmp_path)
+
+    def discard(self, tmp_path: str) -> None:
+        """Removes a reserved temp file that will not be committed."""
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+
+    def _write_tmp(self, data: bytes, name: str) -> str:
+        tmp = self.reserve(name)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+        except BaseException:
+            self.discard(tmp)
+            raise
+        return tmp
+
+    def _exists(self, blob: str, path: str) -> bool:
+        # Caller holds self._lock.
+        known = self._index().execute("SELECT 1 FROM blobs WHERE blob = ?", (blob,)).fetchone()
+        return known is not None and os.path.exists(path)
+
+    def _place(self, tmp_path: str, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic on POSIX and Windows; a concurrent writer of the same content
+        # replaces the file with identical bytes.
+        os.replace(tmp_path, path)
+
+    def _publish(self, blob: str, path: str, name: str, stage: str, run_id: str,
+                 tmp_path: str = None, data: bytes = None) -> str:
+        """
+        Places the content (the temp file `tmp_path`, else `data`) at `path`
+        unless it is already stored, and records it. Check, placement and
+        record happen under the lock that gc deletes under, so gc can never
+        remove a blob between them.
+        """
+        now = time.time()
+        agent = "" if run_id else _current_agent.get()
+        run_id = run_id or _current_run.get()
+        with self._lock:
+            conn = self._index()
+            if self._exists(blob, path):
+                if tmp_path:
+                    self.discard(tmp_path)
+            else:
+                self._place(tmp_path or self._write_tmp(data, name), path)
+            conn.execute(
+                "INSERT INTO blobs (blob, size, created, accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(blob) DO UPDATE SET accessed = excluded.accessed, size = excluded.size",
+                (blob, os.path.getsize(path), now, now)
+            )
+            if run_id:
+                conn.execute(
+                    "INSERT OR REPLACE INTO refs (run_id, agent, stage, blob, name, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, agent, stage or _stage(name), blob, os.path.basename(name), now)
+                )
+            over_budget = self.max_bytes and self._total_bytes(conn) > self.max_bytes
+        if over_budget or now - self._last_gc > GC_INTERVAL_SECONDS:
+            self.gc(keep=blob)
+        return path
+
+    # -------------------------------------------------------------------------
+    # READING
+    # -------------------------------------------------------------------------
+    def lookup(self, run_id: str, stage: str, agent: str = None):
+        """
+        Path of the artifact a run produced for a stage, or None. Without
+        `agent`, the latest one any agent of the run produced.
+
+        Counts as an access for the LRU order.
+        """
+        with self._lock:
+            row = self._index().execute(
+                "SELECT blob FROM refs WHERE run_id = ? AND stage = ? AND agent = COALESCE(?, agent) "
+                "ORDER BY created DESC LIMIT 1", (run_id, stage, agent)
+            ).fetchone()
+        if row is None or not os.path.exists(self.blob_path(row[0])):
+            return None
+        self.touch(self.blob_path(row[0]))
+        return self.blob_path(row[0])
+
+    def run_artifacts(self, run_id: str) -> list:
+        """[{"agent", "stage", "path"}] of everything a run produced, oldest first."""
+        with self._lock:
+            rows = self._index().execute(
+                "SELECT agent, stage, blob FROM refs WHERE run_id = ? ORDER BY created", (run_id,)
+            ).fetchall()
+        return [{"agent": agent, "stage": stage, "path": self.blob_path(blob)} for agent, stage, blob in rows]
+
+    def touch(self, path: str) -> None:
+        """Marks a blob as recently used, so GC evicts it last."""
+        with self._lock:
+            self._index().execute("UPDATE blobs SET accessed = ? WHERE blob = ?",
+                                  (time.time(), os.path.basename(path)))
+
+    # -------------------------------------------------------------------------
+    # GARBAGE COLLECTION
+    # -------------------------------------------------------------------------
+    def _total_bytes(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def gc(self, max_bytes: int = None, max_age_seconds: float = None, keep: str = None) -> dict:
+        """
+        Deletes blobs not accessed within `max_age_seconds`, then the least
+        recently accessed ones until the store holds at most `max_bytes`.
+        Blobs behind the paths of the `add_gc_root` providers are kept. Stale
+        temp files of crashed writers are removed as well.
+
+        Args:
+            max_bytes (int): Size budget. Default: the store's.
+            max_age_seconds (float): Age limit. Default: the store's.
+            keep (str): Blob id never evicted in this pass (the one just written).
+
+        Returns:
+            dict: {"removed", "freed_bytes", "total_bytes"}.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_seconds = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        now = time.time()
+        # Collected before taking the lock: providers may take locks of their own.
+        roots = _root_blobs(self.blob_root)
+        if keep:
+            roots.add(keep)
+        victims = []
+        with self._lock:
+            self._last_gc = now
+            conn = self._index()
+            if max_age_seconds:
+                victims += [(blob, size) for blob, size in conn.execute(
+                    "SELECT blob, size FROM blobs WHERE accessed < ?", (now - max_age_seconds,)
+                ) if blob not in roots]
+            total = self._total_bytes(conn) - sum(size for _, size in victims)
+            if max_bytes and total > max_bytes:
+                aged = {blob for blob, _ in victims}
+                for blob, size in conn.execute("SELECT blob, size FROM blobs ORDER BY accessed"):
+                    if total <= max_bytes:
+                        break
+                    if blob not in aged and blob not in roots:
+                        victims.append((blob, size))
+                        total -= size
+            # Files go with their rows under the lock, so a writer of the same
+            # content cannot place a file in between and lose it.
+            for blob, _ in victims:
+                conn.execute("DELETE FROM blobs WHERE blob = ?", (blob,))
+                conn.execute("DELETE FROM refs WHERE blob = ?", (blob,))
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self.blob_path(blob))
+
+        if os.path.isdir(self.tmp_root):
+            for entry in os.scandir(self.tmp_root):
+                with contextlib.suppress(FileNotFoundError):
+                    if now - entry.stat().st_mtime > STALE_TMP_SECONDS:
+                        os.remove(entry.path)
+        return {"removed": len(victims), "freed_bytes": sum(size for _, size in victims), "total_bytes": total}
+
+    def stats(self) -> dict:
+        """Returns the number of blobs, their total size and the number of indexed run/stage entries."""
+        with self._lock:
+            conn = self._index()
+            blobs, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs = conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        return {"blobs": blobs, "total_bytes": total, "refs": refs, "max_bytes": self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def add_gc_root(provider) -> None:
+    """
+    Registers `provider`, a callable returning file paths still in use (for
+    example by in-memory handles or cached answers); garbage collection of
+    every store keeps the blobs behind them.
+    """
+    if provider not in _gc_roots:
+        _gc_roots.append(provider)
+
+
+def _root_blobs(blob_root: str) -> set:
+    """Blob ids under `blob_root` that a registered root provider still references."""
+    blob_root = os.path.abspath(blob_root)
+    roots = set()
+    for provider in list(_gc_roots):
+        try:
+            paths = provider()
+        except Exception as e:
+            print(f"[WARNING] Artifact GC root provider failed: {e}")
+            continue
+        for path in paths or ():
+            if isinstance(path, str) and os.path.dirname(os.path.dirname(os.path.abspath(path))) == blob_root:
+                roots.add(os.path.basename(path))
+    return roots
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(root: str = "output") -> ArtifactStore:
+    """Returns the process-wide store for `root`."""
+    key = os.path.abspath(root)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ArtifactStore(root)
+        return _stores[key]
+
+
+# -----------------------------------------------------------------------------
+# RUN IDS
+# -----------------------------------------------------------------------------
+def current_run_id():
+    """Invocation id of the ADK run the caller belongs to, or None."""
+    return _current_run.get()
+
+
+@contextlib.contextmanager
+def run_scope(run_id: str, agent: str = ""):
+    """Indexes artifacts written inside the block under `run_id` and `agent` (for scripts outside ADK)."""
+    token, agent_token = _current_run.set(run_id), _current_agent.set(agent)
+    try:
+        yield run_id
+    finally:
+        _current_agent.reset(agent_token)
+        _current_run.reset(token)
+
+
+def _bind_run(callback_context):
+    _current_run.set(callback_context.invocation_id)
+    _current_agent.set(callback_context.agent_name)
+    return None
+
+
+def track_runs(root_agent):
+    """
+    Makes every agent under `root_agent` record its invocation id and name
+    before it runs, so the artifacts its tools write are indexed by run and
+    agent (parallel branches of one run have agents of their own).
+
+    Returns:
+        The same agent.
+    """
+    def visit(agent):
+        if "before_agent_callback" in type(agent).model_fields:
+            add_callback(agent, "before_agent_callback", _bind_run)
+        for sub_agent in agent.sub_agents:
+            visit(sub_agent)
+
+    visit(root_agent)
+    return root_agent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or collect an artifact store.")
+    parser.add_argument("command", choices=["stats", "gc"])
+    parser.add_argument("--root", default="output", help="Folder holding the store (blobs/ inside it).")
+    parser.add_argument("--max-bytes", type=int, default=None)
+    parser.add_argument("--max-age-days", type=float, default=None)
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.command == "gc":
+        max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+        print(store.gc(args.max_bytes, max_age))
+    print(store.stats())
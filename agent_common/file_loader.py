@@ -0,0 +1,77 @@
+# =============================================================================
+# FILE: file_loader.py
+# PURPOSE:
+#   Shared `load_instructions_file` for every project in this repository.
+#   Reads the plain-text instructions and descriptions of the LLM agents;
+#   if a file is missing or unreadable, a default string is returned.
+#
+#   Relative paths are resolved against `base_dir` (each project's
+#   utils/file_loader.py binds it to its project root with
+#   `project_loader`), so agents load the same
+#   files whatever the current working directory is. File contents are
+#   memoized per path: agents that share an instruction file, and agent
+#   modules imported by several roots, read it once per process.
+# =============================================================================
+
+import functools
+import os
+import threading
+
+_cache = {}
+_lock = threading.Lock()
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: load_instructions_file
+# -----------------------------------------------------------------------------
+def load_instructions_file(filename: str, default: str = "", base_dir: str = None) -> str:
+    """
+    Loads instruction or description text from a given file path.
+
+    Args:
+        filename (str): Path to the file to read (relative or absolute).
+        default (str): Default string to return if the file is not found or fails to load.
+        base_dir (str): Directory relative paths are resolved against
+            (default: the current working directory).
+
+    Returns:
+        str: The file contents if successful, or the fallback default string.
+    """
+    path = os.path.abspath(os.path.join(base_dir, filename) if base_dir else filename)
+    with _lock:
+        if path in _cache:
+            return _cache[path]
+
+    try:
+        # UTF-8 keeps non-ASCII characters in prompt files intact.
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    except FileNotFoundError:
+        # If the file doesn't exist, log a warning and fall back to the default value.
+        print(f"[WARNING] File not found: {path}. Using default.")
+        return default
+
+    except Exception as e:
+        # Catch any other exception (e.g. permission issues, IO errors) and log it.
+        print(f"[ERROR] Failed to load {path}: {e}")
+        return default
+
+    with _lock:
+        _cache[path] = text
+    return text
+
+
+def project_loader(module_file: str):
+    """
+    Returns `load_instructions_file` with `base_dir` bound to the project of
+    `module_file`, a module in <project>/utils/.
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(module_file)))
+    return functools.partial(load_instructions_file, base_dir=project_root)
+
+
+def clear_instructions_cache() -> None:
+    """Forgets every loaded file, e.g. after editing prompts in a running process."""
+    with _lock:
+        _cache.clear()
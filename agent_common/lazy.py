@@ -0,0 +1,55 @@
+# =============================================================================
+# FILE: lazy.py
+# PURPOSE:
+#   Deferred imports of heavy dependencies. `pd = lazy_import("pandas")`
+#   binds a module placeholder that imports pandas on the first attribute
+#   access (`pd.DataFrame`), so importing an agent or tool module does not
+#   pay for libraries that only some tools use. Modules using a lazy import
+#   in annotations need `from __future__ import annotations`, otherwise the
+#   annotation itself triggers the import when the function is defined.
+# =============================================================================
+
+import importlib
+import sys
+import threading
+import types
+
+_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    """Stands in for a module until one of its attributes is used."""
+
+    def __getattr__(self, attribute: str):
+        # Only called for attributes not set on the placeholder itself.
+        with _lock:
+            module = self.__dict__.get("_module")
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                self.__dict__["_module"] = module
+        return getattr(module, attribute)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns `name` if it is already imported, otherwise a placeholder that
+    imports it on first use.
+
+    Args:
+        name (str): Absolute module name, e.g. "pandas".
+
+    Returns:
+        module: The module, or its lazy placeholder.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
+
+
+def is_loaded(name: str) -> bool:
+    """True when `name` has actually been imported in this process."""
+    return name in sys.modules
@@ -0,0 +1,402 @@
+# =============================================================================
+# FILE: tracing.py
+# PURPOSE:
+#   Latency tracing for ADK runs, shared by every project in this repository.
+#   `instrument(root_agent)` walks the agent tree and attaches ADK callbacks
+#   that record one span per
+#     - agent run       (kind "agent", before/after_agent_callback)
+#     - model call      (kind "model", before/after_model_callback; tokens in/out)
+#     - tool call       (kind "tool",  before/after_tool_callback; artifact bytes)
+#   with start/end time, parent span, errors and the invocation as trace id.
+#   Spans are appended as JSON lines to traces/spans.jsonl (env
+#   AGENT_TRACE_FILE); AGENT_TRACING=0 turns tracing off.
+#
+#   The span records use OpenTelemetry field names, and `export-otlp`
+#   converts a trace file to OTLP/JSON for any OpenTelemetry collector.
+#
+# USAGE:
+#   python -m agent_common.tracing summary --file Query-to-Insight-Agent/traces/spans.jsonl
+#   python -m agent_common.tracing export-otlp --file traces/spans.jsonl --output traces/otlp.json
+# =============================================================================
+
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+TRACE_FILE_ENV = "AGENT_TRACE_FILE"
+TRACING_ENV = "AGENT_TRACING"
+DEFAULT_TRACE_FILE = os.path.join("traces", "spans.jsonl")
+
+# Open spans kept at most; spans of runs that died without an "after" callback are dropped.
+MAX_OPEN_SPANS = 10_000
+
+_CALLBACKS = {
+    # ADK field -> Tracer method (ADK calls these with keyword arguments)
+    "before_agent_callback": "before_agent",
+    "after_agent_callback": "after_agent",
+}
+_LLM_CALLBACKS = {
+    "before_model_callback": "before_model",
+    "after_model_callback": "after_model",
+    "on_model_error_callback": "on_model_error",
+    "before_tool_callback": "before_tool",
+    "after_tool_callback": "after_tool",
+    "on_tool_error_callback": "on_tool_error",
+}
+
+
+def _trace_id(invocation_id: str) -> str:
+    """32-hex OpenTelemetry trace id derived from the ADK invocation id."""
+    return hashlib.md5(str(invocation_id).encode("utf-8")).hexdigest()
+
+
+def _span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class Tracer:
+    """Collects spans from ADK callbacks and appends them to a JSONL file."""
+
+    def __init__(self, path: str = None, enabled: bool = None):
+        self.path = path or os.environ.get(TRACE_FILE_ENV, DEFAULT_TRACE_FILE)
+        self.enabled = os.environ.get(TRACING_ENV, "1") != "0" if enabled is None else enabled
+        self._open = {}
+        self._parents = {}
+        self._roots = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    # -------------------------------------------------------------------------
+    # SPANS
+    # -------------------------------------------------------------------------
+    def start(self, key: tuple, kind: str, name: str, invocation_id: str, parent_key: tuple = None,
+              **attributes) -> dict:
+        """Opens a span under `key`; its parent is the open span under `parent_key`, if any."""
+        with self._lock:
+            parent = self._open.get(parent_key) if parent_key else None
+            span = {
+                "trace_id": _trace_id(invocation_id),
+                "span_id": _span_id(),
+                "parent_span_id": parent["span_id"] if parent else None,
+                "name": name,
+                "kind": kind,
+                "start_time_unix_nano": time.time_ns(),
+                "attributes": {"invocation_id": invocation_id, **attributes},
+                "_started": time.perf_counter(),
+            }
+            if len(self._open) >= MAX_OPEN_SPANS:
+                self._open.pop(next(iter(self._open)))
+            self._open[key] = span
+        return span
+
+    def end(self, key: tuple, error: str = None, **attributes):
+        """Closes the span under `key` and writes it; returns the record, or None if it was not open."""
+        with self._lock:
+            span = self._open.pop(key, None)
+        if span is None:
+            return None
+        duration = time.perf_counter() - span.pop("_started")
+        span["end_time_unix_nano"] = span["start_time_unix_nano"] + int(duration * 1e9)
+        span["duration_ms"] = round(duration * 1000, 3)
+        span["status"] = "ERROR" if error else "OK"
+        span["attributes"].update({k: v for k, v in attributes.items() if v is not None})
+        if error:
+            span["attributes"]["error"] = str(error)
+        self._write(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, kind: str, name: str, invocation_id: str = "", agent: str = None, **attributes):
+        """
+        Traces a block of code that does not run through ADK callbacks, e.g. a
+        tool a custom agent calls directly; `agent` is the calling agent.
+        """
+        if not self.enabled:
+            yield None
+            return
+        key = (kind, invocation_id, name, _span_id())
+        parent_key = self._agent_key(invocation_id, agent) if agent else None
+        record = self.start(key, kind, name, invocation_id, parent_key, agent=agent,
+                            root_agent=self._roots.get(agent), **attributes)
+        try:
+            yield record
+        except BaseException as e:
+            self.end(key, error=repr(e))
+            raise
+        self.end(key)
+
+    def _write(self, span: dict) -> None:
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                folder = os.path.dirname(self.path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # -------------------------------------------------------------------------
+    # ADK CALLBACKS (all return None, so they never change the run)
+    # -------------------------------------------------------------------------
+    def _agent_key(self, invocation_id: str, agent_name: str) -> tuple:
+        return ("agent", invocation_id, agent_name)
+
+    def before_agent(self, callback_context):
+        invocation_id, agent = callback_context.invocation_id, callback_context.agent_name
+        parent = self._parents.get(agent)
+        self.start(
+            self._agent_key(invocation_id, agent), "agent", agent, invocation_id,
+            self._agent_key(invocation_id, parent) if parent else None,
+            root_agent=self._roots.get(agent),
+        )
+        return None
+
+    def after_agent(self, callback_context):
+        self.end(self._agent_key(callback_context.invocation_id, callback_context.agent_name))
+        return None
+
+    def before_model(self, callback_context, llm_request):
+        invocation_id, agent = callback_context.invocation_id, callback_context.agent_name
+        self.start(
+            ("model", invocation_id, agent), "model", agent, invocation_id,
+            self._agent_key(invocation_id, agent),
+            model=getattr(llm_request, "model", None), root_agent=self._roots.get(agent),
+        )
+        return None
+
+    def after_model(self, callback_context, llm_response):
+        if getattr(llm_response, "partial", False):
+            # Streaming chunk; the span ends with the final response.
+            return None
+        usage = getattr(llm_response, "usage_metadata", None)
+        self.end(
+            ("model", callback_context.invocation_id, callback_context.agent_name),
+            error=getattr(llm_response, "error_message", None),
+            tokens_in=getattr(usage, "prompt_token_count", None),
+            tokens_out=getattr(usage, "candidates_token_count", None),
+        )
+        return None
+
+    def on_model_error(self, callback_context, llm_request, error):
+        self.end(("model", callback_context.invocation_id, callback_context.agent_name), error=repr(error))
+        return None
+
+    def _tool_key(self, tool_context, tool) -> tuple:
+        return ("tool", tool_context.invocation_id, getattr(tool_context, "function_call_id", None) or tool.name)
+
+    def before_tool(self, tool, args, tool_context):
+        invocation_id, agent = tool_context.invocation_id, tool_context.agent_name
+        self.start(
+            self._tool_key(tool_context, tool), "tool", tool.name, invocation_id,
+            self._agent_key(invocation_id, agent),
+            agent=agent, root_agent=self._roots.get(agent),
+        )
+        return None
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        error, artifact_bytes = None, None
+        if isinstance(tool_response, dict):
+            if tool_response.get("status") == "error":
+                error = tool_response.get("message") or "error"
+            artifact_bytes = tool_response.get("bytes")
+            file = tool_response.get("file")
+            if artifact_bytes is None and isinstance(file, str) and os.path.isfile(file):
+                artifact_bytes = os.path.getsize(file)
+        self.end(self._tool_key(tool_context, tool), error=error, artifact_bytes=artifact_bytes)
+        return None
+
+    def on_tool_error(self, tool, args, tool_context, error):
+        self.end(self._tool_key(tool_context, tool), error=repr(error))
+        return None
+
+    # -------------------------------------------------------------------------
+    # INSTRUMENTATION
+    # -------------------------------------------------------------------------
+    def instrument(self, root_agent):
+        """
+        Attaches the tracing callbacks to `root_agent` and every agent below it.
+
+        Existing callbacks are kept; ours run first and never return a value.
+        Calling it twice is harmless.
+
+        Returns:
+            The same agent, for `root_agent = instrument(...)`.
+        """
+        if not self.enabled:
+            return root_agent
+
+        def visit(agent, parent):
+            self._parents[agent.name] = parent.name if parent else None
+            self._roots[agent.name] = root_agent.name
+            callbacks = dict(_CALLBACKS)
+            if hasattr(agent, "before_model_callback"):
+                callbacks.update(_LLM_CALLBACKS)
+            for field, method in callbacks.items():
+                if field in type(agent).model_fields:
+                    add_callback(agent, field, getattr(self, method))
+            for sub_agent in agent.sub_agents:
+                visit(sub_agent, agent)
+
+        visit(root_agent, None)
+        return root_agent
+
+
+def add_callback(agent, field: str, callback) -> None:
+    """Prepends `callback` to an agent callback field, keeping what is already set."""
+    existing = getattr(agent, field)
+    if existing is None:
+        setattr(agent, field, callback)
+    elif isinstance(existing, list):
+        if callback not in existing:
+            setattr(agent, field, [callback] + existing)
+    elif existing != callback:
+        setattr(agent, field, [callback, existing])
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def instrument(root_agent):
+    """Attaches the process-wide tracer to `root_agent` and its sub-agents (see Tracer.instrument)."""
+    return get_tracer().instrument(root_agent)
+
+
+# -----------------------------------------------------------------------------
+# READING TRACES
+# -----------------------------------------------------------------------------
+def load_spans(path: str) -> list:
+    """Reads a JSONL trace file, skipping malformed lines."""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(spans: list) -> list:
+    """
+    Latency per stage, one row per (kind, name).
+
+    Returns:
+        list[dict]: {"kind", "name", "count", "errors", "p50_ms", "p95_ms",
+                     "p99_ms", "total_ms", "tokens_in", "tokens_out",
+                     "artifact_bytes"}, slowest total first.
+    """
+    stages = {}
+    for span in spans:
+        stages.setdefault((span.get("kind"), span.get("name")), []).append(span)
+
+    rows = []
+    for (kind, name), group in stages.items():
+        durations = [s.get("duration_ms", 0.0) for s in group]
+        attributes = [s.get("attributes", {}) for s in group]
+        rows.append({
+            "kind": kind,
+            "name": name,
+            "count": len(group),
+            "errors": sum(1 for s in group if s.get("status") == "ERROR"),
+            "p50_ms": percentile(durations, 50),
+            "p95_ms": percentile(durations, 95),
+            "p99_ms": percentile(durations, 99),
+            "total_ms": sum(durations),
+            "tokens_in": sum(a.get("tokens_in") or 0 for a in attributes),
+            "tokens_out": sum(a.get("tokens_out") or 0 for a in attributes),
+            "artifact_bytes": sum(a.get("artifact_bytes") or 0 for a in attributes),
+        })
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list, service_name: str = "adk-agents") -> dict:
+    """Converts span records to an OTLP/JSON ExportTraceServiceRequest."""
+    otlp_spans = []
+    for span in spans:
+        record = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": f"{span['kind']} {span['name']}",
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span["start_time_unix_nano"]),
+            "endTimeUnixNano": str(span["end_time_unix_nano"]),
+            "attributes": [
+                {"key": f"adk.{key}", "value": _otlp_value(value)}
+                for key, value in span.get("attributes", {}).items() if value is not None
+            ],
+            "status": {"code": 2 if span.get("status") == "ERROR" else 1},
+        }
+        if span.get("parent_span_id"):
+            record["parentSpanId"] = span["parent_span_id"]
+        if span.get("status") == "ERROR":
+            record["status"]["message"] = str(span.get("attributes", {}).get("error", ""))
+        otlp_spans.append(record)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "agent_common.tracing"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or export ADK trace files.")
+    parser.add_argument("command", choices=["summary", "export-otlp"])
+    parser.add_argument("--file", default=DEFAULT_TRACE_FILE, help="JSONL trace file.")
+    parser.add_argument("--kind", choices=["agent", "model", "tool"], help="Only this kind of span.")
+    parser.add_argument("--output", default=os.path.join("traces", "otlp.json"), help="OTLP/JSON output file.")
+    parser.add_argument("--service", default="adk-agents", help="service.name for the OTLP export.")
+    args = parser.parse_args()
+
+    records = [s for s in load_spans(args.file) if not args.kind or s.get("kind") == args.kind]
+    if args.command == "summary":
+        print(f"{'stage':<48} {'n':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'tok in':>8} {'tok out':>8} {'bytes':>10}")
+        for row in summarize(records):
+            stage = f"{row['kind']}:{row['name']}"
+            print(f"{stage:<48} {row['count']:>5} {row['errors']:>4} {row['p50_ms']:>9.1f} "
+                  f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['tokens_in']:>8} "
+                  f"{row['tokens_out']:>8} {row['artifact_bytes']:>10}")
+    else:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(to_otlp(records, args.service), f)
+        print(f"{len(records)} spans written to {args.output}")
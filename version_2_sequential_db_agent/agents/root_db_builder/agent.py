@@ -3,13 +3,16 @@ import sys
 from google.adk.agents import SequentialAgent
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..","..")))
+from agent_common.artifact_store import track_runs
+from agent_common.tracing import instrument
 from utils.file_loader import load_instructions_file
 from agents.requirements_writer.agent import requirements_writer_agent
 from agents.designer.agent import designer_agent
 from agents.sql_writer.agent import sql_writer_agent
 
-root_agent = SequentialAgent(
+root_agent = instrument(track_runs(SequentialAgent(
     name="root_db_builder_agent",
     sub_agents=[requirements_writer_agent, designer_agent, sql_writer_agent],
     description=load_instructions_file("agents/root_db_builder/description.txt")
-)
\ No newline at end of file
+)))
\ No newline at end of file
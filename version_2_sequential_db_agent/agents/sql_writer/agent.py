@@ -3,6 +3,7 @@ import sys
 from google.adk.agents import LlmAgent
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..","..")))
 from utils.file_loader import load_instructions_file
 from tools.file_writer_tool import write_database_file
 
@@ -4,11 +4,18 @@
 #   This module defines tools for database agents to persist generated database
 #   schemas and SQLite database files. It includes functions for writing SQL
 #   requirements, design specifications, and complete SQLite databases.
+#   Files go to the shared content-addressed artifact store
+#   (agent_common/artifact_store.py) under `output/`.
 # =============================================================================
 
+import os
+import sys
 import sqlite3
-import datetime
-from pathlib import Path
+
+# Add the repository root so the shared agent_common package can be imported.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_common.artifact_store import get_store
 
 
 # -----------------------------------------------------------------------------
@@ -26,17 +33,11 @@ def write_database_file(sql_statements: str) -> dict:
         dict: A dictionary containing the status and generated database filename.
     """
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    # Example: "250611_142317"
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-
-    # Construct the output filename using the timestamp.
-    # Example: "output/250611_142317_database.sqlite"
-    filename = f"output/{timestamp}_database.sqlite"
-
-    # Ensure the "output" directory exists. If it doesn't, create it.
-    # `exist_ok=True` prevents an error if the directory already exists.
-    Path("output").mkdir(exist_ok=True)
+    # Build the database under a temporary name inside the artifact store.
+    # It is moved to its content-addressed name once complete, so concurrent
+    # runs never write into the same file.
+    store = get_store("output")
+    filename = store.reserve("database.sqlite")
 
     try:
         # Create a new SQLite database connection.
@@ -56,6 +57,10 @@ def write_database_file(sql_statements: str) -> dict:
         # Close the database connection.
         connection.close()
 
+        # Publish the finished database file.
+        # Example: "output/blobs/3f/3f2c...9e.sqlite"
+        filename = store.commit(filename, "database.sqlite")
+
         # Return success status with the filename.
         return {
             "status": "success",
@@ -64,18 +69,20 @@ def write_database_file(sql_statements: str) -> dict:
         }
 
     except sqlite3.Error as e:
-        # If there's a SQLite error, return the error details.
+        # If there's a SQLite error, drop the partial database and return the error details.
+        store.discard(filename)
         return {
             "status": "error",
-            "file": filename,
+            "file": None,
             "message": f"SQLite Error: {str(e)}"
         }
 
     except Exception as e:
-        # If there's any other error, return the error details.
+        # If there's any other error, drop the partial database and return the error details.
+        store.discard(filename)
         return {
             "status": "error",
-            "file": filename,
+            "file": None,
             "message": f"Error: {str(e)}"
         }
 
@@ -85,7 +92,7 @@ def write_database_file(sql_statements: str) -> dict:
 # -----------------------------------------------------------------------------
 def write_requirements_to_file(content: str) -> dict:
     """
-    Writes database requirements documentation to a timestamped text file.
+    Writes database requirements documentation to a text file in the artifact store.
 
     Args:
         content (str): Database requirements documentation as a string.
@@ -94,19 +101,12 @@ def write_requirements_to_file(content: str) -> dict:
         dict: A dictionary containing the status and generated filename.
     """
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-
-    # Construct the output filename.
-    # Example: "output/250611_142317_requirements.txt"
-    filename = f"output/{timestamp}_requirements.txt"
-
-    # Ensure the "output" directory exists.
-    Path("output").mkdir(exist_ok=True)
+    filename = None
 
     try:
-        # Write the requirements content to the file.
-        Path(filename).write_text(content, encoding="utf-8")
+        # Write the requirements content to the artifact store, named by its hash.
+        # Example: "output/blobs/3f/3f2c...9e.txt"
+        filename = get_store("output").put_text(content, "requirements.txt")
 
         # Return success status with the filename.
         return {
@@ -129,7 +129,7 @@ def write_requirements_to_file(content: str) -> dict:
 # -----------------------------------------------------------------------------
 def write_design_to_file(content: str) -> dict:
     """
-    Writes database design specification to a timestamped text file.
+    Writes database design specification to a text file in the artifact store.
 
     Args:
         content (str): Database design specification as a string.
@@ -138,19 +138,11 @@ def write_design_to_file(content: str) -> dict:
         dict: A dictionary containing the status and generated filename.
     """
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-
-    # Construct the output filename.
-    # Example: "output/250611_142317_design.txt"
-    filename = f"output/{timestamp}_design.txt"
-
-    # Ensure the "output" directory exists.
-    Path("output").mkdir(exist_ok=True)
+    filename = None
 
     try:
-        # Write the design content to the file.
-        Path(filename).write_text(content, encoding="utf-8")
+        # Write the design content to the artifact store, named by its hash.
+        filename = get_store("output").put_text(content, "design.txt")
 
         # Return success status with the filename.
         return {
@@ -3,6 +3,9 @@ import sys
 from google.adk.agents import SequentialAgent, ParallelAgent, LlmAgent
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..","..")))
+from agent_common.artifact_store import track_runs
+from agent_common.tracing import instrument
 from utils.file_loader import load_instructions_file
 from agents.competitor_identifier.agent import competitor_identifier_agent
 from agents.swot_analyzer.agent import swot_analyzer_agent
@@ -63,8 +66,9 @@ parallel_competitor_analysis = ParallelAgent(
     description="Analyzes all 5 competitors in parallel"
 )
 
-# Create the main sequential orchestration
-root_agent = SequentialAgent(
+# Create the main sequential orchestration (traced, see agent_common/tracing.py;
+# reports are indexed by run in the artifact store, see agent_common/artifact_store.py)
+root_agent = instrument(track_runs(SequentialAgent(
     name="root_report_builder_agent",
     sub_agents=[
         competitor_identifier_agent,
@@ -73,4 +77,4 @@ root_agent = SequentialAgent(
         report_generator_agent
     ],
     description=load_instructions_file("agents/root_report_builder/description.txt")
-)
\ No newline at end of file
+)))
\ No newline at end of file
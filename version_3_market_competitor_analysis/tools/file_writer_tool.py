@@ -3,10 +3,17 @@
 # PURPOSE:
 #   This module defines a tool function for writing HTML reports to file.
 #   Used by agents to persist generated competitive analysis reports.
+#   Reports go to the shared content-addressed artifact store
+#   (agent_common/artifact_store.py) under `output/`.
 # =============================================================================
 
-import datetime
-from pathlib import Path
+import os
+import sys
+
+# Add the repository root so the shared agent_common package can be imported.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_common.artifact_store import get_store
 
 
 # -----------------------------------------------------------------------------
@@ -14,7 +21,7 @@ from pathlib import Path
 # -----------------------------------------------------------------------------
 def write_to_file(content: str) -> dict:
     """
-    Writes the given HTML content to a timestamped HTML file.
+    Writes the given HTML content to an HTML file in the artifact store.
 
     Args:
         content (str): Full HTML content as a string to be saved to disk.
@@ -23,17 +30,9 @@ def write_to_file(content: str) -> dict:
         dict: A dictionary containing the status and generated filename.
     """
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-
-    # Construct the output filename using the timestamp.
-    filename = f"output/{timestamp}_competitive_analysis_report.html"
-
-    # Ensure the "output" directory exists.
-    Path("output").mkdir(exist_ok=True)
-
-    # Write the HTML content to the constructed file.
-    Path(filename).write_text(content, encoding="utf-8")
+    # Write the HTML atomically under its content hash; an identical report is stored once.
+    # Example: "output/blobs/3f/3f2c...9e.html"
+    filename = get_store("output").put_text(content, "competitive_analysis_report.html")
 
     # Return a dictionary indicating success, and the filename that was written.
     return {
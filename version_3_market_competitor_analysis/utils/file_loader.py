@@ -1,26 +1,11 @@
 # =============================================================================
 # FILE: file_loader.py
 # PURPOSE:
-#   Utility function to load instruction and description files from disk.
+#   `load_instructions_file` of agent_common/file_loader.py, with relative
+#   paths ("agents/<name>/instructions.txt") resolved against this project's
+#   root instead of the current working directory.
 # =============================================================================
 
-from pathlib import Path
+from agent_common.file_loader import project_loader
 
-
-def load_instructions_file(file_path: str) -> str:
-    """
-    Loads the content of an instructions or description file.
-
-    Args:
-        file_path (str): Relative or absolute path to the file.
-
-    Returns:
-        str: The file content as a string.
-    """
-    try:
-        path = Path(file_path)
-        return path.read_text(encoding="utf-8")
-    except FileNotFoundError:
-        return f"Error: File not found at {file_path}"
-    except Exception as e:
-        return f"Error loading file: {str(e)}"
+load_instructions_file = project_loader(__file__)
@@ -16,6 +16,10 @@ load_dotenv()
 # We are importing the "brain" of our AI agent from our project.
 from agents.website_builder_simple.agent import root_agent
 
+# The agent module puts the repository root on the path, so the shared tracing
+# package can be imported from here as well.
+from agent_common.tracing import get_tracer, load_spans, summarize
+
 # --- C. IMPORTING ADK (AGENT DEVELOPMENT KIT) COMPONENTS ---
 # These are special tools from the ADK to run our agent programmatically.
 from google.adk.runners import Runner
@@ -64,6 +68,7 @@ async def chat_loop():
         # .lower() makes the text lowercase so "Quit" or "QUIT" also work.
         if user_query.lower() in ["quit", "exit", ":q"]:
             print("Ending chat session. Goodbye!")
+            print_trace_summary()  # Show where the time went during this session.
             break  # This command exits the 'while' loop.
 
         # --- Agent Interaction (Inside the Loop) ---
@@ -122,6 +127,27 @@ def print_json_response(response: Any, title: str) -> None:
         rprint(repr(response))
 
 
+# -----------------------------------------------------------------------------
+# Helper: Print per-stage latency (p50/p95/p99) from the trace file
+# -----------------------------------------------------------------------------
+def print_trace_summary() -> None:
+    tracer = get_tracer()
+    if not tracer.enabled:
+        return
+    tracer.close()  # Flush the spans written so far
+    try:
+        rows = summarize(load_spans(tracer.path))
+    except FileNotFoundError:
+        return  # Nothing was traced yet
+
+    print(f"\n=== Latency per stage ({tracer.path}) ===")
+    for row in rows:
+        stage = f"{row['kind']}:{row['name']}"
+        print(f"{stage:<40} n={row['count']:<4} p50={row['p50_ms']:.0f}ms "
+              f"p95={row['p95_ms']:.0f}ms p99={row['p99_ms']:.0f}ms "
+              f"tokens={row['tokens_in']}/{row['tokens_out']}")
+
+
 # --- 3. STARTING THE PROGRAM ---
 # This is the entry point that runs our chat loop.
 if __name__ == '__main__':
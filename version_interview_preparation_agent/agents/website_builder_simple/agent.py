@@ -9,6 +9,8 @@
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+# The repository root holds the shared agent_common package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 
 # Import the base class for a language-model-powered agent from Google ADK.
 from google.adk.agents import LlmAgent
@@ -19,10 +21,18 @@ from tools.file_writer_tool import write_to_file
 # Import a utility function that reads instruction and description files from disk.
 from utils.file_loader import load_instructions_file
 
+# Import the tracing layer that records a span per agent run, model call and tool call.
+from agent_common.tracing import instrument
+
+# Import the run tracking that indexes the generated pages by run in the artifact store.
+from agent_common.artifact_store import track_runs
+
 # -----------------------------------------------------------------------------
 # Define the root LLM agent for this app. It is a single-agent app (no sub-agents).
+# `instrument` attaches the tracing callbacks; spans go to traces/spans.jsonl.
+# `track_runs` records the run id, so saved pages are indexed by run.
 # -----------------------------------------------------------------------------
-root_agent = LlmAgent(
+root_agent = instrument(track_runs(LlmAgent(
     name="website_builder_simple",  # Unique name for the agent; also shown in the UI.
 
     model="gemini-2.0-flash-001",   # The ID of the Gemini model used to generate responses.
@@ -38,4 +48,4 @@ root_agent = LlmAgent(
     # A list of tools the agent can invoke during execution.
     # In this case, just one: a function that writes the generated HTML to a file.
     tools=[write_to_file],
-)
\ No newline at end of file
+)))
\ No newline at end of file
@@ -2,22 +2,27 @@
 # FILE: file_writer_tool.py
 # PURPOSE:
 #   This module defines a single tool function, `write_to_file`, which saves
-#   the provided HTML/CSS/JS content to a timestamped HTML file inside an
-#   output directory. This is used by agents to persist generated webpage content.
+#   the provided HTML/CSS/JS content to an HTML file inside an output
+#   directory. This is used by agents to persist generated webpage content.
+#   Pages go to the shared content-addressed artifact store
+#   (agent_common/artifact_store.py), named by the hash of their content.
 # =============================================================================
 
-# Import the `datetime` module to generate a unique timestamp for the filename.
-import datetime
+# Import `os` and `sys` to put the repository root on the import path.
+import os
+import sys
 
-# Import `Path` from `pathlib` for convenient and safe file/directory handling.
-from pathlib import Path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+# Import the shared artifact store (atomic writes, deduplication, size-bounded GC).
+from agent_common.artifact_store import get_store
 
 # -----------------------------------------------------------------------------
 # TOOL FUNCTION: write_to_file
 # -----------------------------------------------------------------------------
 def write_to_file(content: str) -> dict:
     """
-    Writes the given HTML/CSS/JS content to a timestamped HTML file.
+    Writes the given HTML/CSS/JS content to an HTML file in the artifact store.
 
     Args:
         content (str): Full HTML content as a string to be saved to disk.
@@ -26,21 +31,11 @@ def write_to_file(content: str) -> dict:
         dict: A dictionary containing the status and generated filename.
     """
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    # Example: "250611_142317"
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-
-    # Construct the output filename using the timestamp.
-    # Example: "output/250611_142317_generated_page.html"
-    filename = f"output/{timestamp}_generated_page.html"
-
-    # Ensure the "output" directory exists. If it doesn’t, create it.
-    # `exist_ok=True` prevents an error if the directory already exists.
-    Path("output").mkdir(exist_ok=True)
-
-    # Write the HTML content to the constructed file.
-    # `encoding='utf-8'` ensures proper character encoding.
-    Path(filename).write_text(content, encoding="utf-8")
+    # Write the HTML content to the artifact store.
+    # It is written to a temp file and renamed into place, so concurrent runs
+    # never clobber each other, and the name is the SHA-256 of the content.
+    # Example: "output/blobs/3f/3f2c...9e.html"
+    filename = get_store("output").put_text(content, "generated_page.html")
 
     # Return a dictionary indicating success, and the filename that was written.
     return {